@@ -1,11 +1,10 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager, get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended import JWTManager
 from pymongo import MongoClient
 import os
 from dotenv import load_dotenv
 from datetime import timedelta
-from functools import wraps
 import logging
 
 # Importar todos los blueprints
@@ -20,6 +19,10 @@ from .routes.comunas import comunas_bp  # Nuevo blueprint de comunas
 from .routes.beneficiario import beneficiario_bp  # Importar blueprint singular
 from .routes.poblacion_migrante import poblacion_migrante_bp  # Importar blueprint de población migrante
 from .routes.actividad import actividad_bp  # Importar blueprint de actividades
+from .routes.firmas import firmas_bp  # Almacén de firmas por hash de contenido
+from .routes.exportaciones import exportaciones_bp  # Exportaciones en segundo plano
+from .routes.importaciones import importaciones_bp  # Importaciones masivas desde XLSX/CSV
+from .routes.duplicados import duplicados_bp  # Revisión de posibles duplicados
 
 # Importación opcional de dashboard
 try:
@@ -29,6 +32,7 @@ except ImportError:
 
 # Importar función de inicialización de usuario
 from .routes.auth import init_admin_user
+from .utils.catalogos import cache_catalogos, INTERVALO_VERIFICACION_CATALOGOS
 
 load_dotenv()
 
@@ -124,10 +128,59 @@ def create_app():
     # Crear usuario administrador inicial
     init_admin_user(app.config['MONGO_DB'])
     
+    # Crear índices de las colecciones
+    from .models.beneficiario import BeneficiarioModel
+    from .models.estadisticas import EstadisticasMaterializadasModel, CuboBeneficiariosModel
+    from .models.asistente import AsistenteModel
+    from .models.trabajo_exportacion import TrabajoExportacionModel
+    from .models.trabajo_importacion import TrabajoImportacionModel
+    from .models.duplicados import DuplicadosModel
+    from .models.miniatura_firma import MiniaturaFirmaModel
+    from .utils.busqueda import CAMPO_BUSQUEDA
+    try:
+        BeneficiarioModel(db).crear_indices()
+        CuboBeneficiariosModel(db).crear_indices()
+        db['poblacion_migrante'].create_index(CAMPO_BUSQUEDA)
+        db['poblacion_migrante'].create_index('numero_documento')
+        AsistenteModel(db).crear_indices()
+        TrabajoExportacionModel(db).crear_indices()
+        TrabajoImportacionModel(db).crear_indices()
+        DuplicadosModel(db).crear_indices()
+        MiniaturaFirmaModel(db).crear_indices()
+    except Exception as e:
+        app.logger.error(f"Error al crear índices: {e}")
+
+    # Construir los contadores del dashboard si todavía no existen (las lecturas no los construyen)
+    try:
+        estadisticas = EstadisticasMaterializadasModel(db)
+        if not estadisticas.construido():
+            estadisticas.reconstruir()
+    except Exception as e:
+        app.logger.error(f"Error al construir las estadísticas materializadas: {e}")
+    
     # Configuración de JWT
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'clave-secreta-predeterminada')
     app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(hours=24)  # 24 horas de expiración
     app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=30)  # 30 días para refresh token
+    # Segundos que se reutiliza el estado de un funcionario al comprobar si su token sigue vigente
+    app.config['JWT_REVOCACION_TTL'] = int(os.getenv('JWT_REVOCACION_TTL', 60))
+    
+    # Exportaciones en segundo plano (sin EXPORTACIONES_DIR se usa el directorio temporal)
+    app.config['EXPORTACIONES_DIR'] = os.getenv('EXPORTACIONES_DIR')
+    app.config['EXPORTACIONES_TRABAJADORES'] = int(os.getenv('EXPORTACIONES_TRABAJADORES', 2))
+    app.config['EXPORTACIONES_TTL_HORAS'] = int(os.getenv('EXPORTACIONES_TTL_HORAS', 24))
+
+    # Importaciones masivas (sin IMPORTACIONES_PROCESOS se usa un proceso por CPU)
+    app.config['IMPORTACIONES_DIR'] = os.getenv('IMPORTACIONES_DIR')
+    app.config['IMPORTACIONES_PROCESOS'] = int(os.getenv('IMPORTACIONES_PROCESOS', 0)) or None
+    app.config['IMPORTACIONES_SIMULTANEAS'] = int(os.getenv('IMPORTACIONES_SIMULTANEAS', 1))
+
+    # Caché de miniaturas de firma de las hojas de asistencia
+    app.config['MINIATURAS_FIRMA_MAXIMO'] = int(os.getenv('MINIATURAS_FIRMA_MAXIMO', 20000))
+    app.config['MINIATURAS_FIRMA_HILOS'] = int(os.getenv('MINIATURAS_FIRMA_HILOS', 0)) or min(4, os.cpu_count() or 1)
+
+    # Segundos entre comprobaciones de la versión de los catálogos en memoria (líneas de trabajo y comunas)
+    cache_catalogos.intervalo = int(os.getenv('CATALOGOS_VERIFICACION_SEGUNDOS', INTERVALO_VERIFICACION_CATALOGOS))
     jwt = JWTManager(app)
     
     # Configuración personalizada de JWT
@@ -151,6 +204,17 @@ def create_app():
             'msg': 'Token de autenticación expirado',
             'status': 'error'
         }), 401
+
+    # Revocación: funcionario eliminado o con rol, línea o estado distintos a los del token
+    from .utils.autorizacion import token_revocado
+    jwt.token_in_blocklist_loader(token_revocado)
+
+    @jwt.revoked_token_loader
+    def revoked_token_response(jwt_header, jwt_payload):
+        return jsonify({
+            'msg': 'Token de autenticación revocado, inicie sesión de nuevo',
+            'status': 'error'
+        }), 401
     
     # Importar blueprints
     from .routes.auth import auth_bp
@@ -181,6 +245,10 @@ def create_app():
     app.register_blueprint(comunas_bp, url_prefix='/comunas')
     app.register_blueprint(poblacion_migrante_bp, url_prefix='/poblacion-migrante')
     app.register_blueprint(actividad_bp, url_prefix='/actividades')
+    app.register_blueprint(firmas_bp, url_prefix='/firmas')
+    app.register_blueprint(exportaciones_bp, url_prefix='/exportaciones')
+    app.register_blueprint(importaciones_bp, url_prefix='/importaciones')
+    app.register_blueprint(duplicados_bp, url_prefix='/duplicados')
     
     # Inicializar rutas de asistentes con la base de datos
     init_asistente_routes(app, db)
@@ -192,17 +260,9 @@ def create_app():
     if dashboard_bp:
         app.register_blueprint(dashboard_bp, url_prefix='/dashboard')
     
-    # Decorador personalizado para roles
-    def role_required(allowed_roles):
-        def decorator(fn):
-            @wraps(fn)
-            def wrapper(*args, **kwargs):
-                verify_jwt_in_request()
-                current_user = get_jwt_identity()
-                # Aquí deberías agregar lógica para verificar roles
-                return fn(*args, **kwargs)
-            return wrapper
-        return decorator
+    # Registrar comandos de mantenimiento (flask --app run <comando>)
+    from .commands import registrar_comandos
+    registrar_comandos(app)
 
     # Ruta raíz de prueba
     @app.route('/')
@@ -0,0 +1,117 @@
+import click
+from flask import current_app
+
+from app.models.asistente import AsistenteModel
+from app.models.duplicados import DuplicadosModel
+from app.models.estadisticas import EstadisticasMaterializadasModel, CuboBeneficiariosModel
+from app.models.firma import FirmaModel
+from app.utils.busqueda import CAMPOS_BUSQUEDA, generar_claves_faltantes
+from app.utils.duplicados import UMBRAL_DUPLICADO
+from app.utils.unicidad import nombre_indice_unico
+
+
+def registrar_comandos(app):
+    """
+    Registrar los comandos de mantenimiento en la CLI de Flask
+
+    Uso: flask --app run <comando>
+    """
+
+    @app.cli.command('reconstruir-estadisticas')
+    @click.option('--solo-verificar', is_flag=True,
+                  help='Solo comparar los contadores con los conteos en vivo, sin reconstruir')
+    def reconstruir_estadisticas(solo_verificar):
+        """Recalcular los contadores materializados de beneficiarios."""
+        modelo = EstadisticasMaterializadasModel(current_app.config['MONGO_DB'])
+
+        diferencias = modelo.verificar()
+        if diferencias:
+            click.echo(f"Se encontraron {len(diferencias)} contadores desactualizados:")
+            for ruta, guardado, en_vivo in diferencias:
+                click.echo(f"  {ruta}: materializado={guardado} en_vivo={en_vivo}")
+        else:
+            click.echo("Los contadores materializados coinciden con los conteos en vivo.")
+
+        if solo_verificar:
+            return
+
+        if modelo.reconstruir() is None:
+            raise click.ClickException("No se pudo reconstruir: hubo cambios de beneficiarios durante cada recálculo")
+        diferencias = modelo.verificar()
+        if diferencias:
+            raise click.ClickException(
+                f"Tras reconstruir siguen {len(diferencias)} diferencias (hubo escrituras concurrentes)"
+            )
+        click.echo("Contadores reconstruidos y verificados.")
+
+    @app.cli.command('reconstruir-cubo')
+    def reconstruir_cubo():
+        """Volver a calcular el cubo de beneficiarios del dashboard y sustituir el actual."""
+        incorporados = CuboBeneficiariosModel(current_app.config['MONGO_DB']).reconstruir()
+        if incorporados is None:
+            raise click.ClickException("Hay un refresco del cubo en curso; inténtelo de nuevo más tarde")
+        click.echo(f"Cubo reconstruido con {incorporados} beneficiarios.")
+
+    @app.cli.command('generar-claves-busqueda')
+    @click.option('--lote', default=1000, show_default=True, help='Documentos por escritura masiva')
+    @click.option('--todos', is_flag=True,
+                  help='Recalcular también los documentos que ya tienen términos de búsqueda')
+    def generar_claves_busqueda(lote, todos):
+        """Rellenar los términos de búsqueda normalizados de los registros existentes."""
+        db = current_app.config['MONGO_DB']
+        colecciones = {
+            'beneficiarios': db['beneficiarios'],
+            'poblacion_migrante': db['poblacion_migrante'],
+            # La colección de asistentes puede llamarse 'asistentes' o 'asistentes.asistentes'
+            'asistentes': AsistenteModel(db).collection,
+        }
+        for nombre in CAMPOS_BUSQUEDA:
+            actualizados = generar_claves_faltantes(colecciones[nombre], nombre, tamano_lote=lote, todos=todos)
+            click.echo(f"{nombre}: {actualizados} documentos actualizados.")
+
+    @app.cli.command('eliminar-indices-redundantes')
+    def eliminar_indices_redundantes():
+        """Eliminar el índice simple de número de documento cuando ya existe el índice único."""
+        beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
+        indices = beneficiarios.index_information()
+        if nombre_indice_unico('numero_documento') not in indices:
+            raise click.ClickException(
+                "El índice único de número de documento no existe; resuelva antes los documentos repetidos"
+            )
+        if 'numero_documento_1' not in indices:
+            click.echo("No hay índices redundantes.")
+            return
+        beneficiarios.drop_index('numero_documento_1')
+        click.echo("Índice numero_documento_1 eliminado (lo cubre el índice único).")
+
+    @app.cli.command('migrar-firmas')
+    @click.option('--lote', default=200, show_default=True, help='Documentos por escritura masiva')
+    def migrar_firmas(lote):
+        """Mover las firmas en línea (base64) al almacén de firmas por hash de contenido."""
+        db = current_app.config['MONGO_DB']
+        firmas = FirmaModel(db)
+
+        migrados = firmas.migrar_coleccion(db['beneficiarios'], tamano_lote=lote)
+        click.echo(f"beneficiarios: {migrados} firmas migradas.")
+
+        migrados = firmas.migrar_coleccion(AsistenteModel(db).collection, tamano_lote=lote)
+        click.echo(f"asistentes: {migrados} firmas migradas.")
+
+        migrados = firmas.migrar_actividades(db['actividades'], tamano_lote=max(1, lote // 4))
+        click.echo(f"actividades: {migrados} firmas de asistentes migradas.")
+        click.echo(f"Firmas distintas en el almacén: {firmas.collection.count_documents({})}")
+
+    @app.cli.command('detectar-duplicados')
+    @click.option('--lote', default=1000, show_default=True, help='Registros procesados juntos')
+    @click.option('--umbral', default=UMBRAL_DUPLICADO, show_default=True, help='Puntaje mínimo (0 a 1) de un par')
+    @click.option('--desde-cero', is_flag=True,
+                  help='Vaciar el índice y revisar todos los registros (las revisiones hechas se conservan)')
+    def detectar_duplicados(lote, umbral, desde_cero):
+        """Buscar posibles duplicados entre los registros nuevos de beneficiarios y población migrante."""
+        modelo = DuplicadosModel(current_app.config['MONGO_DB'])
+        if desde_cero:
+            modelo.reiniciar()
+        resumen = modelo.detectar(tamano_lote=lote, umbral=umbral)
+        click.echo(f"Registros nuevos revisados: {resumen['registros']}")
+        click.echo(f"Pares comparados: {resumen['comparaciones']}")
+        click.echo(f"Posibles duplicados encontrados: {resumen['candidatos']}")
@@ -1,23 +1,34 @@
 # backend/app/controllers/actividad_controller.py
-from flask import request, current_app, jsonify, send_file, g
+from flask import request, current_app, jsonify, g
 from bson import ObjectId
 from werkzeug.utils import secure_filename
 from datetime import datetime, timezone
 import os
 import logging
 import traceback
-import tempfile  # Para manejo de archivos temporales
-import requests  # Para descargar imágenes de códigos QR existentes
 import time     # Para manejo de timestamps
-from io import BytesIO  # Para manejar datos binarios en memoria
 from bson.errors import InvalidId
 from app.models.actividad import ActividadModel, actividad_schema, ActividadSchema
-from PIL import Image
-import base64
+from app.models.firma import CAMPO_FIRMA_REF, exponer_firma
+from app.models.miniatura_firma import MiniaturaFirmaModel
+from app.utils.trabajos import ejecutor_en_segundo_plano
+from app.utils.hoja_asistencia import PLANTILLA_ACTIVIDAD, PLANTILLA_REUNION, HojaAsistencia, AnchoColumnas
+from app.utils.exportacion import respuesta_archivo_en_flujo
 
 # Configurar el logger
 logger = logging.getLogger(__name__)
 
+# Campos del asistente referenciado que usa la exportación de reuniones
+CAMPOS_ASISTENTE_REUNION = [
+    'nombre', 'nombre_completo', 'cedula', 'dependencia', 'cargo', 'tipo_participacion',
+    'telefono', 'email', 'firma', CAMPO_FIRMA_REF
+]
+
+def ejecutor_miniaturas():
+    """Grupo de hilos del proceso que genera las miniaturas de firma que faltan en la caché"""
+    app = current_app._get_current_object()
+    return ejecutor_en_segundo_plano(app, 'miniaturas_firma', app.config.get('MINIATURAS_FIRMA_HILOS'))
+
 def configurar_subida_logo():
     upload_folder = os.path.join(current_app.root_path, '..', '..', 'uploads', 'logos')
     os.makedirs(upload_folder, exist_ok=True)
@@ -265,16 +276,26 @@ def obtener_actividad(actividad_id):
         # Obtener información detallada de los beneficiarios si hay asistentes
         if 'asistentes' in actividad and actividad['asistentes']:
             logger.info(f"Obteniendo información de {len(actividad['asistentes'])} asistentes")
-            aistente_model = BeneficiarioModel()
+            
+            # Todos los beneficiarios referenciados en una sola consulta
+            beneficiarios = {}
+            try:
+                beneficiarios = BeneficiarioModel().obtener_beneficiarios_por_ids(
+                    [asistente.get('beneficiario_id') for asistente in actividad['asistentes']],
+                    campos=['nombre_completo', 'tipo_documento', 'numero_documento']
+                )
+            except Exception as e:
+                logger.error(f"Error al obtener información de los beneficiarios: {str(e)}")
             
             for asistente in actividad['asistentes']:
+                exponer_firma(asistente)
                 try:
                     beneficiario_id = asistente.get('beneficiario_id')
                     if not beneficiario_id:
                         logger.warning("Asistente sin beneficiario_id")
                         continue
                         
-                    beneficiario = aistente_model.obtener_beneficiario_por_id(beneficiario_id)
+                    beneficiario = beneficiarios.get(str(beneficiario_id))
                     if beneficiario:
                         # Agregar información del beneficiario al asistente
                         asistente['beneficiario'] = {
@@ -552,28 +573,13 @@ def exportar_actividad(actividad_id, columnas=None):
     try:
         from app.models.actividad import ActividadModel
         from app.models.beneficiario import BeneficiarioModel
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
         from openpyxl.drawing.image import Image as OpenpyxlImage
-        from openpyxl.drawing.image import Image as XLImage
         from openpyxl.utils import get_column_letter
-        import tempfile
-        import os
-        import requests
         from io import BytesIO
-        from bson import ObjectId
-        from datetime import datetime
-        from PIL import Image as PILImage
-        from PIL import ImageDraw, ImageFont
         
         logger.info(f"Iniciando exportación de actividad a Excel: {actividad_id}")
         logger.info(f"Columnas seleccionadas: {columnas}")
         
-        # Crear un libro de Excel
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Asistencia"
-        
         # Obtener la actividad de la base de datos
         actividad_model = ActividadModel()
         actividad = actividad_model.obtener_actividad_por_id(actividad_id)
@@ -587,12 +593,16 @@ def exportar_actividad(actividad_id, columnas=None):
         
         # Obtener los datos completos de los beneficiarios
         if 'asistentes' in actividad and actividad['asistentes']:
-            beneficiario_model = BeneficiarioModel()
+            # Todos los beneficiarios referenciados en una sola consulta
+            beneficiarios = BeneficiarioModel().obtener_beneficiarios_por_ids(
+                [asistente.get('beneficiario_id') for asistente in actividad['asistentes']],
+                incluir=('firma',)
+            )
+            logger.info(f"Beneficiarios encontrados: {len(beneficiarios)}")
             for asistente in actividad['asistentes']:
                 if 'beneficiario_id' in asistente and asistente['beneficiario_id']:
                     try:
-                        logger.info(f"Buscando beneficiario con ID: {asistente['beneficiario_id']}")
-                        beneficiario = beneficiario_model.obtener_beneficiario_por_id(asistente['beneficiario_id'])
+                        beneficiario = beneficiarios.get(str(asistente['beneficiario_id']))
                         if beneficiario:
                             asistente['beneficiario'] = beneficiario
                         else:
@@ -610,251 +620,6 @@ def exportar_actividad(actividad_id, columnas=None):
             
         logger.info(f"Actividad encontrada: {actividad.get('tema', 'Sin nombre')}")
         
-        # Estilos
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-        title_font = Font(bold=True, size=14)
-        subtitle_font = Font(bold=True)
-        thin_border = Border(left=Side(style='thin'), 
-                            right=Side(style='thin'), 
-                            top=Side(style='thin'), 
-                            bottom=Side(style='thin'))
-        
-        # Color de fondo para celdas de información (blanco)
-        info_fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-        
-        # Color de fondo para celdas de etiquetas (gris claro)
-        label_fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-        
-        # Agregar encabezado con logo e información de la actividad
-        try:
-            # Ruta al logo (usando ruta absoluta)
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-            logo_path = os.path.join(base_dir, 'frontend', 'src', 'fondo', 'logo.png')
-            logger.info(f"Ruta completa del logo: {logo_path}")
-            logger.info(f"El archivo existe: {os.path.exists(logo_path)}")
-            
-            # Configuración de estilos
-            font_size = 10
-            font_name = 'Arial'
-            
-            # Configurar dimensiones de celdas
-            ws.column_dimensions['A'].width = 15  # Columna A para el logo
-            ws.column_dimensions['B'].width = 13  # Columna B para etiquetas
-            ws.column_dimensions['C'].width = 20  # Columna C para valores
-            ws.column_dimensions['D'].width = 15  # Columna D
-            ws.column_dimensions['E'].width = 13  # Columna E
-            ws.column_dimensions['F'].width = 15  # Columna F
-            ws.column_dimensions['G'].width = 15  # Columna G
-            ws.column_dimensions['H'].width = 13  # Columna H
-            ws.column_dimensions['I'].width = 15  # Columna I
-            ws.column_dimensions['J'].width = 15  # Columna J
-            ws.column_dimensions['K'].width = 20  # Columna K
-            
-            # Altura de filas (se deja la altura por defecto)
-            # No establecemos altura fija para que use la altura por defecto
-            
-            # Agregar logo (ocupa A1:C4)
-            logo_size = 300  # Tamaño del logo más grande
-            
-            if os.path.exists(logo_path):
-                try:
-                    img = XLImage(logo_path)
-                    # Ajustar tamaño manteniendo la relación de aspecto
-                    img_ratio = img.height / img.width
-                    # Redimensionar manteniendo la relación de aspecto
-                    img.width = logo_size
-                    img.height = int(logo_size * img_ratio)
-                    
-                    # No ajustamos la altura de las filas, se mantiene la altura por defecto
-                    
-                    # Agregar el logo
-                    ws.add_image(img, 'A1')
-                    logger.info("Logo agregado exitosamente")
-                    
-                    # Fusionar celdas para el logo (4 filas de alto x 3 columnas de ancho)
-                    ws.merge_cells('A1:C4')
-                    
-                except Exception as e:
-                    logger.error(f"Error al cargar la imagen: {str(e)}")
-            else:
-                logger.warning(f"No se encontró el archivo de logo en: {logo_path}")
-            
-            # Título principal (D1:K1)
-            ws.merge_cells('D1:K1')
-            title_cell = ws['D1']
-            title_cell.value = 'FORMATO REGISTRO DE ASISTENCIA'
-            title_cell.font = Font(bold=True, size=14, name='Arial')
-            title_cell.fill = info_fill
-            # title_cell.border = thin_border
-            for row in ws['D1:K1']:
-                for cell in row:
-                    cell.border = Border(
-                        left=Side(style='thin', color='000000'),
-                        right=Side(style='thin', color='000000'),
-                        top=Side(style='thin', color='000000'),
-                        bottom=Side(style='thin', color='000000')
-                    )
-            title_cell.alignment = Alignment(horizontal='left', vertical='center')
-            
-            # Subtítulo (D2:K2)
-            ws.merge_cells('D2:K2')
-            subtitle_cell = ws['D2']
-            subtitle_cell.value = 'ALCALDÍA MUNICIPAL DE QUIBDÓ'
-            subtitle_cell.font = Font(bold=True, size=12, name='Arial')
-            subtitle_cell.fill = info_fill
-            for row in ws['D2:K2']:
-                for cell in row:
-                    cell.border = Border(
-                        left=Side(style='thin', color='000000'),
-                        right=Side(style='thin', color='000000'),
-                        top=Side(style='thin', color='000000'),
-                        bottom=Side(style='thin', color='000000')
-                    )
-            subtitle_cell.alignment = Alignment(horizontal='left', vertical='center')
-                        
-
-            # Fila 4: Dependencia
-            ws['D3'].value = 'DEPENDENCIA:'
-            ws['D3'].font = Font(bold=True, name='Arial', size=10)
-            ws['D3'].fill = label_fill
-            ws['D3'].border = thin_border
-            ws.merge_cells('D3:E3')  # Fusionar D4:E4
-
-            ws['F3'].value = actividad.get('dependencia', '').upper()
-            ws['F3'].font = Font(name='Arial', size=10)
-            ws['F3'].fill = info_fill
-            ws['F3'].border = thin_border
-            ws.merge_cells('F3:K3')  # Fusionar F4:I4
-
-               # Fila 4: Dependencia
-      
-            # Combinar celdas sin texto
-            ws.merge_cells('D4:K4')  # Fusionar D4:K4
-            ws['D4'].fill = label_fill
-            ws['D4'].border = thin_border
-
-            # Fila 5: Tema
-            ws['A5'].value = 'TEMA:'
-            ws['A5'].font = Font(bold=True, name='Arial', size=10)
-            ws['A5'].fill = label_fill
-            ws['A5'].border = thin_border
-            ws.merge_cells('A5:B5') 
-
-            ws['C5'].value = actividad.get('tema', '').upper()
-            ws['C5'].font = Font(name='Arial', size=10)
-            ws['C5'].fill = info_fill
-            ws['C5'].border = thin_border
-            ws.merge_cells('C5:f5')  # Fusionar C5:F5
-
-            # Fila 6: Fecha
-            ws['A6'].value = 'FECHA:'
-            ws['A6'].font = Font(bold=True, name='Arial', size=10)
-            ws['A6'].fill = label_fill
-            ws['A6'].border = thin_border
-            ws.merge_cells('A6:B6')
-
-          
-
-            if 'fecha' in actividad:
-                fecha_obj = datetime.strptime(actividad['fecha'], '%Y-%m-%dT%H:%M:%S')  # Si viene como string
-                # O si ya es un objeto datetime: fecha_obj = reunion['fecha']
-                fecha_formateada = fecha_obj.strftime('%d/%m/%Y')  # Formato DD/MM/YYYY
-                ws['C6'].value = f"FECHA: {fecha_formateada}"
-                ws['C6'].font = Font(name='Arial', size=10)
-                ws['C6'].fill = info_fill
-                ws['C6'].border = thin_border
-            ws.merge_cells('C6') 
-
-            # Fila 6: Lugar
-            ws['D6'].value = 'LUGAR:'
-            ws['D6'].font = Font(bold=True, name='Arial', size=10)
-            ws['D6'].fill = label_fill
-            ws['D6'].border = thin_border
-            ws.merge_cells('D6') 
-
-            ws['E6'].value = actividad.get('lugar', '').upper()
-            ws['E6'].font = Font(name='Arial', size=10)
-            ws['E6'].fill = info_fill
-            ws['E6'].border = thin_border
-            ws.merge_cells('E6:F6')  # Fusionar E6:F6
-
-            # Fila 7: Hora de inicio
-            ws['A7'].value = 'HORA INICIO:'
-            ws['A7'].font = Font(bold=True, name='Arial', size=10)
-            ws['A7'].fill = label_fill
-            ws['A7'].border = thin_border
-            ws.merge_cells('A7:B7') 
-
-            ws['C7'].value = actividad.get('hora_inicio', '')
-            ws['C7'].font = Font(name='Arial', size=10)
-            ws['C7'].fill = info_fill
-            ws['C7'].border = thin_border
-            ws.merge_cells('C7')  
-
-            # Fila 7: Hora de finalización
-            ws['D7'].value = 'HORA FINALIZACIÓN:'
-            ws['D7'].font = Font(bold=True, name='Arial', size=10)
-            ws['D7'].fill = label_fill
-            ws['D7'].border = thin_border
-            ws.merge_cells('D7')  
-
-            ws['E7'].value = actividad.get('hora_fin', '')
-            ws['E7'].font = Font(name='Arial', size=10)
-            ws['E7'].fill = info_fill
-            ws['E7'].border = thin_border
-            ws.merge_cells('E7:F7')  # Fusionar E7:F7
-
-            # Ajustar inicio de la tabla de asistentes
-            start_row = 10  # Dejar un espacio después de la información
-            
-            # Fila 5: Objetivo
-            # Establecer etiqueta
-            ws.merge_cells('G5:H7')
-            ws['G5'].value = 'OBJETIVO:'
-            ws['G5'].font = Font(bold=True, size=10, name='Arial')
-            ws['G5'].fill = label_fill  # Color de fondo para la etiqueta
-            # Aplicar borde completo a la celda de etiqueta
-            for row in ws['G5:H7']:
-                for cell in row:
-                    cell.border = Border(
-                        left=Side(style='thin', color='000000'),
-                        right=Side(style='thin', color='000000'),
-                        top=Side(style='thin', color='000000'),
-                        bottom=Side(style='thin', color='000000')
-                    )
-            ws['G5'].alignment = Alignment(horizontal='center', vertical='center')
-            
-            # Establecer valor del objetivo
-            ws['I5'].value = actividad.get('objetivo', '').upper()
-            ws['I5'].font = Font(name='Arial', size=10)
-            ws['I5'].fill = info_fill
-            # Aplicar borde completo a la celda de valor
-            for row in ws['I5:K7']:
-                for cell in row:
-                    cell.border = Border(
-                        left=Side(style='thin', color='000000'),
-                        right=Side(style='thin', color='000000'),
-                        top=Side(style='thin', color='000000'),
-                        bottom=Side(style='thin', color='000000')
-                    )
-            ws['I5'].alignment = Alignment(wrap_text=True, vertical='top')
-            
-            # Fusionar celdas después de establecer valores
-            ws.merge_cells('I5:K7')  # Objetivo ocupa 3 filas y 4 columnas (excluyendo la columna G con la etiqueta)
-            
-            # Ajustar altura de filas para el objetivo (usar auto_size para que se ajuste al contenido)
-            ws.row_dimensions[5].auto_size = True
-            ws.row_dimensions[6].auto_size = True
-            ws.row_dimensions[7].auto_size = True
-            
-            # Fila inicial para la tabla de asistentes
-            start_row = 8
-            
-        except Exception as e:
-            logger.error(f"Error al generar el encabezado: {str(e)}")
-            start_row = 1  # Si hay error, comenzar desde la primera fila
-        
         # Definir todas las columnas posibles con sus etiquetas
         columnas_disponibles = [
             {'campo': 'numero', 'etiqueta': 'N°', 'visible_por_defecto': True},
@@ -905,18 +670,11 @@ def exportar_actividad(actividad_id, columnas=None):
             if col['campo'] in columnas_seleccionadas:
                 headers.append(col['etiqueta'])
         
-        # Agregar encabezados de la tabla
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-            ws.row_dimensions[start_row].height = 60  # Ajusta este valor según necesites
+        # Firmas de cada fila ya preparadas como imagen (se anclan al escribir la fila)
+        imagenes_firma = {}
 
         # Mapeo de campos a sus valores correspondientes
         def obtener_valor_campo(asistente, campo, indice, row_num=None):
-            import time
             beneficiario = asistente.get('beneficiario', {})
             
             # Obtener fecha de registro del asistente o del beneficiario
@@ -966,70 +724,20 @@ def exportar_actividad(actividad_id, columnas=None):
                     # Intentar eliminar solo la parte de la zona horaria si existe
                     fecha_registro = str(fecha_registro).split('+')[0].split('.')[0].strip()
             
-            # Inicializar variable de firma
-            firma_data = ''
-            logger.info(f"Buscando firma para beneficiario: {beneficiario.get('nombre_completo', 'Sin nombre')}")
-            logger.info(f"Campos del beneficiario: {list(beneficiario.keys())}")
-            
             try:
-                # Buscar firma digital
-                if 'firma' in beneficiario and beneficiario['firma']:
-                    logger.info("Firma digital encontrada en beneficiario")
-                    firma_data = beneficiario['firma']
-                    logger.info("Firma digital obtenida del beneficiario")
-                
-                # Buscar en el nivel superior del beneficiario
-                if 'registro' in beneficiario and isinstance(beneficiario['registro'], dict):
-                    if 'firma' in beneficiario['registro'] and beneficiario['registro']['firma']:
-                        firma_data = beneficiario['registro']['firma']
-                        logger.info("Firma digital encontrada en registro del beneficiario")
+                # Miniatura de la firma ya preparada para esta fila (ver miniaturas_firma)
+                firma_data = miniaturas_firma[indice] if campo == 'firma' else None
                 
-                logger.info(f"Firma digital obtenida para {beneficiario.get('nombre_completo', 'Sin nombre')}")
-                
-                # Procesar la firma digital si existe
-                if firma_data and campo == 'firma' and row_num is not None:
+                # Preparar la firma digital si existe
+                if firma_data and campo == 'firma':
                     try:
-                        # Procesar la firma en formato base64
-                        if 'base64,' in firma_data:
-                            firma_data = firma_data.split('base64,')[1]
-                        
-                        # Decodificar la imagen
-                        image_data = base64.b64decode(firma_data)
-                        img = Image.open(BytesIO(image_data))
-                        
-                        # Redimensionar la imagen
-                        max_size = (150, 50)
-                        img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                        
-                        # Guardar en buffer
-                        img_byte_arr = BytesIO()
-                        img.save(img_byte_arr, format='PNG')
-                        img_byte_arr.seek(0)
-                        
                         # Crear objeto de imagen para Excel
-                        img_obj = OpenpyxlImage(img_byte_arr)
-                        
-                        # Calcular posición de la celda
-                        col_idx = columnas_seleccionadas.index('firma') + 1
-                        col_letter = get_column_letter(col_idx)
-                        
-                        # Insertar imagen en la celda
-                        cell_reference = f"{col_letter}{row_num}"
-                        ws.add_image(img_obj, cell_reference)
-                        
-                        # Ajustar altura de la fila para la imagen
-                        ws.row_dimensions[row_num].height = 32
-                        
-                        # Ajustar ancho de la columna
-                        ws.column_dimensions[col_letter].width = 20
-                        
-                        logger.info(f"Firma insertada en celda {cell_reference}")
-                        
+                        imagenes_firma[indice] = OpenpyxlImage(BytesIO(firma_data))
                     except Exception as e:
                         logger.error(f"Error al procesar la firma: {str(e)}", exc_info=True)
                         return "Error en firma"
                     
-                    # Devolver cadena vacía ya que la imagen se insertó directamente
+                    # Devolver cadena vacía ya que la imagen se ancla en la celda
                     return ""
                 
                 # Si es el campo firma pero no hay datos
@@ -1098,75 +806,98 @@ def exportar_actividad(actividad_id, columnas=None):
             
             return field_mapping.get(campo, '')
         
-        # Llenar datos - Comenzar después del encabezado
-        start_row_table = start_row + 1  # Fila después del encabezado de la tabla
+        # Miniaturas de las firmas de todas las filas: las ya generadas en otras
+        # exportaciones salen de la caché y el resto se genera en paralelo.
+        # La firma del registro del beneficiario tiene prioridad sobre la suya.
+        miniaturas_firma = []
+        if 'firma' in columnas_seleccionadas:
+            fuentes_firma = []
+            for asistente in actividad.get('asistentes', []):
+                beneficiario = asistente.get('beneficiario', {})
+                registro = beneficiario.get('registro')
+                if isinstance(registro, dict) and (registro.get(CAMPO_FIRMA_REF) or registro.get('firma')):
+                    fuentes_firma.append(registro)
+                else:
+                    fuentes_firma.append(beneficiario)
+            miniaturas_firma = MiniaturaFirmaModel(current_app.config['db']).miniaturas(
+                fuentes_firma, ejecutor=ejecutor_miniaturas()
+            )
         
+        # Valores de todas las filas: la hoja se escribe en flujo y los anchos
+        # de columna deben conocerse antes de la primera fila
+        filas_datos = []
         for i, asistente in enumerate(actividad.get('asistentes', [])):
             try:
                 # Obtener valores para cada columna seleccionada
                 row_data = []
-                # El número de fila es start_row_table (fila inicial de datos) + i (índice del asistente)
-                # start_row ya incluye el encabezado, por eso no sumamos 1 adicional
-                row_num = start_row_table + i
-                logger.info(f"Procesando fila {row_num} para asistente {i}")
-                
                 for col in columnas_disponibles:
                     if col['campo'] in columnas_seleccionadas:
-                        valor = obtener_valor_campo(asistente, col['campo'], i, row_num)
+                        valor = obtener_valor_campo(asistente, col['campo'], i)
                         row_data.append(valor)
-                
-                # Agregar fila a la hoja
-                for col_num, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=start_row_table + i, column=col_num, value=value)
-                    cell.border = thin_border
-                    cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
+                filas_datos.append((i, row_data))
                 
             except Exception as e:
                 logger.error(f"Error al procesar asistente {i}: {str(e)}", exc_info=True)
                 continue
         
+        # Hoja de asistencia en flujo (encabezado con la plantilla precompilada)
+        hoja = HojaAsistencia("Asistencia", PLANTILLA_ACTIVIDAD)
+        
+        # Ancho fijo de la columna de firmas si alguna fila tiene imagen
+        if imagenes_firma:
+            hoja.anchos[get_column_letter(columnas_seleccionadas.index('firma') + 1)] = 20
+        
         # Ajustar ancho de columnas (solo para las columnas de datos, no las del encabezado)
         for col_num in range(1, len(columnas_seleccionadas) + 1):
             column_letter = get_column_letter(col_num)
             
             # Establecer ancho fijo para la columna del nombre completo
             if columnas_seleccionadas[col_num-1] == 'nombre':
-                ws.column_dimensions[column_letter].width = 30  # Ancho fijo para la columna de nombre
+                hoja.anchos[column_letter] = 30  # Ancho fijo para la columna de nombre
                 continue
                 
             # Solo ajustar columnas que no están en el encabezado combinado
             if column_letter in ['C', 'D', 'E']:  # Columnas del título combinado
-                ws.column_dimensions[column_letter].width = 20  # Ancho fijo
+                hoja.anchos[column_letter] = 20  # Ancho fijo
                 continue
                 
             # Para otras columnas, ajustar automáticamente el ancho
-            max_length = 0
-            for row in range(start_row_table, start_row_table + len(actividad.get('asistentes', []))):
-                try:
-                    cell_value = ws.cell(row=row, column=col_num).value
-                    if cell_value and len(str(cell_value)) > max_length:
-                        max_length = len(str(cell_value))
-                except:
-                    pass
-            
+            max_length = max((len(str(row_data[col_num - 1])) for _, row_data in filas_datos
+                              if row_data[col_num - 1]), default=0)
             if max_length > 0:
                 adjusted_width = (max_length + 2) * 1.2
-                ws.column_dimensions[column_letter].width = min(adjusted_width, 50)  # Máximo 50 caracteres
-        
-        # Crear un archivo temporal
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            excel_path = tmp_file.name
-        
-        # Guardar el libro de Excel
-        wb.save(excel_path)
-        logger.info(f"Archivo Excel generado: {excel_path}")
-        
-        # Enviar el archivo como respuesta
-        return send_file(
-            excel_path,  # Usar excel_path en lugar de temp_filename
-            as_attachment=True,
-            download_name=f"asistencia_{actividad.get('tema', 'actividad')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                hoja.anchos[column_letter] = min(adjusted_width, 50)  # Máximo 50 caracteres
+        
+        try:
+            # Agregar encabezado con logo e información de la actividad
+            try:
+                hoja.encabezado(actividad)
+            except Exception as e:
+                logger.error(f"Error al generar el encabezado: {str(e)}")
+            
+            # Agregar encabezados de la tabla
+            hoja.encabezados_tabla(headers, alto=60)
+            
+            # Llenar datos - Comenzar después del encabezado
+            if imagenes_firma:
+                letra_firma = get_column_letter(columnas_seleccionadas.index('firma') + 1)
+            for i, row_data in filas_datos:
+                imagen = imagenes_firma.get(i)
+                # Altura de la fila ajustada a la imagen de la firma
+                row_num = hoja.agregar_fila(row_data, alto=32 if imagen else None)
+                if imagen:
+                    hoja.agregar_imagen(imagen, f"{letra_firma}{row_num}")
+            
+            archivo = hoja.guardar()
+        except Exception:
+            hoja.descartar()
+            raise
+        logger.info(f"Archivo Excel generado: {hoja.fila} filas")
+        
+        # Enviar el archivo por bloques; el temporal se borra al cerrar la respuesta
+        return respuesta_archivo_en_flujo(
+            archivo,
+            f"asistencia_{actividad.get('tema', 'actividad')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
         )
         
     except Exception as e:
@@ -1255,21 +986,9 @@ def exportar_reunion(reunion_id, columnas=None):
     try:
         from app.models.actividad import ActividadModel
         from app.models.asistente import AsistenteModel
-        from openpyxl import Workbook
-        from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-        from openpyxl.drawing.image import Image as XLImage
-        from openpyxl.utils import get_column_letter
-        from flask import jsonify, send_file, current_app
-        import tempfile
-        import os
+        from flask import jsonify, current_app
         import logging
-        from bson import ObjectId
-        from datetime import datetime
-        import traceback
-        import json
-        import base64
         from io import BytesIO
-        from PIL import Image
         from openpyxl.drawing.image import Image as OpenpyxlImage
                 # Configurar logger
         logger = logging.getLogger(__name__)
@@ -1302,9 +1021,14 @@ def exportar_reunion(reunion_id, columnas=None):
         asistente_model = AsistenteModel(current_app.config['db'])
         asistentes_completos = []
         
+        # Todos los registros referenciados en una sola consulta
+        referenciados = asistente_model.obtener_varios_por_id(
+            [asistente_ref.get('beneficiario_id') for asistente_ref in asistentes_reunion],
+            campos=CAMPOS_ASISTENTE_REUNION
+        )
+        
         for i, asistente_ref in enumerate(asistentes_reunion, 1):
             try:
-                logger.info(f"Procesando asistente_ref: {json.dumps(asistente_ref, default=str)}")
                 # Obtener los datos del asistente
                 asistente = {
                     'numero': i,
@@ -1315,17 +1039,16 @@ def exportar_reunion(reunion_id, columnas=None):
                     'tipo_participacion': asistente_ref.get('tipo_participacion', ''),
                     'telefono': asistente_ref.get('telefono', ''),
                     'email': asistente_ref.get('email', ''),
-                    'firma': asistente_ref.get('firma', '')  # Guardamos la firma real
+                    'firma': asistente_ref.get('firma', ''),  # Guardamos la firma real
+                    CAMPO_FIRMA_REF: asistente_ref.get(CAMPO_FIRMA_REF)
                 }
-                logger.info(f"Antes de beneficiario - asistente: {json.dumps(asistente, default=str)}")
 
                 # Si hay un beneficiario_id, obtener sus datos adicionales
                 
                 # Busca esta sección en tu código (alrededor de la línea 1400)
                 if 'beneficiario_id' in asistente_ref and asistente_ref['beneficiario_id']:
                     try:
-                        beneficiario = asistente_model.obtener_por_id(asistente_ref['beneficiario_id'])
-                        logger.info(f"Beneficiario encontrado: {json.dumps(beneficiario, default=str) if beneficiario else 'No encontrado'}")
+                        beneficiario = referenciados.get(str(asistente_ref['beneficiario_id']))
                         
                         if beneficiario:
                             # Actualizar con datos del beneficiario
@@ -1339,392 +1062,91 @@ def exportar_reunion(reunion_id, columnas=None):
                                 'email': beneficiario.get('email', asistente['email']),
                                 'firma': beneficiario.get('firma', asistente['firma'])
                             })
-                            logger.info(f"Después de actualizar con beneficiario: {json.dumps(asistente, default=str)}")
+                            if 'firma' in beneficiario or CAMPO_FIRMA_REF in beneficiario:
+                                asistente[CAMPO_FIRMA_REF] = beneficiario.get(CAMPO_FIRMA_REF)
                     except Exception as e:
                         logger.error(f"Error al obtener datos del beneficiario {asistente_ref['beneficiario_id']}: {str(e)}", exc_info=True)
-                logger.info(f"Asistente final a agregar: {json.dumps(asistente, default=str)}")
                 asistentes_completos.append(asistente)
             except Exception as e:
                 logger.error(f"Error al procesar asistente: {str(e)}")
                 continue
         
-        # Crear el libro de Excel
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Asistencia Reunión"
-        
-        # Estilos
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
-        title_font = Font(bold=True, size=14)
-        subtitle_font = Font(bold=True)
-        thin_border = Border(left=Side(style='thin'), 
-                            right=Side(style='thin'), 
-                            top=Side(style='thin'), 
-                            bottom=Side(style='thin'))
-        
-        # Color de fondo para celdas de información (blanco)
-        info_fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
-        
-        # Color de fondo para celdas de etiquetas (gris claro)
-        label_fill = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
+        # Hoja de asistencia en flujo (encabezado con la plantilla precompilada)
+        hoja = HojaAsistencia("Asistencia Reunión", PLANTILLA_REUNION)
         
-        # Agregar encabezado con logo e información de la actividad
         try:
-            # Ruta al logo (usando ruta absoluta)
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-            logo_path = os.path.join(base_dir, 'frontend', 'src', 'fondo', 'logo.png')
-                       
-            # Configuración de estilos
-            font_size = 10
-            font_name = 'Arial'
-            
-            # Configurar dimensiones de celdas
-            ws.column_dimensions['A'].width = 15  # Columna A para el logo
-            ws.column_dimensions['B'].width = 15  # Columna B para etiquetas
-            ws.column_dimensions['C'].width = 20  # Columna C para valores
-            ws.column_dimensions['D'].width = 15  # Columna D
-            ws.column_dimensions['E'].width = 15  # Columna E
-            ws.column_dimensions['F'].width = 20  # Columna F
-            ws.column_dimensions['G'].width = 15  # Columna G
-            ws.column_dimensions['H'].width = 15  # Columna H
-            ws.column_dimensions['I'].width = 15  # Columna I
-            ws.column_dimensions['J'].width = 15  # Columna J
-            ws.column_dimensions['K'].width = 20  # Columna K
-            
-            # Altura de filas (se deja la altura por defecto)
-            # No establecemos altura fija para que use la altura por defecto
-            
-            # Agregar logo (ocupa A1:C4)
-            logo_size = 300  # Tamaño del logo más grande
-            
-            if os.path.exists(logo_path):
-                try:
-                    img = XLImage(logo_path)
-                    # Ajustar tamaño manteniendo la relación de aspecto
-                    img_ratio = img.height / img.width
-                    # Redimensionar manteniendo la relación de aspecto
-                    img.width = logo_size
-                    img.height = int(logo_size * img_ratio)
-                    
-                    # No ajustamos la altura de las filas, se mantiene la altura por defecto
-                    
-                    # Agregar el logo
-                    ws.add_image(img, 'A1')
-                    logger.info("Logo agregado exitosamente")
-                    
-                    # Fusionar celdas para el logo (4 filas de alto x 3 columnas de ancho)
-                    ws.merge_cells('A1:C4')
-                    
-                except Exception as e:
-                    logger.error(f"Error al cargar la imagen: {str(e)}")
-            else:
-                logger.warning(f"No se encontró el archivo de logo en: {logo_path}")
-            
-            # Título principal (D1:K1)
-            ws.merge_cells('D1:I1')
-            title_cell = ws['D1']
-            title_cell.value = 'FORMATO REGISTRO DE ASISTENCIA'
-            title_cell.font = Font(bold=True, size=14, name='Arial')
-            title_cell.fill = info_fill
-            # title_cell.border = thin_border
-            for row in ws['D1:I1']:
-                for cell in row:
-                    cell.border = Border(
-                        left=Side(style='thin', color='000000'),
-                        right=Side(style='thin', color='000000'),
-                        top=Side(style='thin', color='000000'),
-                        bottom=Side(style='thin', color='000000')
-                    )
-            title_cell.alignment = Alignment(horizontal='left', vertical='center')
-            
-            # Subtítulo (D2:K2)
-            ws.merge_cells('D2:I2')
-            subtitle_cell = ws['D2']
-            subtitle_cell.value = 'ALCALDÍA MUNICIPAL DE QUIBDÓ'
-            subtitle_cell.font = Font(bold=True, size=12, name='Arial')
-            subtitle_cell.fill = info_fill
-            for row in ws['D2:I2']:
-                for cell in row:
-                    cell.border = Border(
-                        left=Side(style='thin', color='000000'),
-                        right=Side(style='thin', color='000000'),
-                        top=Side(style='thin', color='000000'),
-                        bottom=Side(style='thin', color='000000')
-                    )
-            subtitle_cell.alignment = Alignment(horizontal='left', vertical='center')
-                        
-
-            # Fila 4: Dependencia
-            ws['D3'].value = 'DEPENDENCIA:'
-            ws['D3'].font = Font(bold=True, name='Arial', size=10)
-            ws['D3'].fill = label_fill
-            ws['D3'].border = thin_border
-            ws.merge_cells('D3:E3')  # Fusionar D4:E4
-
-            ws['F3'].value = reunion.get('dependencia', '').upper()
-            ws['F3'].font = Font(name='Arial', size=10)
-            ws['F3'].fill = info_fill
-            ws['F3'].border = thin_border
-            ws.merge_cells('F3:I3')  # Fusionar F4:I4
-
-               # Fila 4: Dependencia
-      
-            # Combinar celdas sin texto
-            ws.merge_cells('D4:I4')  # Fusionar D4:K4
-            ws['D4'].fill = label_fill
-            ws['D4'].border = thin_border
-
-            # Fila 5: Tema
-            ws['A5'].value = 'TEMA:'
-            ws['A5'].font = Font(bold=True, name='Arial', size=10)
-            ws['A5'].fill = label_fill
-            ws['A5'].border = thin_border
-            ws.merge_cells('A5:B5') 
-
-            ws['C5'].value = reunion.get('tema', '').upper()
-            ws['C5'].font = Font(name='Arial', size=10)
-            ws['C5'].fill = info_fill
-            ws['C5'].border = thin_border
-            ws.merge_cells('C5:f5')  # Fusionar C5:F5
-
-            # Fila 6: Fecha
-            ws['A6'].value = 'FECHA:'
-            ws['A6'].font = Font(bold=True, name='Arial', size=10)
-            ws['A6'].fill = label_fill
-            ws['A6'].border = thin_border
-            ws.merge_cells('A6:B6')
-
-            if 'fecha' in reunion:
-                fecha_obj = datetime.strptime(reunion['fecha'], '%Y-%m-%dT%H:%M:%S')  # Si viene como string
-                # O si ya es un objeto datetime: fecha_obj = reunion['fecha']
-                fecha_formateada = fecha_obj.strftime('%d/%m/%Y')  # Formato DD/MM/YYYY
-                ws['C6'].value = f"FECHA: {fecha_formateada}"
-                ws['C6'].font = Font(name='Arial', size=10)
-                ws['C6'].fill = info_fill
-                ws['C6'].border = thin_border
-            ws.merge_cells('C6') 
-
-            # Fila 6: Lugar
-            ws['D6'].value = 'LUGAR:'
-            ws['D6'].font = Font(bold=True, name='Arial', size=10)
-            ws['D6'].fill = label_fill
-            ws['D6'].border = thin_border
-            ws.merge_cells('D6') 
-
-            ws['E6'].value = reunion.get('lugar', '').upper()
-            ws['E6'].font = Font(name='Arial', size=10)
-            ws['E6'].fill = info_fill
-            ws['E6'].border = thin_border
-            ws.merge_cells('E6:F6')  # Fusionar E6:F6
-
-            # Fila 7: Hora de inicio
-            ws['A7'].value = 'HORA INICIO:'
-            ws['A7'].font = Font(bold=True, name='Arial', size=10)
-            ws['A7'].fill = label_fill
-            ws['A7'].border = thin_border
-            ws.merge_cells('A7:B7') 
-
-            ws['C7'].value = reunion.get('hora_inicio', '')
-            ws['C7'].font = Font(name='Arial', size=10)
-            ws['C7'].fill = info_fill
-            ws['C7'].border = thin_border
-            ws.merge_cells('C7')
-
-            # Fila 7: Hora de finalización
-            ws['D7'].value = 'HORA FINALIZACIÓN:'
-            ws['D7'].font = Font(bold=True, name='Arial', size=10)
-            ws['D7'].fill = label_fill
-            ws['D7'].border = thin_border
-            ws.merge_cells('D7')  
-
-
-            
-            ws['E7'].value = reunion.get('hora_fin', '')
-            ws['E7'].font = Font(name='Arial', size=10)
-            ws['E7'].fill = info_fill
-            ws['E7'].border = thin_border
-            ws.merge_cells('E7:F7')  # Fusionar E7:F7
-            
-             # Establecer etiqueta
-            ws.merge_cells('G5:G7')
-            ws['G5'].value = 'OBJETIVO:'
-            ws['G5'].font = Font(bold=True, size=10, name='Arial')
-            ws['G5'].fill = label_fill  # Color de fondo para la etiqueta
-            ws['G5'].border = thin_border
-          
-            for row in ws['G5:G7']:
-                for cell in row:
-                    cell.border = Border(
-                        left=Side(style='thin', color='000000'),
-                        right=Side(style='thin', color='000000'),
-                        top=Side(style='thin', color='000000'),
-                        bottom=Side(style='thin', color='000000')
-                    )
-            ws['G5'].alignment = Alignment(horizontal='center', vertical='center')
-                        
-            # Establecer valor del objetivo
-            ws['H5'].value = reunion.get('objetivo', '').upper()
-            ws['H5'].font = Font(name='Arial', size=10)
-            ws['H5'].fill = info_fill
-            # Aplicar borde completo a la celda de valor
-            for row in ws['H5:I7']:
-                for cell in row:
-                    cell.border = Border(
-                        left=Side(style='thin', color='000000'),
-                        right=Side(style='thin', color='000000'),
-                        top=Side(style='thin', color='000000'),
-                        bottom=Side(style='thin', color='000000')
-                    )
-            ws['H5'].alignment = Alignment(wrap_text=True, vertical='top')
-            
-            # Fusionar celdas después de establecer valores
-            ws.merge_cells('H5:I7')  # Objetivo ocupa 3 filas y 4 columnas (excluyendo la columna G con la etiqueta)
-            
-            # Ajustar altura de filas para el objetivo (usar auto_size para que se ajuste al contenido)
-            ws.row_dimensions[5].auto_size = True
-            ws.row_dimensions[6].auto_size = True
-            ws.row_dimensions[7].auto_size = True
-            
-            # Fila inicial para la tabla de asistentes
-           
-            
-            # Agregar encabezados de la tabla de asistentes
-            # En la función exportar_reunion, modificar la sección de encabezados:
-           # En la sección de encabezados, actualizar a:
-           # En la sección de encabezados
-            headers = ['NOMBRE COMPLETO', '', 'CÉDULA', 'DEPENDENCIA', 'CARGO', 'TIPO PARTICIPACIÓN', 'TELÉFONO', 'EMAIL', 'FIRMA']
-            start_row = 8
-
-            # Escribir encabezados
-            for col_num, header in enumerate(headers, 1):  # Comenzar desde columna 1
-                cell = ws.cell(row=start_row, column=col_num, value=header if header else '')
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-            # Combinar celdas del encabezado para NOMBRE COMPLETO (A y B)
-            ws.merge_cells(start_row=start_row, start_column=1, end_row=start_row, end_column=2)
-
-            # Ajustar el ancho de las columnas
-            column_widths = {
-                1: 14,  # Primera parte de NOMBRE (A)
-                2: 14,  # Segunda parte de NOMBRE (B) - se combinará con A
-                3: 18,  # CÉDULA (C)
-                4: 25,  # DEPENDENCIA (D)
-                5: 25,  # CARGO (E)
-                6: 20,  # TIPO PARTICIPACIÓN (F)
-                7: 13,  # TELÉFONO (G)
-                8: 35,  # EMAIL (H)
-                9: 20   # FIRMA (I)
-            }
-
-            for col_num, width in column_widths.items():
-                ws.column_dimensions[get_column_letter(col_num)].width = width
+            # Miniaturas de las firmas (caché por contenido; las nuevas se generan en paralelo)
+            miniaturas_firma = MiniaturaFirmaModel(current_app.config['db']).miniaturas(
+                asistentes_completos, ejecutor=ejecutor_miniaturas()
+            )
 
-            # Escribir datos de asistentes
-            for row_num, asistente in enumerate(asistentes_completos, start_row + 1):
+            # Valores de todas las filas: la hoja se escribe en flujo y los anchos
+            # de columna deben conocerse antes de la primera fila
+            ancho_columnas = AnchoColumnas(fijas=hoja.anchos)
+            filas_datos = []
+            for indice, asistente in enumerate(asistentes_completos):
                 try:
                     # NOMBRE COMPLETO (columnas A y B combinadas)
-                    nombre = asistente.get('nombre', '')
-                    ws.cell(row=row_num, column=1, value=nombre).border = thin_border
-                    ws.cell(row=row_num, column=2, value='').border = thin_border
-                    ws.merge_cells(start_row=row_num, start_column=1, end_row=row_num, end_column=2)
-                    
-                    # CÉDULA (columna C)
-                    ws.cell(row=row_num, column=3, value=asistente.get('cedula', '')).border = thin_border
+                    ancho_columnas.combinar(indice, 1, indice, 2)
                     
-                    # DEPENDENCIA (columna D)
+                    # CÉDULA, DEPENDENCIA, CARGO, TIPO PARTICIPACIÓN, TELÉFONO y EMAIL (columnas C a H)
                     dependencia = f"{asistente.get('dependencia', '')} {asistente.get('dependencia_adicional', '')}".strip()
-                    ws.cell(row=row_num, column=4, value=dependencia).border = thin_border
-                    
-                    # CARGO (columna E)
-                    ws.cell(row=row_num, column=5, value=asistente.get('cargo', '')).border = thin_border
-                    
-                    # TIPO PARTICIPACIÓN (columna F)
-                    ws.cell(row=row_num, column=6, value=asistente.get('tipo_participacion', '')).border = thin_border
-                    
-                    # TELÉFONO (columna G)
-                    ws.cell(row=row_num, column=7, value=asistente.get('telefono', '')).border = thin_border
+                    valores = [
+                        asistente.get('nombre', ''), '', asistente.get('cedula', ''), dependencia,
+                        asistente.get('cargo', ''), asistente.get('tipo_participacion', ''),
+                        asistente.get('telefono', ''), asistente.get('email', '')
+                    ]
                     
-                    # EMAIL (columna H)
-                    ws.cell(row=row_num, column=8, value=asistente.get('email', '')).border = thin_border
-                    
-                    # FIRMA (columna I)
-                    if 'firma' in asistente and asistente['firma']:
+                    # FIRMA (columna I): imagen anclada o texto
+                    imagen = None
+                    if asistente.get(CAMPO_FIRMA_REF) or asistente.get('firma'):
                         try:
-                            img_data = asistente['firma']
-                            if 'base64,' in img_data:
-                                img_data = img_data.split('base64,')[1]
-                            
-                            image_data = base64.b64decode(img_data)
-                            img = Image.open(BytesIO(image_data))
-                            
-                            max_size = (150, 50)
-                            img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                            
-                            img_byte_arr = BytesIO()
-                            img.save(img_byte_arr, format='PNG')
-                            img_byte_arr.seek(0)
-                            
-                            img_obj = OpenpyxlImage(img_byte_arr)
-                            ws.add_image(img_obj, f'I{row_num}')  # Columna I para la firma
-                            ws.row_dimensions[row_num].height = 32
-                            
+                            image_data = miniaturas_firma[indice]
+                            if not image_data:
+                                raise ValueError("Firma no encontrada en el almacén")
+                            imagen = OpenpyxlImage(BytesIO(image_data))
+                            valores.append(None)
                         except Exception as e:
                             logger.error(f"Error al procesar firma: {str(e)}")
-                            ws.cell(row=row_num, column=9, value="Error en firma").border = thin_border
+                            valores.append("Error en firma")
                     else:
-                        ws.cell(row=row_num, column=9, value="Sin firma").border = thin_border
+                        valores.append("Sin firma")
+                    
+                    for col_num, valor in enumerate(valores, 1):
+                        ancho_columnas.registrar(indice, col_num, valor)
+                    filas_datos.append((valores, imagen))
                         
                 except Exception as e:
                     logger.error(f"Error al procesar asistente: {str(e)}")
                     continue
-            # Ajustar el ancho de las columnas al contenido
-            for col_num in range(1, ws.max_column + 1):
-                max_length = 0
-                column_letter = get_column_letter(col_num)
-                
-                # Saltar si la columna ya tiene un ancho definido
-                if column_letter in ws.column_dimensions and ws.column_dimensions[column_letter].width is not None:
-                    continue
-                    
-                for row in ws.iter_rows(min_col=col_num, max_col=col_num):
-                    cell = row[0]
-                    # Verificar si la celda es parte de un rango combinado
-                    is_merged = False
-                    for merge_range in ws.merged_cells.ranges:
-                        if cell.coordinate in merge_range:
-                            is_merged = True
-                            break
-                    
-                    if not is_merged and cell.value:
-                        try:
-                            cell_length = len(str(cell.value))
-                            if cell_length > max_length:
-                                max_length = cell_length
-                        except:
-                            pass
-                
-                if max_length > 0:
-                    adjusted_width = (max_length + 2) * 1.2
-                    ws.column_dimensions[column_letter].width = min(adjusted_width, 30)  # Máximo ancho de 30
+
+            # Ajustar el ancho de las columnas al contenido (máximo 30)
+            hoja.anchos.update(ancho_columnas.anchos())
+
+            # Agregar encabezado con logo e información de la reunión
+            start_row = hoja.encabezado(reunion)
+
+            # Encabezados de la tabla de asistentes
+            headers = ['NOMBRE COMPLETO', '', 'CÉDULA', 'DEPENDENCIA', 'CARGO', 'TIPO PARTICIPACIÓN', 'TELÉFONO', 'EMAIL', 'FIRMA']
+            hoja.encabezados_tabla(headers)
+
+            # Combinar celdas del encabezado para NOMBRE COMPLETO (A y B)
+            hoja.combinar(start_row, 1, start_row, 2)
+
+            # Escribir datos de asistentes
+            for valores, imagen in filas_datos:
+                row_num = hoja.agregar_fila(valores, estilo='asistencia_celda', alto=32 if imagen else None)
+                hoja.combinar(row_num, 1, row_num, 2)
+                if imagen:
+                    hoja.agregar_imagen(imagen, f'I{row_num}')  # Columna I para la firma
             
-            # Crear archivo temporal
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
-                wb.save(tmp.name)
-                tmp_path = tmp.name
+            archivo = hoja.guardar()
             
-            # Enviar el archivo
-            return send_file(
-                tmp_path,
-                as_attachment=True,
-                download_name=f"asistencia_reunion_{reunion_id}.xlsx",
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-            )
+            # Enviar el archivo por bloques; el temporal se borra al cerrar la respuesta
+            return respuesta_archivo_en_flujo(archivo, f"asistencia_reunion_{reunion_id}.xlsx")
             
         except Exception as e:
+            hoja.descartar()
             logger.error(f"Error al generar el archivo Excel: {str(e)}")
             logger.error(traceback.format_exc())
             return jsonify({
@@ -1735,154 +1157,9 @@ def exportar_reunion(reunion_id, columnas=None):
             
     except Exception as e:
         logger.error(f"Error en exportar_reunion: {str(e)}")
-        # Definir todas las columnas posibles con sus etiquetas
-        columnas_disponibles = [
-    
-            {'campo': 'nombre', 'etiqueta': 'NOMBRE COMPLETO', 'visible_por_defecto': True},
-            {'campo': 'cedula', 'etiqueta': 'CÉDULA', 'visible_por_defecto': True},
-            {'campo': 'dependencia', 'etiqueta': 'DEPENDENCIA', 'visible_por_defecto': True},
-            {'campo': 'cargo', 'etiqueta': 'CARGO', 'visible_por_defecto': True},
-            {'campo': 'tipo_participacion', 'etiqueta': 'TIPO PARTICIPACIÓN', 'visible_por_defecto': True},
-            {'campo': 'telefono', 'etiqueta': 'TELÉFONO', 'visible_por_defecto': True},
-            {'campo': 'email', 'etiqueta': 'CORREO ELECTRÓNICO', 'visible_por_defecto': True},
-            {'campo': 'firma', 'etiqueta': 'FIRMA', 'visible_por_defecto': True}
-        ]
-
-        # Filtrar columnas según lo solicitado
-        if columnas:
-            columnas_seleccionadas = [col for col in columnas if any(c['campo'] == col for c in columnas_disponibles)]
-            if not columnas_seleccionadas:
-                columnas_seleccionadas = [c['campo'] for c in columnas_disponibles if c['visible_por_defecto']]
-        else:
-            columnas_seleccionadas = [c['campo'] for c in columnas_disponibles if c['visible_por_defecto']]
-
-        # Obtener los encabezados para las columnas seleccionadas
-        headers = [col['etiqueta'] for col in columnas_disponibles if col['campo'] in columnas_seleccionadas]
-
-        # Agregar encabezados de la tabla
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=start_row, column=col_num, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = thin_border
-            cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-
-        # Función auxiliar para obtener el valor de un campo de un asistente
-        def obtener_valor_campo(asistente, campo, indice, row_num=None):
-            try:
-                # Mapeo de campos a valores directamente del objeto asistente
-                field_mapping = {
-                  
-                    'nombre': asistente.get('nombre', '').strip(),
-                    'cedula': asistente.get('cedula', '').strip(),
-                    'dependencia': asistente.get('dependencia', '').strip(),
-                    'cargo': asistente.get('cargo', '').strip(),
-                    'tipo_participacion': asistente.get('tipo_participacion', '').strip(),
-                    'telefono': asistente.get('telefono', '').strip(),
-                    'email': asistente.get('email', '').strip(),
-                    'firma': asistente.get('firma', '')  # No aplicamos strip() a la firma
-                }
-                
-                valor = field_mapping.get(campo, '')
-               
- 
-                # Manejo especial para el campo firma
-                if campo == 'firma':
-                    if valor and isinstance(valor, str) and valor.startswith('data:image/png;base64,'):
-                        return 'Firmado'
-                    else:
-                        return 'Pendiente'
-                        
-                return valor
-                
-            except Exception as e:
-                logger.error(f"Error al obtener valor del campo {campo}: {str(e)}")
-                return ''
-
-        # Llenar datos - Comenzar después del encabezado
-        start_row_table = start_row + 1  # Fila después del encabezado de la tabla
-        
-        # Log de depuración
-        logger.info(f"Asistentes completos a exportar: {json.dumps(asistentes_completos, default=str, indent=2)}")
-        logger.info(f"Columnas seleccionadas: {columnas_seleccionadas}")
-        
-        for i, asistente in enumerate(asistentes_completos):
-            try:
-                # Obtener valores para cada columna seleccionada
-                row_data = []
-                row_num = start_row_table + i
-                
-                logger.info(f"Procesando asistente {i+1}: {asistente.get('nombre', 'Sin nombre')}")
-                logger.info(f"Datos del asistente: {json.dumps(asistente, default=str)}")
-                
-                for col in columnas_disponibles:
-                    if col['campo'] in columnas_seleccionadas:
-                        valor = obtener_valor_campo(asistente, col['campo'], i, row_num)
-                        logger.info(f"  - Columna '{col['campo']}': {valor}")
-                        row_data.append(valor)
-                
-                # Agregar fila a la hoja
-                for col_num, value in enumerate(row_data, 1):
-                    cell = ws.cell(row=row_num, column=col_num, value=value)
-                    cell.border = thin_border
-                    cell.alignment = Alignment(horizontal='left', vertical='center', wrap_text=True)
-                
-                logger.info(f"Fila {row_num} procesada correctamente")
-                
-                
-            except Exception as e:
-                logger.error(f"Error al procesar asistente {i}: {str(e)}", exc_info=True)
-                continue
-        
-        # Ajustar ancho de columnas (solo para las columnas de datos, no las del encabezado)
-        for col_num in range(1, len(columnas_seleccionadas) + 1):
-            column_letter = get_column_letter(col_num)
-            
-            # Establecer ancho fijo para la columna del nombre completo
-            if columnas_seleccionadas[col_num-1] == 'nombre':
-                ws.column_dimensions[column_letter].width = 30  # Ancho fijo para la columna de nombre
-                continue
-                
-            # Solo ajustar columnas que no están en el encabezado combinado
-            if column_letter in ['C', 'D', 'E']:  # Columnas del título combinado
-                ws.column_dimensions[column_letter].width = 20  # Ancho fijo
-                continue
-                
-            # Para otras columnas, ajustar automáticamente el ancho
-            max_length = 0
-            for row in range(start_row_table, start_row_table + len(actividad.get('asistentes', []))):
-                try:
-                    cell_value = ws.cell(row=row, column=col_num).value
-                    if cell_value and len(str(cell_value)) > max_length:
-                        max_length = len(str(cell_value))
-                except:
-                    pass
-            
-            if max_length > 0:
-                adjusted_width = (max_length + 2) * 1.2
-                ws.column_dimensions[column_letter].width = min(adjusted_width, 50)  # Máximo 50 caracteres
-        
-        # Crear un archivo temporal
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            excel_path = tmp_file.name
-        
-        # Guardar el libro de Excel
-        wb.save(excel_path)
-        logger.info(f"Archivo Excel generado: {excel_path}")
-        
-        # Enviar el archivo como respuesta
-        return send_file(
-            excel_path,  # Usar excel_path en lugar de temp_filename
-            as_attachment=True,
-            download_name=f"asistencia_{actividad.get('tema', 'actividad')}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-        
-    except Exception as e:
-        logger.error(f"Error en exportar_actividad: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({
             'success': False,
-            'message': 'Error al exportar la actividad',
+            'message': 'Error al exportar la reunión',
             'error': str(e)
-        }), 500
\ No newline at end of file
+        }), 500
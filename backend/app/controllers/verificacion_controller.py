@@ -1,8 +1,12 @@
 from flask import jsonify
 from bson import ObjectId
+from pymongo import ReturnDocument
 import secrets
 import string
 
+from app.models.estadisticas import EstadisticasMaterializadasModel, CAMPOS_CONTADORES
+from app.models.version_datos import registrar_cambio_datos
+
 def generar_codigo_verificacion(length=10):
     """Genera un código único para verificación"""
     alphabet = string.ascii_letters + string.digits
@@ -35,14 +39,20 @@ class VerificacionController:
                 "codigo_verificacion": codigo
             }
             
-            # Actualizar beneficiario
-            result = self.beneficiarios.update_one(
+            # Actualizar beneficiario obteniendo el estado anterior en la misma operación
+            anterior = self.beneficiarios.find_one_and_update(
                 {"_id": ObjectId(beneficiario_id)},
-                {"$set": verificacion}
+                {"$set": verificacion},
+                projection=CAMPOS_CONTADORES,
+                return_document=ReturnDocument.BEFORE
             )
             
-            if result.modified_count == 0:
+            if anterior is None:
                 return {"error": "No se pudo registrar la verificación"}, 400
+
+            # Igual que al actualizar un beneficiario: contadores y versión de los datos
+            EstadisticasMaterializadasModel(self.db).registrar_cambio(anterior, {**anterior, **verificacion})
+            registrar_cambio_datos(self.db, 'beneficiarios')
                 
             return {
                 "mensaje": "Verificación registrada exitosamente",
@@ -3,6 +3,8 @@ import logging
 from datetime import datetime, timezone
 from bson import ObjectId
 from marshmallow import Schema, fields, validate, EXCLUDE
+from app.models.firma import separar_firmas_asistentes
+from app.models.version_datos import registrar_cambio_datos
 
 # Configurar logger
 logger = logging.getLogger(__name__)
@@ -84,6 +86,7 @@ class ActividadModel:
                 
                 # Insertar en la base de datos
                 resultado = self.collection.insert_one(datos_validados)
+                registrar_cambio_datos(self.db, 'actividades')
                 logger.info(f"[MODELO] Documento creado con ID: {resultado.inserted_id}, Tipo: {datos_validados.get('tipo')}")
                 return str(resultado.inserted_id)
                 
@@ -216,6 +219,10 @@ class ActividadModel:
                     else:
                         update_data[field] = datos_actualizados[field]
             
+            # Las firmas de los asistentes se guardan en el almacén de firmas
+            if update_data.get('asistentes'):
+                separar_firmas_asistentes(self.db, update_data['asistentes'])
+            
             logger.info(f"Actualizando actividad {actividad_id} con datos: {update_data}")
             
             # Actualizar en la base de datos
@@ -225,6 +232,8 @@ class ActividadModel:
             )
             
             logger.info(f"Documentos modificados: {resultado.modified_count}")
+            if resultado.modified_count:
+                registrar_cambio_datos(self.db, 'actividades')
             return resultado.modified_count
             
         except Exception as e:
@@ -240,6 +249,8 @@ class ActividadModel:
         """
         try:
             resultado = self.collection.delete_one({'_id': ObjectId(actividad_id)})
+            if resultado.deleted_count:
+                registrar_cambio_datos(self.db, 'actividades')
             return resultado.deleted_count
         except Exception as e:
             raise ValueError(f"Error al eliminar la actividad: {str(e)}")
@@ -258,6 +269,9 @@ class ActividadModel:
                 if 'beneficiario_id' not in asistente:
                     raise ValueError("Cada asistente debe tener un beneficiario_id")
             
+            # Las firmas de los asistentes se guardan en el almacén de firmas
+            separar_firmas_asistentes(self.db, asistentes)
+            
             # Actualizar asistentes en la actividad
             resultado = self.collection.update_one(
                 {'_id': ObjectId(actividad_id)},
@@ -269,6 +283,8 @@ class ActividadModel:
                     }
                 }
             )
+            if resultado.modified_count:
+                registrar_cambio_datos(self.db, 'actividades')
             
             return resultado.modified_count
             
@@ -1,9 +1,22 @@
 from bson import ObjectId
 import logging
 from datetime import datetime
+from pymongo.errors import DuplicateKeyError
+
+from app.utils.busqueda import CAMPO_BUSQUEDA, CAMPOS_BUSQUEDA, claves_busqueda, filtro_busqueda, afecta_busqueda
+from app.models.firma import FirmaModel
+from app.models.version_datos import registrar_cambio_datos
+from app.utils.unicidad import crear_indice_unico
+from app.utils.hidratacion import cargar_por_ids
 
 logger = logging.getLogger(__name__)
 
+# Campos con índice único y el mensaje que se devuelve si el valor ya pertenece a otro asistente
+CAMPOS_UNICOS = {
+    'cedula': 'Ya existe un asistente con esta cédula',
+    'email': 'Ya existe un asistente con este correo electrónico',
+}
+
 class AsistenteModel:
     def __init__(self, db):
         """Inicializa el modelo con la conexión a la base de datos."""
@@ -34,6 +47,22 @@ class AsistenteModel:
         except Exception as e:
             logger.error(f"Error al contar documentos en {collection_name}: {str(e)}")
 
+    def crear_indices(self):
+        """Crea los índices que usan las búsquedas de asistentes y los de unicidad."""
+        self.collection.create_index(CAMPO_BUSQUEDA)
+        for campo in CAMPOS_UNICOS:
+            crear_indice_unico(self.collection, campo)
+
+    def _refrescar_busqueda(self, asistente_id):
+        """Recalcula los términos de búsqueda normalizados de un asistente."""
+        campos = CAMPOS_BUSQUEDA['asistentes']
+        asistente = self.collection.find_one({'_id': asistente_id}, {campo: 1 for campo in campos})
+        if asistente:
+            self.collection.update_one(
+                {'_id': asistente_id},
+                {'$set': {CAMPO_BUSQUEDA: claves_busqueda(asistente, campos)}}
+            )
+
     def obtener_por_id(self, asistente_id):
         """Obtiene un asistente por su ID."""
         try:
@@ -49,6 +78,11 @@ class AsistenteModel:
             logger.error(f"Error al obtener asistente por ID {asistente_id}: {str(e)}")
             return None
 
+    def obtener_varios_por_id(self, asistente_ids, campos=None):
+        """Obtiene varios asistentes con una sola consulta ({id_en_texto: asistente})."""
+        proyeccion = {campo: 1 for campo in campos} if campos else None
+        return cargar_por_ids(self.collection, asistente_ids, proyeccion)
+
     def listar_por_actividad(self, actividad_id):
         """Lista todos los asistentes de una actividad."""
         try:
@@ -65,10 +99,15 @@ class AsistenteModel:
             return []
 
     def crear(self, datos_asistente):
-        """Crea un nuevo asistente."""
+        """Crea un nuevo asistente. Lanza DuplicateKeyError si la cédula o el email ya existen."""
         try:
+            FirmaModel(self.db).separar(datos_asistente)
+            datos_asistente[CAMPO_BUSQUEDA] = claves_busqueda(datos_asistente, CAMPOS_BUSQUEDA['asistentes'])
             resultado = self.collection.insert_one(datos_asistente)
+            registrar_cambio_datos(self.db, 'asistentes')
             return str(resultado.inserted_id)
+        except DuplicateKeyError:
+            raise
         except Exception as e:
             logger.error(f"Error al crear asistente: {str(e)}")
             return None
@@ -79,10 +118,15 @@ class AsistenteModel:
             if not ObjectId.is_valid(asistente_id):
                 return False
                 
+            FirmaModel(self.db).separar(datos_actualizacion)
             resultado = self.collection.update_one(
                 {'_id': ObjectId(asistente_id)},
                 {'$set': datos_actualizacion}
             )
+            if resultado.modified_count:
+                registrar_cambio_datos(self.db, 'asistentes')
+                if afecta_busqueda(datos_actualizacion, 'asistentes'):
+                    self._refrescar_busqueda(ObjectId(asistente_id))
             return resultado.modified_count > 0
             
         except Exception as e:
@@ -96,6 +140,8 @@ class AsistenteModel:
                 return False
                 
             resultado = self.collection.delete_one({'_id': ObjectId(asistente_id)})
+            if resultado.deleted_count:
+                registrar_cambio_datos(self.db, 'asistentes')
             return resultado.deleted_count > 0
             
         except Exception as e:
@@ -122,6 +168,16 @@ class AsistenteModel:
             logger.error(f"Error al buscar asistente por cédula {cedula}: {str(e)}", exc_info=True)
             return None
             
+    def autocompletar(self, texto, limite):
+        """Devuelve los primeros asistentes cuyo nombre o cédula empiezan por el texto."""
+        filtro = filtro_busqueda(texto)
+        if not filtro:
+            return []
+        asistentes = list(self.collection.find(filtro, {'nombre': 1, 'cedula': 1}).limit(limite))
+        for asistente in asistentes:
+            asistente['_id'] = str(asistente['_id'])
+        return asistentes
+
     def listar_todos(self, filtro=None):
         """Lista todos los asistentes con un filtro opcional."""
         try:
@@ -172,12 +228,16 @@ class AsistenteModel:
             return []
 
     def actualizar_por_id(self, asistente_id, datos_actualizacion):
-        """Actualiza un asistente por su ID y devuelve el documento actualizado."""
+        """
+        Actualiza un asistente por su ID y devuelve el documento actualizado.
+        Lanza DuplicateKeyError si la nueva cédula o el nuevo email ya existen.
+        """
         try:
             if not ObjectId.is_valid(asistente_id):
                 return None
                 
             datos_actualizacion['fecha_actualizacion'] = datetime.utcnow()
+            FirmaModel(self.db).separar(datos_actualizacion)
             resultado = self.collection.find_one_and_update(
                 {'_id': ObjectId(asistente_id)},
                 {'$set': datos_actualizacion},
@@ -185,10 +245,18 @@ class AsistenteModel:
             )
             
             if resultado:
+                registrar_cambio_datos(self.db, 'asistentes')
+                if afecta_busqueda(datos_actualizacion, 'asistentes'):
+                    claves = claves_busqueda(resultado, CAMPOS_BUSQUEDA['asistentes'])
+                    if claves != resultado.get(CAMPO_BUSQUEDA):
+                        self.collection.update_one({'_id': resultado['_id']}, {'$set': {CAMPO_BUSQUEDA: claves}})
+                        resultado[CAMPO_BUSQUEDA] = claves
                 resultado['_id'] = str(resultado['_id'])
                 return resultado
             return None
             
+        except DuplicateKeyError:
+            raise
         except Exception as e:
             logger.error(f"Error al actualizar asistente {asistente_id}: {str(e)}")
             return None
@@ -1,5 +1,16 @@
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument, DESCENDING
+
+from app.utils.busqueda import (
+    CAMPO_BUSQUEDA, CAMPOS_BUSQUEDA, CAMPO_AUTOCOMPLETAR, CAMPO_NOMBRE_ORDEN, campos_busqueda, afecta_busqueda
+)
+from app.utils.proyeccion import construir_proyeccion
+from app.utils.unicidad import crear_indice_unico
+from app.models.firma import FirmaModel, CAMPO_FIRMA_REF
+from app.models.version_datos import registrar_cambio_datos
+from app.utils.catalogos import catalogo
+from app.utils.hidratacion import cargar_por_ids
 
 # Importaciones de Marshmallow
 from marshmallow import Schema, fields, validate, EXCLUDE
@@ -23,6 +34,93 @@ TIPOS_VIVIENDA = ['Propia', 'Arriendo', 'Familiar', 'Invasión', 'Otra']
 TIPOS_VERIFICACION = ['huella_digital', 'firma_digital']
 ESTADOS_VERIFICACION = ['pendiente', 'verificado', 'rechazado']
 
+# Campos pesados (imagen base64 de la firma y datos biométricos) y de uso interno
+# que no se envían en las lecturas salvo que se pidan expresamente
+CAMPOS_PESADOS = ('firma', 'verificacion_biometrica', 'huella_dactilar')
+CAMPOS_OMITIDOS = CAMPOS_PESADOS + (CAMPO_BUSQUEDA, CAMPO_AUTOCOMPLETAR, CAMPO_NOMBRE_ORDEN)
+
+# Campos con índice único y el mensaje que se devuelve si el valor ya pertenece a otro beneficiario
+CAMPOS_UNICOS = {
+    'numero_documento': "El número de documento ya está registrado para otro beneficiario",
+    'correo_electronico': "El correo electrónico ya está registrado para otro beneficiario",
+}
+
+
+def proyeccion_beneficiario(campos=None, incluir=(), obligatorios=()):
+    """
+    Proyección para leer beneficiarios sin los campos pesados
+
+    :param campos: Fieldset parcial solicitado (?fields=) o None para el documento ligero
+    :param incluir: Campos pesados que sí se necesitan en la proyección por defecto
+    :param obligatorios: Campos que la consulta necesita aunque no estén en 'campos'
+    :return: Diccionario de proyección
+    """
+    excluir = [campo for campo in CAMPOS_OMITIDOS if campo not in incluir]
+    if campos and 'firma' in campos:
+        # La firma se expone a partir de su referencia en el almacén
+        obligatorios = list(obligatorios) + [CAMPO_FIRMA_REF]
+    return construir_proyeccion(campos, excluir=excluir, obligatorios=obligatorios)
+
+
+def _fecha_exportacion(fecha_registro):
+    """Fecha de registro como YYYY-MM-DD (acepta datetime o texto ISO)"""
+    if isinstance(fecha_registro, datetime):
+        return fecha_registro.strftime('%Y-%m-%d')
+    if isinstance(fecha_registro, str):
+        # Si es string tipo ISO, recortar solo la fecha
+        return fecha_registro.split('T')[0]
+    return ''
+
+
+def _si_no(valor):
+    return 'Sí' if valor else 'No'
+
+
+# Columnas de la exportación de beneficiarios: (encabezado, valor a partir del documento)
+COLUMNAS_EXPORTACION = [
+    ('Nombre Completo', lambda b: b.get('nombre_completo', '')),
+    ('Tipo Documento', lambda b: b.get('tipo_documento', '')),
+    ('Número Documento', lambda b: b.get('numero_documento', '')),
+    ('Género', lambda b: b.get('genero', '')),
+    ('Rango Edad', lambda b: b.get('rango_edad', '')),
+    ('Correo Electrónico', lambda b: b.get('correo_electronico', 'No registrado')),
+    ('Número Celular', lambda b: b.get('numero_celular', 'No registrado')),
+    ('Comuna', lambda b: b.get('comuna', '')),
+    ('Barrio', lambda b: b.get('barrio', '')),
+    ('Línea Trabajo', lambda b: b.get('linea_trabajo_nombre', 'No asignado')),
+    ('Fecha Registro', lambda b: _fecha_exportacion(b.get('fecha_registro', ''))),
+    ('Estudia Actualmente', lambda b: _si_no(b.get('estudia_actualmente'))),
+    ('Nivel Educativo', lambda b: b.get('nivel_educativo', '')),
+    ('Situación Laboral', lambda b: b.get('situacion_laboral', '')),
+    ('Víctima Conflicto', lambda b: _si_no(b.get('victima_conflicto'))),
+    ('Tiene Discapacidad', lambda b: _si_no(b.get('tiene_discapacidad'))),
+]
+
+# Campos que hay que leer de MongoDB para construir las columnas de exportación
+CAMPOS_EXPORTACION = [
+    'nombre_completo', 'tipo_documento', 'numero_documento', 'genero', 'rango_edad',
+    'correo_electronico', 'numero_celular', 'comuna', 'barrio', 'linea_trabajo_nombre',
+    'fecha_registro', 'estudia_actualmente', 'nivel_educativo', 'situacion_laboral',
+    'victima_conflicto', 'tiene_discapacidad'
+]
+
+# Tipos de las columnas no textuales en las exportaciones de datos (parquet)
+TIPOS_EXPORTACION = {
+    'estudia_actualmente': 'bool',
+    'victima_conflicto': 'bool',
+    'tiene_discapacidad': 'bool'
+}
+
+
+def fila_exportacion(beneficiario):
+    """
+    Valores de un beneficiario en el orden de COLUMNAS_EXPORTACION
+
+    :param beneficiario: Documento leído con la proyección de CAMPOS_EXPORTACION
+    :return: Lista de valores de la fila
+    """
+    return [valor(beneficiario) for _, valor in COLUMNAS_EXPORTACION]
+
 # Esquema obsoleto para compatibilidad con datos existentes
 class HuellaDactilarSchema(Schema):
     id = fields.Str(required=False)
@@ -85,6 +183,39 @@ class BeneficiarioSchema(Schema):
 beneficiario_schema = BeneficiarioSchema()
 beneficiarios_schema = BeneficiarioSchema(many=True)
 
+# Filtros de cada contador de estadísticas. Se evalúan dentro de un único
+# $facet para no repetir un count_documents (y un recorrido) por contador.
+FILTROS_ESTADISTICAS = {
+    'total_beneficiarios': {},
+    'total_victimas': {'victima_conflicto': True},
+    'total_discapacidad': {'tiene_discapacidad': True},
+    'total_ayuda_humanitaria': {'ayuda_humanitaria': True},
+    'menores_estudiando': {
+        'rango_edad': {'$in': ['0-12', '13-18']},
+        'estudia_actualmente': True
+    },
+    'beneficiarios_trabajan': {'situacion_laboral': {'$ne': 'Desempleado'}},
+    'vivienda_propia': {'tipo_vivienda': 'Propia'},
+    'vivienda_arrendada': {'tipo_vivienda': 'Arriendo'},
+    'vivienda_familiar': {'tipo_vivienda': 'Familiar'},
+    'vivienda_compartida': {'tipo_vivienda': 'Compartida'},
+    'total_menores_13': {'rango_edad': '0-12'},
+    'total_13_25': {'rango_edad': {'$in': ['13-18', '19-25']}},
+    'total_mayores_25': {'rango_edad': {'$in': ['26-35', '36-45', '46-55', '56-65', '66 o más']}},
+    'total_alfabetizados': {'sabe_leer': True, 'sabe_escribir': True},
+    'total_analfabetas': {
+        '$or': [
+            {'sabe_leer': False},
+            {'sabe_escribir': False}
+        ]
+    },
+    'total_mujeres_menores_con_hijos': {
+        'genero': 'Femenino',
+        'rango_edad': {'$in': ['0-12', '13-18']},
+        'hijos_a_cargo': {'$gt': 0}
+    }
+}
+
 class BeneficiarioModel:
     def __init__(self, db=None):
         """
@@ -103,6 +234,21 @@ class BeneficiarioModel:
         self.collection = db['beneficiarios']
         self.schema = BeneficiarioSchema()
     
+    def crear_indices(self):
+        """
+        Crear los índices que usan los listados de beneficiarios
+        """
+        # Orden del listado y paginación por cursor (fecha_registro, _id)
+        self.collection.create_index([('fecha_registro', DESCENDING), ('_id', DESCENDING)])
+        # Búsqueda por prefijo sobre los términos normalizados
+        self.collection.create_index(CAMPO_BUSQUEDA)
+        # Autocompletado por nombre o documento, ordenado por nombre
+        self.collection.create_index([(CAMPO_AUTOCOMPLETAR, 1), (CAMPO_NOMBRE_ORDEN, 1)])
+        # Unicidad de documento y correo (también sirven a las verificaciones y a
+        # los upserts de las importaciones masivas)
+        for campo in CAMPOS_UNICOS:
+            crear_indice_unico(self.collection, campo)
+    
     def crear_beneficiario(self, datos):
         """
         Crear un nuevo beneficiario
@@ -114,15 +260,24 @@ class BeneficiarioModel:
             # Validar datos con el esquema
             datos_validados = self.schema.load(datos)
             
+            # La firma se guarda en el almacén de firmas
+            FirmaModel(self.db).separar(datos_validados)
+            
             # Preparar datos para inserción
             nuevo_beneficiario = {
                 **datos_validados,
-                'fecha_registro': datetime.utcnow()
+                'fecha_registro': datetime.utcnow(),
+                **campos_busqueda(datos_validados, 'beneficiarios')
             }
             
             # Insertar beneficiario
             resultado = self.collection.insert_one(nuevo_beneficiario)
             
+            # Actualizar contadores materializados
+            from app.models.estadisticas import EstadisticasMaterializadasModel
+            EstadisticasMaterializadasModel(self.db).registrar_alta(nuevo_beneficiario)
+            registrar_cambio_datos(self.db, 'beneficiarios')
+            
             return str(resultado.inserted_id)
         
         except ValidationError as e:
@@ -130,11 +285,12 @@ class BeneficiarioModel:
         except Exception as e:
             raise ValueError(f"Error al crear beneficiario: {str(e)}")
     
-    def obtener_beneficiarios(self, filtros=None):
+    def obtener_beneficiarios(self, filtros=None, campos=None):
         """
         Obtener beneficiarios con filtros opcionales
         
         :param filtros: Diccionario de filtros para la consulta
+        :param campos: Campos a devolver (por defecto todos salvo firma y datos biométricos)
         :return: Lista de beneficiarios
         """
         try:
@@ -146,7 +302,7 @@ class BeneficiarioModel:
                     filtros[key] = ObjectId(value) if value else None
             
             # Obtener beneficiarios
-            beneficiarios = list(self.collection.find(filtros))
+            beneficiarios = list(self.collection.find(filtros, proyeccion_beneficiario(campos)))
             
             # Convertir ObjectId a string
             for beneficiario in beneficiarios:
@@ -157,11 +313,13 @@ class BeneficiarioModel:
         except Exception as e:
             raise ValueError(f"Error al obtener beneficiarios: {str(e)}")
     
-    def obtener_beneficiario_por_id(self, beneficiario_id):
+    def obtener_beneficiario_por_id(self, beneficiario_id, campos=None, incluir=()):
         """
         Obtener un beneficiario por su ID
         
         :param beneficiario_id: ID del beneficiario
+        :param campos: Campos a devolver (por defecto todos salvo firma y datos biométricos)
+        :param incluir: Campos pesados que se quieren recibir junto al documento ligero
         :return: Datos del beneficiario
         """
         try:
@@ -169,7 +327,10 @@ class BeneficiarioModel:
             if not isinstance(beneficiario_id, ObjectId):
                 beneficiario_id = ObjectId(beneficiario_id)
             
-            beneficiario = self.collection.find_one({'_id': beneficiario_id})
+            beneficiario = self.collection.find_one(
+                {'_id': beneficiario_id},
+                proyeccion_beneficiario(campos, incluir=incluir)
+            )
             
             if beneficiario:
                 # Convertir ObjectId a string
@@ -181,6 +342,17 @@ class BeneficiarioModel:
         except Exception as e:
             raise ValueError(f"Error al obtener beneficiario: {str(e)}")
     
+    def obtener_beneficiarios_por_ids(self, beneficiario_ids, campos=None, incluir=()):
+        """
+        Obtener varios beneficiarios con una sola consulta
+        
+        :param beneficiario_ids: IDs de beneficiario (se ignoran los vacíos e inválidos)
+        :param campos: Campos a devolver (por defecto todos salvo firma y datos biométricos)
+        :param incluir: Campos pesados que se quieren recibir junto al documento ligero
+        :return: Diccionario {id_en_texto: beneficiario}
+        """
+        return cargar_por_ids(self.collection, beneficiario_ids, proyeccion_beneficiario(campos, incluir=incluir))
+    
     def actualizar_beneficiario(self, beneficiario_id, datos):
         """
         Actualizar un beneficiario
@@ -200,13 +372,33 @@ class BeneficiarioModel:
             # Validar datos parcialmente
             datos_validados = self.schema.load(datos, partial=True)
             
-            # Actualizar beneficiario
-            resultado = self.collection.update_one(
+            from app.models.estadisticas import EstadisticasMaterializadasModel, CAMPOS_CONTADORES
+            
+            # La firma se guarda en el almacén de firmas
+            FirmaModel(self.db).separar(datos_validados)
+            
+            # Actualizar beneficiario obteniendo el estado anterior en la misma operación
+            antes = self.collection.find_one_and_update(
                 {'_id': beneficiario_id}, 
-                {'$set': datos_validados}
+                {'$set': datos_validados},
+                projection=list(set(CAMPOS_CONTADORES) | set(CAMPOS_BUSQUEDA['beneficiarios']) | set(datos_validados)),
+                return_document=ReturnDocument.BEFORE
             )
+            if antes is None:
+                return 0
+            
+            # Recalcular los términos de búsqueda si cambió algún campo de texto
+            if afecta_busqueda(datos_validados, 'beneficiarios'):
+                self.collection.update_one(
+                    {'_id': beneficiario_id},
+                    {'$set': campos_busqueda({**antes, **datos_validados}, 'beneficiarios')}
+                )
+            
+            # Actualizar contadores materializados
+            EstadisticasMaterializadasModel(self.db).registrar_cambio(antes, {**antes, **datos_validados})
+            registrar_cambio_datos(self.db, 'beneficiarios')
             
-            return resultado.modified_count
+            return int(any(antes.get(campo) != valor for campo, valor in datos_validados.items()))
         
         except ValidationError as e:
             raise ValueError(f"Datos inválidos: {e.messages}")
@@ -225,14 +417,57 @@ class BeneficiarioModel:
             if not isinstance(beneficiario_id, ObjectId):
                 beneficiario_id = ObjectId(beneficiario_id)
             
-            # Eliminar beneficiario
-            resultado = self.collection.delete_one({'_id': beneficiario_id})
+            from app.models.estadisticas import EstadisticasMaterializadasModel, CAMPOS_CONTADORES
+            
+            # Eliminar beneficiario conservando los campos que afectan a los contadores
+            eliminado = self.collection.find_one_and_delete(
+                {'_id': beneficiario_id},
+                projection=CAMPOS_CONTADORES
+            )
+            if eliminado is None:
+                return 0
+            
+            # Actualizar contadores materializados
+            EstadisticasMaterializadasModel(self.db).registrar_baja(eliminado)
+            registrar_cambio_datos(self.db, 'beneficiarios')
             
-            return resultado.deleted_count
+            return 1
         
         except Exception as e:
             raise ValueError(f"Error al eliminar beneficiario: {str(e)}")
     
+    def _contar_en_un_paso(self, filtro_base):
+        """
+        Calcular todos los contadores de FILTROS_ESTADISTICAS y el conteo por
+        comuna en una sola consulta de agregación
+        
+        :param filtro_base: Filtro aplicado antes de contar
+        :return: Tupla (diccionario de contadores, lista de comunas con total)
+        """
+        facetas = {
+            nombre: [{'$match': filtro}, {'$count': 'total'}] if filtro else [{'$count': 'total'}]
+            for nombre, filtro in FILTROS_ESTADISTICAS.items()
+        }
+        facetas['comunas'] = [
+            {'$group': {
+                '_id': '$comuna',
+                'total': {'$sum': 1}
+            }}
+        ]
+        
+        resultado = list(self.collection.aggregate([
+            {'$match': filtro_base},
+            {'$facet': facetas}
+        ]))
+        resultado = resultado[0] if resultado else {}
+        
+        # $count no devuelve documento cuando no hay coincidencias
+        conteos = {
+            nombre: resultado[nombre][0]['total'] if resultado.get(nombre) else 0
+            for nombre in FILTROS_ESTADISTICAS
+        }
+        return conteos, resultado.get('comunas', [])
+    
     def obtener_estadisticas_por_linea_trabajo(self, linea_trabajo_id):
         """
         Obtener estadísticas detalladas de beneficiarios por línea de trabajo
@@ -252,7 +487,7 @@ class BeneficiarioModel:
             logging.info(f"Obteniendo estadísticas para línea de trabajo: {linea_trabajo_id}")
             
             # Verificar si la línea de trabajo existe
-            linea_trabajo_existente = self.collection.database['lineas_trabajo'].find_one({'_id': linea_trabajo_id})
+            linea_trabajo_existente = catalogo(self.collection.database, 'lineas_trabajo').obtener(linea_trabajo_id)
             if not linea_trabajo_existente:
                 logging.warning(f"Línea de trabajo no encontrada: {linea_trabajo_id}")
                 return {}
@@ -262,69 +497,15 @@ class BeneficiarioModel:
                 'linea_trabajo': str(linea_trabajo_id)  # Convertir a string para comparación
             }
             
-            # Estadísticas generales
-            total_beneficiarios = self.collection.count_documents(filtro_base)
-            
-            # Estadísticas de comunas
-            comunas = self.collection.aggregate([
-                {'$match': filtro_base},
-                {'$group': {
-                    '_id': '$comuna',
-                    'total': {'$sum': 1}
-                }}
-            ])
-            total_comunas = list(comunas)
-            
-            # Menores de 18 años que estudian
-            menores_estudiando = self.collection.count_documents({
-                **filtro_base,
-                'rango_edad': {'$in': ['0-12', '13-18']},
-                'estudia_actualmente': True
-            })
-            
-            # Beneficiarios que trabajan
-            beneficiarios_trabajan = self.collection.count_documents({
-                **filtro_base,
-                'situacion_laboral': {'$ne': 'Desempleado'}
-            })
-            
-            # Estadísticas de vivienda
-            vivienda_propia = self.collection.count_documents({
-                **filtro_base,
-                'tipo_vivienda': 'Propia'
-            })
-            
-            vivienda_arrendada = self.collection.count_documents({
-                **filtro_base,
-                'tipo_vivienda': 'Arriendo'
-            })
-            
-            vivienda_familiar = self.collection.count_documents({
-                **filtro_base,
-                'tipo_vivienda': 'Familiar'
-            })
-            
-            # Cuida casa
-            vivienda_compartida = self.collection.count_documents({
-                **filtro_base,
-               'tipo_vivienda': 'Compartida'
-            })
+            # Todos los contadores se calculan en un solo recorrido con $facet
+            conteos, total_comunas = self._contar_en_un_paso(filtro_base)
             
             estadisticas = {
                 # Estadísticas previas
-                'total_beneficiarios': total_beneficiarios,
-                'total_victimas': self.collection.count_documents({
-                    **filtro_base,
-                    'victima_conflicto': True
-                }),
-                'total_discapacidad': self.collection.count_documents({
-                    **filtro_base,
-                    'tiene_discapacidad': True
-                }),
-                'total_ayuda_humanitaria': self.collection.count_documents({
-                    **filtro_base,
-                    'ayuda_humanitaria': True
-                }),
+                'total_beneficiarios': conteos['total_beneficiarios'],
+                'total_victimas': conteos['total_victimas'],
+                'total_discapacidad': conteos['total_discapacidad'],
+                'total_ayuda_humanitaria': conteos['total_ayuda_humanitaria'],
                 
                 # Nuevas estadísticas
                 'total_comunas': {
@@ -334,46 +515,22 @@ class BeneficiarioModel:
                         for comuna in total_comunas
                     ]
                 },
-                'menores_estudiando': menores_estudiando,
-                'beneficiarios_trabajan': beneficiarios_trabajan,
-                'vivienda_propia': vivienda_propia,
-                'vivienda_arrendada': vivienda_arrendada,
-                'vivienda_familiar': vivienda_familiar,
-                'vivienda_compartida': vivienda_compartida,
+                'menores_estudiando': conteos['menores_estudiando'],
+                'beneficiarios_trabajan': conteos['beneficiarios_trabajan'],
+                'vivienda_propia': conteos['vivienda_propia'],
+                'vivienda_arrendada': conteos['vivienda_arrendada'],
+                'vivienda_familiar': conteos['vivienda_familiar'],
+                'vivienda_compartida': conteos['vivienda_compartida'],
                 
                 # Estadísticas de edad previas
-                'total_menores_13': self.collection.count_documents({
-                    **filtro_base,
-                    'rango_edad': '0-12'
-                }),
-                'total_13_25': self.collection.count_documents({
-                    **filtro_base,
-                    'rango_edad': {'$in': ['13-18', '19-25']}
-                }),
-                'total_mayores_25': self.collection.count_documents({
-                    **filtro_base,
-                    'rango_edad': {'$in': ['26-35', '36-45', '46-55', '56-65', '66 o más']}
-                }),
+                'total_menores_13': conteos['total_menores_13'],
+                'total_13_25': conteos['total_13_25'],
+                'total_mayores_25': conteos['total_mayores_25'],
                 
                 # Alfabetización
-                'total_alfabetizados': self.collection.count_documents({
-                    **filtro_base,
-                    'sabe_leer': True,
-                    'sabe_escribir': True
-                }),
-                'total_analfabetas': self.collection.count_documents({
-                    **filtro_base,
-                    '$or': [
-                        {'sabe_leer': False},
-                        {'sabe_escribir': False}
-                    ]
-                }),
-                'total_mujeres_menores_con_hijos': self.collection.count_documents({
-                    **filtro_base,
-                    'genero': 'Femenino',
-                    'rango_edad': {'$in': ['0-12', '13-18']},
-                    'hijos_a_cargo': {'$gt': 0}
-                })
+                'total_alfabetizados': conteos['total_alfabetizados'],
+                'total_analfabetas': conteos['total_analfabetas'],
+                'total_mujeres_menores_con_hijos': conteos['total_mujeres_menores_con_hijos']
             }
             
             logging.info(f"Estadísticas obtenidas: {estadisticas}")
@@ -388,114 +545,45 @@ class BeneficiarioModel:
         Obtener estadísticas globales de beneficiarios para dashboard administrativo
         sin filtrar por línea de trabajo
         
-        :return: Diccionario con estadísticas globales
+        Los valores se leen del documento de contadores materializados, que se
+        mantiene al registrar, actualizar y eliminar beneficiarios.
+        
+        :return: Diccionario con estadísticas globales, o None si los contadores
+                 aún no se han construido
         """
         try:
-            # Total de beneficiarios
-            total_beneficiarios = self.collection.count_documents({})
-            
-            # Víctimas de conflicto
-            total_victimas = self.collection.count_documents({
-                'victima_conflicto': True
-            })
-            
-            # Beneficiarios con discapacidad
-            total_discapacidad = self.collection.count_documents({
-                'tiene_discapacidad': True
-            })
-            
-            # Ayuda humanitaria
-            total_ayuda_humanitaria = self.collection.count_documents({
-                'ayuda_humanitaria': True
-            })
-            
-            # Rango de edades
-            total_menores_13 = self.collection.count_documents({
-                'rango_edad': '0-12'
-            })
-            
-            total_13_25 = self.collection.count_documents({
-                'rango_edad': {'$in': ['13-18', '19-25']}
-            })
-            
-            total_mayores_25 = self.collection.count_documents({
-                'rango_edad': {'$in': ['26-35', '36-45', '46-55', '56-65', '66 o más']}
-            })
-            
-            # Alfabetización
-            total_alfabetizados = self.collection.count_documents({
-                'sabe_leer': True,
-                'sabe_escribir': True
-            })
-            
-            total_analfabetas = self.collection.count_documents({
-                '$or': [
-                    {'sabe_leer': False},
-                    {'sabe_escribir': False}
-                ]
-            })
-            
-            # Mujeres menores con hijos
-            total_mujeres_menores_con_hijos = self.collection.count_documents({
-                'genero': 'Femenino',
-                'rango_edad': {'$in': ['0-12', '13-18']},
-                'hijos_a_cargo': {'$gt': 0}
-            })
-            
-            # Estadísticas globales para dashboard admin
-            total_comunas = list(self.collection.aggregate([
-                {"$group": {"_id": "$comuna", "cantidad": {"$sum": 1}}}
-            ]))
-            
-            comunas_conteo = {str(item['_id']): item['cantidad'] for item in total_comunas}
-            
-            # Menores de 18 años que estudian
-            menores_estudian = self.collection.count_documents({
-                'rango_edad': {'$in': ['0-12', '13-18']},
-                'estudia_actualmente': True
-            })
-            
-            # Beneficiarios que trabajan
-            beneficiarios_trabajan = self.collection.count_documents({
-                'situacion_laboral': {'$ne': 'Desempleado'}
-            })
-            
-            # Estadísticas de vivienda
-            vivienda_propia = self.collection.count_documents({
-                'tipo_vivienda': 'Propia'
-            })
-            
-            vivienda_arrendada = self.collection.count_documents({
-                'tipo_vivienda': 'Arriendo'
-            })
-            
-            vivienda_familiar = self.collection.count_documents({
-                'tipo_vivienda': 'Familiar'
-            })
-            
-            vivienda_compartida = self.collection.count_documents({
-                'tipo_vivienda': 'Compartida'
-            })
-            
+            from app.models.estadisticas import EstadisticasMaterializadasModel, valor_desde_clave
+            
+            documento = EstadisticasMaterializadasModel(self.db).obtener()
+            if documento is None:
+                return None
+            contadores = documento.get('contadores', {})
+            
+            # Conteo por comuna a partir del desglose (sin comunas que quedaron en cero)
+            comunas_conteo = {
+                valor_desde_clave(comuna): cantidad
+                for comuna, cantidad in documento.get('desglose', {}).get('comuna', {}).items()
+                if cantidad > 0
+            }
             
             estadisticas = {
-                'total_beneficiarios': total_beneficiarios,
-                'total_victimas': total_victimas,
-                'total_discapacidad': total_discapacidad,
-                'total_ayuda_humanitaria': total_ayuda_humanitaria,
-                'total_menores_13': total_menores_13,
-                'total_13_25': total_13_25,
-                'total_mayores_25': total_mayores_25,
-                'total_alfabetizados': total_alfabetizados,
-                'total_analfabetas': total_analfabetas,
-                'total_mujeres_menores_con_hijos': total_mujeres_menores_con_hijos,
+                'total_beneficiarios': contadores.get('total_beneficiarios', 0),
+                'total_victimas': contadores.get('total_victimas', 0),
+                'total_discapacidad': contadores.get('total_discapacidad', 0),
+                'total_ayuda_humanitaria': contadores.get('total_ayuda_humanitaria', 0),
+                'total_menores_13': contadores.get('total_menores_13', 0),
+                'total_13_25': contadores.get('total_13_25', 0),
+                'total_mayores_25': contadores.get('total_mayores_25', 0),
+                'total_alfabetizados': contadores.get('total_alfabetizados', 0),
+                'total_analfabetas': contadores.get('total_analfabetas', 0),
+                'total_mujeres_menores_con_hijos': contadores.get('total_mujeres_menores_con_hijos', 0),
                 'total_comunas': comunas_conteo,
-                'menores_estudian': menores_estudian,
-                'beneficiarios_trabajan': beneficiarios_trabajan,
-                'vivienda_propia': vivienda_propia,
-                'vivienda_arrendada': vivienda_arrendada,
-                'vivienda_familiar': vivienda_familiar,
-                'vivienda_compartida': vivienda_compartida
+                'menores_estudian': contadores.get('menores_estudiando', 0),
+                'beneficiarios_trabajan': contadores.get('beneficiarios_trabajan', 0),
+                'vivienda_propia': contadores.get('vivienda_propia', 0),
+                'vivienda_arrendada': contadores.get('vivienda_arrendada', 0),
+                'vivienda_familiar': contadores.get('vivienda_familiar', 0),
+                'vivienda_compartida': contadores.get('vivienda_compartida', 0)
             }
             
             logging.info(f"Estadísticas globales administrativas obtenidas: {estadisticas}")
@@ -3,6 +3,9 @@ from flask import current_app
 import logging
 from datetime import datetime
 
+from app.models.version_datos import registrar_cambio_datos
+from app.utils.catalogos import catalogo, invalidar_catalogo
+
 class ComunaModel:
     def __init__(self, db=None):
         """
@@ -26,6 +29,11 @@ class ComunaModel:
         self.db = db
         self.collection = db['comunas']
 
+    def _registrar_cambio(self):
+        """Aumentar la versión de las comunas y descartar su catálogo en memoria"""
+        registrar_cambio_datos(self.db, 'comunas')
+        invalidar_catalogo(self.db, 'comunas')
+
     def crear_comuna(self, datos):
         """
         Crear una nueva Comuna
@@ -54,6 +62,7 @@ class ComunaModel:
             
             # Insertar Comuna
             resultado = self.collection.insert_one(nueva_comuna)
+            self._registrar_cambio()
             
             logging.info(f"Comuna creada: {resultado.inserted_id}")
             
@@ -68,12 +77,11 @@ class ComunaModel:
         Obtener todas las Comunas
         """
         try:
-            # Obtener todas las comunas, ordenadas por nombre
-            comunas = list(self.collection.find().sort('nombre', 1))
-            
-            # Convertir ObjectId a string para serialización JSON
-            for comuna in comunas:
-                comuna['_id'] = str(comuna['_id'])
+            # Obtener todas las comunas del catálogo en memoria, ordenadas por nombre
+            comunas = sorted(
+                ({**comuna, '_id': str(comuna['_id'])} for comuna in catalogo(self.db, 'comunas').documentos),
+                key=lambda comuna: comuna.get('nombre') or ''
+            )
             
             return comunas
         
@@ -93,12 +101,11 @@ class ComunaModel:
             if not isinstance(comuna_id, ObjectId):
                 comuna_id = ObjectId(comuna_id)
             
-            comuna = self.collection.find_one({'_id': comuna_id})
+            comuna = catalogo(self.db, 'comunas').obtener(comuna_id)
             
             if comuna:
-                # Convertir ObjectId a string
-                comuna['_id'] = str(comuna['_id'])
-                return comuna
+                # Copia con el ObjectId convertido a string
+                return {**comuna, '_id': str(comuna['_id'])}
             
             return None
         
@@ -137,6 +144,8 @@ class ComunaModel:
             )
             
             logging.info(f"Comuna actualizada: {resultado.modified_count}")
+            if resultado.modified_count:
+                self._registrar_cambio()
             
             return resultado.modified_count
         
@@ -160,6 +169,8 @@ class ComunaModel:
             resultado = self.collection.delete_one({'_id': comuna_id})
             
             logging.info(f"Comuna eliminada: {resultado.deleted_count}")
+            if resultado.deleted_count:
+                self._registrar_cambio()
             
             return resultado.deleted_count
         
@@ -0,0 +1,214 @@
+import logging
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import UpdateOne, ReplaceOne, DESCENDING
+
+from app.utils.duplicados import claves_bloqueo, puntuar, LIMITE_BLOQUE, UMBRAL_DUPLICADO
+
+logger = logging.getLogger(__name__)
+
+# Colecciones que se revisan y que se comparan entre sí
+COLECCIONES_DUPLICADOS = ('beneficiarios', 'poblacion_migrante')
+
+ESTADOS_DUPLICADO = ['pendiente', 'confirmado', 'descartado']
+
+
+class DuplicadosModel:
+    # Margen para no saltar inserciones en curso con un _id apenas menor (el _id
+    # lo genera el cliente, así que un registro puede confirmarse después de
+    # otro con _id mayor)
+    MARGEN_INSERCION = timedelta(seconds=5)
+
+    def __init__(self, db=None):
+        """
+        Inicializar el detector de posibles registros duplicados
+
+        Mantiene un índice de bloques ('duplicados_indice') con las claves de
+        cada registro ya revisado. Cada ejecución solo toma los registros
+        nuevos de cada colección (_id posterior al último procesado y anterior
+        a MARGEN_INSERCION) y los
+        compara con los registros del índice que comparten alguna clave. Los
+        pares con puntaje suficiente se guardan en 'duplicados_candidatos'
+        para que un administrador los revise.
+
+        :param db: Conexión a la base de datos MongoDB
+        """
+        if db is None:
+            from flask import current_app
+            db = current_app.config.get('db')
+
+        if db is None:
+            raise ValueError("Base de datos no configurada")
+
+        self.db = db
+        self.indice = db['duplicados_indice']
+        self.bloques = db['duplicados_bloques']
+        self.estado = db['duplicados_estado']
+        self.candidatos = db['duplicados_candidatos']
+
+    def crear_indices(self):
+        """Crear los índices de búsqueda por clave de bloque y de revisión de candidatos"""
+        self.indice.create_index('claves')
+        self.candidatos.create_index([('estado', 1), ('puntaje', DESCENDING)])
+
+    def reiniciar(self):
+        """Vaciar el índice para volver a revisar todos los registros (las revisiones se conservan)"""
+        self.indice.delete_many({})
+        self.bloques.delete_many({})
+        self.estado.delete_many({})
+
+    def detectar(self, tamano_lote=1000, umbral=UMBRAL_DUPLICADO):
+        """
+        Comparar los registros nuevos con los ya indexados
+
+        :param tamano_lote: Registros que se procesan juntos
+        :param umbral: Puntaje mínimo para guardar un par
+        :return: Resumen con registros procesados, comparaciones y candidatos
+        """
+        resumen = {'registros': 0, 'comparaciones': 0, 'candidatos': 0}
+        limite = ObjectId.from_datetime(datetime.utcnow() - self.MARGEN_INSERCION)
+        for coleccion in COLECCIONES_DUPLICADOS:
+            estado = self.estado.find_one({'_id': coleccion}) or {}
+            ultimo_id = estado.get('ultimo_id')
+            while True:
+                filtro = {'_id': {'$lt': limite}}
+                if ultimo_id:
+                    filtro['_id']['$gt'] = ultimo_id
+                lote = list(self.db[coleccion]
+                            .find(filtro, {'nombre_completo': 1, 'numero_documento': 1})
+                            .sort('_id', 1)
+                            .limit(tamano_lote))
+                if not lote:
+                    break
+
+                registros = [{
+                    '_id': f"{coleccion}:{documento['_id']}",
+                    'coleccion': coleccion,
+                    'registro_id': str(documento['_id']),
+                    'nombre': documento.get('nombre_completo'),
+                    'documento': documento.get('numero_documento'),
+                    'claves': claves_bloqueo(documento.get('nombre_completo'), documento.get('numero_documento'))
+                } for documento in lote]
+                comparaciones, candidatos = self._procesar_lote(registros, umbral)
+
+                ultimo_id = lote[-1]['_id']
+                self.estado.update_one(
+                    {'_id': coleccion},
+                    {'$set': {'ultimo_id': ultimo_id, 'fecha_actualizacion': datetime.utcnow()}},
+                    upsert=True
+                )
+                resumen['registros'] += len(registros)
+                resumen['comparaciones'] += comparaciones
+                resumen['candidatos'] += candidatos
+        return resumen
+
+    def _procesar_lote(self, registros, umbral):
+        """
+        Indexar un lote de registros y compararlos con sus bloques
+
+        :return: Tupla (comparaciones hechas, pares guardados)
+        """
+        # Indexar primero el lote para que también se comparen entre sí. Si una
+        # ejecución anterior se interrumpió, los ya indexados no vuelven a contar
+        ids = [registro['_id'] for registro in registros]
+        ya_indexados = {documento['_id'] for documento in self.indice.find({'_id': {'$in': ids}}, {'_id': 1})}
+        self.indice.bulk_write([ReplaceOne({'_id': registro['_id']}, registro, upsert=True) for registro in registros])
+        incrementos = {}
+        for registro in registros:
+            if registro['_id'] not in ya_indexados:
+                for clave in registro['claves']:
+                    incrementos[clave] = incrementos.get(clave, 0) + 1
+        if incrementos:
+            self.bloques.bulk_write([
+                UpdateOne({'_id': clave}, {'$inc': {'total': total}}, upsert=True)
+                for clave, total in incrementos.items()
+            ], ordered=False)
+
+        # Solo se usan los bloques lo bastante pequeños para distinguir personas
+        claves = {clave for registro in registros for clave in registro['claves']}
+        utiles = {
+            bloque['_id'] for bloque in self.bloques.find({'_id': {'$in': list(claves)}})
+            if bloque.get('total', 0) <= LIMITE_BLOQUE
+        }
+        miembros = {}
+        for candidato in self.indice.find({'claves': {'$in': list(utiles)}}):
+            for clave in candidato['claves']:
+                if clave in utiles:
+                    miembros.setdefault(clave, []).append(candidato)
+
+        comparados = set()
+        operaciones = []
+        ahora = datetime.utcnow()
+        for registro in registros:
+            for clave in registro['claves']:
+                for candidato in miembros.get(clave, ()):
+                    if candidato['_id'] == registro['_id']:
+                        continue
+                    par = tuple(sorted((registro['_id'], candidato['_id'])))
+                    if par in comparados:
+                        continue
+                    comparados.add(par)
+
+                    puntaje, detalle = puntuar(registro, candidato)
+                    if puntaje < umbral:
+                        continue
+                    primero, segundo = (registro, candidato) if par[0] == registro['_id'] else (candidato, registro)
+                    operaciones.append(UpdateOne(
+                        {'_id': '|'.join(par)},
+                        {
+                            '$set': {
+                                'registros': [self._resumen_registro(primero), self._resumen_registro(segundo)],
+                                'puntaje': puntaje,
+                                'detalle': detalle,
+                                'fecha_deteccion': ahora
+                            },
+                            '$setOnInsert': {'estado': 'pendiente'}
+                        },
+                        upsert=True
+                    ))
+
+        if operaciones:
+            self.candidatos.bulk_write(operaciones, ordered=False)
+        return len(comparados), len(operaciones)
+
+    @staticmethod
+    def _resumen_registro(registro):
+        return {
+            'coleccion': registro['coleccion'],
+            'registro_id': registro['registro_id'],
+            'nombre': registro.get('nombre'),
+            'documento': registro.get('documento')
+        }
+
+    def listar(self, estado='pendiente', pagina=1, por_pagina=20):
+        """
+        Obtener los pares candidatos, del más al menos probable
+
+        :param estado: Estado de revisión
+        :param pagina: Número de página
+        :param por_pagina: Pares por página
+        :return: Tupla (pares, total)
+        """
+        filtro = {'estado': estado}
+        total = self.candidatos.count_documents(filtro)
+        pares = list(self.candidatos.find(filtro)
+                     .sort([('puntaje', DESCENDING), ('_id', 1)])
+                     .skip((pagina - 1) * por_pagina)
+                     .limit(por_pagina))
+        return pares, total
+
+    def resolver(self, par_id, estado, funcionario_id):
+        """
+        Registrar la revisión de un par
+
+        :param par_id: ID del par
+        :param estado: 'confirmado' o 'descartado'
+        :param funcionario_id: ID de quien lo revisó
+        :return: True si el par existe
+        """
+        resultado = self.candidatos.update_one(
+            {'_id': par_id},
+            {'$set': {'estado': estado, 'revisado_por': funcionario_id, 'fecha_revision': datetime.utcnow()}}
+        )
+        return resultado.matched_count > 0
@@ -0,0 +1,805 @@
+from datetime import datetime, timedelta
+import logging
+import re
+
+from bson import ObjectId
+from pymongo import UpdateOne, ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.models.beneficiario import FILTROS_ESTADISTICAS
+
+# Campos de beneficiario por los que se desglosan los contadores materializados
+DIMENSIONES_DESGLOSE = [
+    'linea_trabajo',
+    'comuna',
+    'genero',
+    'rango_edad',
+    'tipo_vivienda',
+    'victima_conflicto',
+    'tiene_discapacidad',
+    'ayuda_humanitaria',
+    'etnia',
+    'nivel_educativo',
+    'situacion_laboral'
+]
+
+# Dimensiones del cubo de beneficiarios, en el orden en que forman la clave de cada celda
+DIMENSIONES_CUBO = [
+    'periodo',
+    'comuna',
+    'genero',
+    'grupo_edad',
+    'linea_trabajo',
+    'victima',
+    'discapacidad'
+]
+
+# Grupos de edad del dashboard para beneficiarios con edad numérica
+GRUPOS_EDAD = [
+    ('0-12', 0, 13),
+    ('13-18', 13, 19),
+    ('19-35', 19, 36),
+    ('36-60', 36, 61),
+    ('60+', 61, None)
+]
+
+# Campos que afectan a algún contador o al cubo; son los únicos que hace
+# falta leer del documento anterior al actualizar un beneficiario
+CAMPOS_CONTADORES = sorted(set(DIMENSIONES_DESGLOSE) | {
+    'estudia_actualmente', 'sabe_leer', 'sabe_escribir', 'hijos_a_cargo',
+    'fecha_registro', 'edad', 'victima', 'discapacidad', 'ayudas'
+})
+
+SIN_DATO = 'sin_dato'
+
+
+def clave_contador(valor):
+    """
+    Convertir un valor en una clave válida para un campo de MongoDB
+
+    :param valor: Valor del campo del beneficiario
+    :return: Clave sin puntos ni '$' inicial
+    """
+    if valor is None or valor == '':
+        return SIN_DATO
+    if isinstance(valor, bool):
+        return 'si' if valor else 'no'
+    clave = str(valor).replace('.', '．')
+    if clave.startswith('$'):
+        clave = '＄' + clave[1:]
+    return clave
+
+
+def valor_desde_clave(clave):
+    """Revertir la transformación hecha por clave_contador"""
+    return clave.replace('．', '.').replace('＄', '$')
+
+
+def _igual(valor, esperado):
+    # En MongoDB True no coincide con 1, a diferencia de Python
+    if isinstance(valor, bool) or isinstance(esperado, bool):
+        return type(valor) is type(esperado) and valor == esperado
+    return valor == esperado
+
+
+def coincide_filtro(documento, filtro):
+    """
+    Evaluar en Python un filtro de FILTROS_ESTADISTICAS sobre un documento,
+    con la misma semántica que la consulta en MongoDB
+
+    :param documento: Documento del beneficiario
+    :param filtro: Filtro de consulta (igualdad, $in, $ne, $gt y $or)
+    :return: True si el documento cumple el filtro
+    """
+    for campo, condicion in filtro.items():
+        if campo == '$or':
+            if not any(coincide_filtro(documento, sub) for sub in condicion):
+                return False
+            continue
+
+        valor = documento.get(campo)
+        if isinstance(condicion, dict):
+            for operador, esperado in condicion.items():
+                if operador == '$in':
+                    if not any(_igual(valor, e) for e in esperado):
+                        return False
+                elif operador == '$ne':
+                    if _igual(valor, esperado):
+                        return False
+                elif operador == '$gt':
+                    es_numero = isinstance(valor, (int, float)) and not isinstance(valor, bool)
+                    if not es_numero or not valor > esperado:
+                        return False
+                else:
+                    raise ValueError(f"Operador no soportado: {operador}")
+        elif campo not in documento or not _igual(valor, condicion):
+            return False
+    return True
+
+
+class EstadisticasMaterializadasModel:
+    """
+    Contadores de beneficiarios mantenidos de forma incremental.
+
+    Todos los contadores viven en un único documento de la colección
+    estadisticas_materializadas, de modo que el dashboard administrativo
+    lo lee con una sola consulta. Cada alta, cambio o baja de un beneficiario
+    aplica un $inc con la diferencia de contadores y con 'version', de modo
+    que una reconstrucción solo reemplaza el documento si ningún delta llegó
+    mientras recalculaba.
+    """
+    ID_DOCUMENTO = 'beneficiarios'
+    # Recálculos que se intentan antes de desistir por deltas concurrentes
+    INTENTOS_RECONSTRUCCION = 5
+
+    def __init__(self, db=None):
+        """
+        Inicializar modelo de estadísticas materializadas
+
+        :param db: Conexión a la base de datos MongoDB
+        """
+        if db is None:
+            from flask import current_app
+            db = current_app.config.get('db')
+
+        if db is None:
+            raise ValueError("Base de datos no configurada")
+
+        self.db = db
+        self.collection = db['estadisticas_materializadas']
+        self.beneficiarios = db['beneficiarios']
+
+    @staticmethod
+    def contribucion(beneficiario):
+        """
+        Calcular los contadores a los que suma un beneficiario
+
+        :param beneficiario: Documento del beneficiario (o None)
+        :return: Diccionario {ruta_del_contador: 1}
+        """
+        if not beneficiario:
+            return {}
+
+        rutas = {
+            f'contadores.{nombre}': 1
+            for nombre, filtro in FILTROS_ESTADISTICAS.items()
+            if coincide_filtro(beneficiario, filtro)
+        }
+        for dimension in DIMENSIONES_DESGLOSE:
+            clave = clave_contador(beneficiario.get(dimension))
+            rutas[f'desglose.{dimension}.{clave}'] = 1
+        return rutas
+
+    def _guardar_delta(self, delta):
+        delta = {ruta: valor for ruta, valor in delta.items() if valor}
+        if not delta:
+            return
+        try:
+            # Con upsert para que una reconstrucción en curso vea cambiar la
+            # versión; un documento creado así no tiene 'fecha_reconstruccion'
+            # y no se lee hasta que se reconstruya
+            self.collection.update_one(
+                {'_id': self.ID_DOCUMENTO},
+                {
+                    '$inc': {**delta, 'version': 1},
+                    '$set': {'fecha_actualizacion': datetime.utcnow()}
+                },
+                upsert=True
+            )
+        except Exception as e:
+            # Un fallo aquí no debe impedir el registro; reconstruir corrige la deriva
+            logging.error(f"Error al actualizar estadísticas materializadas: {str(e)}")
+
+    def _aplicar_delta(self, antes, despues):
+        delta = dict(self.contribucion(despues))
+        for ruta, valor in self.contribucion(antes).items():
+            delta[ruta] = delta.get(ruta, 0) - valor
+        self._guardar_delta(delta)
+
+        # El cubo solo necesita los cambios y bajas; las altas las incorpora al refrescarse
+        if antes is not None:
+            CuboBeneficiariosModel(self.db).aplicar_cambio(antes, despues)
+
+    def registrar_alta(self, beneficiario):
+        """Sumar un beneficiario recién insertado a los contadores"""
+        self._aplicar_delta(None, beneficiario)
+
+    def registrar_altas(self, beneficiarios):
+        """Sumar varios beneficiarios recién insertados con una sola actualización"""
+        delta = {}
+        for beneficiario in beneficiarios:
+            for ruta, valor in self.contribucion(beneficiario).items():
+                delta[ruta] = delta.get(ruta, 0) + valor
+        self._guardar_delta(delta)
+
+    def registrar_cambio(self, antes, despues):
+        """Aplicar la diferencia entre el documento anterior y el actualizado"""
+        self._aplicar_delta(antes, despues)
+
+    def registrar_baja(self, beneficiario):
+        """Restar un beneficiario eliminado de los contadores"""
+        self._aplicar_delta(beneficiario, None)
+
+    def calcular_desde_cero(self):
+        """
+        Recalcular todos los contadores recorriendo la colección de beneficiarios
+
+        :return: Documento de contadores con la misma forma que el materializado
+        """
+        facetas = {
+            nombre: [{'$match': filtro}, {'$count': 'total'}] if filtro else [{'$count': 'total'}]
+            for nombre, filtro in FILTROS_ESTADISTICAS.items()
+        }
+        for dimension in DIMENSIONES_DESGLOSE:
+            facetas[f'desglose_{dimension}'] = [
+                {'$group': {'_id': f'${dimension}', 'total': {'$sum': 1}}}
+            ]
+
+        resultado = list(self.beneficiarios.aggregate([{'$facet': facetas}]))
+        resultado = resultado[0] if resultado else {}
+
+        contadores = {
+            nombre: resultado[nombre][0]['total'] if resultado.get(nombre) else 0
+            for nombre in FILTROS_ESTADISTICAS
+        }
+        desglose = {}
+        for dimension in DIMENSIONES_DESGLOSE:
+            conteo = {}
+            for grupo in resultado.get(f'desglose_{dimension}', []):
+                clave = clave_contador(grupo['_id'])
+                conteo[clave] = conteo.get(clave, 0) + grupo['total']
+            desglose[dimension] = conteo
+
+        return {'contadores': contadores, 'desglose': desglose}
+
+    def reconstruir(self):
+        """
+        Reemplazar el documento materializado por un recálculo completo
+
+        El reemplazo exige que 'version' no haya cambiado desde antes del
+        recálculo; si llegó algún delta entretanto se vuelve a calcular.
+
+        :return: Documento de contadores guardado, o None si los deltas
+                 concurrentes impidieron guardarlo en todos los intentos
+        """
+        for _ in range(self.INTENTOS_RECONSTRUCCION):
+            actual = self.collection.find_one({'_id': self.ID_DOCUMENTO}, {'version': 1})
+            documento = self.calcular_desde_cero()
+            ahora = datetime.utcnow()
+            nuevo = {
+                **documento,
+                'version': ((actual or {}).get('version') or 0) + 1,
+                'fecha_actualizacion': ahora,
+                'fecha_reconstruccion': ahora
+            }
+            try:
+                if actual is None:
+                    self.collection.insert_one({'_id': self.ID_DOCUMENTO, **nuevo})
+                    guardado = True
+                else:
+                    guardado = self.collection.replace_one(
+                        {'_id': self.ID_DOCUMENTO, 'version': actual.get('version')}, nuevo
+                    ).matched_count > 0
+            except DuplicateKeyError:
+                # Un delta o otra reconstrucción creó el documento mientras se calculaba
+                guardado = False
+            if guardado:
+                logging.info("Estadísticas materializadas reconstruidas")
+                return documento
+
+        logging.warning("No se reconstruyeron las estadísticas materializadas: hubo cambios durante cada recálculo")
+        return None
+
+    def verificar(self):
+        """
+        Comparar los contadores materializados con los conteos en vivo
+
+        :return: Lista de diferencias (ruta, materializado, en_vivo)
+        """
+        materializado = self.collection.find_one({'_id': self.ID_DOCUMENTO}) or {}
+        en_vivo = self.calcular_desde_cero()
+
+        diferencias = []
+        for nombre, valor in en_vivo['contadores'].items():
+            guardado = materializado.get('contadores', {}).get(nombre, 0)
+            if guardado != valor:
+                diferencias.append((f'contadores.{nombre}', guardado, valor))
+        for dimension, conteo in en_vivo['desglose'].items():
+            guardado_dimension = materializado.get('desglose', {}).get(dimension, {})
+            for clave in set(conteo) | set(guardado_dimension):
+                guardado = guardado_dimension.get(clave, 0)
+                if guardado != conteo.get(clave, 0):
+                    diferencias.append((f'desglose.{dimension}.{clave}', guardado, conteo.get(clave, 0)))
+        return diferencias
+
+    def construido(self):
+        """Indicar si el documento de contadores ya se construyó con una reconstrucción"""
+        return self.collection.count_documents(
+            {'_id': self.ID_DOCUMENTO, 'fecha_reconstruccion': {'$exists': True}}, limit=1
+        ) > 0
+
+    def obtener(self):
+        """
+        Leer el documento de contadores
+
+        No se construye en la lectura: lo construye el arranque de la aplicación
+        o 'flask reconstruir-estadisticas'.
+
+        :return: Documento con 'contadores' y 'desglose', o None si aún no se construyó
+        """
+        documento = self.collection.find_one({'_id': self.ID_DOCUMENTO})
+        if documento is None or 'fecha_reconstruccion' not in documento:
+            return None
+        return documento
+
+
+def _periodo(fecha_registro):
+    # fecha_registro puede ser datetime o una cadena ISO enviada por el frontend
+    if isinstance(fecha_registro, datetime):
+        return fecha_registro.strftime('%Y-%m')
+    if isinstance(fecha_registro, str):
+        coincidencia = re.match(r'^(\d{4})-(\d{2})', fecha_registro.strip())
+        if coincidencia:
+            return f'{coincidencia.group(1)}-{coincidencia.group(2)}'
+    return SIN_DATO
+
+
+def _grupo_edad(beneficiario):
+    edad = beneficiario.get('edad')
+    if isinstance(edad, (int, float)) and not isinstance(edad, bool):
+        for nombre, minimo, maximo in GRUPOS_EDAD:
+            if edad >= minimo and (maximo is None or edad < maximo):
+                return nombre
+    # Los registros actuales guardan el rango de edad en lugar de la edad
+    return beneficiario.get('rango_edad') or SIN_DATO
+
+
+def celda_cubo(beneficiario):
+    """
+    Calcular la celda del cubo y las medidas que aporta un beneficiario
+
+    :param beneficiario: Documento del beneficiario
+    :return: Tupla (clave de la celda, diccionario de medidas)
+    """
+    clave = {
+        'periodo': _periodo(beneficiario.get('fecha_registro')),
+        'comuna': beneficiario.get('comuna') or SIN_DATO,
+        'genero': beneficiario.get('genero') or SIN_DATO,
+        'grupo_edad': _grupo_edad(beneficiario),
+        'linea_trabajo': str(beneficiario.get('linea_trabajo') or SIN_DATO),
+        'victima': beneficiario.get('victima_conflicto') is True or beneficiario.get('victima') is True,
+        'discapacidad': beneficiario.get('tiene_discapacidad') is True or beneficiario.get('discapacidad') is True
+    }
+
+    medidas = {'total': 1}
+    tipos_ayuda = {
+        ayuda.get('tipo') for ayuda in beneficiario.get('ayudas') or []
+        if isinstance(ayuda, dict) and ayuda.get('tipo')
+    }
+    for tipo in tipos_ayuda:
+        medidas[f'ayudas.{clave_contador(tipo)}'] = 1
+
+    return clave, medidas
+
+
+class CuboBeneficiariosModel:
+    """
+    Cubo de conteos de beneficiarios por (periodo, comuna, género, grupo de edad,
+    línea de trabajo, víctima, discapacidad).
+
+    Cada documento de cubo_beneficiarios es una celda con la clave en _id y las
+    medidas 'total' y 'ayudas.<tipo>'. Los beneficiarios nuevos se incorporan
+    de forma incremental siguiendo el _id (que crece con la fecha de inserción);
+    los cambios y bajas de beneficiarios ya incorporados se aplican como deltas.
+
+    Mientras un refresco está en curso, los cambios de beneficiarios que todavía
+    no cubre 'ultimo_id' se anotan en 'pendientes' (el refresco pudo leerlos ya
+    con sus valores anteriores) y el refresco los aplica al volcar el lote que
+    los contiene.
+    """
+    ID_ESTADO = 'cubo_beneficiarios'
+    TAMANO_LOTE = 5000
+    # Margen para no saltar inserciones en curso con un _id apenas menor
+    MARGEN_INSERCION = timedelta(seconds=5)
+    DURACION_BLOQUEO = timedelta(minutes=5)
+
+    def __init__(self, db=None):
+        """
+        Inicializar modelo del cubo de beneficiarios
+
+        :param db: Conexión a la base de datos MongoDB
+        """
+        if db is None:
+            from flask import current_app
+            db = current_app.config.get('db')
+
+        if db is None:
+            raise ValueError("Base de datos no configurada")
+
+        self.db = db
+        self.collection = db['cubo_beneficiarios']
+        self.estado = db['estadisticas_materializadas']
+        self.beneficiarios = db['beneficiarios']
+
+    def crear_indices(self, coleccion=None):
+        """
+        Crear los índices usados para filtrar celdas por periodo y dimensión
+
+        :param coleccion: Colección de destino (por defecto la del cubo)
+        """
+        coleccion = self.collection if coleccion is None else coleccion
+        coleccion.create_index([('_id.periodo', ASCENDING)])
+        coleccion.create_index([('_id.linea_trabajo', ASCENDING), ('_id.periodo', ASCENDING)])
+
+    @staticmethod
+    def _operacion(clave, medidas, signo):
+        return UpdateOne(
+            {'_id': clave},
+            {'$inc': {medida: valor * signo for medida, valor in medidas.items()}},
+            upsert=True
+        )
+
+    def _ultimo_id(self):
+        estado = self.estado.find_one({'_id': self.ID_ESTADO}, {'ultimo_id': 1})
+        return estado.get('ultimo_id') if estado else None
+
+    def _tomar_bloqueo(self):
+        ahora = datetime.utcnow()
+        try:
+            resultado = self.estado.update_one(
+                {
+                    '_id': self.ID_ESTADO,
+                    '$or': [
+                        {'bloqueado_hasta': {'$exists': False}},
+                        {'bloqueado_hasta': {'$lt': ahora}}
+                    ]
+                },
+                {
+                    '$set': {'bloqueado_hasta': ahora + self.DURACION_BLOQUEO},
+                    # Los pendientes de un refresco interrumpido se vuelven a leer desde la colección
+                    '$unset': {'pendientes': ''}
+                },
+                upsert=True
+            )
+            return resultado.matched_count > 0 or resultado.upserted_id is not None
+        except DuplicateKeyError:
+            # Otro proceso tiene el bloqueo (el upsert chocó con su documento)
+            return False
+
+    def _liberar_bloqueo(self):
+        # Los pendientes que quedan son de beneficiarios posteriores a ultimo_id:
+        # el próximo refresco los leerá con su estado actual
+        self.estado.update_one({'_id': self.ID_ESTADO}, {'$unset': {'bloqueado_hasta': '', 'pendientes': ''}})
+
+    def refrescar(self):
+        """
+        Incorporar al cubo los beneficiarios insertados desde el último refresco
+
+        :return: Número de beneficiarios incorporados
+        """
+        if not self._tomar_bloqueo():
+            return 0
+
+        try:
+            incorporados, _ = self._incorporar(self.collection, self._ultimo_id())
+        finally:
+            self._liberar_bloqueo()
+
+        if incorporados:
+            logging.info(f"Cubo de beneficiarios: {incorporados} beneficiarios incorporados")
+        return incorporados
+
+    def _incorporar(self, destino, ultimo_id):
+        """
+        Recorrer los beneficiarios posteriores a ultimo_id y volcarlos por lotes en destino
+
+        :param destino: Colección del cubo en la que se escribe
+        :param ultimo_id: _id del último beneficiario ya incorporado (o None)
+        :return: Tupla (beneficiarios incorporados, último _id incorporado)
+        """
+        incorporados = 0
+        limite = ObjectId.from_datetime(datetime.utcnow() - self.MARGEN_INSERCION)
+        filtro = {'_id': {'$lt': limite}}
+        if ultimo_id is not None:
+            filtro['_id']['$gt'] = ultimo_id
+
+        acumulado = {}
+        # Celda con la que se contó cada beneficiario del lote, por si cambia antes del volcado
+        celdas_lote = {}
+        cursor = self.beneficiarios.find(filtro, CAMPOS_CONTADORES).sort('_id', ASCENDING)
+        for beneficiario in cursor.batch_size(self.TAMANO_LOTE):
+            clave, medidas = celda_cubo(beneficiario)
+            celda = acumulado.setdefault(tuple(clave.items()), {})
+            for medida, valor in medidas.items():
+                celda[medida] = celda.get(medida, 0) + valor
+            celdas_lote[beneficiario['_id']] = (clave, medidas)
+            ultimo_id = beneficiario['_id']
+            incorporados += 1
+
+            if incorporados % self.TAMANO_LOTE == 0:
+                self._volcar(acumulado, celdas_lote, ultimo_id, destino)
+                acumulado = {}
+                celdas_lote = {}
+        if celdas_lote:
+            self._volcar(acumulado, celdas_lote, ultimo_id, destino)
+        return incorporados, ultimo_id
+
+    def _volcar(self, acumulado, celdas_lote, ultimo_id, destino=None, terminar_reconstruccion=False):
+        """
+        Escribir un lote en el cubo y avanzar ultimo_id hasta su último beneficiario
+
+        ultimo_id avanza en la misma operación que recoge los cambios pendientes
+        del lote, de modo que cada cambio o queda en 'pendientes' o lo aplica
+        aplicar_cambio como delta, nunca ninguno de los dos.
+
+        :param acumulado: Medidas por celda del lote
+        :param celdas_lote: Celda con la que se contó cada beneficiario del lote
+        :param ultimo_id: _id del último beneficiario del lote
+        :param destino: Colección del cubo en la que se escribe (por defecto la del cubo)
+        :param terminar_reconstruccion: Cerrar en la misma operación la reconstrucción en curso
+        """
+        destino = self.collection if destino is None else destino
+        if acumulado:
+            destino.bulk_write([
+                self._operacion(dict(llave), medidas, 1)
+                for llave, medidas in acumulado.items()
+            ], ordered=False)
+
+        ahora = datetime.utcnow()
+        actualizacion = {
+            '$set': {
+                'ultimo_id': ultimo_id,
+                'fecha_actualizacion': ahora,
+                'bloqueado_hasta': ahora + self.DURACION_BLOQUEO
+            },
+            '$pull': {'pendientes': {'_id': {'$lte': ultimo_id}}}
+        }
+        if terminar_reconstruccion:
+            actualizacion['$unset'] = {'reconstruyendo': ''}
+        estado = self.estado.find_one_and_update(
+            {'_id': self.ID_ESTADO},
+            actualizacion,
+            projection={'pendientes': 1, 'ultimo_id': 1},
+            return_document=ReturnDocument.BEFORE
+        ) or {}
+
+        # Cambios de cada beneficiario anotados hasta ahora, en el orden en que se anotaron
+        cambios = {}
+        for pendiente in estado.get('pendientes') or []:
+            if pendiente['_id'] <= ultimo_id:
+                cambios.setdefault(pendiente['_id'], []).append(pendiente)
+        anterior = estado.get('ultimo_id')
+        operaciones = []
+        for beneficiario_id, pendientes in cambios.items():
+            if beneficiario_id in celdas_lote:
+                # Se contó al leer el lote; se sustituye por su estado final
+                operaciones.append(self._operacion(*celdas_lote[beneficiario_id], -1))
+            elif anterior is not None and beneficiario_id <= anterior:
+                # Durante una reconstrucción se anotan también los cambios de lotes ya
+                # volcados: se deshace el estado anterior al primero de ellos
+                operaciones.append(self._operacion(pendientes[0]['celda_antes'], pendientes[0]['medidas_antes'], -1))
+            if pendientes[-1].get('celda') is not None:
+                operaciones.append(self._operacion(pendientes[-1]['celda'], pendientes[-1]['medidas'], 1))
+        if operaciones:
+            destino.bulk_write(operaciones, ordered=True)
+
+    def aplicar_cambio(self, antes, despues):
+        """
+        Trasladar un beneficiario ya incorporado de su celda anterior a la nueva
+
+        :param antes: Documento anterior (debe incluir _id)
+        :param despues: Documento actualizado, o None si se eliminó
+        """
+        try:
+            beneficiario_id = antes.get('_id')
+            if beneficiario_id is None:
+                return
+
+            # Con un refresco en curso que aún no ha volcado a este beneficiario, o
+            # con una reconstrucción en curso, se le anota el estado nuevo; la
+            # condición y la anotación son una sola operación frente al avance
+            # de ultimo_id en _volcar
+            clave_antes, medidas_antes = celda_cubo(antes)
+            clave, medidas = celda_cubo(despues) if despues is not None else (None, None)
+            anotado = self.estado.update_one(
+                {
+                    '_id': self.ID_ESTADO,
+                    'bloqueado_hasta': {'$gt': datetime.utcnow()},
+                    '$or': [
+                        {'ultimo_id': None},
+                        {'ultimo_id': {'$lt': beneficiario_id}},
+                        {'reconstruyendo': True}
+                    ]
+                },
+                {'$push': {'pendientes': {
+                    '_id': beneficiario_id,
+                    'celda': clave,
+                    'medidas': medidas,
+                    'celda_antes': clave_antes,
+                    'medidas_antes': medidas_antes
+                }}}
+            )
+            if anotado.matched_count:
+                return
+
+            ultimo_id = self._ultimo_id()
+            if ultimo_id is None or beneficiario_id > ultimo_id:
+                # Aún no está en el cubo; el próximo refresco leerá su estado actual
+                return
+
+            operaciones = [self._operacion(clave_antes, medidas_antes, -1)]
+            if despues is not None:
+                operaciones.append(self._operacion(clave, medidas, 1))
+            self.collection.bulk_write(operaciones, ordered=True)
+        except Exception as e:
+            logging.error(f"Error al actualizar el cubo de beneficiarios: {str(e)}")
+
+    def reconstruir(self):
+        """
+        Volver a calcular el cubo completo y sustituir el actual de una vez
+
+        El cubo nuevo se construye en una colección aparte bajo el bloqueo de
+        refresco y se intercambia con renameCollection, de modo que el dashboard
+        sigue leyendo el cubo anterior (sin los cambios posteriores) hasta el
+        intercambio. Mientras tanto todos los cambios de beneficiarios se anotan
+        en 'pendientes' y se aplican sobre el cubo nuevo.
+
+        :return: Número de beneficiarios incorporados, o None si hay un refresco en curso
+        """
+        if not self._tomar_bloqueo():
+            return None
+
+        anterior = self._ultimo_id()
+        nuevo = self.db[f'{self.collection.name}_nuevo']
+        try:
+            nuevo.drop()
+            self.crear_indices(nuevo)
+            self.estado.update_one(
+                {'_id': self.ID_ESTADO},
+                {'$set': {'reconstruyendo': True}, '$unset': {'ultimo_id': ''}}
+            )
+            incorporados, ultimo_id = self._incorporar(nuevo, None)
+
+            if incorporados:
+                nuevo.rename(self.collection.name, dropTarget=True)
+                # Cambios anotados desde el último lote, ya sobre el cubo intercambiado
+                self._volcar({}, {}, ultimo_id, terminar_reconstruccion=True)
+            else:
+                self.collection.delete_many({})
+                self.estado.update_one({'_id': self.ID_ESTADO}, {'$unset': {'reconstruyendo': ''}})
+        except Exception:
+            # El cubo anterior sigue en uso; los cambios hechos durante el intento
+            # no se le aplicaron y quedan para la próxima reconstrucción
+            logging.error("Error al reconstruir el cubo de beneficiarios; se conserva el anterior")
+            nuevo.drop()
+            restaurar = {'$unset': {'reconstruyendo': ''}}
+            if anterior is not None:
+                restaurar['$set'] = {'ultimo_id': anterior}
+            self.estado.update_one({'_id': self.ID_ESTADO}, restaurar)
+            raise
+        finally:
+            self._liberar_bloqueo()
+
+        logging.info(f"Cubo de beneficiarios reconstruido con {incorporados} beneficiarios")
+        return incorporados
+
+    @staticmethod
+    def _filtro(desde=None, hasta=None, filtros=None):
+        filtro = {}
+        if desde or hasta:
+            filtro['_id.periodo'] = {}
+            if desde:
+                filtro['_id.periodo']['$gte'] = desde
+            if hasta:
+                filtro['_id.periodo']['$lte'] = hasta
+        for dimension, valor in (filtros or {}).items():
+            if dimension not in DIMENSIONES_CUBO:
+                raise ValueError(f"Dimensión no válida: {dimension}")
+            filtro[f'_id.{dimension}'] = valor
+        return filtro
+
+    def consultar(self, desde=None, hasta=None, filtros=None, agrupar_por=None, medida='total'):
+        """
+        Cortar y agregar el cubo
+
+        :param desde: Periodo inicial 'YYYY-MM' (inclusive)
+        :param hasta: Periodo final 'YYYY-MM' (inclusive)
+        :param filtros: Diccionario {dimensión: valor} para fijar dimensiones
+        :param agrupar_por: Lista de dimensiones a conservar; el resto se suma
+        :param medida: 'total' o 'ayudas' (conteo por tipo de ayuda)
+        :return: Lista de diccionarios con las dimensiones agrupadas y el total
+        """
+        agrupar_por = agrupar_por or []
+        for dimension in agrupar_por:
+            if dimension not in DIMENSIONES_CUBO:
+                raise ValueError(f"Dimensión no válida: {dimension}")
+        if medida not in ('total', 'ayudas'):
+            raise ValueError(f"Medida no válida: {medida}")
+
+        grupo = {dimension: f'$_id.{dimension}' for dimension in agrupar_por}
+        pipeline = [{'$match': self._filtro(desde, hasta, filtros)}]
+
+        if medida == 'ayudas':
+            pipeline += [
+                {'$project': {'_id': 1, 'ayuda': {'$objectToArray': {'$ifNull': ['$ayudas', {}]}}}},
+                {'$unwind': '$ayuda'}
+            ]
+            grupo['ayuda'] = '$ayuda.k'
+            suma = '$ayuda.v'
+        else:
+            suma = '$total'
+
+        pipeline += [
+            {'$group': {'_id': grupo or None, 'total': {'$sum': suma}}},
+            {'$match': {'total': {'$ne': 0}}},
+            {'$sort': {'total': -1}}
+        ]
+
+        resultado = []
+        for fila in self.collection.aggregate(pipeline):
+            dimensiones = fila['_id'] or {}
+            if 'ayuda' in dimensiones:
+                dimensiones['ayuda'] = valor_desde_clave(dimensiones['ayuda'])
+            resultado.append({**dimensiones, 'total': fila['total']})
+        return resultado
+
+    def resumen(self, desde=None, hasta=None, filtros=None):
+        """
+        Totales del dashboard para un rango de periodos en una sola consulta
+
+        :return: Diccionario con la forma de /dashboard/estadisticas
+        """
+        def por(dimension):
+            return [
+                {'$group': {'_id': f'$_id.{dimension}', 'total': {'$sum': '$total'}}},
+                {'$match': {'total': {'$ne': 0}}}
+            ]
+
+        pipeline = [
+            {'$match': self._filtro(desde, hasta, filtros)},
+            {'$facet': {
+                'total': [{'$group': {'_id': None, 'total': {'$sum': '$total'}}}],
+                'victima': por('victima'),
+                'discapacidad': por('discapacidad'),
+                'genero': por('genero'),
+                'grupo_edad': por('grupo_edad'),
+                'comuna': por('comuna'),
+                'ayudas': [
+                    {'$project': {'ayuda': {'$objectToArray': {'$ifNull': ['$ayudas', {}]}}}},
+                    {'$unwind': '$ayuda'},
+                    {'$group': {'_id': '$ayuda.k', 'total': {'$sum': '$ayuda.v'}}},
+                    {'$match': {'total': {'$ne': 0}}}
+                ]
+            }}
+        ]
+        resultado = list(self.collection.aggregate(pipeline))
+        resultado = resultado[0] if resultado else {}
+
+        def como_dict(faceta):
+            return {fila['_id']: fila['total'] for fila in resultado.get(faceta, [])}
+
+        total = resultado['total'][0]['total'] if resultado.get('total') else 0
+        genero = como_dict('genero')
+        return {
+            'total_beneficiarios': total,
+            'vulnerabilidad': {
+                'victimas': como_dict('victima').get(True, 0),
+                'discapacidad': como_dict('discapacidad').get(True, 0)
+            },
+            'genero': {
+                'masculino': genero.get('Masculino', 0),
+                'femenino': genero.get('Femenino', 0)
+            },
+            'grupos_edad': {
+                **{nombre: 0 for nombre, _, _ in GRUPOS_EDAD},
+                **{str(grupo): total for grupo, total in como_dict('grupo_edad').items()
+                   if grupo != SIN_DATO}
+            },
+            'comunas': {
+                str(comuna): total for comuna, total in como_dict('comuna').items()
+                if comuna != SIN_DATO
+            },
+            'ayudas_entregadas': {
+                valor_desde_clave(tipo): total for tipo, total in como_dict('ayudas').items()
+            }
+        }
@@ -0,0 +1,338 @@
+import base64
+import binascii
+import hashlib
+import re
+from datetime import datetime
+
+from bson.binary import Binary
+from pymongo import UpdateOne
+
+# Campo que guarda la referencia (hash SHA-256) a la firma almacenada
+CAMPO_FIRMA_REF = 'firma_hash'
+
+_PATRON_DATA_URL = re.compile(r'^data:(?P<tipo>[\w/+.-]+);base64,(?P<datos>.*)$', re.DOTALL)
+# URL de firma devuelta por la API: ruta /firmas/<hash>, con servidor y prefijo de ruta opcionales
+_PATRON_URL_FIRMA = re.compile(r'(?:https?://[\w.:-]+)?(?:/[\w.-]+)*/firmas/(?P<hash>[0-9a-f]{64})/?')
+_PATRON_ESPACIOS = re.compile(r'\s+')
+
+# Formatos de imagen admitidos para las firmas, por su firma de bytes inicial.
+# El tipo guardado (y servido como Content-Type) sale siempre de aquí, nunca
+# del prefijo que envía el cliente
+FORMATOS_FIRMA = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+)
+TIPOS_FIRMA = {'image/png', 'image/jpeg', 'image/jpg'}
+
+
+def tipo_imagen_firma(datos):
+    """
+    Detectar el formato de una firma a partir de sus bytes
+
+    :param datos: Bytes de la imagen
+    :return: Tipo MIME ('image/png' o 'image/jpeg') o None si no es un formato admitido
+    """
+    for cabecera, tipo in FORMATOS_FIRMA:
+        if datos.startswith(cabecera):
+            return tipo
+    return None
+
+
+def decodificar_firma(valor):
+    """
+    Obtener los bytes de una firma recibida como data URL o base64
+
+    Solo se admiten imágenes PNG o JPEG; el tipo devuelto se detecta en los
+    bytes decodificados.
+
+    :param valor: Cadena 'data:image/png;base64,...' o base64 sin prefijo
+    :return: Tupla (bytes, tipo MIME)
+    :raises ValueError: Si el valor no es base64 válido o no es una imagen PNG/JPEG
+    """
+    coincidencia = _PATRON_DATA_URL.match(valor.strip())
+    if coincidencia:
+        if coincidencia.group('tipo').lower() not in TIPOS_FIRMA:
+            raise ValueError("La firma debe ser una imagen PNG o JPEG")
+        valor = coincidencia.group('datos')
+    try:
+        datos = base64.b64decode(_PATRON_ESPACIOS.sub('', valor), validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("La firma no es una imagen base64 válida")
+    tipo = tipo_imagen_firma(datos)
+    if tipo is None:
+        raise ValueError("La firma debe ser una imagen PNG o JPEG")
+    return datos, tipo
+
+
+def hash_desde_url(valor):
+    """
+    Reconocer una URL de /firmas/<hash> devuelta por la API
+
+    :param valor: Valor recibido en el campo firma
+    :return: Hash de la firma o None si no es una URL de firma
+    """
+    if not isinstance(valor, str):
+        return None
+    coincidencia = _PATRON_URL_FIRMA.fullmatch(valor.strip().split('?')[0])
+    return coincidencia.group('hash') if coincidencia else None
+
+
+class FirmaModel:
+    def __init__(self, db=None):
+        """
+        Inicializar el almacén de firmas direccionado por contenido
+
+        Cada firma se guarda una sola vez en la colección 'firmas' con el
+        SHA-256 de sus bytes como _id; los documentos solo guardan ese hash.
+
+        :param db: Conexión a la base de datos MongoDB
+        """
+        if db is None:
+            from flask import current_app
+            db = current_app.config.get('db')
+
+        if db is None:
+            raise ValueError("Base de datos no configurada")
+
+        self.db = db
+        self.collection = db['firmas']
+
+    @staticmethod
+    def _documento(datos, tipo):
+        """Documento a insertar para unos bytes de firma"""
+        return {
+            'datos': Binary(datos),
+            'tipo': tipo,
+            'tamano': len(datos),
+            'fecha_creacion': datetime.utcnow()
+        }
+
+    def guardar(self, firma):
+        """
+        Guardar una firma (si no existía) y devolver su referencia
+
+        :param firma: Data URL, base64 o URL /firmas/<hash> ya existente
+        :return: Hash SHA-256 de la firma, o None si la firma está vacía
+        :raises ValueError: Si la firma no es válida o la URL apunta a una firma que no existe
+        """
+        if not firma or (isinstance(firma, str) and not firma.strip()):
+            return None
+
+        existente = hash_desde_url(firma)
+        if existente:
+            if not self.collection.count_documents({'_id': existente}, limit=1):
+                raise ValueError("La firma referenciada no existe")
+            return existente
+
+        datos, tipo = decodificar_firma(firma)
+        hash_firma = hashlib.sha256(datos).hexdigest()
+        self.collection.update_one(
+            {'_id': hash_firma},
+            {'$setOnInsert': self._documento(datos, tipo)},
+            upsert=True
+        )
+        return hash_firma
+
+    def obtener(self, hash_firma):
+        """
+        Obtener el documento de una firma
+
+        :param hash_firma: Hash SHA-256 de la firma
+        :return: Documento con datos, tipo y tamano, o None
+        """
+        return self.collection.find_one({'_id': hash_firma})
+
+    def obtener_varias(self, hashes):
+        """
+        Obtener los bytes de varias firmas en una sola consulta
+
+        :param hashes: Hashes de firma (se ignoran los vacíos)
+        :return: Diccionario {hash: bytes}
+        """
+        hashes = list({h for h in hashes if h})
+        if not hashes:
+            return {}
+        return {
+            firma['_id']: bytes(firma['datos'])
+            for firma in self.collection.find({'_id': {'$in': hashes}}, {'datos': 1})
+        }
+
+    def obtener_datos(self, documento):
+        """
+        Obtener los bytes de la firma de un documento
+
+        Admite tanto la referencia al almacén como firmas en línea todavía
+        no migradas.
+
+        :param documento: Beneficiario, asistente o entrada de asistencia
+        :return: Bytes de la imagen o None si no tiene firma
+        """
+        hash_firma = documento.get(CAMPO_FIRMA_REF)
+        if hash_firma:
+            firma = self.collection.find_one({'_id': hash_firma}, {'datos': 1})
+            return bytes(firma['datos']) if firma else None
+
+        firma = documento.get('firma')
+        if not firma or not isinstance(firma, str):
+            return None
+        hash_firma = hash_desde_url(firma)
+        if hash_firma:
+            return self.obtener_varias([hash_firma]).get(hash_firma)
+        return decodificar_firma(firma)[0]
+
+    def separar(self, datos):
+        """
+        Sustituir la firma en línea de un documento por su referencia
+
+        Modifica 'datos' en el sitio: 'firma' queda en None y la referencia
+        se guarda en CAMPO_FIRMA_REF. Si 'datos' no trae firma no se toca.
+
+        :param datos: Documento a insertar o campos de un $set
+        :return: El mismo diccionario
+        """
+        if 'firma' not in datos:
+            return datos
+        datos[CAMPO_FIRMA_REF] = self.guardar(datos['firma'])
+        datos['firma'] = None
+        return datos
+
+    def migrar_coleccion(self, coleccion, tamano_lote=200):
+        """
+        Mover al almacén las firmas en línea de una colección
+
+        :param coleccion: Colección con un campo 'firma' de nivel superior
+        :param tamano_lote: Documentos procesados por escritura masiva
+        :return: Número de documentos migrados
+        """
+        filtro = {'firma': {'$type': 'string', '$ne': ''}}
+        migrados = 0
+        while True:
+            lote = list(coleccion.find(filtro, {'firma': 1}).limit(tamano_lote))
+            if not lote:
+                return migrados
+
+            firmas = []
+            documentos = []
+            for documento in lote:
+                try:
+                    hash_firma = hash_desde_url(documento['firma'])
+                    if not hash_firma:
+                        datos, tipo = decodificar_firma(documento['firma'])
+                        hash_firma = hashlib.sha256(datos).hexdigest()
+                        firmas.append(UpdateOne(
+                            {'_id': hash_firma},
+                            {'$setOnInsert': self._documento(datos, tipo)},
+                            upsert=True
+                        ))
+                    nuevo = {CAMPO_FIRMA_REF: hash_firma, 'firma': None}
+                except ValueError:
+                    # Firma corrupta: se conserva aparte para no volver a procesarla
+                    nuevo = {'firma_invalida': documento['firma'], 'firma': None}
+                # El filtro por la firma original evita pisar una firma cambiada entretanto
+                documentos.append(UpdateOne(
+                    {'_id': documento['_id'], 'firma': documento['firma']},
+                    {'$set': nuevo}
+                ))
+
+            if firmas:
+                self.collection.bulk_write(firmas, ordered=False)
+            migrados += coleccion.bulk_write(documentos, ordered=False).modified_count
+
+    def migrar_actividades(self, coleccion, tamano_lote=50):
+        """
+        Mover al almacén las firmas en línea de los asistentes de cada actividad
+
+        :param coleccion: Colección de actividades (lista 'asistentes')
+        :param tamano_lote: Actividades procesadas por escritura masiva
+        :return: Número de entradas de asistencia migradas
+        """
+        filtro = {'asistentes': {'$elemMatch': {'firma': {'$type': 'string', '$ne': ''}}}}
+        migradas = 0
+        ultimo_id = None
+        while True:
+            consulta = dict(filtro)
+            if ultimo_id is not None:
+                consulta['_id'] = {'$gt': ultimo_id}
+            lote = list(coleccion.find(consulta, {'asistentes': 1}).sort('_id', 1).limit(tamano_lote))
+            if not lote:
+                return migradas
+            ultimo_id = lote[-1]['_id']
+
+            firmas = []
+            actividades = []
+            for actividad in lote:
+                cambios = {}
+                for indice, asistente in enumerate(actividad.get('asistentes') or []):
+                    firma = asistente.get('firma') if isinstance(asistente, dict) else None
+                    if not isinstance(firma, str) or not firma:
+                        continue
+                    try:
+                        hash_firma = hash_desde_url(firma)
+                        if not hash_firma:
+                            datos, tipo = decodificar_firma(firma)
+                            hash_firma = hashlib.sha256(datos).hexdigest()
+                            firmas.append(UpdateOne(
+                                {'_id': hash_firma},
+                                {'$setOnInsert': self._documento(datos, tipo)},
+                                upsert=True
+                            ))
+                        cambios[f'asistentes.{indice}.{CAMPO_FIRMA_REF}'] = hash_firma
+                    except ValueError:
+                        cambios[f'asistentes.{indice}.firma_invalida'] = firma
+                    cambios[f'asistentes.{indice}.firma'] = None
+                if cambios:
+                    migradas += sum(1 for campo in cambios if campo.endswith('.firma'))
+                    # Solo si la lista no cambió desde la lectura
+                    actividades.append(UpdateOne(
+                        {'_id': actividad['_id'], 'asistentes': actividad['asistentes']},
+                        {'$set': cambios}
+                    ))
+
+            if firmas:
+                self.collection.bulk_write(firmas, ordered=False)
+            if actividades:
+                coleccion.bulk_write(actividades, ordered=False)
+
+
+def separar_firmas_asistentes(db, asistentes):
+    """
+    Sustituir por referencias las firmas en línea de una lista de asistencia
+
+    :param db: Conexión a la base de datos MongoDB
+    :param asistentes: Lista de entradas de asistencia (se modifica en el sitio)
+    :return: La misma lista
+    """
+    if not asistentes:
+        return asistentes
+    firmas = FirmaModel(db)
+    for asistente in asistentes:
+        if isinstance(asistente, dict) and asistente.get('firma'):
+            firmas.separar(asistente)
+    return asistentes
+
+
+def url_firma(hash_firma):
+    """
+    URL absoluta desde la que el cliente puede descargar una firma
+
+    :param hash_firma: Hash SHA-256 de la firma
+    :return: URL de /firmas/<hash>
+    """
+    from flask import url_for
+    return url_for('firmas.obtener_firma', hash_firma=hash_firma, _external=True)
+
+
+def exponer_firma(documento):
+    """
+    Preparar la firma de un documento para la respuesta JSON
+
+    Si el documento trae el campo 'firma' y tiene referencia al almacén,
+    'firma' pasa a ser la URL de la imagen (el cliente la usa igual que
+    antes usaba la data URL).
+
+    :param documento: Documento a devolver (se modifica en el sitio)
+    :return: El mismo documento
+    """
+    if documento and 'firma' in documento and documento.get(CAMPO_FIRMA_REF):
+        documento['firma'] = url_firma(documento[CAMPO_FIRMA_REF])
+    return documento
@@ -4,6 +4,9 @@ import logging
 import bcrypt
 from datetime import datetime
 
+from app.models.linea_trabajo import asignar_nombres_lineas
+from app.utils.catalogos import catalogo
+
 class FuncionarioModel:
     def __init__(self, db=None):
         """
@@ -101,11 +104,9 @@ class FuncionarioModel:
                 # Obtener nombre de línea de trabajo si existe
                 if 'linea_trabajo' in funcionario:
                     try:
-                        linea_trabajo = self.db['lineas_trabajo'].find_one(
-                            {'_id': funcionario['linea_trabajo']}, 
-                            {'nombre': 1}
+                        funcionario['nombreLineaTrabajo'] = catalogo(self.db, 'lineas_trabajo').nombre(
+                            funcionario['linea_trabajo'], 'Sin línea de trabajo'
                         )
-                        funcionario['nombreLineaTrabajo'] = linea_trabajo.get('nombre', 'Sin línea de trabajo') if linea_trabajo else 'Sin línea de trabajo'
                     except Exception as e:
                         logging.error(f"Error al obtener línea de trabajo: {str(e)}")
                         funcionario['nombreLineaTrabajo'] = 'Sin línea de trabajo'
@@ -251,22 +252,8 @@ class FuncionarioModel:
         :return: Lista de funcionarios con información de línea de trabajo
         """
         try:
-            # Obtener todos los funcionarios con agregación para incluir nombre de línea de trabajo
+            # Obtener todos los funcionarios
             pipeline = [
-                {
-                    '$lookup': {
-                        'from': 'lineas_trabajo',  # Nombre de la colección de líneas de trabajo
-                        'localField': 'linea_trabajo',
-                        'foreignField': '_id',
-                        'as': 'lineaTrabajoDetalle'
-                    }
-                },
-                {
-                    '$unwind': {
-                        'path': '$lineaTrabajoDetalle',
-                        'preserveNullAndEmptyArrays': True  # Mantener funcionarios sin línea de trabajo
-                    }
-                },
                 {
                     '$project': {
                         '_id': {'$toString': '$_id'},
@@ -274,12 +261,6 @@ class FuncionarioModel:
                         'secretaría': 1,
                         'email': 1,
                         'linea_trabajo': {'$toString': '$linea_trabajo'},
-                        'nombreLineaTrabajo': {
-                            '$ifNull': [
-                                '$lineaTrabajoDetalle.nombre', 
-                                'Sin línea de trabajo asignada'
-                            ]
-                        },
                         'rol': 1,
                         'fecha_registro': 1,
                         'estado': 1,
@@ -292,6 +273,10 @@ class FuncionarioModel:
             # Ejecutar agregación
             funcionarios = list(self.collection.aggregate(pipeline))
             
+            # Resolver los nombres de línea de trabajo con una sola consulta
+            # (linea_trabajo puede estar guardada como ObjectId o como texto)
+            asignar_nombres_lineas(self.db, funcionarios, campo_nombre='nombreLineaTrabajo')
+            
             return funcionarios
         
         except Exception as e:
@@ -3,6 +3,9 @@ from datetime import datetime
 from bson import ObjectId
 import logging
 
+from app.models.version_datos import registrar_cambio_datos
+from app.utils.catalogos import catalogo, invalidar_catalogo
+
 class LineaTrabajoSchema(Schema):
     nombre = fields.Str(required=True, validate=[
         validate.Length(min=2, max=100),
@@ -16,6 +19,40 @@ class LineaTrabajoSchema(Schema):
 linea_trabajo_schema = LineaTrabajoSchema()
 lineas_trabajo_schema = LineaTrabajoSchema(many=True)
 
+def resolver_nombres_lineas(db, ids):
+    """
+    Obtener los nombres de varias líneas de trabajo desde el catálogo en memoria
+    
+    :param db: Base de datos de MongoDB
+    :param ids: IDs de línea de trabajo (str u ObjectId; se ignoran los que no existen)
+    :return: Diccionario {id_en_texto: nombre}
+    """
+    lineas = catalogo(db, 'lineas_trabajo')
+    nombres = {}
+    for linea_id in ids:
+        linea = lineas.obtener(linea_id)
+        if linea:
+            nombres[str(linea_id)] = linea.get('nombre')
+    return nombres
+
+def asignar_nombres_lineas(db, documentos, campo_id='linea_trabajo',
+                           campo_nombre='nombre_linea_trabajo', por_defecto='Sin línea de trabajo'):
+    """
+    Completar el nombre de la línea de trabajo de una página de documentos
+    resolviendo todos los IDs de una vez en lugar de una consulta por fila
+    
+    :param db: Base de datos de MongoDB
+    :param documentos: Lista de documentos a completar (se modifican en sitio)
+    :param campo_id: Campo con el ID de la línea de trabajo
+    :param campo_nombre: Campo donde se guarda el nombre
+    :param por_defecto: Valor cuando la línea no existe
+    :return: La misma lista de documentos
+    """
+    nombres = resolver_nombres_lineas(db, [doc.get(campo_id) for doc in documentos])
+    for doc in documentos:
+        doc[campo_nombre] = nombres.get(str(doc.get(campo_id))) or por_defecto
+    return documentos
+
 class LineaTrabajo:
     def __init__(self, collection):
         """
@@ -46,6 +83,8 @@ class LineaTrabajo:
             
             # Insertar línea de trabajo
             resultado = self.collection.insert_one(datos)
+            registrar_cambio_datos(self.collection.database, 'lineas_trabajo')
+            invalidar_catalogo(self.collection.database, 'lineas_trabajo')
             
             return str(resultado.inserted_id)
         except Exception as e:
@@ -59,7 +98,7 @@ class LineaTrabajo:
         :return: Lista de líneas de trabajo
         """
         try:
-            lineas = list(self.collection.find())
+            lineas = [dict(linea) for linea in catalogo(self.collection.database, 'lineas_trabajo').documentos]
             
             # Convertir ObjectId a string para cada línea
             for linea in lineas:
@@ -79,7 +118,8 @@ class LineaTrabajo:
         :return: Línea de trabajo o None si no se encuentra
         """
         try:
-            linea = self.collection.find_one({'_id': ObjectId(linea_trabajo_id)})
+            linea = catalogo(self.collection.database, 'lineas_trabajo').obtener(ObjectId(linea_trabajo_id))
+            linea = dict(linea) if linea else None
             
             if linea:
                 linea['id'] = str(linea['_id'])
@@ -99,7 +139,8 @@ class LineaTrabajo:
         :return: Línea de trabajo o None si no se encuentra
         """
         try:
-            linea = self.collection.find_one({'nombre': nombre})
+            linea = catalogo(self.collection.database, 'lineas_trabajo').por_nombre.get(nombre)
+            linea = dict(linea) if linea else None
             
             if linea:
                 linea['id'] = str(linea['_id'])
@@ -124,6 +165,9 @@ class LineaTrabajo:
                 {'_id': ObjectId(linea_trabajo_id)}, 
                 {'$set': datos}
             )
+            if resultado.modified_count:
+                registrar_cambio_datos(self.collection.database, 'lineas_trabajo')
+                invalidar_catalogo(self.collection.database, 'lineas_trabajo')
             
             return resultado.modified_count
         except Exception as e:
@@ -139,6 +183,9 @@ class LineaTrabajo:
         """
         try:
             resultado = self.collection.delete_one({'_id': ObjectId(linea_trabajo_id)})
+            if resultado.deleted_count:
+                registrar_cambio_datos(self.collection.database, 'lineas_trabajo')
+                invalidar_catalogo(self.collection.database, 'lineas_trabajo')
             
             return resultado.deleted_count
         except Exception as e:
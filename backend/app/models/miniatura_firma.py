@@ -0,0 +1,197 @@
+import hashlib
+import logging
+from datetime import datetime
+from io import BytesIO
+
+from bson.binary import Binary
+from pymongo import UpdateOne
+
+from app.models.firma import FirmaModel, CAMPO_FIRMA_REF, decodificar_firma, hash_desde_url
+
+logger = logging.getLogger(__name__)
+
+# Caja en la que se ajusta la firma dentro de la celda de la hoja de asistencia
+TAMANO_MINIATURA = (150, 50)
+
+# Miniaturas que se conservan; al superarse se descartan las usadas hace más tiempo
+MAXIMO_MINIATURAS = 20000
+
+
+def generar_miniatura(datos, tamano=TAMANO_MINIATURA):
+    """
+    Reducir una firma a PNG del tamaño de la celda
+
+    :param datos: Bytes de la imagen original
+    :param tamano: Ancho y alto máximos
+    :return: Bytes PNG de la miniatura
+    """
+    from PIL import Image
+
+    imagen = Image.open(BytesIO(datos))
+    imagen.thumbnail(tamano, Image.Resampling.LANCZOS)
+    salida = BytesIO()
+    imagen.save(salida, format='PNG')
+    return salida.getvalue()
+
+
+def referencia_firma(documento):
+    """
+    Clave de contenido de la firma de un documento
+
+    Para las firmas del almacén la clave es su hash (no hace falta leer los
+    bytes); las firmas en línea todavía no migradas se decodifican y se
+    calcula el mismo SHA-256.
+
+    :param documento: Beneficiario, asistente o entrada de asistencia
+    :return: Tupla (clave, bytes o None); (None, None) si no tiene firma
+    :raises ValueError: Si la firma en línea no es base64 válido
+    """
+    if not documento:
+        return None, None
+    hash_firma = documento.get(CAMPO_FIRMA_REF)
+    if hash_firma:
+        return hash_firma, None
+
+    firma = documento.get('firma')
+    if not firma or not isinstance(firma, str):
+        return None, None
+    hash_firma = hash_desde_url(firma)
+    if hash_firma:
+        return hash_firma, None
+    datos = decodificar_firma(firma)[0]
+    return hashlib.sha256(datos).hexdigest(), datos
+
+
+class MiniaturaFirmaModel:
+    def __init__(self, db=None, maximo=None):
+        """
+        Inicializar la caché de miniaturas de firma
+
+        Cada miniatura se guarda en la colección 'miniaturas_firma' con el
+        SHA-256 de la firma original como _id, de modo que una firma se
+        reduce una sola vez aunque aparezca en muchas actividades y
+        exportaciones. 'ultimo_uso' permite descartar las menos usadas.
+
+        :param db: Conexión a la base de datos MongoDB
+        :param maximo: Miniaturas que se conservan (por defecto MINIATURAS_FIRMA_MAXIMO)
+        """
+        from flask import current_app, has_app_context
+
+        if db is None and has_app_context():
+            db = current_app.config.get('db')
+
+        if db is None:
+            raise ValueError("Base de datos no configurada")
+
+        if maximo is None:
+            maximo = current_app.config.get('MINIATURAS_FIRMA_MAXIMO') if has_app_context() else None
+
+        self.db = db
+        self.collection = db['miniaturas_firma']
+        self.maximo = maximo or MAXIMO_MINIATURAS
+
+    def crear_indices(self):
+        """Crear el índice por fecha de último uso que usa el descarte"""
+        self.collection.create_index('ultimo_uso')
+
+    def miniaturas(self, documentos, ejecutor=None):
+        """
+        Obtener la miniatura de la firma de cada documento
+
+        Las miniaturas ya guardadas se leen con una sola consulta. Las que
+        faltan se generan en 'ejecutor' (si se indica) y se guardan para las
+        siguientes exportaciones.
+
+        :param documentos: Documentos con firma (referencia o en línea); admite None
+        :param ejecutor: Grupo de hilos o procesos para generar las que faltan
+        :return: Lista alineada con 'documentos': bytes PNG, None si no tiene
+                 firma o False si la firma no se pudo obtener
+        """
+        claves = []
+        originales = {}
+        for documento in documentos:
+            try:
+                clave, datos = referencia_firma(documento)
+            except ValueError as e:
+                logger.error(f"Firma en línea inválida: {str(e)}")
+                claves.append(False)
+                continue
+            claves.append(clave)
+            if datos is not None:
+                originales[clave] = datos
+
+        solicitadas = list({clave for clave in claves if clave})
+        if not solicitadas:
+            return claves
+
+        ahora = datetime.utcnow()
+        encontradas = {
+            miniatura['_id']: bytes(miniatura['datos'])
+            for miniatura in self.collection.find({'_id': {'$in': solicitadas}}, {'datos': 1})
+        }
+        if encontradas:
+            self.collection.update_many({'_id': {'$in': list(encontradas)}}, {'$set': {'ultimo_uso': ahora}})
+
+        faltantes = [clave for clave in solicitadas if clave not in encontradas]
+        if faltantes:
+            encontradas.update(self._generar(faltantes, originales, ahora, ejecutor))
+
+        return [encontradas.get(clave, False) if clave else clave for clave in claves]
+
+    def _generar(self, claves, originales, ahora, ejecutor=None):
+        """
+        Generar y guardar las miniaturas que no estaban en la caché
+
+        :return: Diccionario {clave: bytes PNG} de las que se pudieron generar
+        """
+        pendientes = [clave for clave in claves if clave not in originales]
+        datos = dict(originales)
+        datos.update(FirmaModel(self.db).obtener_varias(pendientes))
+        claves = [clave for clave in claves if clave in datos]
+        if not claves:
+            return {}
+
+        if ejecutor is not None and len(claves) > 1:
+            resultados = ejecutor.map(_generar_segura, [datos[clave] for clave in claves])
+        else:
+            resultados = map(_generar_segura, [datos[clave] for clave in claves])
+        generadas = {clave: miniatura for clave, miniatura in zip(claves, resultados) if miniatura}
+
+        if generadas:
+            self.collection.bulk_write([
+                UpdateOne(
+                    {'_id': clave},
+                    {
+                        '$setOnInsert': {'datos': Binary(miniatura), 'tamano': len(miniatura)},
+                        '$set': {'ultimo_uso': ahora}
+                    },
+                    upsert=True
+                )
+                for clave, miniatura in generadas.items()
+            ], ordered=False)
+            self.descartar_antiguas()
+        return generadas
+
+    def descartar_antiguas(self):
+        """
+        Descartar las miniaturas usadas hace más tiempo si se supera el máximo
+
+        :return: Número de miniaturas eliminadas
+        """
+        sobrantes = self.collection.estimated_document_count() - self.maximo
+        if sobrantes <= 0:
+            return 0
+        antiguas = [
+            miniatura['_id']
+            for miniatura in self.collection.find({}, {'_id': 1}).sort('ultimo_uso', 1).limit(sobrantes)
+        ]
+        return self.collection.delete_many({'_id': {'$in': antiguas}}).deleted_count
+
+
+def _generar_segura(datos):
+    """generar_miniatura para el grupo de trabajo: None si la imagen no se puede leer"""
+    try:
+        return generar_miniatura(datos)
+    except Exception as e:
+        logger.error(f"Error al generar la miniatura de una firma: {str(e)}")
+        return None
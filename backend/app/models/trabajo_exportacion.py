@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+ESTADOS_TRABAJO = ['pendiente', 'procesando', 'completado', 'error']
+
+
+class TrabajoExportacionModel:
+    def __init__(self, db=None):
+        """
+        Inicializar el modelo de trabajos de exportación en segundo plano
+
+        Cada trabajo guarda su estado, su progreso y, al terminar, la ruta del
+        archivo generado. Los documentos caducan con el archivo (índice TTL
+        sobre 'expira').
+
+        :param db: Conexión a la base de datos MongoDB
+        """
+        if db is None:
+            from flask import current_app
+            db = current_app.config.get('db')
+
+        if db is None:
+            raise ValueError("Base de datos no configurada")
+
+        self.db = db
+        self.collection = db['trabajos_exportacion']
+
+    def crear_indices(self):
+        """Crear los índices de búsqueda por clave de caché y de caducidad"""
+        self.collection.create_index([('clave_cache', 1), ('estado', 1), ('fecha_fin', -1)])
+        self.collection.create_index('expira', expireAfterSeconds=0)
+
+    def crear(self, funcionario_id, endpoint, url, clave_cache, ttl_horas):
+        """
+        Registrar un trabajo pendiente
+
+        :param funcionario_id: ID del funcionario que lo solicita
+        :param endpoint: Endpoint de exportación que se ejecutará
+        :param url: URL de exportación solicitada
+        :param clave_cache: Clave del resultado (filtros + versión de los datos)
+        :param ttl_horas: Horas que se conserva el trabajo y su archivo
+        :return: ID del trabajo
+        """
+        ahora = datetime.utcnow()
+        resultado = self.collection.insert_one({
+            'funcionario_id': funcionario_id,
+            'endpoint': endpoint,
+            'url': url,
+            'clave_cache': clave_cache,
+            'estado': 'pendiente',
+            'progreso': {},
+            'reutilizado': False,
+            'fecha_creacion': ahora,
+            'expira': ahora + timedelta(hours=ttl_horas)
+        })
+        return str(resultado.inserted_id)
+
+    def crear_reutilizado(self, funcionario_id, url, origen):
+        """
+        Registrar un trabajo ya completado que reutiliza el archivo de otro
+
+        :param funcionario_id: ID del funcionario que lo solicita
+        :param url: URL de exportación solicitada
+        :param origen: Trabajo completado con la misma clave de caché
+        :return: ID del trabajo
+        """
+        ahora = datetime.utcnow()
+        campos = ('endpoint', 'clave_cache', 'archivo', 'nombre_archivo', 'mimetype', 'tamano', 'expira')
+        resultado = self.collection.insert_one({
+            **{campo: origen.get(campo) for campo in campos},
+            'funcionario_id': funcionario_id,
+            'url': url,
+            'estado': 'completado',
+            'progreso': origen.get('progreso', {}),
+            'reutilizado': True,
+            'origen': origen['_id'],
+            'fecha_creacion': ahora,
+            'fecha_fin': ahora
+        })
+        return str(resultado.inserted_id)
+
+    def obtener(self, trabajo_id):
+        """
+        Obtener un trabajo por su ID
+
+        :param trabajo_id: ID del trabajo
+        :return: Documento del trabajo o None
+        """
+        if not ObjectId.is_valid(trabajo_id):
+            return None
+        return self.collection.find_one({'_id': ObjectId(trabajo_id)})
+
+    def buscar_completado(self, clave_cache):
+        """
+        Buscar el último trabajo completado (y vigente) con una clave de caché
+
+        :param clave_cache: Clave del resultado
+        :return: Documento del trabajo o None
+        """
+        return self.collection.find_one(
+            {'clave_cache': clave_cache, 'estado': 'completado', 'expira': {'$gt': datetime.utcnow()}},
+            sort=[('fecha_fin', -1)]
+        )
+
+    def iniciar(self, trabajo_id):
+        """Marcar un trabajo como en proceso"""
+        self.collection.update_one(
+            {'_id': ObjectId(trabajo_id)},
+            {'$set': {'estado': 'procesando', 'fecha_inicio': datetime.utcnow()}}
+        )
+
+    def actualizar_progreso(self, trabajo_id, progreso):
+        """
+        Guardar el progreso de un trabajo
+
+        :param trabajo_id: ID del trabajo
+        :param progreso: Diccionario con bytes escritos y registros procesados
+        """
+        self.collection.update_one(
+            {'_id': ObjectId(trabajo_id), 'estado': 'procesando'},
+            {'$set': {'progreso': progreso}}
+        )
+
+    def completar(self, trabajo_id, archivo, nombre_archivo, mimetype, tamano, progreso):
+        """
+        Marcar un trabajo como completado con su archivo
+
+        :param trabajo_id: ID del trabajo
+        :param archivo: Ruta del archivo generado
+        :param nombre_archivo: Nombre con el que se descarga
+        :param mimetype: Tipo MIME del archivo
+        :param tamano: Tamaño en bytes
+        :param progreso: Progreso final
+        """
+        self.collection.update_one(
+            {'_id': ObjectId(trabajo_id)},
+            {'$set': {
+                'estado': 'completado',
+                'archivo': archivo,
+                'nombre_archivo': nombre_archivo,
+                'mimetype': mimetype,
+                'tamano': tamano,
+                'progreso': progreso,
+                'fecha_fin': datetime.utcnow()
+            }}
+        )
+
+    def fallar(self, trabajo_id, mensaje, codigo=500):
+        """
+        Marcar un trabajo como fallido
+
+        :param trabajo_id: ID del trabajo
+        :param mensaje: Descripción del error
+        :param codigo: Código HTTP que devolvió la exportación
+        """
+        self.collection.update_one(
+            {'_id': ObjectId(trabajo_id)},
+            {'$set': {
+                'estado': 'error',
+                'error': mensaje,
+                'codigo_error': codigo,
+                'fecha_fin': datetime.utcnow()
+            }}
+        )
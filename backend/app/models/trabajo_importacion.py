@@ -0,0 +1,125 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+ESTADOS_IMPORTACION = ['pendiente', 'procesando', 'completado', 'error']
+
+
+class TrabajoImportacionModel:
+    def __init__(self, db=None):
+        """
+        Inicializar el modelo de importaciones masivas
+
+        Cada trabajo guarda el archivo subido, su progreso y el punto de
+        control (última fila escrita) desde el que se reanuda tras un fallo.
+
+        :param db: Conexión a la base de datos MongoDB
+        """
+        if db is None:
+            from flask import current_app
+            db = current_app.config.get('db')
+
+        if db is None:
+            raise ValueError("Base de datos no configurada")
+
+        self.db = db
+        self.collection = db['trabajos_importacion']
+
+    def crear_indices(self):
+        """Crear el índice de consulta por funcionario"""
+        self.collection.create_index([('funcionario_id', 1), ('fecha_creacion', -1)])
+
+    def crear(self, funcionario_id, tipo, archivo, nombre_archivo, formato, valores_por_defecto, trabajo_id=None):
+        """
+        Registrar una importación pendiente
+
+        :param funcionario_id: ID del funcionario que la solicita
+        :param tipo: Clave de TIPOS_IMPORTACION ('beneficiarios' o 'poblacion_migrante')
+        :param archivo: Ruta del archivo subido
+        :param nombre_archivo: Nombre original del archivo
+        :param formato: 'xlsx' o 'csv'
+        :param valores_por_defecto: Valores para los campos obligatorios que falten en el archivo
+        :param trabajo_id: ID con el que se registra (el del nombre del archivo guardado)
+        :return: ID del trabajo
+        """
+        resultado = self.collection.insert_one({
+            '_id': trabajo_id or ObjectId(),
+            'funcionario_id': funcionario_id,
+            'tipo': tipo,
+            'archivo': archivo,
+            'nombre_archivo': nombre_archivo,
+            'formato': formato,
+            'valores_por_defecto': valores_por_defecto,
+            'estado': 'pendiente',
+            'fila_confirmada': 0,
+            'tamano_rechazados': 0,
+            'progreso': {'filas': 0, 'insertados': 0, 'actualizados': 0, 'rechazados': 0},
+            'fecha_creacion': datetime.utcnow()
+        })
+        return str(resultado.inserted_id)
+
+    def obtener(self, trabajo_id):
+        """
+        Obtener una importación por su ID
+
+        :param trabajo_id: ID del trabajo
+        :return: Documento del trabajo o None
+        """
+        if not ObjectId.is_valid(trabajo_id):
+            return None
+        return self.collection.find_one({'_id': ObjectId(trabajo_id)})
+
+    def iniciar(self, trabajo_id, columnas, total=None):
+        """
+        Marcar una importación como en proceso
+
+        :param trabajo_id: ID del trabajo
+        :param columnas: Correspondencia encabezado -> campo del esquema
+        :param total: Filas del archivo, si se conocen
+        """
+        self.collection.update_one(
+            {'_id': ObjectId(trabajo_id)},
+            {
+                '$set': {'estado': 'procesando', 'columnas': columnas, 'total': total,
+                         'fecha_inicio': datetime.utcnow()},
+                '$unset': {'error': ''}
+            }
+        )
+
+    def confirmar(self, trabajo_id, fila, tamano_rechazados, progreso):
+        """
+        Guardar el punto de control tras escribir un bloque
+
+        :param trabajo_id: ID del trabajo
+        :param fila: Última fila del archivo ya escrita en la base de datos
+        :param tamano_rechazados: Bytes escritos en el informe de rechazados hasta esa fila
+        :param progreso: Contadores de filas, insertados, actualizados y rechazados
+        """
+        self.collection.update_one(
+            {'_id': ObjectId(trabajo_id)},
+            {'$set': {
+                'fila_confirmada': fila,
+                'tamano_rechazados': tamano_rechazados,
+                'progreso': progreso,
+                'fecha_actualizacion': datetime.utcnow()
+            }}
+        )
+
+    def completar(self, trabajo_id, progreso):
+        """Marcar una importación como completada"""
+        self.collection.update_one(
+            {'_id': ObjectId(trabajo_id)},
+            {'$set': {'estado': 'completado', 'progreso': progreso, 'fecha_fin': datetime.utcnow()}}
+        )
+
+    def fallar(self, trabajo_id, mensaje):
+        """
+        Marcar una importación como fallida (se puede reanudar)
+
+        :param trabajo_id: ID del trabajo
+        :param mensaje: Descripción del error
+        """
+        self.collection.update_one(
+            {'_id': ObjectId(trabajo_id)},
+            {'$set': {'estado': 'error', 'error': mensaje, 'fecha_fin': datetime.utcnow()}}
+        )
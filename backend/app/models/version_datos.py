@@ -0,0 +1,70 @@
+import logging
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+class VersionDatosModel:
+    def __init__(self, db=None):
+        """
+        Inicializar el registro de versiones de datos
+
+        Guarda un contador por colección en 'versiones_datos' que aumenta con
+        cada escritura. Las exportaciones en segundo plano lo usan como parte
+        de la clave de caché: si el contador cambió, el archivo guardado ya no
+        corresponde a los datos actuales.
+
+        :param db: Conexión a la base de datos MongoDB
+        """
+        if db is None:
+            from flask import current_app
+            db = current_app.config.get('db')
+
+        if db is None:
+            raise ValueError("Base de datos no configurada")
+
+        self.db = db
+        self.collection = db['versiones_datos']
+
+    def incrementar(self, coleccion):
+        """
+        Registrar un cambio en una colección
+
+        :param coleccion: Nombre de la colección modificada
+        :return: Nueva versión de la colección
+        """
+        documento = self.collection.find_one_and_update(
+            {'_id': coleccion},
+            {'$inc': {'version': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return documento['version']
+
+    def obtener(self, colecciones):
+        """
+        Obtener la versión actual de varias colecciones
+
+        :param colecciones: Nombres de las colecciones
+        :return: Diccionario {coleccion: version} (0 si nunca se modificó)
+        """
+        versiones = {coleccion: 0 for coleccion in colecciones}
+        for documento in self.collection.find({'_id': {'$in': list(colecciones)}}):
+            versiones[documento['_id']] = documento.get('version', 0)
+        return versiones
+
+
+def registrar_cambio_datos(db, coleccion):
+    """
+    Aumentar la versión de una colección tras una escritura
+
+    Un fallo aquí no debe impedir la escritura que ya se hizo: solo se registra.
+
+    :param db: Conexión a la base de datos MongoDB
+    :param coleccion: Nombre de la colección modificada
+    """
+    try:
+        VersionDatosModel(db).incrementar(coleccion)
+    except Exception as e:
+        logger.error(f"Error al registrar el cambio de datos en {coleccion}: {str(e)}")
@@ -1,23 +1,17 @@
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
 from bson.objectid import ObjectId
 from marshmallow import ValidationError
 from ..models.asignacion_linea import asignacion_linea_schema, asignaciones_linea_schema
+from ..utils.autorizacion import role_required, funcionario_actual
+from ..utils.catalogos import catalogo
 
 asignaciones_bp = Blueprint('asignaciones', __name__)
 
 @asignaciones_bp.route('/crear', methods=['POST'])
-@jwt_required()
+@role_required(['admin', 'usuario'], "No tienes permisos para crear asignaciones")
 def crear_asignacion():
     try:
-        # Verificar rol del usuario
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-        
-        if funcionario['rol'] not in ['admin', 'usuario']:
-            return jsonify({"msg": "No tienes permisos para crear asignaciones"}), 403
-        
         data = request.get_json()
         
         try:
@@ -27,12 +21,11 @@ def crear_asignacion():
         
         # Verificar que los IDs existan
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
-        lineas_trabajo = current_app.config['MONGO_DB']['lineas_trabajo']
         
         if not beneficiarios.find_one({'_id': ObjectId(asignacion['beneficiario_id'])}):
             return jsonify({"msg": "Beneficiario no encontrado"}), 404
         
-        if not lineas_trabajo.find_one({'_id': ObjectId(asignacion['linea_trabajo_id'])}):
+        if not catalogo(current_app.config['MONGO_DB'], 'lineas_trabajo').obtener(asignacion['linea_trabajo_id']):
             return jsonify({"msg": "Línea de trabajo no encontrada"}), 404
         
         asignaciones = current_app.config['MONGO_DB']['asignaciones']
@@ -50,14 +43,13 @@ def crear_asignacion():
 @jwt_required()
 def listar_asignaciones():
     try:
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
+        funcionario = funcionario_actual()
+        funcionario_id = funcionario['id']
         
         asignaciones = current_app.config['MONGO_DB']['asignaciones']
         
         # Si es admin, muestra todas las asignaciones
-        if funcionario['rol'] == 'admin':
+        if funcionario.get('rol') == 'admin':
             lista_asignaciones = list(asignaciones.find())
         else:
             # Si es usuario, muestra solo sus asignaciones
@@ -77,16 +69,9 @@ def listar_asignaciones():
         return jsonify({"msg": f"Error al listar asignaciones: {str(e)}"}), 500
 
 @asignaciones_bp.route('/editar/<asignacion_id>', methods=['PUT'])
-@jwt_required()
+@role_required(['admin', 'usuario'], "No tienes permisos para editar asignaciones")
 def editar_asignacion(asignacion_id):
     try:
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-        
-        if funcionario['rol'] not in ['admin', 'usuario']:
-            return jsonify({"msg": "No tienes permisos para editar asignaciones"}), 403
-        
         data = request.get_json()
         
         try:
@@ -109,16 +94,9 @@ def editar_asignacion(asignacion_id):
         return jsonify({"msg": f"Error al editar asignación: {str(e)}"}), 500
 
 @asignaciones_bp.route('/eliminar/<asignacion_id>', methods=['DELETE'])
-@jwt_required()
+@role_required(['admin'], "No tienes permisos para eliminar asignaciones")
 def eliminar_asignacion(asignacion_id):
     try:
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-        
-        if funcionario['rol'] != 'admin':
-            return jsonify({"msg": "No tienes permisos para eliminar asignaciones"}), 403
-        
         asignaciones = current_app.config['MONGO_DB']['asignaciones']
         result = asignaciones.delete_one({'_id': ObjectId(asignacion_id)})
         
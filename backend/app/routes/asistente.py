@@ -3,7 +3,11 @@ from flask import Blueprint, request, jsonify
 from bson import ObjectId
 from datetime import datetime
 import logging
-from ..models.asistente import AsistenteModel
+from pymongo.errors import DuplicateKeyError
+from ..models.asistente import AsistenteModel, CAMPOS_UNICOS
+from ..models.firma import exponer_firma
+from ..utils.busqueda import limite_autocompletar
+from ..utils.unicidad import campo_duplicado, valor_repetido
 
 # Configurar el logger
 logger = logging.getLogger(__name__)
@@ -15,6 +19,34 @@ asistente_bp = Blueprint('asistente', __name__)
 db = None
 asistente_model = None
 
+
+def respuesta_duplicado(error, datos):
+    """
+    Respuesta 400 para una cédula o un email que ya tiene otro asistente
+
+    :param error: DuplicateKeyError lanzado por uno de los índices únicos
+    :param datos: Campos que se intentaron guardar
+    :return: Tupla (respuesta, código)
+    """
+    return respuesta_campo_repetido(campo_duplicado(error, list(CAMPOS_UNICOS), datos), datos)
+
+
+def respuesta_campo_repetido(campo, datos):
+    """
+    Respuesta 400 para un campo único cuyo valor ya tiene otro asistente
+
+    :param campo: Campo repetido ('cedula' o 'email')
+    :param datos: Campos que se intentaron guardar
+    :return: Tupla (respuesta, código)
+    """
+    logger.error(f'{campo} duplicado: {datos.get(campo)}')
+    return jsonify({
+        'success': False,
+        'message': CAMPOS_UNICOS[campo],
+        'field': campo
+    }), 400
+
+
 @asistente_bp.route('', methods=['GET'])
 def listar_asistentes():
     """
@@ -30,6 +62,8 @@ def listar_asistentes():
         
         # Obtener asistentes usando el modelo
         asistentes = asistente_model.listar_todos(query)
+        for asistente in asistentes:
+            exponer_firma(asistente)
         
         return jsonify({
             'success': True,
@@ -45,6 +79,36 @@ def listar_asistentes():
             'error': str(e)
         }), 500
 
+@asistente_bp.route('/autocompletar', methods=['GET'])
+def autocompletar_asistentes():
+    """
+    Sugerencias de asistentes mientras se escribe (nombre o cédula)
+    """
+    try:
+        try:
+            limite = limite_autocompletar(request.args.get('limite'))
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': 'El parámetro limite debe ser un número entero'
+            }), 400
+
+        asistentes = asistente_model.autocompletar(request.args.get('q', ''), limite)
+
+        return jsonify({
+            'success': True,
+            'data': asistentes,
+            'count': len(asistentes)
+        })
+        
+    except Exception as e:
+        logger.error(f'Error al autocompletar asistentes: {str(e)}')
+        return jsonify({
+            'success': False,
+            'message': 'Error al buscar asistentes',
+            'error': str(e)
+        }), 500
+
 @asistente_bp.route('', methods=['POST'])
 def crear_asistente():
     """
@@ -64,25 +128,6 @@ def crear_asistente():
                     'field': field
                 }), 400
         
-        # Validar que no exista un asistente con la misma cédula
-        if asistente_model.buscar_por_cedula(data['cedula']):
-            logger.error(f'Cédula duplicada: {data["cedula"]}')
-            return jsonify({
-                'success': False,
-                'message': 'Ya existe un asistente con esta cédula',
-                'field': 'cedula'
-            }), 400
-            
-        # Si se proporciona email, validar que sea único
-        if data.get('email'):
-            if asistente_model.buscar_por_email(data['email']):
-                logger.error(f'Email duplicado: {data["email"]}')
-                return jsonify({
-                    'success': False,
-                    'message': 'Ya existe un asistente con este correo electrónico',
-                    'field': 'email'
-                }), 400
-        
         # Normalizar datos
         tipo_participacion = data.get('tipo_participacion', 'SERVIDOR PÚBLICO').strip().upper()
         
@@ -101,8 +146,16 @@ def crear_asistente():
             'firma': data.get('firma')  # Añadir el campo de firma
         }
         
-        # Crear el asistente usando el modelo
-        asistente_id = asistente_model.crear(asistente)
+        # Sin índice único (datos antiguos con repetidos), verificar antes cédula y email
+        campo = valor_repetido(asistente_model.collection, asistente, list(CAMPOS_UNICOS))
+        if campo:
+            return respuesta_campo_repetido(campo, asistente)
+
+        # Crear el asistente usando el modelo (los índices únicos rechazan cédula o email repetidos)
+        try:
+            asistente_id = asistente_model.crear(asistente)
+        except DuplicateKeyError as e:
+            return respuesta_duplicado(e, asistente)
         
         if not asistente_id:
             raise Exception('No se pudo crear el asistente')
@@ -114,7 +167,7 @@ def crear_asistente():
         return jsonify({
             'success': True,
             'message': 'Asistente creado exitosamente',
-            'data': asistente_creado
+            'data': exponer_firma(asistente_creado)
         }), 201
         
     except Exception as e:
@@ -149,7 +202,7 @@ def obtener_asistente(asistente_id):
         
         return jsonify({
             'success': True,
-            'data': asistente
+            'data': exponer_firma(asistente)
         })
         
     except Exception as e:
@@ -193,26 +246,6 @@ def actualizar_asistente(asistente_id):
                     'field': campo
                 }), 400
         
-        # Validar cédula única si se está actualizando
-        if 'cedula' in data and data['cedula'] != asistente['cedula']:
-            if asistente_model.buscar_por_cedula(data['cedula']):
-                logger.error(f'Cédula duplicada: {data["cedula"]}')
-                return jsonify({
-                    'success': False,
-                    'message': 'Ya existe un asistente con esta cédula',
-                    'field': 'cedula'
-                }), 400
-        
-        # Validar email único si se está actualizando
-        if 'email' in data and data.get('email') and data['email'] != asistente.get('email', ''):
-            if asistente_model.buscar_por_email(data['email']):
-                logger.error(f'Email duplicado: {data["email"]}')
-                return jsonify({
-                    'success': False,
-                    'message': 'Ya existe un asistente con este correo electrónico',
-                    'field': 'email'
-                }), 400
-        
         # Preparar los datos a actualizar
         datos_actualizacion = {
             'nombre': data.get('nombre', asistente.get('nombre', '')).strip(),
@@ -229,22 +262,31 @@ def actualizar_asistente(asistente_id):
         if 'firma' in data:
             datos_actualizacion['firma'] = data['firma']
         
-        # Actualizar el asistente usando el modelo
-        asistente_actualizado = asistente_model.actualizar_por_id(asistente_id, datos_actualizacion)
+        # Sin índice único (datos antiguos con repetidos), verificar antes cédula y email
+        campo = valor_repetido(asistente_model.collection, datos_actualizacion, list(CAMPOS_UNICOS),
+                               excluir_id=ObjectId(asistente_id))
+        if campo:
+            return respuesta_campo_repetido(campo, datos_actualizacion)
+
+        # Actualizar el asistente usando el modelo (los índices únicos rechazan cédula o email repetidos)
+        try:
+            asistente_actualizado = asistente_model.actualizar_por_id(asistente_id, datos_actualizacion)
+        except DuplicateKeyError as e:
+            return respuesta_duplicado(e, datos_actualizacion)
         
         if not asistente_actualizado:
             logger.warning(f'No se realizaron cambios en el asistente {asistente_id}')
             return jsonify({
                 'success': True,
                 'message': 'No se realizaron cambios en el asistente',
-                'data': asistente
+                'data': exponer_firma(asistente)
             })
         
         logger.info(f'Asistente actualizado exitosamente: {asistente_id}')
         return jsonify({
             'success': True,
             'message': 'Asistente actualizado correctamente',
-            'data': asistente_actualizado
+            'data': exponer_firma(asistente_actualizado)
         })
         
     except Exception as e:
@@ -3,11 +3,12 @@ from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
     jwt_required,
-    get_jwt_identity,
-    get_jwt
+    get_jwt_identity
 )
 from ..models.funcionario import FuncionarioModel
 from ..schemas.funcionario_schema import funcionario_schema
+from ..utils.autorizacion import claims_funcionario, cache_funcionarios
+from ..utils.catalogos import catalogo
 import logging
 import bcrypt
 from datetime import datetime
@@ -92,14 +93,17 @@ def login():
         if not password_verified:
             return jsonify({"msg": "Contraseña incorrecta"}), 401
 
-        # Obtener nombre de línea de trabajo
-        lineas_trabajo = db['lineas_trabajo']
-        linea_trabajo_obj = lineas_trabajo.find_one({'_id': ObjectId(funcionario_completo['linea_trabajo'])})
-        nombre_linea_trabajo = linea_trabajo_obj['nombre'] if linea_trabajo_obj else 'Sin línea de trabajo'
+        # Obtener nombre de línea de trabajo (catálogo en memoria)
+        nombre_linea_trabajo = catalogo(db, 'lineas_trabajo').nombre(
+            funcionario_completo.get('linea_trabajo'), 'Sin línea de trabajo'
+        )
 
-        # Crear tokens de acceso y refresco
-        access_token = create_access_token(identity=funcionario_completo['id'])
+        # Crear tokens de acceso y refresco. El de acceso lleva rol, línea y estado
+        # para autorizar las rutas sin consultar al funcionario en cada solicitud
+        claims = claims_funcionario(funcionario_completo)
+        access_token = create_access_token(identity=funcionario_completo['id'], additional_claims=claims)
         refresh_token = create_refresh_token(identity=funcionario_completo['id'])
+        cache_funcionarios().guardar(funcionario_completo['id'], claims)
 
         # Preparar respuesta
         response_data = {
@@ -188,12 +192,15 @@ def refresh():
     try:
         current_user = get_jwt_identity()
         
-        # Verificar si el token de refresco es válido
+        # El token de refresco ya pasó la comprobación de revocación; los claims
+        # del nuevo token de acceso se toman del estado actual del funcionario
         db = current_app.config['db']
-        token_data = get_jwt()
+        claims = cache_funcionarios().obtener(db, current_user, refrescar=True)
+        if claims is None:
+            return jsonify({"msg": "Funcionario no encontrado"}), 404
         
         # Crear nuevo token de acceso
-        access_token = create_access_token(identity=current_user)
+        access_token = create_access_token(identity=current_user, additional_claims=claims)
         
         return jsonify({
             'access_token': access_token,
@@ -240,6 +247,8 @@ def registro():
         
         # Insertar en la base de datos
         result = db.funcionarios.insert_one(nuevo_funcionario)
+        # Descartar un "no existe" que hubiera quedado guardado para este ID
+        cache_funcionarios().invalidar(result.inserted_id)
         
         return jsonify({
             "message": "Usuario registrado exitosamente",
@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson import ObjectId
 from app.models.beneficiario import BeneficiarioModel
+from app.utils.catalogos import catalogo
 import logging
 import re
 
@@ -23,7 +24,7 @@ def obtener_estadisticas_beneficiarios(linea_trabajo_id):
         linea_trabajo_obj_id = ObjectId(linea_trabajo_id)
         
         # Verificar si la línea de trabajo existe
-        linea_trabajo = db['lineas_trabajo'].find_one({'_id': linea_trabajo_obj_id})
+        linea_trabajo = catalogo(db, 'lineas_trabajo').obtener(linea_trabajo_obj_id)
         if not linea_trabajo:
             current_app.logger.warning(f"Línea de trabajo no encontrada: {linea_trabajo_id}")
             return jsonify({
@@ -61,6 +62,11 @@ def obtener_estadisticas_beneficiarios_todos():
         db = current_app.config['db']
         beneficiario_model = BeneficiarioModel(db)
         estadisticas = beneficiario_model.obtener_estadisticas_globales_admin()
+        if estadisticas is None:
+            return jsonify({
+                "status": "error",
+                "msg": "Las estadísticas aún no están disponibles, intente de nuevo más tarde"
+            }), 503
 
         return jsonify({
             "status": "success",
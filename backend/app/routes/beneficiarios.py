@@ -1,30 +1,79 @@
-from flask import Blueprint, request, jsonify, current_app, send_file
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from flask_jwt_extended import jwt_required
 from bson.objectid import ObjectId
-from ..models.beneficiario import beneficiario_schema, beneficiarios_schema
-import pandas as pd
-import io
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from marshmallow import ValidationError
+from ..models.beneficiario import (
+    beneficiario_schema, beneficiarios_schema, proyeccion_beneficiario,
+    COLUMNAS_EXPORTACION, CAMPOS_EXPORTACION, TIPOS_EXPORTACION, CAMPOS_UNICOS, fila_exportacion
+)
+from ..models.estadisticas import EstadisticasMaterializadasModel
+from ..models.version_datos import registrar_cambio_datos
+from ..models.firma import FirmaModel, CAMPO_FIRMA_REF, exponer_firma
+from ..models.linea_trabajo import asignar_nombres_lineas
+from ..utils.paginacion import (
+    codificar_cursor, filtro_despues_de_cursor, leer_modo_conteo, combinar_filtros,
+    LIMITE_CONTEO_ESTIMADO, POR_PAGINA_TODOS
+)
+from ..utils.proyeccion import leer_campos
+from ..utils.trabajos import reportar_progreso, en_trabajo_exportacion
+from ..utils.exportacion import (
+    generar_xlsx, generar_exportacion, generar_lineas_json, leer_formato, respuesta_en_flujo,
+    FORMATOS_EXPORTACION, PARQUET_DISPONIBLE, TAMANO_LOTE_EXPORTACION
+)
+from ..utils.busqueda import (
+    CAMPO_BUSQUEDA, CAMPOS_BUSQUEDA, CAMPO_AUTOCOMPLETAR, CAMPO_NOMBRE_ORDEN, campos_busqueda, filtro_busqueda,
+    afecta_busqueda, documentos_exactos, limite_autocompletar
+)
+from ..utils.unicidad import campo_duplicado, valor_repetido, valores_registrados, CODIGO_CLAVE_DUPLICADA
+from ..utils.autorizacion import role_required
+from ..utils.catalogos import catalogo, linea_trabajo_por_nombre
 from datetime import datetime
 import math
 
 beneficiarios_bp = Blueprint('beneficiarios', __name__)
 
-@beneficiarios_bp.route('/registrar', methods=['POST'])
-@jwt_required()
-def registrar_beneficiario():
-    try:
-        # Obtener ID del funcionario desde el token
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
+# Máximo de beneficiarios por solicitud en /registrar-lote
+LIMITE_LOTE_REGISTRO = 500
+
+# Mensajes para un valor único que se repite dentro del mismo lote
+REPETIDOS_EN_LOTE = {
+    'numero_documento': "El número de documento está repetido en el lote",
+    'correo_electronico': "El correo electrónico está repetido en el lote",
+}
+
+# Intentos de la actualización condicionada a los campos de búsqueda leídos
+INTENTOS_ACTUALIZACION = 3
+
+
+def respuesta_duplicado(error, datos):
+    """
+    Respuesta 400 para un documento o correo que ya tiene otro beneficiario
+
+    :param error: DuplicateKeyError lanzado por uno de los índices únicos
+    :param datos: Campos que se intentaron guardar
+    :return: Tupla (respuesta, código)
+    """
+    return respuesta_campo_repetido(campo_duplicado(error, list(CAMPOS_UNICOS), datos), datos)
+
 
-        if not funcionario:
-            return jsonify({"msg": "Funcionario no encontrado"}), 404
+def respuesta_campo_repetido(campo, datos):
+    """
+    Respuesta 400 para un campo único cuyo valor ya tiene otro beneficiario
 
-        # Solo funcionarios pueden registrar beneficiarios
-        if funcionario['rol'] != 'funcionario':
-            return jsonify({"msg": "Solo funcionarios pueden registrar beneficiarios"}), 403
+    :param campo: Campo repetido ('numero_documento' o 'correo_electronico')
+    :param datos: Campos que se intentaron guardar
+    :return: Tupla (respuesta, código)
+    """
+    current_app.logger.warning(f"{campo} {datos.get(campo)} ya existe")
+    return jsonify({"msg": CAMPOS_UNICOS[campo], "campo": campo}), 400
 
+
+@beneficiarios_bp.route('/registrar', methods=['POST'])
+@role_required(['funcionario'], "Solo funcionarios pueden registrar beneficiarios")
+def registrar_beneficiario():
+    try:
         # Obtener datos del beneficiario
         data = request.get_json()
 
@@ -37,9 +86,29 @@ def registrar_beneficiario():
                 "errors": err.messages
             }), 400
 
-        # Insertar en base de datos
+        # La firma se guarda en el almacén de firmas y el beneficiario solo conserva su hash
+        try:
+            FirmaModel(current_app.config['MONGO_DB']).separar(beneficiario_validado)
+        except ValueError as e:
+            return jsonify({"msg": str(e), "campo": "firma"}), 400
+
+        # Términos de búsqueda normalizados
+        beneficiario_validado.update(campos_busqueda(beneficiario_validado, 'beneficiarios'))
+
+        # Insertar en base de datos (los índices únicos rechazan documento o correo
+        # repetidos; si alguno no existe se comprueba antes con una consulta)
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
-        result = beneficiarios.insert_one(beneficiario_validado)
+        campo = valor_repetido(beneficiarios, beneficiario_validado, list(CAMPOS_UNICOS))
+        if campo:
+            return respuesta_campo_repetido(campo, beneficiario_validado)
+        try:
+            result = beneficiarios.insert_one(beneficiario_validado)
+        except DuplicateKeyError as e:
+            return respuesta_duplicado(e, beneficiario_validado)
+
+        # Actualizar contadores materializados
+        EstadisticasMaterializadasModel(current_app.config['MONGO_DB']).registrar_alta(beneficiario_validado)
+        registrar_cambio_datos(current_app.config['MONGO_DB'], 'beneficiarios')
 
         return jsonify({
             "msg": "Beneficiario registrado exitosamente",
@@ -51,8 +120,127 @@ def registrar_beneficiario():
         return jsonify({"msg": f"Error interno al registrar beneficiario. Consulte los logs del servidor."}), 500
 
 
+
+@beneficiarios_bp.route('/registrar-lote', methods=['POST'])
+@role_required(['funcionario'], "Solo funcionarios pueden registrar beneficiarios")
+def registrar_beneficiarios_lote():
+    """
+    Registrar varios beneficiarios en una sola solicitud
+
+    Cuerpo: {"beneficiarios": [{...}, {...}]} (o directamente la lista). Cada
+    registro se valida por separado; los válidos se insertan juntos y la
+    respuesta indica, por posición, si cada uno quedó registrado o por qué no.
+    """
+    try:
+        db = current_app.config['MONGO_DB']
+
+        data = request.get_json(silent=True)
+        registros = data.get('beneficiarios') if isinstance(data, dict) else data
+        if not isinstance(registros, list) or not registros:
+            return jsonify({"msg": "Debe enviar una lista de beneficiarios"}), 400
+        if len(registros) > LIMITE_LOTE_REGISTRO:
+            return jsonify({
+                "msg": f"El lote supera el máximo de {LIMITE_LOTE_REGISTRO} beneficiarios por solicitud"
+            }), 400
+
+        resultados = [None] * len(registros)
+        validos = []  # (posición en el lote, documento validado)
+        for indice, registro in enumerate(registros):
+            try:
+                validos.append((indice, beneficiario_schema.load(registro)))
+            except ValidationError as err:
+                resultados[indice] = {"indice": indice, "estado": "error",
+                                      "msg": "Error de validación", "errors": err.messages}
+
+        # Los valores ya registrados los rechazan los índices únicos al insertar; si
+        # alguno no existe se buscan antes, con una sola consulta para todo el lote
+        registrados = valores_registrados(db['beneficiarios'], [b for _, b in validos], list(CAMPOS_UNICOS))
+        # Valores únicos de los registros anteriores del lote (los vacíos no cuentan)
+        vistos = {campo: set() for campo in CAMPOS_UNICOS}
+        por_insertar = []
+        for indice, beneficiario in validos:
+            repetido = next((campo for campo, valores in registrados.items()
+                             if beneficiario.get(campo) in valores), None)
+            if repetido:
+                resultados[indice] = {"indice": indice, "estado": "error",
+                                      "msg": CAMPOS_UNICOS[repetido], "campo": repetido}
+                continue
+            repetido = next((campo for campo in CAMPOS_UNICOS
+                             if beneficiario.get(campo) and beneficiario[campo] in vistos[campo]), None)
+            if repetido:
+                resultados[indice] = {"indice": indice, "estado": "error",
+                                      "msg": REPETIDOS_EN_LOTE[repetido], "campo": repetido}
+                continue
+            for campo in CAMPOS_UNICOS:
+                if beneficiario.get(campo):
+                    vistos[campo].add(beneficiario[campo])
+            por_insertar.append((indice, beneficiario))
+
+        firmas = FirmaModel(db)
+        con_firma = []
+        for indice, beneficiario in por_insertar:
+            # La firma se guarda en el almacén de firmas y el beneficiario solo conserva su hash
+            try:
+                firmas.separar(beneficiario)
+            except ValueError as e:
+                resultados[indice] = {"indice": indice, "estado": "error", "msg": str(e), "campo": "firma"}
+                continue
+            # Términos de búsqueda normalizados
+            beneficiario.update(campos_busqueda(beneficiario, 'beneficiarios'))
+            con_firma.append((indice, beneficiario))
+        por_insertar = con_firma
+
+        # Sin orden: un registro rechazado por la base de datos no detiene a los demás
+        fallidos = {}
+        if por_insertar:
+            try:
+                db['beneficiarios'].insert_many([beneficiario for _, beneficiario in por_insertar], ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get('writeErrors', []):
+                    fallidos[error['index']] = error
+
+        insertados = []
+        for posicion, (indice, beneficiario) in enumerate(por_insertar):
+            error = fallidos.get(posicion)
+            if error and error.get('code') == CODIGO_CLAVE_DUPLICADA:
+                campo = campo_duplicado(error, list(CAMPOS_UNICOS), beneficiario)
+                resultados[indice] = {"indice": indice, "estado": "error",
+                                      "msg": CAMPOS_UNICOS[campo], "campo": campo}
+            elif error:
+                current_app.logger.error(f"Error al registrar el beneficiario {indice} del lote: "
+                                         f"{error.get('errmsg', 'Error al insertar')}")
+                resultados[indice] = {"indice": indice, "estado": "error",
+                                      "msg": "No se pudo registrar el beneficiario"}
+            else:
+                insertados.append(beneficiario)
+                resultados[indice] = {"indice": indice, "estado": "registrado",
+                                      "beneficiario_id": str(beneficiario['_id'])}
+
+        if insertados:
+            # Actualizar contadores materializados (una sola actualización para el lote)
+            EstadisticasMaterializadasModel(db).registrar_altas(insertados)
+            registrar_cambio_datos(db, 'beneficiarios')
+
+        if len(insertados) == len(registros):
+            codigo = 201
+        elif insertados:
+            codigo = 207
+        else:
+            codigo = 400
+
+        return jsonify({
+            "msg": f"{len(insertados)} de {len(registros)} beneficiarios registrados",
+            "registrados": len(insertados),
+            "errores": len(registros) - len(insertados),
+            "resultados": resultados
+        }), codigo
+
+    except Exception as e:
+        current_app.logger.error(f"Error al registrar el lote de beneficiarios: {str(e)}", exc_info=True)
+        return jsonify({"msg": "Error interno al registrar el lote de beneficiarios. Consulte los logs del servidor."}), 500
+
 @beneficiarios_bp.route('/listar', methods=['GET'])
-@jwt_required()
+@role_required(['admin', 'usuario', 'funcionario'], "No tienes permisos para listar beneficiarios")
 def listar_beneficiarios():
     try:
         # Obtener parámetros de la solicitud
@@ -60,26 +248,15 @@ def listar_beneficiarios():
         por_pagina = int(request.args.get('por_pagina', 10))
         filtro = request.args.get('filtro', '')
         linea_trabajo = request.args.get('linea_trabajo')
+        # Modo cursor: ?cursor= (primera página) o ?cursor=<next_cursor>
+        modo_cursor = 'cursor' in request.args
+        cursor = request.args.get('cursor', '')
+        # Fieldset parcial: ?fields=nombre_completo,numero_documento (por defecto sin firma ni biometría)
+        campos = leer_campos(request.args.get('fields'))
 
-        # Obtener ID del usuario desde el token
-        funcionario_id = get_jwt_identity()
-        
         # Obtener colecciones
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
-        lineas_trabajo = current_app.config['MONGO_DB']['lineas_trabajo']
-
-        # Obtener funcionario
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-       
-    
-        # Validar existencia del funcionario
-        if not funcionario:
-            return jsonify({"msg": "Funcionario no encontrado"}), 404
-
-        # Validar rol del funcionario
-        if funcionario['rol'] not in ['admin', 'usuario', 'funcionario']:
-            return jsonify({"msg": "No tienes permisos para listar beneficiarios"}), 403
+        db = current_app.config['MONGO_DB']
+        beneficiarios = db['beneficiarios']
 
         # Construir filtro de búsqueda
         filtro_query = {}
@@ -87,7 +264,7 @@ def listar_beneficiarios():
         # Filtrar por línea de trabajo si se proporciona
         if linea_trabajo:
             # Buscar el ID de la línea de trabajo por su nombre
-            linea_trabajo_obj = lineas_trabajo.find_one({'nombre': linea_trabajo})
+            linea_trabajo_obj = linea_trabajo_por_nombre(db, linea_trabajo)
             if linea_trabajo_obj:
                 filtro_query['linea_trabajo'] = str(linea_trabajo_obj['_id'])
             else:
@@ -129,31 +306,46 @@ def listar_beneficiarios():
             except Exception as e:
                 pass
         
-        # Filtro adicional por texto
+        # Filtro adicional por texto (prefijos sobre los términos normalizados)
         if filtro:
-            filtro_query['$or'] = [
-                {'nombre_completo': {'$regex': filtro, '$options': 'i'}},
-                {'funcionario_nombre': {'$regex': filtro, '$options': 'i'}},
-                {'numero_documento': {'$regex': filtro, '$options': 'i'}}
-            ]
-
-        # Obtener lista de beneficiarios con paginación y orden descendente por fecha_registro
-        total_beneficiarios = beneficiarios.count_documents(filtro_query)
-        lista_beneficiarios = list(beneficiarios.find(filtro_query)
-            .sort('fecha_registro', -1)
-            .skip((pagina - 1) * por_pagina)
-            .limit(por_pagina)
+            filtro_query.update(filtro_busqueda(filtro))
+
+        # Obtener lista de beneficiarios con orden descendente por fecha_registro
+        # (_id desempata para que el orden sea estable entre páginas)
+        orden = [('fecha_registro', -1), ('_id', -1)]
+        proyeccion = proyeccion_beneficiario(campos, obligatorios=['fecha_registro'] if modo_cursor else [])
+        if modo_cursor:
+            consulta = filtro_query
+            if cursor:
+                consulta = {'$and': [filtro_query, filtro_despues_de_cursor(cursor)]}
+            # Se pide un registro extra para saber si hay página siguiente
+            lista_beneficiarios = list(beneficiarios.find(consulta, proyeccion)
+                .sort(orden)
+                .limit(por_pagina + 1)
+            )
+            hay_siguiente = len(lista_beneficiarios) > por_pagina
+            lista_beneficiarios = lista_beneficiarios[:por_pagina]
+            next_cursor = codificar_cursor(lista_beneficiarios[-1]) if hay_siguiente else None
+        else:
+            total_beneficiarios = beneficiarios.count_documents(filtro_query)
+            lista_beneficiarios = list(beneficiarios.find(filtro_query, proyeccion)
+                .sort(orden)
+                .skip((pagina - 1) * por_pagina)
+                .limit(por_pagina)
+            )
+
+        # Enriquecer beneficiarios con nombre de línea de trabajo (una sola consulta para la página)
+        asignar_nombres_lineas(
+            current_app.config['MONGO_DB'],
+            [beneficiario for beneficiario in lista_beneficiarios if 'linea_trabajo' in beneficiario]
         )
 
-        # Enriquecer beneficiarios con nombre de línea de trabajo y fecha legible
+        # Normalizar identificador y fecha legible
         from datetime import datetime
         for beneficiario in lista_beneficiarios:
             beneficiario['_id'] = str(beneficiario['_id'])
+            exponer_firma(beneficiario)
             
-            # Obtener nombre de línea de trabajo
-            if 'linea_trabajo' in beneficiario:
-                linea_trabajo_obj = lineas_trabajo.find_one({'_id': ObjectId(beneficiario['linea_trabajo'])})
-                beneficiario['nombre_linea_trabajo'] = linea_trabajo_obj['nombre'] if linea_trabajo_obj else 'Sin línea de trabajo'
             # Normalizar fecha_registro
             if 'fecha_registro' in beneficiario:
                 if isinstance(beneficiario['fecha_registro'], datetime):
@@ -163,6 +355,13 @@ def listar_beneficiarios():
        
        
         # Retornar resultados
+        if modo_cursor:
+            return jsonify({
+                "beneficiarios": lista_beneficiarios,
+                "next_cursor": next_cursor,
+                "por_pagina": por_pagina
+            })
+
         return jsonify({
             "beneficiarios": lista_beneficiarios,
             "total": total_beneficiarios,
@@ -170,6 +369,8 @@ def listar_beneficiarios():
             "total_paginas": math.ceil(total_beneficiarios / por_pagina)
         })
 
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"msg": f"Error al listar beneficiarios: {str(e)}"}), 500
 
@@ -264,8 +465,8 @@ def verificar_beneficiario():
 def detalle_beneficiario(beneficiario_id):
     try:
         # Obtener colecciones
-        beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
-        lineas_trabajo = current_app.config['MONGO_DB']['lineas_trabajo']
+        db = current_app.config['MONGO_DB']
+        beneficiarios = db['beneficiarios']
         
         # Buscar beneficiario
         beneficiario = beneficiarios.find_one({'_id': ObjectId(beneficiario_id)})
@@ -275,11 +476,15 @@ def detalle_beneficiario(beneficiario_id):
         
         # Convertir ObjectId a string
         beneficiario['_id'] = str(beneficiario['_id'])
+        for campo in (CAMPO_BUSQUEDA, CAMPO_AUTOCOMPLETAR, CAMPO_NOMBRE_ORDEN):
+            beneficiario.pop(campo, None)
+        exponer_firma(beneficiario)
         
         # Obtener nombre de línea de trabajo si existe
         if 'linea_trabajo' in beneficiario:
-            linea_trabajo_obj = lineas_trabajo.find_one({'_id': ObjectId(beneficiario['linea_trabajo'])})
-            beneficiario['nombre_linea_trabajo'] = linea_trabajo_obj['nombre'] if linea_trabajo_obj else 'Sin línea de trabajo'
+            beneficiario['nombre_linea_trabajo'] = catalogo(db, 'lineas_trabajo').nombre(
+                beneficiario['linea_trabajo'], 'Sin línea de trabajo'
+            )
         
         return jsonify(beneficiario), 200
 
@@ -287,18 +492,9 @@ def detalle_beneficiario(beneficiario_id):
         return jsonify({"msg": f"Error al obtener detalles del beneficiario: {str(e)}"}), 500
 
 @beneficiarios_bp.route('/estadisticas/por-mes', methods=['GET'])
-@jwt_required()
+@role_required(['admin'], "No tienes permisos para ver estadísticas")
 def beneficiarios_por_mes():
     try:
-        # Verificar rol del usuario
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-        
-        # MODIFICACIÓN: Solo administradores pueden ver estadísticas
-        if funcionario['rol'] != 'admin':
-            return jsonify({"msg": "No tienes permisos para ver estadísticas"}), 403
-        
         # Obtener beneficiarios
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
         
@@ -346,18 +542,9 @@ def beneficiarios_por_mes():
         return jsonify({"msg": f"Error al obtener estadísticas: {str(e)}"}), 500
 
 @beneficiarios_bp.route('/estadisticas/poblaciones-vulnerables', methods=['GET'])
-@jwt_required()
+@role_required(['admin'], "No tienes permisos para ver estadísticas")
 def poblaciones_vulnerables():
     try:
-        # Verificar rol del usuario
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-        
-        # MODIFICACIÓN: Solo administradores pueden ver estadísticas
-        if funcionario['rol'] != 'admin':
-            return jsonify({"msg": "No tienes permisos para ver estadísticas"}), 403
-        
         # Obtener beneficiarios
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
         
@@ -416,17 +603,9 @@ def actualizar_beneficiario(beneficiario_id):
         logger = current_app.logger
         logger.info("=== INICIO ACTUALIZACIÓN BENEFICIARIO ===")
         
-        # Obtener ID del funcionario desde el token
-        funcionario_id = get_jwt_identity()
+        # La existencia del funcionario ya la comprobó la verificación del token
         db = current_app.config['MONGO_DB']
-        funcionarios = db['funcionarios']
         beneficiarios = db['beneficiarios']
-        
-        # Verificar que el funcionario existe
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-        if not funcionario:
-            logger.error("Funcionario no encontrado")
-            return jsonify({"msg": "Funcionario no encontrado"}), 404
 
         # Obtener datos de la solicitud
         datos = request.get_json()
@@ -442,36 +621,11 @@ def actualizar_beneficiario(beneficiario_id):
         else:
             logger.warning("No se recibió el campo 'firma' en la solicitud")
 
-        # Verificar si el documento o correo ya existen, excluyendo el beneficiario actual
-        filtro_documento = {
-            'numero_documento': datos.get('numero_documento'),
-            '_id': {'$ne': ObjectId(beneficiario_id)}
-        }
-        documento_existente = beneficiarios.find_one(filtro_documento)
-
-        correo = datos.get('correo_electronico')
-        correo_existente = None
-        if correo:
-            filtro_correo = {
-                'correo_electronico': correo,
-                '_id': {'$ne': ObjectId(beneficiario_id)}
-            }
-            correo_existente = beneficiarios.find_one(filtro_correo)
-
-        # Verificar conflictos
-        if documento_existente:
-            logger.warning(f"Documento {datos.get('numero_documento')} ya existe")
-            return jsonify({
-                "msg": "El número de documento ya está registrado para otro beneficiario",
-                "campo": "numero_documento"
-            }), 400
-
-        if correo_existente:
-            logger.warning(f"Correo {correo} ya existe")
-            return jsonify({
-                "msg": "El correo electrónico ya está registrado para otro beneficiario",
-                "campo": "correo_electronico"
-            }), 400
+        # Sin índice único (datos antiguos con repetidos), verificar antes que el
+        # documento o el correo no los tenga otro beneficiario
+        campo = valor_repetido(beneficiarios, datos, list(CAMPOS_UNICOS), excluir_id=ObjectId(beneficiario_id))
+        if campo:
+            return respuesta_campo_repetido(campo, datos)
 
         # Preparar datos para la actualización
         datos_actualizacion = {k: v for k, v in datos.items() if v is not None}
@@ -483,23 +637,63 @@ def actualizar_beneficiario(beneficiario_id):
                 logger.info("Firma establecida como None")
             else:
                 logger.info("Firma válida recibida, se procederá a guardar")
+                try:
+                    FirmaModel(db).separar(datos_actualizacion)
+                except ValueError as e:
+                    return jsonify({"msg": str(e), "campo": "firma"}), 400
         
         logger.info(f"Campos a actualizar: {list(datos_actualizacion.keys())}")
 
-        # Actualizar beneficiario
+        # Actualizar beneficiario obteniendo el documento anterior (sin los campos
+        # pesados) en la misma operación; los índices únicos rechazan un documento
+        # o correo que ya tenga otro beneficiario
         logger.info("Iniciando actualización en la base de datos...")
-        resultado = beneficiarios.update_one(
-            {'_id': ObjectId(beneficiario_id)},
-            {'$set': datos_actualizacion}
-        )
+        beneficiario_anterior = None
+        for _ in range(INTENTOS_ACTUALIZACION):
+            filtro = {'_id': ObjectId(beneficiario_id)}
+            terminos = {}
+            if afecta_busqueda(datos_actualizacion, 'beneficiarios'):
+                # Los términos de búsqueda se escriben en la misma operación; la
+                # escritura exige que los campos de búsqueda que no se envían sigan
+                # como se leyeron
+                actual = beneficiarios.find_one(filtro, list(CAMPOS_BUSQUEDA['beneficiarios']))
+                if actual is None:
+                    break
+                filtro.update({
+                    campo: actual.get(campo) for campo in CAMPOS_BUSQUEDA['beneficiarios']
+                    if campo not in datos_actualizacion
+                })
+                terminos = campos_busqueda({**actual, **datos_actualizacion}, 'beneficiarios')
+            try:
+                beneficiario_anterior = beneficiarios.find_one_and_update(
+                    filtro,
+                    {'$set': {**datos_actualizacion, **terminos}},
+                    projection=proyeccion_beneficiario(),
+                    return_document=ReturnDocument.BEFORE
+                )
+            except DuplicateKeyError as e:
+                return respuesta_duplicado(e, datos_actualizacion)
+            if beneficiario_anterior is not None or not terminos:
+                break
+            # Otra actualización cambió un campo de búsqueda entre la lectura y la escritura
+        else:
+            return jsonify({"msg": "El beneficiario se está modificando, intente de nuevo"}), 409
 
-        if resultado.modified_count == 0:
+        hubo_cambios = beneficiario_anterior is not None and any(
+            beneficiario_anterior.get(campo) != valor
+            for campo, valor in datos_actualizacion.items()
+        )
+        if not hubo_cambios:
             logger.warning("No se realizaron cambios en el beneficiario")
             return jsonify({"msg": "No se realizaron cambios"}), 200
 
-        # Obtener el beneficiario actualizado para verificar
-        beneficiario_actualizado = beneficiarios.find_one({'_id': ObjectId(beneficiario_id)})
-        tiene_firma = 'firma' in beneficiario_actualizado and bool(beneficiario_actualizado['firma'])
+        beneficiario_actualizado = {**beneficiario_anterior, **datos_actualizacion}
+
+        # Actualizar contadores materializados
+        EstadisticasMaterializadasModel(db).registrar_cambio(beneficiario_anterior, beneficiario_actualizado)
+        registrar_cambio_datos(db, 'beneficiarios')
+
+        tiene_firma = bool(beneficiario_actualizado.get(CAMPO_FIRMA_REF))
         
         logger.info(f"Beneficiario actualizado. ¿Tiene firma?: {tiene_firma}")
         logger.info("=== FIN ACTUALIZACIÓN BENEFICIARIO ===")
@@ -516,21 +710,9 @@ def actualizar_beneficiario(beneficiario_id):
         return jsonify({"msg": f"Error interno al actualizar beneficiario: {str(e)}"}), 500
 
 @beneficiarios_bp.route('/verificar-documento/<numero_documento>', methods=['GET'])
-@jwt_required()
+@role_required(['funcionario', 'admin'], "No tienes permisos para verificar documentos")
 def verificar_documento_unico(numero_documento):
     try:
-        # Obtener ID del funcionario desde el token
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-
-        if not funcionario:
-            return jsonify({"msg": "Funcionario no encontrado"}), 404
-
-        # Solo funcionarios pueden verificar documentos
-        if funcionario['rol'] not in ['funcionario', 'admin']:
-            return jsonify({"msg": "No tienes permisos para verificar documentos"}), 403
-
         # Buscar beneficiario con el mismo número de documento
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
         query = {
@@ -542,7 +724,8 @@ def verificar_documento_unico(numero_documento):
         if excluir_id:
             query['_id'] = {'$ne': ObjectId(excluir_id)}
         
-        beneficiario_existente = beneficiarios.find_one(query)
+        # La consulta se resuelve con el índice único y solo lee el _id
+        beneficiario_existente = beneficiarios.find_one(query, {'_id': 1})
 
         return jsonify({
             "existe": beneficiario_existente is not None,
@@ -553,21 +736,9 @@ def verificar_documento_unico(numero_documento):
         return jsonify({"msg": f"Error al verificar documento: {str(e)}"}), 500
 
 @beneficiarios_bp.route('/verificar-correo/<correo_electronico>', methods=['GET'])
-@jwt_required()
+@role_required(['funcionario', 'admin'], "No tienes permisos para verificar correos")
 def verificar_correo_unico(correo_electronico):
     try:
-        # Obtener ID del funcionario desde el token
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-
-        if not funcionario:
-            return jsonify({"msg": "Funcionario no encontrado"}), 404
-
-        # Solo funcionarios pueden verificar correos
-        if funcionario['rol'] not in ['funcionario', 'admin']:
-            return jsonify({"msg": "No tienes permisos para verificar correos"}), 403
-
         # Buscar beneficiario con el mismo correo electrónico
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
         query = {
@@ -579,7 +750,8 @@ def verificar_correo_unico(correo_electronico):
         if excluir_id:
             query['_id'] = {'$ne': ObjectId(excluir_id)}
         
-        beneficiario_existente = beneficiarios.find_one(query)
+        # La consulta se resuelve con el índice único y solo lee el _id
+        beneficiario_existente = beneficiarios.find_one(query, {'_id': 1})
 
         return jsonify({
             "existe": beneficiario_existente is not None,
@@ -590,35 +762,21 @@ def verificar_correo_unico(correo_electronico):
         return jsonify({"msg": f"Error al verificar correo: {str(e)}"}), 500
 
 @beneficiarios_bp.route('/<beneficiario_id>', methods=['DELETE'])
-@jwt_required()
+@role_required(['admin', 'funcionario'], "No tienes permisos para eliminar beneficiarios")
 def eliminar_beneficiario(beneficiario_id):
     try:
-        # Obtener ID del funcionario desde el token
-        funcionario_id = get_jwt_identity()
-        funcionarios = current_app.config['MONGO_DB']['funcionarios']
-        funcionario = funcionarios.find_one({'_id': ObjectId(funcionario_id)})
-
-        if not funcionario:
-            return jsonify({"msg": "Funcionario no encontrado"}), 404
-
-        # Verificar permisos (solo admin o funcionario pueden eliminar)
-        if funcionario.get('rol') not in ['admin', 'funcionario']:
-            return jsonify({"msg": "No tienes permisos para eliminar beneficiarios"}), 403
-
         # Obtener colección de beneficiarios
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
 
-        # Buscar el beneficiario
-        beneficiario = beneficiarios.find_one({'_id': ObjectId(beneficiario_id)})
+        # Eliminar beneficiario y obtener el documento eliminado en la misma operación
+        beneficiario = beneficiarios.find_one_and_delete({'_id': ObjectId(beneficiario_id)})
         
         if not beneficiario:
             return jsonify({"msg": "Beneficiario no encontrado"}), 404
 
-        # Eliminar beneficiario
-        resultado = beneficiarios.delete_one({'_id': ObjectId(beneficiario_id)})
-
-        if resultado.deleted_count == 0:
-            return jsonify({"msg": "No se pudo eliminar el beneficiario"}), 500
+        # Actualizar contadores materializados
+        EstadisticasMaterializadasModel(current_app.config['MONGO_DB']).registrar_baja(beneficiario)
+        registrar_cambio_datos(current_app.config['MONGO_DB'], 'beneficiarios')
 
         return jsonify({
             "msg": "Beneficiario eliminado exitosamente",
@@ -638,67 +796,118 @@ def obtener_beneficiarios():
         por_pagina = int(request.args.get('por_pagina', 10))
         filtro = request.args.get('filtro', '')
         es_admin = request.args.get('admin', 'false').lower() == 'true'
+        # Modo cursor: ?cursor= (primera página) o ?cursor=<next_cursor>
+        modo_cursor = 'cursor' in request.args
+        cursor = request.args.get('cursor', '')
+        # Fieldset parcial: ?fields=nombre_completo,numero_documento (por defecto sin firma ni biometría)
+        campos = leer_campos(request.args.get('fields'))
+
+        # Conteo del total: exact (por defecto), estimated o none
+        modo_conteo = leer_modo_conteo(request.args.get('count'))
 
         # Configurar la colección de beneficiarios
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
-        
-        # Construir pipeline de agregación base
-        pipeline = []
-
-        # Filtro de texto si existe
-        if filtro:
-            pipeline.append({
-                '$match': {
-                    '$or': [
-                        {'nombre_completo': {'$regex': filtro, '$options': 'i'}},
-                        {'numero_documento': {'$regex': filtro, '$options': 'i'}}
-                    ]
-                }
-            })
-
-        # Etapa de ordenamiento
-        pipeline.append({'$sort': {'fecha_registro': -1}})
-
-        # Si no es admin, filtrar solo beneficiarios activos
-        if not es_admin:
-            pipeline.append({
-                '$match': {'estado': 'Activo'}
-            })
 
-        # Etapa de conteo total
-        pipeline_conteo = pipeline.copy()
-        pipeline_conteo.append({'$count': 'total'})
-
-        # Contar total de registros
-        total_registros = list(beneficiarios.aggregate(pipeline_conteo))
-        total = total_registros[0]['total'] if total_registros else 0
+        # Todos los filtros van en un único $match al inicio, antes del ordenamiento,
+        # para que el orden solo recorra los documentos que se van a devolver
+        filtro_query = combinar_filtros(
+            # En modo cursor se parte del último registro de la página anterior
+            filtro_despues_de_cursor(cursor) if modo_cursor and cursor else None,
+            # Filtro de texto si existe (prefijos sobre los términos normalizados)
+            filtro_busqueda(filtro) if filtro else None,
+            # Si no es admin, filtrar solo beneficiarios activos
+            None if es_admin else {'estado': 'Activo'}
+        )
+        pipeline = [
+            {'$match': filtro_query},
+            # Etapa de ordenamiento (_id desempata para que el orden sea estable)
+            {'$sort': {'fecha_registro': -1, '_id': -1}}
+        ]
 
-        # Agregar paginación solo si no se solicitan todos los registros
-        if por_pagina < 1000000:  
-            pipeline.extend([
-                {'$skip': (pagina - 1) * por_pagina},
-                {'$limit': por_pagina}
-            ])
+        # Omitir los campos pesados o quedarse con el fieldset solicitado
+        proyeccion = {'$project': proyeccion_beneficiario(
+            campos, obligatorios=['fecha_registro'] if modo_cursor else []
+        )}
+
+        if modo_cursor:
+            # Se pide un registro extra para saber si hay página siguiente
+            pipeline.extend([{'$limit': por_pagina + 1}, proyeccion])
+            resultado = list(beneficiarios.aggregate(pipeline))
+            hay_siguiente = len(resultado) > por_pagina
+            resultado = resultado[:por_pagina]
+            next_cursor = codificar_cursor(resultado[-1]) if hay_siguiente else None
+            for beneficiario in resultado:
+                beneficiario['_id'] = str(beneficiario['_id'])
+                exponer_firma(beneficiario)
 
-        # Ejecutar pipeline
-        resultado = list(beneficiarios.aggregate(pipeline))
-
-        # Si se solicitan todos los registros, devolver todo
-        if por_pagina >= 1000000:
             return jsonify({
                 'beneficiarios': resultado,
-                'total': total,
-                'pagina': 1,
-                'por_pagina': total
+                'next_cursor': next_cursor,
+                'por_pagina': por_pagina
             }), 200
 
-        return jsonify({
-            'beneficiarios': resultado,
-            'total': total,
-            'pagina': pagina,
-            'por_pagina': por_pagina
-        }), 200
+        # Listado completo (?format=ndjson, o por_pagina muy grande en clientes
+        # antiguos): se envía en flujo, un beneficiario por línea, sin cargarlo en memoria
+        if request.args.get('format') == 'ndjson' or por_pagina >= POR_PAGINA_TODOS:
+            documentos = beneficiarios.aggregate(pipeline + [proyeccion], batchSize=TAMANO_LOTE_EXPORTACION)
+            serializar = current_app.json.dumps
 
+            def lineas():
+                try:
+                    for beneficiario in documentos:
+                        beneficiario['_id'] = str(beneficiario['_id'])
+                        yield exponer_firma(beneficiario)
+                finally:
+                    # Si el cliente se desconecta el cursor se libera en el servidor
+                    documentos.close()
+
+            return Response(
+                stream_with_context(generar_lineas_json(lineas(), serializar)),
+                mimetype=FORMATOS_EXPORTACION['ndjson'][0]
+            )
+
+        pagina_pipeline = [{'$skip': (pagina - 1) * por_pagina}, {'$limit': por_pagina}, proyeccion]
+        respuesta = {'pagina': pagina, 'por_pagina': por_pagina, 'conteo': modo_conteo}
+
+        if modo_conteo == 'exact':
+            # Total y página en una sola consulta
+            pipeline.append({'$facet': {
+                'total': [{'$count': 'total'}],
+                'beneficiarios': pagina_pipeline
+            }})
+            facetas = next(beneficiarios.aggregate(pipeline), {'total': [], 'beneficiarios': []})
+            resultado = facetas['beneficiarios']
+            respuesta['total'] = facetas['total'][0]['total'] if facetas['total'] else 0
+        else:
+            if modo_conteo == 'none':
+                # Sin total: un registro extra indica si hay página siguiente
+                pagina_pipeline[1] = {'$limit': por_pagina + 1}
+            resultado = list(beneficiarios.aggregate(pipeline + pagina_pipeline))
+
+            if modo_conteo == 'estimated':
+                if filtro_query:
+                    # Conteo acotado: pasado el límite el total es solo una cota inferior
+                    total = beneficiarios.count_documents(filtro_query, limit=LIMITE_CONTEO_ESTIMADO)
+                    respuesta['total_exacto'] = total < LIMITE_CONTEO_ESTIMADO
+                else:
+                    # Sin filtros el total sale de los metadatos de la colección
+                    total = beneficiarios.estimated_document_count()
+                    respuesta['total_exacto'] = False
+                respuesta['total'] = total
+            else:
+                respuesta['total'] = None
+                respuesta['hay_siguiente'] = len(resultado) > por_pagina
+                resultado = resultado[:por_pagina]
+
+        for beneficiario in resultado:
+            beneficiario['_id'] = str(beneficiario['_id'])
+            exponer_firma(beneficiario)
+        respuesta['beneficiarios'] = resultado
+
+        return jsonify(respuesta), 200
+
+    except ValueError as e:
+        return jsonify({"msg": str(e), "beneficiarios": [], "total": 0}), 400
     except Exception as e:
         current_app.logger.error(f"Error al obtener beneficiarios: {str(e)}")
         return jsonify({
@@ -708,6 +917,55 @@ def obtener_beneficiarios():
         }), 500
 
 
+@beneficiarios_bp.route('/autocompletar', methods=['GET'])
+@jwt_required()
+def autocompletar_beneficiarios():
+    """
+    Sugerencias de beneficiarios mientras se escribe (nombre o documento)
+
+    Primero el beneficiario cuyo documento coincide exactamente con lo escrito
+    y después los que tienen nombre o documento con esos prefijos, por nombre.
+
+    Parámetros: q (texto escrito), limite (opcional, máximo 50)
+    """
+    try:
+        texto = request.args.get('q', '')
+        limite = limite_autocompletar(request.args.get('limite'))
+
+        filtro = filtro_busqueda(texto, CAMPO_AUTOCOMPLETAR)
+        if not filtro:
+            return jsonify({'resultados': []}), 200
+
+        beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
+        proyeccion = {'nombre_completo': 1, 'numero_documento': 1}
+
+        # Coincidencia exacta de documento (índice único de numero_documento)
+        resultados = []
+        documentos = documentos_exactos(texto)
+        if documentos:
+            resultados = list(beneficiarios.find(
+                {'numero_documento': {'$in': documentos}}, proyeccion
+            ).sort('_id', 1).limit(limite))
+
+        if len(resultados) < limite:
+            if resultados:
+                filtro = {**filtro, '_id': {'$nin': [beneficiario['_id'] for beneficiario in resultados]}}
+            resultados += list(beneficiarios.find(filtro, proyeccion).sort(
+                [(CAMPO_NOMBRE_ORDEN, 1), ('_id', 1)]
+            ).limit(limite - len(resultados)))
+
+        for beneficiario in resultados:
+            beneficiario['_id'] = str(beneficiario['_id'])
+
+        return jsonify({'resultados': resultados}), 200
+
+    except ValueError:
+        return jsonify({"msg": "El parámetro limite debe ser un número entero"}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error al autocompletar beneficiarios: {str(e)}")
+        return jsonify({"msg": f"Error al autocompletar beneficiarios: {str(e)}"}), 500
+
+
 @beneficiarios_bp.route('/exportar-beneficiarios-excel', methods=['GET'])
 @jwt_required()
 def exportar_beneficiarios_excel():
@@ -716,20 +974,19 @@ def exportar_beneficiarios_excel():
         tipo_exportacion = request.args.get('tipo_exportacion', 'todos')
         fecha_inicio = request.args.get('fecha_inicio')
         fecha_fin = request.args.get('fecha_fin')
+        try:
+            formato = leer_formato(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({'msg': str(e)}), 400
 
-        current_app.logger.debug(f"Parámetros de exportación: filtro={filtro}, tipo_exportacion={tipo_exportacion}, fecha_inicio={fecha_inicio}, fecha_fin={fecha_fin}")
+        current_app.logger.debug(f"Parámetros de exportación: filtro={filtro}, tipo_exportacion={tipo_exportacion}, fecha_inicio={fecha_inicio}, fecha_fin={fecha_fin}, formato={formato}")
 
         beneficiarios = current_app.config['MONGO_DB']['beneficiarios']
         filtro_query = {}
 
-        # Filtro por texto
+        # Filtro por texto (prefijos sobre los términos normalizados)
         if filtro:
-            filtro_query['$or'] = [
-                {'nombre_completo': {'$regex': filtro, '$options': 'i'}},
-                {'numero_documento': {'$regex': filtro, '$options': 'i'}},
-                {'comuna': {'$regex': filtro, '$options': 'i'}},
-                {'barrio': {'$regex': filtro, '$options': 'i'}}
-            ]
+            filtro_query.update(filtro_busqueda(filtro))
 
         # Filtro por fecha si se seleccionó rango
         if tipo_exportacion == 'rango':
@@ -754,90 +1011,58 @@ def exportar_beneficiarios_excel():
                 current_app.logger.error(f"Error en formato de fecha: {e}")
                 return jsonify({'msg': 'Formato de fecha inválido'}), 400
 
-        # Obtener registros
-        registros = list(beneficiarios.find(filtro_query))
-
-        current_app.logger.info(f"Registros encontrados: {len(registros)}")
+        if formato == 'parquet' and not PARQUET_DISPONIBLE:
+            return jsonify({'msg': 'Exportación a Parquet no disponible. Instale pyarrow.'}), 501
 
-        if not registros:
+        if not beneficiarios.find_one(filtro_query, {'_id': 1}):
             current_app.logger.warning("No hay registros para exportar en el rango especificado")
             # Cambiado de 404 a 204 (sin contenido) para evitar error en frontend y ser semánticamente correcto
             return ('', 204)
 
-        # Preparar datos para el DataFrame
-        datos_exportacion = []
-        for r in registros:
-            # Convertir fecha_registro a string con formato YYYY-MM-DD
-            fecha_registro = r.get('fecha_registro', '')
-            if isinstance(fecha_registro, datetime):
-                fecha_registro = fecha_registro.strftime('%Y-%m-%d')
-            elif isinstance(fecha_registro, str):
-                # Si es string tipo ISO, recortar solo la fecha
-                if 'T' in fecha_registro:
-                    fecha_registro = fecha_registro.split('T')[0]
-            else:
-                fecha_registro = ''
-
-            datos_exportacion.append({
-                'Nombre Completo': r.get('nombre_completo', ''),
-                'Tipo Documento': r.get('tipo_documento', ''),
-                'Número Documento': r.get('numero_documento', ''),
-                'Género': r.get('genero', ''),
-                'Rango Edad': r.get('rango_edad', ''),
-                'Correo Electrónico': r.get('correo_electronico', 'No registrado'),
-                'Número Celular': r.get('numero_celular', 'No registrado'),
-                'Comuna': r.get('comuna', ''),
-                'Barrio': r.get('barrio', ''),
-                'Línea Trabajo': r.get('linea_trabajo_nombre', 'No asignado'),
-                'Fecha Registro': fecha_registro,
-                'Estudia Actualmente': 'Sí' if r.get('estudia_actualmente') else 'No',
-                'Nivel Educativo': r.get('nivel_educativo', ''),
-                'Situación Laboral': r.get('situacion_laboral', ''),
-                'Víctima Conflicto': 'Sí' if r.get('victima_conflicto') else 'No',
-                'Tiene Discapacidad': 'Sí' if r.get('tiene_discapacidad') else 'No'
-            })
+        # El cursor se recorre por lotes del servidor y solo con las columnas exportadas;
+        # cada fila se escribe en el archivo y se envía sin acumular el resultado
+        cursor = beneficiarios.find(
+            filtro_query, {campo: 1 for campo in CAMPOS_EXPORTACION}
+        ).batch_size(TAMANO_LOTE_EXPORTACION)
 
-        # Crear DataFrame
-        df = pd.DataFrame(datos_exportacion)
+        # En segundo plano se informa del avance sobre el total de registros
+        total_registros = beneficiarios.count_documents(filtro_query) if en_trabajo_exportacion() else None
+
+        def documentos():
+            total = 0
+            try:
+                for beneficiario in cursor:
+                    total += 1
+                    if total % TAMANO_LOTE_EXPORTACION == 0:
+                        reportar_progreso(total, total_registros)
+                    yield beneficiario
+                reportar_progreso(total, total_registros)
+            finally:
+                cursor.close()
+                current_app.logger.info(f"Registros exportados: {total}")
+
+        def contenido():
+            try:
+                if formato == 'xlsx':
+                    yield from generar_xlsx(
+                        [encabezado for encabezado, _ in COLUMNAS_EXPORTACION],
+                        (fila_exportacion(beneficiario) for beneficiario in documentos()),
+                        nombre_hoja='Beneficiarios'
+                    )
+                else:
+                    # Datos sin formato para procesos de BI: campos y tipos originales
+                    yield from generar_exportacion(
+                        formato, ['_id'] + CAMPOS_EXPORTACION, documentos(), tipos=TIPOS_EXPORTACION
+                    )
+            except Exception as e:
+                # La respuesta ya empezó: solo se puede registrar el error y cortar el archivo
+                current_app.logger.error(f"Error al generar la exportación de beneficiarios: {str(e)}")
+                raise
 
-        # Crear archivo Excel en memoria
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Beneficiarios')
-        
-        output.seek(0)
-        
         # Configurar la respuesta para descargar el archivo
         fecha_actual = datetime.now().strftime("%Y%m%d_%H%M%S")
-        return send_file(
-            output,
-            as_attachment=True,
-            download_name=f"beneficiarios_exportacion_{fecha_actual}.xlsx",
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
+        return respuesta_en_flujo(contenido(), formato, f"beneficiarios_exportacion_{fecha_actual}")
 
     except Exception as e:
         current_app.logger.error(f"Error al exportar beneficiarios: {str(e)}")
         return jsonify({'msg': f'Error al exportar: {str(e)}'}), 500
-        df = pd.DataFrame(datos_exportacion)
-
-        # Crear archivo Excel en memoria
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df.to_excel(writer, sheet_name='Beneficiarios', index=False)
-
-        output.seek(0)
-
-        return send_file(
-            output,
-            as_attachment=True,
-            download_name='Beneficiarios.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-
-    except Exception as e:
-        logger.error(f"Error al exportar beneficiarios a Excel: {str(e)}", exc_info=True)
-        return jsonify({
-            'status': 'error',
-            'message': f'Error al exportar beneficiarios: {str(e)}'
-        }), 500
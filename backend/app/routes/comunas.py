@@ -1,8 +1,8 @@
 from flask import Blueprint, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.models.comuna import ComunaModel
-from app.models.funcionario import FuncionarioModel
 from app.utils.response import error_response, success_response
+from app.utils.autorizacion import funcionario_actual
 from bson import ObjectId
 import logging
 
@@ -22,12 +22,11 @@ def crear_comuna():
         db = current_app.config.get('db')
         logging.info(f"Base de datos obtenida: {db}")
         
-        # Validar rol de administrador
-        funcionario_model = FuncionarioModel(db)
-        usuario = funcionario_model.obtener_funcionario_por_id(usuario_id)
+        # Validar rol de administrador (viene en el token)
+        usuario = funcionario_actual()
         logging.info(f"Rol de usuario: {usuario.get('rol')}")
         
-        if usuario['rol'] != 'admin':
+        if usuario.get('rol') != 'admin':
             logging.warning(f"Intento de crear Comuna por usuario no admin: {usuario_id}")
             return error_response('No autorizado', 403)
         
@@ -71,9 +70,8 @@ def obtener_comunas():
         db = current_app.config.get('db')
         logging.info(f"Base de datos obtenida: {db}")
         
-        # Validar que el usuario esté autenticado
-        funcionario_model = FuncionarioModel(db)
-        usuario = funcionario_model.obtener_funcionario_por_id(usuario_id)
+        # El rol viene en el token
+        usuario = funcionario_actual()
         logging.info(f"Rol de usuario: {usuario.get('rol')}")
         
         # Obtener Comunas
@@ -104,12 +102,11 @@ def obtener_comuna_por_id(comuna_id):
         db = current_app.config.get('db')
         logging.info(f"Base de datos obtenida: {db}")
         
-        # Validar rol de administrador
-        funcionario_model = FuncionarioModel(db)
-        usuario = funcionario_model.obtener_funcionario_por_id(usuario_id)
+        # Validar rol de administrador (viene en el token)
+        usuario = funcionario_actual()
         logging.info(f"Rol de usuario: {usuario.get('rol')}")
         
-        if usuario['rol'] != 'admin':
+        if usuario.get('rol') != 'admin':
             logging.warning(f"Intento de obtener Comuna por ID por usuario no admin: {usuario_id}")
             return error_response('No autorizado', 403)
         
@@ -145,12 +142,11 @@ def actualizar_comuna(comuna_id):
         db = current_app.config.get('db')
         logging.info(f"Base de datos obtenida: {db}")
         
-        # Validar rol de administrador
-        funcionario_model = FuncionarioModel(db)
-        usuario = funcionario_model.obtener_funcionario_por_id(usuario_id)
+        # Validar rol de administrador (viene en el token)
+        usuario = funcionario_actual()
         logging.info(f"Rol de usuario: {usuario.get('rol')}")
         
-        if usuario['rol'] != 'admin':
+        if usuario.get('rol') != 'admin':
             logging.warning(f"Intento de actualizar Comuna por usuario no admin: {usuario_id}")
             return error_response('No autorizado', 403)
         
@@ -198,12 +194,11 @@ def eliminar_comuna(comuna_id):
         db = current_app.config.get('db')
         logging.info(f"Base de datos obtenida: {db}")
         
-        # Validar rol de administrador
-        funcionario_model = FuncionarioModel(db)
-        usuario = funcionario_model.obtener_funcionario_por_id(usuario_id)
+        # Validar rol de administrador (viene en el token)
+        usuario = funcionario_actual()
         logging.info(f"Rol de usuario: {usuario.get('rol')}")
         
-        if usuario['rol'] != 'admin':
+        if usuario.get('rol') != 'admin':
             logging.warning(f"Intento de eliminar Comuna por usuario no admin: {usuario_id}")
             return error_response('No autorizado', 403)
         
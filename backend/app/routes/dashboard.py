@@ -1,8 +1,11 @@
-from flask import Blueprint, jsonify, current_app
+from flask import Blueprint, jsonify, current_app, request
+from flask_jwt_extended import jwt_required
 from datetime import datetime, timedelta
 from bson import ObjectId
 import sys
 
+from app.models.estadisticas import CuboBeneficiariosModel, DIMENSIONES_CUBO
+
 # Importaciones opcionales para gráficos
 try:
     import io
@@ -25,126 +28,64 @@ dashboard_bp = Blueprint('dashboard', __name__)
 
 @dashboard_bp.route('/estadisticas', methods=['GET'])
 def obtener_estadisticas():
-    db = current_app.config['MONGO_DB']
-    beneficiarios_collection = db['beneficiarios']
+    try:
+        cubo = CuboBeneficiariosModel(current_app.config['MONGO_DB'])
+        
+        # Incorporar al cubo los beneficiarios registrados desde la última carga
+        cubo.refrescar()
+        
+        # Año solicitado (por defecto el actual)
+        año = int(request.args.get('anio', datetime.now().year))
+        
+        estadisticas = cubo.resumen(desde=f'{año:04d}-01', hasta=f'{año:04d}-12')
+        
+        return jsonify(estadisticas), 200
     
-    # Año actual
-    año_actual = datetime.now().year
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener estadísticas del dashboard: {str(e)}")
+        return jsonify({'error': 'No se pudieron obtener las estadísticas'}), 500
+
+@dashboard_bp.route('/cubo', methods=['GET'])
+@jwt_required()
+def consultar_cubo():
+    """
+    Consulta genérica sobre el cubo de beneficiarios
     
-    # Estadísticas generales
-    estadisticas = {
-        'total_beneficiarios': beneficiarios_collection.count_documents({
-            'fecha_registro': {
-                '$gte': datetime(año_actual, 1, 1),
-                '$lte': datetime(año_actual, 12, 31)
-            }
-        }),
-        'vulnerabilidad': {
-            'victimas': beneficiarios_collection.count_documents({
-                'victima': True,
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            'discapacidad': beneficiarios_collection.count_documents({
-                'discapacidad': True,
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            })
-        },
-        'genero': {
-            'masculino': beneficiarios_collection.count_documents({
-                'genero': 'Masculino',
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            'femenino': beneficiarios_collection.count_documents({
-                'genero': 'Femenino',
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            })
-        },
-        'grupos_edad': {
-            '0-12': beneficiarios_collection.count_documents({
-                'edad': {'$gte': 0, '$lt': 13},
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            '13-18': beneficiarios_collection.count_documents({
-                'edad': {'$gte': 13, '$lt': 19},
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            '19-35': beneficiarios_collection.count_documents({
-                'edad': {'$gte': 19, '$lt': 36},
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            '36-60': beneficiarios_collection.count_documents({
-                'edad': {'$gte': 36, '$lt': 61},
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            '60+': beneficiarios_collection.count_documents({
-                'edad': {'$gte': 61},
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            })
-        },
-        'comunas': {
-            'Comuna 1: Zona Norte': beneficiarios_collection.count_documents({
-                'comuna': 'Comuna 1: Zona Norte',
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            'Comuna 2: Porvenir - Platina': beneficiarios_collection.count_documents({
-                'comuna': 'Comuna 2: Porvenir - Platina',
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            # Continuar con las demás comunas
-        },
-        'ayudas_entregadas': {
-            'Alimentación': beneficiarios_collection.count_documents({
-                'ayudas': {'$elemMatch': {'tipo': 'Alimentación'}},
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            'Salud': beneficiarios_collection.count_documents({
-                'ayudas': {'$elemMatch': {'tipo': 'Salud'}},
-                'fecha_registro': {
-                    '$gte': datetime(año_actual, 1, 1),
-                    '$lte': datetime(año_actual, 12, 31)
-                }
-            }),
-            # Añadir más tipos de ayudas
-        }
-    }
+    Parámetros: desde y hasta ('YYYY-MM'), agrupar_por (dimensiones separadas
+    por coma), medida ('total' o 'ayudas') y cualquier dimensión del cubo
+    como filtro (por ejemplo comuna=... o linea_trabajo=...).
+    """
+    try:
+        cubo = CuboBeneficiariosModel(current_app.config['MONGO_DB'])
+        cubo.refrescar()
+        
+        agrupar_por = [d for d in request.args.get('agrupar_por', '').split(',') if d]
+        filtros = {}
+        for dimension in DIMENSIONES_CUBO:
+            if dimension in request.args:
+                valor = request.args.get(dimension)
+                # Las dimensiones de vulnerabilidad son booleanas
+                if dimension in ('victima', 'discapacidad'):
+                    valor = valor.lower() in ('true', '1', 'si')
+                filtros[dimension] = valor
+        
+        resultado = cubo.consultar(
+            desde=request.args.get('desde'),
+            hasta=request.args.get('hasta'),
+            filtros=filtros,
+            agrupar_por=agrupar_por,
+            medida=request.args.get('medida', 'total')
+        )
+        
+        return jsonify({'resultado': resultado}), 200
     
-    return jsonify(estadisticas), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error al consultar el cubo de beneficiarios: {str(e)}")
+        return jsonify({'error': 'No se pudo consultar el cubo'}), 500
 
 @dashboard_bp.route('/estadisticas-graficas', methods=['GET'])
 def obtener_estadisticas_graficas():
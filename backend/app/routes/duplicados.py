@@ -0,0 +1,62 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+
+from ..models.duplicados import DuplicadosModel, ESTADOS_DUPLICADO
+from ..utils.autorizacion import role_required
+
+duplicados_bp = Blueprint('duplicados', __name__)
+
+
+@duplicados_bp.route('', methods=['GET'])
+@role_required(['admin'], "Solo los administradores pueden revisar duplicados")
+def listar_duplicados():
+    """
+    Listar los posibles duplicados detectados, del más al menos probable
+
+    Parámetros: estado (pendiente, confirmado o descartado), pagina y por_pagina.
+    La detección se ejecuta con el comando 'flask detectar-duplicados'.
+    """
+    try:
+        estado = request.args.get('estado', 'pendiente')
+        if estado not in ESTADOS_DUPLICADO:
+            return jsonify({"msg": f"Estado no válido: {estado}", "estados": ESTADOS_DUPLICADO}), 400
+        pagina = max(int(request.args.get('pagina', 1)), 1)
+        por_pagina = min(max(int(request.args.get('por_pagina', 20)), 1), 100)
+
+        pares, total = DuplicadosModel(current_app.config['MONGO_DB']).listar(estado, pagina, por_pagina)
+        for par in pares:
+            par['id'] = par.pop('_id')
+            for campo in ('fecha_deteccion', 'fecha_revision'):
+                if par.get(campo):
+                    par[campo] = par[campo].isoformat()
+
+        return jsonify({
+            'duplicados': pares,
+            'total': total,
+            'pagina': pagina,
+            'por_pagina': por_pagina
+        }), 200
+
+    except ValueError:
+        return jsonify({"msg": "Parámetros de paginación no válidos"}), 400
+    except Exception as e:
+        current_app.logger.error(f"Error al listar duplicados: {str(e)}")
+        return jsonify({"msg": f"Error al listar duplicados: {str(e)}"}), 500
+
+
+@duplicados_bp.route('/<path:par_id>', methods=['PUT'])
+@role_required(['admin'], "Solo los administradores pueden revisar duplicados")
+def resolver_duplicado(par_id):
+    """Marcar un par como duplicado confirmado o descartado. Cuerpo: {"estado": "confirmado"}"""
+    try:
+        estado = (request.get_json(silent=True) or {}).get('estado')
+        if estado not in ESTADOS_DUPLICADO:
+            return jsonify({"msg": f"Estado no válido: {estado}", "estados": ESTADOS_DUPLICADO}), 400
+
+        if not DuplicadosModel(current_app.config['MONGO_DB']).resolver(par_id, estado, get_jwt_identity()):
+            return jsonify({"msg": "Par de duplicados no encontrado"}), 404
+        return jsonify({"msg": "Revisión registrada", "id": par_id, "estado": estado}), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error al resolver el duplicado {par_id}: {str(e)}")
+        return jsonify({"msg": f"Error al resolver el duplicado: {str(e)}"}), 500
@@ -0,0 +1,131 @@
+from flask import Blueprint, request, jsonify, current_app, send_file, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+import os
+
+from ..models.trabajo_exportacion import TrabajoExportacionModel
+from ..models.version_datos import VersionDatosModel
+from ..utils.trabajos import (
+    EXPORTACIONES_EN_SEGUNDO_PLANO, resolver_exportacion, clave_cache,
+    enviar_trabajo, limpiar_exportaciones_vencidas
+)
+
+exportaciones_bp = Blueprint('exportaciones', __name__)
+
+
+def _trabajo_a_json(trabajo):
+    """Estado de un trabajo tal como se devuelve al cliente"""
+    respuesta = {
+        'id': str(trabajo['_id']),
+        'estado': trabajo['estado'],
+        'url': trabajo.get('url'),
+        'progreso': trabajo.get('progreso', {}),
+        'reutilizado': trabajo.get('reutilizado', False),
+        'fecha_creacion': trabajo['fecha_creacion'].isoformat() if trabajo.get('fecha_creacion') else None,
+        'fecha_fin': trabajo['fecha_fin'].isoformat() if trabajo.get('fecha_fin') else None,
+    }
+    if trabajo['estado'] == 'completado':
+        respuesta['nombre_archivo'] = trabajo.get('nombre_archivo')
+        respuesta['tamano'] = trabajo.get('tamano')
+        respuesta['url_descarga'] = url_for('exportaciones.descargar_exportacion', trabajo_id=str(trabajo['_id']))
+    elif trabajo['estado'] == 'error':
+        respuesta['error'] = trabajo.get('error')
+        respuesta['codigo_error'] = trabajo.get('codigo_error')
+    return respuesta
+
+
+def _obtener_trabajo_propio(trabajo_id):
+    """Trabajo del funcionario autenticado (None si no existe o es de otro)"""
+    trabajo = TrabajoExportacionModel(current_app.config['MONGO_DB']).obtener(trabajo_id)
+    if not trabajo or trabajo.get('funcionario_id') != get_jwt_identity():
+        return None
+    return trabajo
+
+
+@exportaciones_bp.route('', methods=['POST'])
+@jwt_required()
+def crear_exportacion():
+    """
+    Solicitar una exportación en segundo plano
+
+    Cuerpo: {"url": "/beneficiarios/exportar-beneficiarios-excel?filtro=..."}, es
+    decir, la misma URL que se usaría para descargarla directamente. Si ya hay
+    un archivo generado para esa exportación con los datos actuales se reutiliza.
+    """
+    try:
+        datos = request.get_json(silent=True) or {}
+        url = datos.get('url')
+        try:
+            endpoint, argumentos, ruta, parametros = resolver_exportacion(current_app, url)
+        except ValueError as e:
+            return jsonify({
+                "msg": str(e),
+                "exportaciones_disponibles": sorted(EXPORTACIONES_EN_SEGUNDO_PLANO)
+            }), 400
+
+        db = current_app.config['MONGO_DB']
+        modelo = TrabajoExportacionModel(db)
+        versiones = VersionDatosModel(db).obtener(EXPORTACIONES_EN_SEGUNDO_PLANO[endpoint])
+        clave = clave_cache(endpoint, argumentos, parametros, versiones)
+        funcionario_id = get_jwt_identity()
+
+        limpiar_exportaciones_vencidas(current_app)
+
+        # Reutilizar el archivo de una exportación idéntica sobre los mismos datos
+        existente = modelo.buscar_completado(clave)
+        if existente and os.path.exists(existente.get('archivo') or ''):
+            trabajo_id = modelo.crear_reutilizado(funcionario_id, url, existente)
+            return jsonify(_trabajo_a_json(modelo.obtener(trabajo_id))), 200
+
+        trabajo_id = modelo.crear(
+            funcionario_id, endpoint, url, clave, current_app.config.get('EXPORTACIONES_TTL_HORAS', 24)
+        )
+        cabeceras = {}
+        if request.headers.get('Authorization'):
+            cabeceras['Authorization'] = request.headers['Authorization']
+        enviar_trabajo(current_app._get_current_object(), trabajo_id, ruta, parametros, cabeceras)
+
+        return jsonify(_trabajo_a_json(modelo.obtener(trabajo_id))), 202
+
+    except Exception as e:
+        current_app.logger.error(f"Error al crear la exportación: {str(e)}")
+        return jsonify({"msg": f"Error al crear la exportación: {str(e)}"}), 500
+
+
+@exportaciones_bp.route('/<trabajo_id>', methods=['GET'])
+@jwt_required()
+def estado_exportacion(trabajo_id):
+    """Consultar el estado y el progreso de una exportación"""
+    try:
+        trabajo = _obtener_trabajo_propio(trabajo_id)
+        if not trabajo:
+            return jsonify({"msg": "Exportación no encontrada"}), 404
+        return jsonify(_trabajo_a_json(trabajo)), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error al consultar la exportación {trabajo_id}: {str(e)}")
+        return jsonify({"msg": f"Error al consultar la exportación: {str(e)}"}), 500
+
+
+@exportaciones_bp.route('/<trabajo_id>/descargar', methods=['GET'])
+@jwt_required()
+def descargar_exportacion(trabajo_id):
+    """Descargar el archivo de una exportación completada"""
+    try:
+        trabajo = _obtener_trabajo_propio(trabajo_id)
+        if not trabajo:
+            return jsonify({"msg": "Exportación no encontrada"}), 404
+        if trabajo['estado'] != 'completado':
+            return jsonify({"msg": "La exportación aún no está lista", "estado": trabajo['estado']}), 409
+        if not os.path.exists(trabajo.get('archivo') or ''):
+            return jsonify({"msg": "El archivo de la exportación ya no está disponible"}), 410
+
+        return send_file(
+            trabajo['archivo'],
+            mimetype=trabajo.get('mimetype'),
+            as_attachment=True,
+            download_name=trabajo.get('nombre_archivo')
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error al descargar la exportación {trabajo_id}: {str(e)}")
+        return jsonify({"msg": f"Error al descargar la exportación: {str(e)}"}), 500
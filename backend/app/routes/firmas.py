@@ -0,0 +1,47 @@
+from flask import Blueprint, request, jsonify, current_app, make_response
+from ..models.firma import FirmaModel, tipo_imagen_firma
+import re
+
+firmas_bp = Blueprint('firmas', __name__)
+
+# Las firmas son inmutables (la URL depende de su contenido), por lo que el
+# navegador puede conservarlas un año sin volver a preguntar
+CACHE_FIRMAS = 'private, max-age=31536000, immutable'
+
+
+@firmas_bp.route('/<hash_firma>', methods=['GET'])
+def obtener_firma(hash_firma):
+    """
+    Devolver la imagen de una firma del almacén
+
+    No requiere token para que pueda usarse como src de una imagen; la URL
+    solo se conoce a través de las respuestas autenticadas de la API y el
+    hash SHA-256 no se puede adivinar.
+    """
+    try:
+        if not re.fullmatch(r'[0-9a-f]{64}', hash_firma):
+            return jsonify({"msg": "Identificador de firma inválido"}), 400
+
+        etag = f'"{hash_firma}"'
+        if etag in request.headers.get('If-None-Match', ''):
+            respuesta = make_response('', 304)
+        else:
+            firma = FirmaModel(current_app.config['MONGO_DB']).obtener(hash_firma)
+            if not firma:
+                return jsonify({"msg": "Firma no encontrada"}), 404
+            datos = bytes(firma['datos'])
+            # El tipo se toma de los bytes (no del guardado): solo se sirven PNG y JPEG
+            tipo = tipo_imagen_firma(datos)
+            if tipo is None:
+                return jsonify({"msg": "Firma no encontrada"}), 404
+            respuesta = make_response(datos)
+            respuesta.headers['Content-Type'] = tipo
+
+        respuesta.headers['Cache-Control'] = CACHE_FIRMAS
+        respuesta.headers['ETag'] = etag
+        respuesta.headers['X-Content-Type-Options'] = 'nosniff'
+        return respuesta
+
+    except Exception as e:
+        current_app.logger.error(f"Error al obtener firma {hash_firma}: {str(e)}")
+        return jsonify({"msg": f"Error al obtener la firma: {str(e)}"}), 500
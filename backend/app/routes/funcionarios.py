@@ -4,6 +4,8 @@ from marshmallow import ValidationError, validate, Schema, fields
 from ..models.funcionario import FuncionarioModel
 from ..models.linea_trabajo import LineaTrabajo
 from ..schemas.funcionario_schema import funcionario_schema, funcionarios_schema
+from ..utils.autorizacion import cache_funcionarios
+from ..utils.catalogos import catalogo
 import logging
 from bson import ObjectId
 
@@ -61,25 +63,9 @@ def obtener_funcionarios_route():
         # Obtener funcionarios
         funcionarios = funcionario_model.obtener_funcionarios()
         
-        # Asegurar que cada funcionario tenga un nombre de línea de trabajo
+        # Convertir ObjectId a string si es necesario
         for funcionario in funcionarios:
-            # Convertir ObjectId a string si es necesario
             funcionario['_id'] = str(funcionario.get('_id', ''))
-            
-            # Verificar y obtener nombre de línea de trabajo
-            linea_trabajo_id = funcionario.get('linea_trabajo')
-            if linea_trabajo_id:
-                try:
-                    linea_trabajo = db['lineas_trabajo'].find_one(
-                        {'_id': ObjectId(linea_trabajo_id)}, 
-                        {'nombre': 1}
-                    )
-                    funcionario['nombreLineaTrabajo'] = linea_trabajo.get('nombre', 'Sin línea de trabajo') if linea_trabajo else 'Sin línea de trabajo'
-                except Exception as e:
-                    current_app.logger.error(f"Error al obtener línea de trabajo: {str(e)}")
-                    funcionario['nombreLineaTrabajo'] = 'Sin línea de trabajo'
-            else:
-                funcionario['nombreLineaTrabajo'] = 'Sin línea de trabajo'
         
         return jsonify({
             'status': 'success',
@@ -205,11 +191,9 @@ def obtener_funcionario_route(funcionario_id):
         # Obtener nombre de línea de trabajo si existe
         if 'linea_trabajo' in funcionario:
             try:
-                linea_trabajo = db['lineas_trabajo'].find_one(
-                    {'_id': funcionario['linea_trabajo']}, 
-                    {'nombre': 1}
+                funcionario_serializable['nombreLineaTrabajo'] = catalogo(db, 'lineas_trabajo').nombre(
+                    funcionario['linea_trabajo'], 'Sin línea de trabajo'
                 )
-                funcionario_serializable['nombreLineaTrabajo'] = linea_trabajo.get('nombre', 'Sin línea de trabajo') if linea_trabajo else 'Sin línea de trabajo'
             except Exception as e:
                 current_app.logger.error(f"Error al obtener línea de trabajo: {str(e)}")
                 funcionario_serializable['nombreLineaTrabajo'] = 'Sin línea de trabajo'
@@ -299,6 +283,9 @@ def actualizar_funcionario_route(funcionario_id):
         resultado = funcionario_model.actualizar_funcionario(funcionario_id, datos_actualizacion)
         
         if resultado > 0:
+            # Sus tokens se vuelven a comprobar con el rol, línea y estado nuevos
+            cache_funcionarios().invalidar(funcionario_id)
+
             # Obtener funcionario actualizado
             funcionario_actualizado = db['funcionarios'].find_one({'_id': funcionario_id_obj})
             
@@ -318,11 +305,9 @@ def actualizar_funcionario_route(funcionario_id):
             # Obtener nombre de línea de trabajo si existe
             if 'linea_trabajo' in funcionario_actualizado:
                 try:
-                    linea_trabajo = db['lineas_trabajo'].find_one(
-                        {'_id': funcionario_actualizado['linea_trabajo']}, 
-                        {'nombre': 1}
+                    funcionario_serializable['nombreLineaTrabajo'] = catalogo(db, 'lineas_trabajo').nombre(
+                        funcionario_actualizado['linea_trabajo'], 'Sin línea de trabajo'
                     )
-                    funcionario_serializable['nombreLineaTrabajo'] = linea_trabajo.get('nombre', 'Sin línea de trabajo') if linea_trabajo else 'Sin línea de trabajo'
                 except Exception as e:
                     current_app.logger.error(f"Error al obtener línea de trabajo: {str(e)}")
                     funcionario_serializable['nombreLineaTrabajo'] = 'Sin línea de trabajo'
@@ -376,6 +361,8 @@ def eliminar_funcionario_route(funcionario_id):
         eliminado = funcionario_model.eliminar_funcionario(funcionario_id)
         
         if eliminado:
+            # Sus tokens dejan de ser válidos en este proceso de inmediato
+            cache_funcionarios().invalidar(funcionario_id)
             return jsonify({
                 'status': 'success', 
                 'msg': 'Funcionario eliminado exitosamente'
@@ -0,0 +1,174 @@
+from flask import Blueprint, request, jsonify, current_app, send_file, url_for
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from bson.objectid import ObjectId
+from datetime import datetime
+import os
+
+from ..models.trabajo_importacion import TrabajoImportacionModel
+from ..utils.importacion import (
+    TIPOS_IMPORTACION, FORMATOS_IMPORTACION, directorio_importaciones, ruta_rechazados,
+    enviar_importacion, importacion_activa
+)
+
+importaciones_bp = Blueprint('importaciones', __name__)
+
+
+def _importacion_a_json(trabajo):
+    """Estado de una importación tal como se devuelve al cliente"""
+    respuesta = {
+        'id': str(trabajo['_id']),
+        'tipo': trabajo['tipo'],
+        'nombre_archivo': trabajo.get('nombre_archivo'),
+        'estado': trabajo['estado'],
+        'total': trabajo.get('total'),
+        'progreso': trabajo.get('progreso', {}),
+        'fila_confirmada': trabajo.get('fila_confirmada', 0),
+        'columnas': trabajo.get('columnas'),
+        'fecha_creacion': trabajo['fecha_creacion'].isoformat() if trabajo.get('fecha_creacion') else None,
+        'fecha_fin': trabajo['fecha_fin'].isoformat() if trabajo.get('fecha_fin') else None,
+    }
+    if trabajo['estado'] == 'error':
+        respuesta['error'] = trabajo.get('error')
+    if trabajo.get('progreso', {}).get('rechazados'):
+        respuesta['url_rechazados'] = url_for('importaciones.descargar_rechazados', trabajo_id=str(trabajo['_id']))
+    return respuesta
+
+
+def _obtener_importacion_propia(trabajo_id):
+    """Importación del funcionario autenticado (None si no existe o es de otro)"""
+    trabajo = TrabajoImportacionModel(current_app.config['MONGO_DB']).obtener(trabajo_id)
+    if not trabajo or trabajo.get('funcionario_id') != get_jwt_identity():
+        return None
+    return trabajo
+
+
+@importaciones_bp.route('', methods=['POST'])
+@jwt_required()
+def crear_importacion():
+    """
+    Importar beneficiarios o población migrante desde un archivo XLSX o CSV
+
+    Formulario multipart: archivo (xlsx o csv) y tipo ('beneficiarios' o
+    'poblacion_migrante'). Los encabezados pueden ser los nombres de los campos
+    o los de las exportaciones. Los registros se identifican por número de
+    documento: si ya existe se actualiza. Los campos de registro que no traiga
+    el archivo (funcionario, línea de trabajo, fecha) se toman del funcionario.
+    """
+    try:
+        db = current_app.config['MONGO_DB']
+        funcionario_id = get_jwt_identity()
+        funcionario = db['funcionarios'].find_one({'_id': ObjectId(funcionario_id)})
+
+        if not funcionario:
+            return jsonify({"msg": "Funcionario no encontrado"}), 404
+
+        if funcionario.get('rol') not in ['admin', 'funcionario']:
+            return jsonify({"msg": "No tienes permisos para importar registros"}), 403
+
+        tipo = request.form.get('tipo', 'beneficiarios')
+        if tipo not in TIPOS_IMPORTACION:
+            return jsonify({
+                "msg": f"Tipo de importación no válido: {tipo}",
+                "tipos_disponibles": sorted(TIPOS_IMPORTACION)
+            }), 400
+
+        archivo = request.files.get('archivo')
+        if not archivo or not archivo.filename:
+            return jsonify({"msg": "Debe adjuntar el archivo a importar"}), 400
+
+        formato = os.path.splitext(archivo.filename)[1].lower().lstrip('.')
+        if formato not in FORMATOS_IMPORTACION:
+            return jsonify({
+                "msg": f"Formato de archivo no admitido: {formato or 'sin extensión'}",
+                "formatos_disponibles": list(FORMATOS_IMPORTACION)
+            }), 400
+
+        modelo = TrabajoImportacionModel(db)
+        valores_por_defecto = {
+            'funcionario_id': funcionario_id,
+            'funcionario_nombre': funcionario.get('nombre', ''),
+            'fecha_registro': datetime.utcnow().isoformat(),
+        }
+        if funcionario.get('linea_trabajo'):
+            valores_por_defecto['linea_trabajo'] = str(funcionario['linea_trabajo'])
+
+        # El archivo se guarda en disco por bloques; se conserva para poder reanudar
+        trabajo_id = ObjectId()
+        ruta = os.path.join(directorio_importaciones(current_app), f"{trabajo_id}.{formato}")
+        archivo.save(ruta)
+        trabajo_id = modelo.crear(funcionario_id, tipo, ruta, archivo.filename, formato, valores_por_defecto,
+                                  trabajo_id=trabajo_id)
+
+        enviar_importacion(current_app._get_current_object(), trabajo_id)
+        return jsonify(_importacion_a_json(modelo.obtener(trabajo_id))), 202
+
+    except Exception as e:
+        current_app.logger.error(f"Error al crear la importación: {str(e)}")
+        return jsonify({"msg": f"Error al crear la importación: {str(e)}"}), 500
+
+
+@importaciones_bp.route('/<trabajo_id>', methods=['GET'])
+@jwt_required()
+def estado_importacion(trabajo_id):
+    """Consultar el estado y el progreso de una importación"""
+    try:
+        trabajo = _obtener_importacion_propia(trabajo_id)
+        if not trabajo:
+            return jsonify({"msg": "Importación no encontrada"}), 404
+        return jsonify(_importacion_a_json(trabajo)), 200
+
+    except Exception as e:
+        current_app.logger.error(f"Error al consultar la importación {trabajo_id}: {str(e)}")
+        return jsonify({"msg": f"Error al consultar la importación: {str(e)}"}), 500
+
+
+@importaciones_bp.route('/<trabajo_id>/reanudar', methods=['POST'])
+@jwt_required()
+def reanudar_importacion(trabajo_id):
+    """
+    Reanudar una importación interrumpida desde la última fila escrita
+
+    Sirve tanto para las que terminaron con error como para las que quedaron
+    en proceso al reiniciarse el servidor.
+    """
+    try:
+        trabajo = _obtener_importacion_propia(trabajo_id)
+        if not trabajo:
+            return jsonify({"msg": "Importación no encontrada"}), 404
+        if trabajo['estado'] == 'completado' or importacion_activa(current_app, trabajo_id):
+            return jsonify({"msg": "La importación no está detenida", "estado": trabajo['estado']}), 409
+        if not os.path.exists(trabajo.get('archivo') or ''):
+            return jsonify({"msg": "El archivo de la importación ya no está disponible"}), 410
+
+        enviar_importacion(current_app._get_current_object(), trabajo_id)
+        return jsonify(_importacion_a_json(trabajo)), 202
+
+    except Exception as e:
+        current_app.logger.error(f"Error al reanudar la importación {trabajo_id}: {str(e)}")
+        return jsonify({"msg": f"Error al reanudar la importación: {str(e)}"}), 500
+
+
+@importaciones_bp.route('/<trabajo_id>/rechazados', methods=['GET'])
+@jwt_required()
+def descargar_rechazados(trabajo_id):
+    """Descargar el informe CSV de las filas rechazadas y sus errores"""
+    try:
+        trabajo = _obtener_importacion_propia(trabajo_id)
+        if not trabajo:
+            return jsonify({"msg": "Importación no encontrada"}), 404
+
+        ruta = ruta_rechazados(current_app, trabajo_id)
+        if not os.path.exists(ruta):
+            return jsonify({"msg": "La importación no tiene filas rechazadas"}), 404
+
+        nombre_base = os.path.splitext(trabajo.get('nombre_archivo') or 'importacion')[0]
+        return send_file(
+            ruta,
+            mimetype='text/csv',
+            as_attachment=True,
+            download_name=f"{nombre_base}_rechazados.csv"
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error al descargar los rechazados de {trabajo_id}: {str(e)}")
+        return jsonify({"msg": f"Error al descargar los rechazados: {str(e)}"}), 500
@@ -4,9 +4,9 @@ from bson import ObjectId
 from marshmallow import ValidationError
 import logging
 from urllib.parse import unquote
-import re
 
 from app.models.linea_trabajo import linea_trabajo_schema, lineas_trabajo_schema, LineaTrabajo
+from app.utils.catalogos import catalogo
 
 # Configurar logging
 logging.basicConfig(level=logging.DEBUG)
@@ -156,19 +156,18 @@ def obtener_linea_trabajo(nombre_linea_trabajo):
         # Decodificar el nombre de la línea de trabajo
         nombre_linea_trabajo_decoded = unquote(nombre_linea_trabajo)
         
-        # Obtener la colección de líneas de trabajo
-        lineas_trabajo = current_app.config['MONGO_DB']['lineas_trabajo']
-        
-        # Buscar la línea de trabajo por nombre, ignorando mayúsculas/minúsculas
-        linea_trabajo = lineas_trabajo.find_one({
-            'nombre': {'$regex': f'^{re.escape(nombre_linea_trabajo_decoded)}$', '$options': 'i'}
-        })
+        # Buscar la línea de trabajo por nombre en el catálogo, ignorando mayúsculas/minúsculas
+        nombre_buscado = nombre_linea_trabajo_decoded.lower()
+        linea_trabajo = next((
+            linea for linea in catalogo(current_app.config['MONGO_DB'], 'lineas_trabajo').documentos
+            if (linea.get('nombre') or '').lower() == nombre_buscado
+        ), None)
         
         if not linea_trabajo:
             return jsonify({"msg": f"Línea de trabajo '{nombre_linea_trabajo_decoded}' no encontrada"}), 404
         
-        # Convertir ObjectId a string
-        linea_trabajo['_id'] = str(linea_trabajo['_id'])
+        # Copia con el ObjectId convertido a string
+        linea_trabajo = {**linea_trabajo, '_id': str(linea_trabajo['_id'])}
         
         return jsonify(linea_trabajo), 200
     
@@ -179,15 +178,11 @@ def obtener_linea_trabajo(nombre_linea_trabajo):
 @lineas_trabajo_bp.route('/', methods=['GET'])
 def listar_lineas_trabajo():
     try:
-        # Obtener la colección de líneas de trabajo
-        lineas_trabajo = current_app.config['MONGO_DB']['lineas_trabajo']
-        
-        # Obtener todas las líneas de trabajo
-        todas_lineas = list(lineas_trabajo.find())
-        
-        # Convertir ObjectId a string
-        for linea in todas_lineas:
-            linea['_id'] = str(linea['_id'])
+        # Obtener todas las líneas de trabajo del catálogo (copias con el ObjectId como string)
+        todas_lineas = [
+            {**linea, '_id': str(linea['_id'])}
+            for linea in catalogo(current_app.config['MONGO_DB'], 'lineas_trabajo').documentos
+        ]
         
         return jsonify(todas_lineas), 200
     
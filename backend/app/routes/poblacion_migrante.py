@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, send_file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
 from marshmallow import Schema, fields, validate, ValidationError
@@ -8,6 +8,11 @@ import io
 import math
 import re
 import traceback
+from ..utils.busqueda import CAMPO_BUSQUEDA, CAMPOS_BUSQUEDA, claves_busqueda, filtro_busqueda, afecta_busqueda
+from ..utils.exportacion import (
+    generar_exportacion, leer_formato, respuesta_en_flujo, PARQUET_DISPONIBLE, TAMANO_LOTE_EXPORTACION
+)
+from ..utils.catalogos import catalogo
 poblacion_migrante_bp = Blueprint('poblacion_migrante', __name__)
 
 # Esquema de validación para población migrante
@@ -153,6 +158,14 @@ class PoblacionMigranteSchema(Schema):
 poblacion_migrante_schema = PoblacionMigranteSchema()
 poblaciones_migrantes_schema = PoblacionMigranteSchema(many=True)
 
+# Columnas de las exportaciones de datos (csv, ndjson, parquet): los campos del esquema
+CAMPOS_EXPORTACION = ['_id'] + list(poblacion_migrante_schema.fields)
+TIPOS_EXPORTACION = {
+    nombre: 'bool' if isinstance(campo, fields.Bool) else 'int'
+    for nombre, campo in poblacion_migrante_schema.fields.items()
+    if isinstance(campo, (fields.Bool, fields.Int))
+}
+
 @poblacion_migrante_bp.route('/registrar', methods=['POST'])
 @jwt_required()
 def registrar_poblacion_migrante():
@@ -188,6 +201,11 @@ def registrar_poblacion_migrante():
                 "msg": "Ya existe un registro con este número de documento"
             }), 400
 
+        # Términos de búsqueda normalizados
+        poblacion_migrante_validada[CAMPO_BUSQUEDA] = claves_busqueda(
+            poblacion_migrante_validada, CAMPOS_BUSQUEDA['poblacion_migrante']
+        )
+
         # Insertar en base de datos
         result = poblacion_migrante.insert_one(poblacion_migrante_validada)
 
@@ -239,6 +257,7 @@ def update_poblacion_migrante(id_migrante):
         # Eliminar campos que no deberían ser actualizados directamente
         if '_id' in data:
             del data['_id'] 
+        data.pop(CAMPO_BUSQUEDA, None)
         # Considera si necesitas eliminar otros campos como funcionario_id, fecha_registro si no deben ser modificables.
 
         # Obtener colección de base de datos
@@ -253,7 +272,18 @@ def update_poblacion_migrante(id_migrante):
         if result.matched_count == 0:
             current_app.logger.warn(f"Intento de actualizar registro no encontrado con ID: {id_migrante}")
             return jsonify({"success": False, "msg": "Registro no encontrado."}), 404
-        elif result.modified_count == 0:
+
+        # Recalcular los términos de búsqueda si cambió algún campo de texto
+        if result.modified_count and afecta_busqueda(data, 'poblacion_migrante'):
+            campos = CAMPOS_BUSQUEDA['poblacion_migrante']
+            registro = poblacion_migrante_collection.find_one({"_id": object_id}, {campo: 1 for campo in campos})
+            if registro:
+                poblacion_migrante_collection.update_one(
+                    {"_id": object_id},
+                    {"$set": {CAMPO_BUSQUEDA: claves_busqueda(registro, campos)}}
+                )
+
+        if result.modified_count == 0:
             current_app.logger.info(f"Registro {id_migrante} encontrado pero no modificado (datos idénticos).")
             return jsonify({
                 "success": True,
@@ -307,11 +337,11 @@ def listar_poblacion_migrante():
         from datetime import datetime
         
         # Obtener colección
-        poblacion_migrante = current_app.config['MONGO_DB']['poblacion_migrante']
-        lineas_trabajo = current_app.config['MONGO_DB']['lineas_trabajo']
+        db = current_app.config['MONGO_DB']
+        poblacion_migrante = db['poblacion_migrante']
         
-        # Verificar línea de trabajo
-        linea_trabajo_doc = lineas_trabajo.find_one({"_id": ObjectId(linea_trabajo)})
+        # Verificar línea de trabajo (catálogo en memoria)
+        linea_trabajo_doc = catalogo(db, 'lineas_trabajo').obtener(linea_trabajo)
 
         if not linea_trabajo_doc:
             current_app.logger.error(f'Línea de trabajo no encontrada: {linea_trabajo}')
@@ -338,20 +368,16 @@ def listar_poblacion_migrante():
         # Inicializar lista de población migrante
         lista_poblacion_migrante = []
 
-        # Construir filtros de búsqueda
+        # Construir filtros de búsqueda (prefijos sobre los términos normalizados)
         filtro_query = {"linea_trabajo": linea_trabajo}
         if filtro:
-            filtro_query['$or'] = [
-                {"nombre_completo": {"$regex": filtro, "$options": "i"}},
-                {"numero_documento": {"$regex": filtro, "$options": "i"}},
-                {"pais_origen": {"$regex": filtro, "$options": "i"}}
-            ]
+            filtro_query.update(filtro_busqueda(filtro))
 
         # Contar total de documentos con filtro
         total_documentos = poblacion_migrante.count_documents(filtro_query)
         
         # Obtener documentos paginados
-        documentos = list(poblacion_migrante.find(filtro_query)
+        documentos = list(poblacion_migrante.find(filtro_query, {CAMPO_BUSQUEDA: 0})
             .sort('fecha_registro', -1)  # Ordenar por fecha de registro descendente
             .skip((pagina - 1) * por_pagina)  # Saltar documentos de páginas anteriores
             .limit(por_pagina)  # Limitar documentos por página
@@ -428,6 +454,11 @@ def actualizar_poblacion_migrante(id):
         # Obtener colección
         poblacion_migrante = current_app.config['MONGO_DB']['poblacion_migrante']
         
+        # Términos de búsqueda normalizados
+        poblacion_migrante_validada[CAMPO_BUSQUEDA] = claves_busqueda(
+            poblacion_migrante_validada, CAMPOS_BUSQUEDA['poblacion_migrante']
+        )
+
         # Actualizar registro
         resultado = poblacion_migrante.update_one(
             {'_id': ObjectId(id)},
@@ -477,24 +508,37 @@ def exportar_poblacion_migrante():
         # Parámetros de filtrado
         filtro = request.args.get('filtro', '')
         linea_trabajo = request.args.get('linea_trabajo')
+        try:
+            formato = leer_formato(request.args.get('format'))
+        except ValueError as e:
+            return jsonify({"msg": str(e)}), 400
 
         # Obtener colección
         poblacion_migrante = current_app.config['MONGO_DB']['poblacion_migrante']
         
-        # Construir filtro
+        # Construir filtro (prefijos sobre los términos normalizados)
         filtro_query = {}
         if filtro:
-            filtro_query['$or'] = [
-                {'nombre_completo': {'$regex': filtro, '$options': 'i'}},
-                {'numero_documento': {'$regex': filtro, '$options': 'i'}},
-                {'pais_origen': {'$regex': filtro, '$options': 'i'}}
-            ]
+            filtro_query.update(filtro_busqueda(filtro))
         
         if linea_trabajo:
             filtro_query['linea_trabajo'] = linea_trabajo
 
+        if formato != 'xlsx':
+            if formato == 'parquet' and not PARQUET_DISPONIBLE:
+                return jsonify({"msg": "Exportación a Parquet no disponible. Instale pyarrow."}), 501
+
+            # Datos sin formato: se leen por lotes del cursor y se envían a medida que se generan
+            cursor = poblacion_migrante.find(
+                filtro_query, {campo: 1 for campo in CAMPOS_EXPORTACION}
+            ).batch_size(TAMANO_LOTE_EXPORTACION)
+            return respuesta_en_flujo(
+                generar_exportacion(formato, CAMPOS_EXPORTACION, cursor, tipos=TIPOS_EXPORTACION),
+                formato, 'poblacion_migrante'
+            )
+
         # Obtener registros
-        registros = list(poblacion_migrante.find(filtro_query))
+        registros = list(poblacion_migrante.find(filtro_query, {CAMPO_BUSQUEDA: 0}))
 
         # Convertir a DataFrame
         df = pd.DataFrame(registros)
@@ -8,8 +8,29 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet
 
+from ..utils.catalogos import catalogo
+
 reportes_bp = Blueprint('reportes', __name__)
 
+def totales_por_nombre_linea(db, grupos):
+    """
+    Convertir totales agrupados por ID de línea de trabajo en totales por nombre
+
+    Los nombres salen del catálogo en memoria; los grupos cuya línea no
+    existe se descartan.
+
+    :param db: Conexión a la base de datos MongoDB
+    :param grupos: Resultados de un $group con '_id' = ID de línea y 'total'
+    :return: Lista de {'_id': nombre, 'total': n}
+    """
+    lineas = catalogo(db, 'lineas_trabajo')
+    totales = {}
+    for grupo in grupos:
+        nombre = lineas.nombre(grupo['_id'])
+        if nombre:
+            totales[nombre] = totales.get(nombre, 0) + grupo['total']
+    return [{'_id': nombre, 'total': total} for nombre, total in totales.items()]
+
 @reportes_bp.route('/beneficiarios', methods=['GET'])
 def generar_reporte_beneficiarios():
     try:
@@ -37,23 +58,12 @@ def generar_reporte_beneficiarios():
                     }
                 }
             },
-            {
-                '$lookup': {
-                    'from': 'lineas_trabajo',
-                    'localField': 'linea_trabajo',
-                    'foreignField': '_id',
-                    'as': 'linea_trabajo_info'
-                }
-            },
-            {
-                '$unwind': '$linea_trabajo_info'
-            },
             {
                 '$project': {
                     'nombre_completo': 1,
                     'edad': 1,
                     'genero': 1,
-                    'linea_trabajo': '$linea_trabajo_info.nombre',
+                    'linea_trabajo': 1,
                     'fecha_registro': 1,
                     'vulnerabilidad': {
                         '$cond': [
@@ -68,8 +78,15 @@ def generar_reporte_beneficiarios():
             }
         ]
         
-        # Ejecutar pipeline
-        resultados = list(beneficiarios.aggregate(pipeline))
+        # Ejecutar pipeline y resolver el nombre de la línea de trabajo con el
+        # catálogo en memoria (se omiten los beneficiarios sin línea válida)
+        lineas = catalogo(current_app.config['MONGO_DB'], 'lineas_trabajo')
+        resultados = []
+        for beneficiario in beneficiarios.aggregate(pipeline):
+            linea = lineas.obtener(beneficiario.get('linea_trabajo'))
+            if linea:
+                beneficiario['linea_trabajo'] = linea.get('nombre')
+                resultados.append(beneficiario)
         
         # Convertir a DataFrame
         df = pd.DataFrame(resultados)
@@ -191,24 +208,18 @@ def obtener_estadisticas_reportes():
                 },
                 {'$sort': {'_id': 1}}
             ])),
-            'beneficiarios_por_linea_trabajo': list(beneficiarios.aggregate([
-                *pipeline_base,
-                {
-                    '$lookup': {
-                        'from': 'lineas_trabajo',
-                        'localField': 'linea_trabajo',
-                        'foreignField': '_id',
-                        'as': 'linea_trabajo_info'
+            'beneficiarios_por_linea_trabajo': totales_por_nombre_linea(
+                current_app.config['MONGO_DB'],
+                beneficiarios.aggregate([
+                    *pipeline_base,
+                    {
+                        '$group': {
+                            '_id': '$linea_trabajo',
+                            'total': {'$sum': 1}
+                        }
                     }
-                },
-                {'$unwind': '$linea_trabajo_info'},
-                {
-                    '$group': {
-                        '_id': '$linea_trabajo_info.nombre',
-                        'total': {'$sum': 1}
-                    }
-                }
-            ])),
+                ])
+            ),
             'beneficiarios_por_comuna': list(beneficiarios.aggregate([
                 *pipeline_base,
                 {
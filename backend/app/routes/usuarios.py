@@ -7,9 +7,36 @@ import re
 
 from ..models.usuario import usuario_schema, usuarios_schema, UsuarioSchema
 from ..models.linea_trabajo import LineaTrabajoSchema, linea_trabajo_schema
+from ..utils.catalogos import catalogo
+from ..utils.autorizacion import cache_funcionarios
 
 usuarios_bp = Blueprint('usuarios', __name__)
 
+# Campos de un usuario que devuelven los listados
+PROYECCION_USUARIO = {'nombre_completo': 1, 'correo_electronico': 1, 'rol': 1, 'linea_trabajo': 1, 'fecha_registro': 1}
+
+def con_linea_trabajo(db, usuarios):
+    """
+    Sustituir el ID de la línea de trabajo de cada usuario por {_id, nombre}
+
+    La línea se resuelve con el catálogo en memoria. Como hacía el $unwind
+    del $lookup anterior, se omiten los usuarios cuya línea no existe.
+
+    :param db: Conexión a la base de datos MongoDB
+    :param usuarios: Documentos de usuario
+    :return: Lista de usuarios con la línea de trabajo resuelta
+    """
+    lineas = catalogo(db, 'lineas_trabajo')
+    resultado = []
+    for usuario in usuarios:
+        linea = lineas.obtener(usuario.get('linea_trabajo'))
+        if not linea:
+            continue
+        usuario['_id'] = str(usuario['_id'])
+        usuario['linea_trabajo'] = {'_id': str(linea['_id']), 'nombre': linea.get('nombre')}
+        resultado.append(usuario)
+    return resultado
+
 def validar_contrasena(contrasena):
     """
     Validar complejidad de contraseña
@@ -46,8 +73,7 @@ def crear_usuario():
         data = usuario_schema.load(request.json)
         
         # Validar línea de trabajo
-        lineas_trabajo = current_app.config['MONGO_DB']['lineas_trabajo']
-        linea_trabajo = lineas_trabajo.find_one({'_id': ObjectId(data['linea_trabajo'])})
+        linea_trabajo = catalogo(current_app.config['MONGO_DB'], 'lineas_trabajo').obtener(data['linea_trabajo'])
         
         if not linea_trabajo:
             return jsonify({
@@ -115,34 +141,9 @@ def listar_usuarios():
         usuarios = current_app.config['MONGO_DB']['usuarios']
         
         # Obtener todos los usuarios con su línea de trabajo
-        pipeline = [
-            {
-                '$lookup': {
-                    'from': 'lineas_trabajo',
-                    'localField': 'linea_trabajo',
-                    'foreignField': '_id',
-                    'as': 'linea_trabajo_info'
-                }
-            },
-            {
-                '$unwind': '$linea_trabajo_info'
-            },
-            {
-                '$project': {
-                    '_id': {'$toString': '$_id'},
-                    'nombre_completo': 1,
-                    'correo_electronico': 1,
-                    'rol': 1,
-                    'linea_trabajo': {
-                        '_id': {'$toString': '$linea_trabajo_info._id'},
-                        'nombre': '$linea_trabajo_info.nombre'
-                    },
-                    'fecha_registro': 1
-                }
-            }
-        ]
-        
-        usuarios_con_lineas = list(usuarios.aggregate(pipeline))
+        usuarios_con_lineas = con_linea_trabajo(
+            current_app.config['MONGO_DB'], usuarios.find({}, PROYECCION_USUARIO)
+        )
         
         return jsonify(usuarios_schema.dump(usuarios_con_lineas)), 200
     
@@ -156,37 +157,9 @@ def listar_funcionarios():
         usuarios = current_app.config['MONGO_DB']['usuarios']
         
         # Filtrar solo funcionarios
-        pipeline = [
-            {
-                '$match': {'rol': 'funcionario'}
-            },
-            {
-                '$lookup': {
-                    'from': 'lineas_trabajo',
-                    'localField': 'linea_trabajo',
-                    'foreignField': '_id',
-                    'as': 'linea_trabajo_info'
-                }
-            },
-            {
-                '$unwind': '$linea_trabajo_info'
-            },
-            {
-                '$project': {
-                    '_id': {'$toString': '$_id'},
-                    'nombre_completo': 1,
-                    'correo_electronico': 1,
-                    'rol': 1,
-                    'linea_trabajo': {
-                        '_id': {'$toString': '$linea_trabajo_info._id'},
-                        'nombre': '$linea_trabajo_info.nombre'
-                    },
-                    'fecha_registro': 1
-                }
-            }
-        ]
-        
-        funcionarios = list(usuarios.aggregate(pipeline))
+        funcionarios = con_linea_trabajo(
+            current_app.config['MONGO_DB'], usuarios.find({'rol': 'funcionario'}, PROYECCION_USUARIO)
+        )
         
         return jsonify(usuarios_schema.dump(funcionarios)), 200
     
@@ -212,8 +185,7 @@ def actualizar_usuario(id):
         
         # Validar línea de trabajo si se proporciona
         if 'linea_trabajo' in data:
-            lineas_trabajo = current_app.config['MONGO_DB']['lineas_trabajo']
-            linea_trabajo = lineas_trabajo.find_one({'_id': ObjectId(data['linea_trabajo'])})
+            linea_trabajo = catalogo(current_app.config['MONGO_DB'], 'lineas_trabajo').obtener(data['linea_trabajo'])
             
             if not linea_trabajo:
                 return jsonify({
@@ -246,6 +218,9 @@ def actualizar_usuario(id):
         
         if resultado.modified_count == 0:
             return jsonify({"msg": "No se realizaron cambios"}), 200
+
+        # Sus tokens se vuelven a comprobar con el rol, línea y estado nuevos
+        cache_funcionarios().invalidar(id)
         
         return jsonify({"msg": "Usuario actualizado exitosamente"}), 200
     
@@ -272,6 +247,8 @@ def eliminar_usuario(id):
         
         if resultado.deleted_count == 0:
             return jsonify({"msg": "Usuario no encontrado"}), 404
+
+        cache_funcionarios().invalidar(id)
         
         return jsonify({"msg": "Usuario eliminado exitosamente"}), 200
     
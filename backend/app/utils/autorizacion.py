@@ -0,0 +1,170 @@
+import threading
+import time
+from functools import wraps
+
+from bson import ObjectId
+from flask import current_app, jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, verify_jwt_in_request
+
+# Datos del funcionario que viajan como claims en el token de acceso
+CLAIMS_FUNCIONARIO = ('rol', 'linea_trabajo', 'estado')
+
+# Segundos que se reutiliza el estado leído de un funcionario antes de volver a consultarlo
+TTL_REVOCACION = 60
+
+
+def claims_funcionario(funcionario):
+    """
+    Claims adicionales del token de acceso de un funcionario
+
+    :param funcionario: Documento del funcionario
+    :return: Diccionario con rol, linea_trabajo y estado
+    """
+    return {
+        'rol': funcionario.get('rol', 'funcionario'),
+        'linea_trabajo': str(funcionario.get('linea_trabajo', '')),
+        'estado': funcionario.get('estado', 'Activo'),
+    }
+
+
+class CacheFuncionarios:
+    """
+    Estado vigente de los funcionarios, leído de la base de datos como mucho
+    una vez cada 'ttl' segundos por funcionario
+
+    Cada proceso tiene la suya (app.extensions); un cambio hecho en otro
+    proceso se ve, como tarde, al vencer la entrada. También guarda durante
+    'ttl' segundos los tokens (jti) ya rechazados, para que un token revocado
+    que se sigue enviando no vuelva a consultar la base de datos.
+    """
+
+    def __init__(self, ttl=TTL_REVOCACION):
+        self.ttl = ttl
+        self._entradas = {}
+        self._revocados = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, db, funcionario_id, refrescar=False):
+        """
+        Claims vigentes de un funcionario
+
+        :param db: Conexión a la base de datos MongoDB
+        :param funcionario_id: ID del funcionario (identidad del token)
+        :param refrescar: Ignorar la entrada guardada y volver a consultar
+        :return: Diccionario de claims o None si el funcionario no existe
+        """
+        ahora = time.monotonic()
+        if not refrescar:
+            with self._lock:
+                entrada = self._entradas.get(funcionario_id)
+            if entrada and entrada[0] > ahora:
+                return entrada[1]
+
+        if not ObjectId.is_valid(funcionario_id):
+            return None
+        funcionario = db['funcionarios'].find_one(
+            {'_id': ObjectId(funcionario_id)}, {campo: 1 for campo in CLAIMS_FUNCIONARIO}
+        )
+        claims = claims_funcionario(funcionario) if funcionario else None
+        self.guardar(funcionario_id, claims)
+        return claims
+
+    def guardar(self, funcionario_id, claims):
+        """Guardar el estado de un funcionario (p. ej. al emitir sus tokens)"""
+        with self._lock:
+            self._entradas[funcionario_id] = (time.monotonic() + self.ttl, claims)
+
+    def invalidar(self, funcionario_id):
+        """Descartar el estado guardado de un funcionario tras modificarlo o eliminarlo"""
+        with self._lock:
+            self._entradas.pop(str(funcionario_id), None)
+
+    def revocado(self, jti):
+        """Indicar si un token ya se rechazó hace menos de 'ttl' segundos"""
+        with self._lock:
+            vence = self._revocados.get(jti)
+        return vence is not None and vence > time.monotonic()
+
+    def revocar(self, jti):
+        """Recordar que un token se rechazó, descartando los rechazos vencidos"""
+        ahora = time.monotonic()
+        with self._lock:
+            self._revocados = {clave: vence for clave, vence in self._revocados.items() if vence > ahora}
+            self._revocados[jti] = ahora + self.ttl
+
+
+def cache_funcionarios(app=None):
+    """Caché de funcionarios de la aplicación (se crea en el primer uso)"""
+    app = app or current_app._get_current_object()
+    cache = app.extensions.get('cache_funcionarios')
+    if cache is None:
+        cache = app.extensions.setdefault(
+            'cache_funcionarios', CacheFuncionarios(app.config.get('JWT_REVOCACION_TTL', TTL_REVOCACION))
+        )
+    return cache
+
+
+def token_revocado(jwt_header, jwt_payload):
+    """
+    Comprobar si un token ya no es válido (token_in_blocklist_loader)
+
+    Un token queda revocado si su funcionario ya no existe o si los claims
+    que lleva no coinciden con el rol, la línea o el estado actuales. Antes
+    de rechazarlo por una diferencia se vuelve a consultar el funcionario,
+    por si la caché es anterior al cambio que trae el token. El rechazo se
+    recuerda por el jti del token durante el TTL de la caché.
+    """
+    db = current_app.config['MONGO_DB']
+    cache = cache_funcionarios()
+    funcionario_id = jwt_payload.get('sub')
+    jti = jwt_payload.get('jti')
+    if jti and cache.revocado(jti):
+        return True
+
+    def difiere(vigentes):
+        return any(campo in jwt_payload and jwt_payload[campo] != vigentes[campo] for campo in CLAIMS_FUNCIONARIO)
+
+    vigentes = cache.obtener(db, funcionario_id)
+    if vigentes is not None and difiere(vigentes):
+        vigentes = cache.obtener(db, funcionario_id, refrescar=True)
+    revocado = vigentes is None or difiere(vigentes)
+    if revocado and jti:
+        cache.revocar(jti)
+    return revocado
+
+
+def funcionario_actual():
+    """
+    Funcionario autenticado a partir de los claims del token
+
+    Los tokens emitidos antes de incluir los claims se resuelven con la caché.
+
+    :return: Diccionario con 'id', 'rol', 'linea_trabajo' y 'estado'
+    """
+    claims = get_jwt()
+    funcionario_id = get_jwt_identity()
+    if all(campo in claims for campo in CLAIMS_FUNCIONARIO):
+        datos = {campo: claims[campo] for campo in CLAIMS_FUNCIONARIO}
+    else:
+        datos = cache_funcionarios().obtener(current_app.config['MONGO_DB'], funcionario_id) or {}
+    return {'id': funcionario_id, **datos}
+
+
+def role_required(allowed_roles, msg="No tienes permisos para realizar esta acción"):
+    """
+    Exigir un token válido cuyo rol esté entre los permitidos
+
+    El rol se lee de los claims del token, sin consultar la base de datos.
+
+    :param allowed_roles: Roles que pueden acceder a la ruta
+    :param msg: Mensaje de la respuesta 403
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            verify_jwt_in_request()
+            if funcionario_actual().get('rol') not in allowed_roles:
+                return jsonify({"msg": msg}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,182 @@
+import re
+import unicodedata
+
+from bson.regex import Regex
+from pymongo import UpdateOne
+
+# Campo indexado donde se guardan los términos de búsqueda normalizados
+CAMPO_BUSQUEDA = 'busqueda'
+
+# Campos de texto que alimentan la búsqueda en cada colección
+CAMPOS_BUSQUEDA = {
+    'beneficiarios': ('nombre_completo', 'numero_documento', 'funcionario_nombre', 'comuna', 'barrio'),
+    'poblacion_migrante': ('nombre_completo', 'numero_documento', 'pais_origen'),
+    'asistentes': ('nombre', 'cedula'),
+}
+
+# Campo indexado con los términos del autocompletado: solo nombre y documento,
+# para que escribir una comuna o el nombre de un funcionario no sugiera registros
+CAMPO_AUTOCOMPLETAR = 'autocompletar'
+# Nombre normalizado por el que se ordenan las sugerencias
+CAMPO_NOMBRE_ORDEN = 'nombre_orden'
+CAMPOS_AUTOCOMPLETAR = {
+    'beneficiarios': ('nombre_completo', 'numero_documento'),
+}
+
+# Límites de resultados para el autocompletado
+LIMITE_AUTOCOMPLETAR = 10
+LIMITE_AUTOCOMPLETAR_MAXIMO = 50
+
+
+def normalizar_texto(texto):
+    """
+    Pasar un texto a minúsculas y quitarle tildes y diacríticos
+
+    :param texto: Valor a normalizar (se convierte a cadena si no lo es)
+    :return: Texto normalizado, por ejemplo 'José Peña' -> 'jose pena'
+    """
+    if texto is None:
+        return ''
+    descompuesto = unicodedata.normalize('NFKD', str(texto))
+    sin_tildes = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return sin_tildes.casefold()
+
+
+def tokenizar(texto):
+    """
+    Dividir un texto normalizado en palabras
+
+    :param texto: Texto de entrada
+    :return: Lista de términos en el orden en que aparecen
+    """
+    return re.findall(r'\w+', normalizar_texto(texto))
+
+
+def claves_busqueda(documento, campos):
+    """
+    Calcular los términos de búsqueda de un documento
+
+    Además de cada palabra, los valores formados solo por números separados
+    (por ejemplo '1.234.567') se guardan también sin separadores para que
+    el documento se pueda buscar escribiéndolo de las dos formas.
+
+    :param documento: Documento (o subconjunto de campos) a indexar
+    :param campos: Campos de texto que se tienen en cuenta
+    :return: Lista ordenada de términos únicos
+    """
+    terminos = set()
+    for campo in campos:
+        palabras = tokenizar(documento.get(campo))
+        terminos.update(palabras)
+        if len(palabras) > 1 and all(palabra.isdigit() for palabra in palabras):
+            terminos.add(''.join(palabras))
+    return sorted(terminos)
+
+
+def campos_busqueda(documento, coleccion):
+    """
+    Calcular todos los campos de búsqueda derivados de un documento
+
+    :param documento: Documento (o subconjunto de campos) a indexar
+    :param coleccion: Nombre de la colección en CAMPOS_BUSQUEDA
+    :return: Diccionario con CAMPO_BUSQUEDA y, si la colección tiene
+             autocompletado, CAMPO_AUTOCOMPLETAR y CAMPO_NOMBRE_ORDEN
+    """
+    campos = {CAMPO_BUSQUEDA: claves_busqueda(documento, CAMPOS_BUSQUEDA[coleccion])}
+    autocompletar = CAMPOS_AUTOCOMPLETAR.get(coleccion)
+    if autocompletar:
+        campos[CAMPO_AUTOCOMPLETAR] = claves_busqueda(documento, autocompletar)
+        campos[CAMPO_NOMBRE_ORDEN] = ' '.join(tokenizar(documento.get(autocompletar[0])))
+    return campos
+
+
+def filtro_busqueda(texto, campo=CAMPO_BUSQUEDA):
+    """
+    Construir el filtro de búsqueda por prefijo sobre los términos normalizados
+
+    Cada palabra escrita debe ser prefijo de algún término del documento.
+    Las expresiones quedan ancladas al inicio y sin opción 'i', por lo que
+    MongoDB las resuelve como un rango sobre el índice de CAMPO_BUSQUEDA.
+
+    :param texto: Texto escrito por el usuario
+    :param campo: Campo de términos sobre el que se busca (CAMPO_BUSQUEDA o CAMPO_AUTOCOMPLETAR)
+    :return: Filtro de MongoDB, vacío si el texto no contiene palabras
+    """
+    expresiones = [Regex('^' + re.escape(palabra)) for palabra in dict.fromkeys(tokenizar(texto))]
+    if not expresiones:
+        return {}
+    if len(expresiones) == 1:
+        return {campo: expresiones[0]}
+    return {'$and': [{campo: expresion} for expresion in expresiones]}
+
+
+def documentos_exactos(texto):
+    """
+    Formas de un número de documento escrito, para buscarlo tal cual
+
+    :param texto: Texto escrito por el usuario
+    :return: Lista de valores (el texto y, si son solo números con
+             separadores, también sin ellos); vacía si no parece un documento
+    """
+    texto = (texto or '').strip()
+    palabras = tokenizar(texto)
+    if not palabras or not all(palabra.isdigit() for palabra in palabras):
+        return []
+    return list(dict.fromkeys([texto, ''.join(palabras)]))
+
+
+def afecta_busqueda(datos, coleccion):
+    """
+    Indicar si una actualización modifica alguno de los campos de búsqueda
+
+    :param datos: Campos que se van a actualizar
+    :param coleccion: Nombre de la colección en CAMPOS_BUSQUEDA
+    :return: True si hay que recalcular los términos
+    """
+    return any(campo in datos for campo in CAMPOS_BUSQUEDA[coleccion])
+
+
+def generar_claves_faltantes(coleccion, nombre, tamano_lote=1000, todos=False):
+    """
+    Rellenar los términos de búsqueda de documentos existentes
+
+    :param coleccion: Colección de MongoDB a procesar
+    :param nombre: Nombre de la colección en CAMPOS_BUSQUEDA
+    :param tamano_lote: Número de documentos por bulk_write
+    :param todos: Recalcular también los documentos que ya tienen términos
+    :return: Número de documentos actualizados
+    """
+    campos = CAMPOS_BUSQUEDA[nombre]
+    filtro = {}
+    if not todos:
+        filtro = {CAMPO_BUSQUEDA: {'$exists': False}}
+        if nombre in CAMPOS_AUTOCOMPLETAR:
+            filtro = {'$or': [filtro, {CAMPO_AUTOCOMPLETAR: {'$exists': False}}]}
+    proyeccion = {campo: 1 for campo in campos}
+
+    actualizados = 0
+    lote = []
+    for documento in coleccion.find(filtro, proyeccion):
+        lote.append(UpdateOne(
+            {'_id': documento['_id']},
+            {'$set': campos_busqueda(documento, nombre)}
+        ))
+        if len(lote) >= tamano_lote:
+            actualizados += coleccion.bulk_write(lote, ordered=False).modified_count
+            lote = []
+    if lote:
+        actualizados += coleccion.bulk_write(lote, ordered=False).modified_count
+    return actualizados
+
+
+def limite_autocompletar(valor):
+    """
+    Leer el número de sugerencias solicitado, acotado entre 1 y el máximo
+
+    :param valor: Valor recibido en la petición (puede ser None)
+    :return: Límite a aplicar en la consulta
+    :raises ValueError: Si el valor no es un entero
+    """
+    if valor in (None, ''):
+        return LIMITE_AUTOCOMPLETAR
+    return max(1, min(int(valor), LIMITE_AUTOCOMPLETAR_MAXIMO))
@@ -0,0 +1,128 @@
+import threading
+import time
+
+from app.models.version_datos import VersionDatosModel
+
+# Colecciones pequeñas y de lectura frecuente que se guardan en memoria
+COLECCIONES_CATALOGO = ('lineas_trabajo', 'comunas')
+
+# Segundos entre comprobaciones de la versión de un catálogo en la base de datos.
+# Los cambios hechos en el mismo proceso se ven de inmediato; los de otros
+# procesos (otros workers de gunicorn), como tarde, al pasar este intervalo
+INTERVALO_VERIFICACION_CATALOGOS = 5
+
+
+class Catalogo:
+    """
+    Contenido de una colección de catálogo con búsqueda por ID y por nombre
+
+    Los documentos se comparten entre solicitudes: quien necesite modificarlos
+    debe copiarlos antes.
+    """
+
+    def __init__(self, documentos, version):
+        self.documentos = documentos
+        self.version = version
+        self.por_id = {str(documento['_id']): documento for documento in documentos}
+        self.por_nombre = {documento['nombre']: documento for documento in documentos if documento.get('nombre')}
+
+    def obtener(self, documento_id):
+        """
+        Documento por su ID
+
+        :param documento_id: ID como texto u ObjectId
+        :return: Documento o None
+        """
+        if not documento_id:
+            return None
+        return self.por_id.get(str(documento_id))
+
+    def nombre(self, documento_id, por_defecto=None):
+        """Nombre del documento con ese ID, o 'por_defecto' si no existe"""
+        documento = self.obtener(documento_id) or {}
+        return documento.get('nombre') or por_defecto
+
+
+class CacheCatalogos:
+    """
+    Catálogos en memoria del proceso
+
+    Cada catálogo se carga entero la primera vez y se vuelve a cargar solo
+    cuando cambia su contador en 'versiones_datos' (registrar_cambio_datos),
+    que se consulta como mucho una vez cada 'intervalo' segundos.
+    """
+
+    def __init__(self, intervalo=INTERVALO_VERIFICACION_CATALOGOS):
+        self.intervalo = intervalo
+        self._catalogos = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _clave(db, coleccion):
+        return id(db.client), db.name, coleccion
+
+    def obtener(self, db, coleccion):
+        """
+        Catálogo vigente de una colección
+
+        :param db: Conexión a la base de datos MongoDB
+        :param coleccion: Una de COLECCIONES_CATALOGO
+        :return: Catalogo
+        """
+        clave = self._clave(db, coleccion)
+        ahora = time.monotonic()
+        with self._lock:
+            catalogo, verificado_en = self._catalogos.get(clave, (None, 0))
+        if catalogo is not None and ahora - verificado_en < self.intervalo:
+            return catalogo
+
+        # La versión se lee antes que los documentos: si cambia entre ambas
+        # lecturas, la siguiente comprobación vuelve a cargar el catálogo
+        version = VersionDatosModel(db).obtener([coleccion])[coleccion]
+        if catalogo is None or catalogo.version != version:
+            catalogo = Catalogo(list(db[coleccion].find()), version)
+        with self._lock:
+            self._catalogos[clave] = (catalogo, ahora)
+        return catalogo
+
+    def invalidar(self, db, coleccion):
+        """Descartar un catálogo tras escribir en su colección desde este proceso"""
+        with self._lock:
+            self._catalogos.pop(self._clave(db, coleccion), None)
+
+
+cache_catalogos = CacheCatalogos()
+
+
+def catalogo(db, coleccion):
+    """
+    Catálogo vigente de una colección (ver CacheCatalogos)
+
+    :param db: Conexión a la base de datos MongoDB
+    :param coleccion: 'lineas_trabajo' o 'comunas'
+    :return: Catalogo
+    """
+    return cache_catalogos.obtener(db, coleccion)
+
+
+def invalidar_catalogo(db, coleccion):
+    """Descartar el catálogo de una colección en este proceso"""
+    cache_catalogos.invalidar(db, coleccion)
+
+
+def linea_trabajo(db, linea_trabajo_id):
+    """
+    Línea de trabajo por su ID (texto u ObjectId)
+
+    :return: Documento de la línea o None
+    """
+    return catalogo(db, 'lineas_trabajo').obtener(linea_trabajo_id)
+
+
+def linea_trabajo_por_nombre(db, nombre):
+    """
+    Línea de trabajo por su nombre exacto
+
+    :return: Documento de la línea o None
+    """
+    return catalogo(db, 'lineas_trabajo').por_nombre.get(nombre)
@@ -0,0 +1,104 @@
+import re
+from difflib import SequenceMatcher
+from itertools import combinations
+
+from app.utils.busqueda import normalizar_texto, tokenizar
+
+# Palabras que no distinguen a una persona y no sirven para agrupar candidatos
+PALABRAS_VACIAS = {'de', 'del', 'la', 'las', 'los', 'y', 'e', 'da', 'do', 'dos', 'van', 'von', 'san'}
+
+# Palabras del nombre que se combinan en pares (los nombres largos se recortan)
+MAXIMO_PALABRAS_NOMBRE = 6
+
+# Longitud de los prefijos de palabra y de documento que forman las claves de bloque
+LONGITUD_PREFIJO_PALABRA = 3
+LONGITUD_PREFIJO_DOCUMENTO = 5
+
+# Un bloque con más registros que este límite es demasiado común para distinguir
+# a nadie (p. ej. 'maria|rodriguez'); se ignora para que el coste no sea cuadrático
+LIMITE_BLOQUE = 200
+
+# Puntaje mínimo para proponer un par como posible duplicado
+UMBRAL_DUPLICADO = 0.85
+
+# Peso del nombre en el puntaje cuando ambos registros tienen documento
+PESO_NOMBRE = 0.6
+
+
+def palabras_nombre(nombre):
+    """
+    Palabras significativas de un nombre, normalizadas y ordenadas
+
+    :param nombre: Nombre completo
+    :return: Lista ordenada de palabras únicas
+    """
+    return sorted({
+        palabra for palabra in tokenizar(nombre)
+        if len(palabra) > 1 and palabra not in PALABRAS_VACIAS and not palabra.isdigit()
+    })
+
+
+def documento_normalizado(documento):
+    """Número de documento sin separadores ni espacios ('1.234.567' -> '1234567')"""
+    return re.sub(r'[^a-z0-9]', '', normalizar_texto(documento))
+
+
+def claves_bloqueo(nombre, documento):
+    """
+    Claves de bloque de un registro: solo se comparan registros que comparten alguna
+
+    - Cada par de palabras del nombre (un error en una palabra conserva los
+      pares que no la incluyen) y el mismo par reducido a sus prefijos (un
+      error al final de las palabras conserva el prefijo).
+    - El inicio y el final del número de documento (un dígito equivocado deja
+      intacto al menos uno de los dos).
+
+    :param nombre: Nombre completo
+    :param documento: Número de documento
+    :return: Lista ordenada de claves
+    """
+    palabras = palabras_nombre(nombre)[:MAXIMO_PALABRAS_NOMBRE]
+    claves = set()
+    if len(palabras) == 1:
+        claves.add(f'n:{palabras[0]}')
+    for primera, segunda in combinations(palabras, 2):
+        claves.add(f'n:{primera}|{segunda}')
+        prefijos = sorted((primera[:LONGITUD_PREFIJO_PALABRA], segunda[:LONGITUD_PREFIJO_PALABRA]))
+        claves.add(f'p:{prefijos[0]}|{prefijos[1]}')
+
+    numero = documento_normalizado(documento)
+    if len(numero) >= LONGITUD_PREFIJO_DOCUMENTO:
+        claves.add(f'd:{numero[:LONGITUD_PREFIJO_DOCUMENTO]}')
+        claves.add(f'f:{numero[-LONGITUD_PREFIJO_DOCUMENTO:]}')
+    return sorted(claves)
+
+
+def similitud(texto_a, texto_b):
+    """Parecido entre dos textos, de 0 a 1"""
+    if not texto_a or not texto_b:
+        return 0.0
+    return SequenceMatcher(None, texto_a, texto_b).ratio()
+
+
+def puntuar(registro_a, registro_b):
+    """
+    Puntuar la probabilidad de que dos registros sean la misma persona
+
+    El nombre se compara con sus palabras ordenadas, de modo que el orden de
+    nombres y apellidos no influye.
+
+    :param registro_a: Diccionario con 'nombre' y 'documento'
+    :param registro_b: Diccionario con 'nombre' y 'documento'
+    :return: Tupla (puntaje de 0 a 1, detalle con la similitud de cada campo)
+    """
+    nombre = similitud(' '.join(palabras_nombre(registro_a.get('nombre'))),
+                       ' '.join(palabras_nombre(registro_b.get('nombre'))))
+    documento_a = documento_normalizado(registro_a.get('documento'))
+    documento_b = documento_normalizado(registro_b.get('documento'))
+
+    if not documento_a or not documento_b:
+        return round(nombre, 4), {'nombre': round(nombre, 4), 'documento': None}
+
+    documento = similitud(documento_a, documento_b)
+    puntaje = PESO_NOMBRE * nombre + (1 - PESO_NOMBRE) * documento
+    return round(puntaje, 4), {'nombre': round(nombre, 4), 'documento': round(documento, 4)}
@@ -0,0 +1,468 @@
+import csv
+import io
+import json
+import math
+import re
+import unicodedata
+import zipfile
+from datetime import date, datetime
+from urllib.parse import quote
+from xml.sax.saxutils import escape
+
+from bson import ObjectId
+
+# Parquet es opcional: solo está disponible si pyarrow está instalado
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    pa = None
+    pq = None
+    PARQUET_DISPONIBLE = False
+
+# El .xlsx de las exportaciones se escribe a mano (generar_xlsx) y no con
+# openpyxl en modo write_only, como las hojas de asistencia: en ese modo
+# openpyxl guarda la hoja en un archivo temporal y solo arma el libro al
+# llamar a save(), así que el cliente no recibe nada hasta el final. Aquí cada
+# fila se comprime y se entrega en cuanto se escribe. A cambio, este escritor
+# solo genera texto, números y el estilo del encabezado (las hojas de
+# asistencia necesitan imágenes y formato, por eso usan openpyxl).
+
+MIMETYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Formatos de exportación: (tipo MIME, extensión del archivo)
+FORMATOS_EXPORTACION = {
+    'xlsx': (MIMETYPE_XLSX, 'xlsx'),
+    'csv': ('text/csv', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Documentos que se piden al servidor en cada lote del cursor
+TAMANO_LOTE_EXPORTACION = 1000
+
+# Bytes acumulados antes de entregar un bloque al cliente
+TAMANO_BLOQUE_EXPORTACION = 64 * 1024
+
+# Filas por grupo de filas (row group) de Parquet: es lo único que se tiene en memoria
+TAMANO_GRUPO_PARQUET = 10000
+
+# Caracteres de control que XML 1.0 no admite (Excel rechaza el archivo si aparecen)
+_CARACTERES_INVALIDOS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{nombre}" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# Estilo 0: normal; estilo 1: encabezado en negrilla con borde (como el de pandas)
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+    '<border><left style="thin"/><right style="thin"/><top style="thin"/><bottom style="thin"/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="1" xfId="0" applyFont="1" applyBorder="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_INICIO_HOJA = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+)
+
+
+class _SalidaEnBloques:
+    """
+    Destino de escritura para zipfile que acumula los bytes en memoria
+    hasta que el generador los entrega al cliente
+
+    No implementa seek(), por lo que zipfile escribe el ZIP en modo
+    secuencial (descriptores de datos tras cada entrada); tell() devuelve
+    los bytes escritos desde el principio.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self._partes = []
+        self.tamano = 0
+        self.posicion = 0
+
+    def write(self, datos):
+        self._partes.append(bytes(datos))
+        self.tamano += len(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+    def flush(self):
+        pass
+
+    def close(self):
+        # El contenido pendiente se sigue pudiendo extraer
+        pass
+
+    def extraer(self):
+        datos = b''.join(self._partes)
+        self._partes = []
+        self.tamano = 0
+        return datos
+
+
+def columna_excel(indice):
+    """
+    Letra de columna de Excel para un índice que empieza en 0 (0 -> A, 26 -> AA)
+
+    :param indice: Índice de la columna
+    :return: Letras de la columna
+    """
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def _celda(referencia, valor, estilo=0):
+    """XML de una celda: números como valor, el resto como texto en línea"""
+    atributo_estilo = f' s="{estilo}"' if estilo else ''
+    # Excel no admite NaN ni infinitos como valor numérico: quedan vacías
+    if valor is None or valor == '' or (isinstance(valor, float) and not math.isfinite(valor)):
+        return f'<c r="{referencia}"{atributo_estilo}/>' if estilo else ''
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return f'<c r="{referencia}"{atributo_estilo}><v>{valor}</v></c>'
+    texto = escape(_CARACTERES_INVALIDOS.sub('', str(valor)))
+    espacio = ' xml:space="preserve"' if texto != texto.strip() else ''
+    return f'<c r="{referencia}"{atributo_estilo} t="inlineStr"><is><t{espacio}>{texto}</t></is></c>'
+
+
+def generar_xlsx(encabezados, filas, nombre_hoja='Hoja1', tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Generar un libro de Excel (una hoja) por bloques, sin tenerlo entero en memoria
+
+    Cada fila se escribe directamente en la entrada comprimida de la hoja y
+    los bytes se entregan en cuanto se acumula un bloque, de modo que la
+    memoria usada no depende del número de filas y el cliente empieza a
+    recibir el archivo desde la primera fila.
+
+    :param encabezados: Títulos de las columnas
+    :param filas: Iterable de listas de valores (en el orden de los encabezados)
+    :param nombre_hoja: Nombre de la hoja
+    :param tamano_bloque: Bytes acumulados antes de entregar un bloque
+    :return: Generador de bloques de bytes del archivo .xlsx
+    """
+    columnas = [columna_excel(i) for i in range(len(encabezados))]
+    salida = _SalidaEnBloques()
+
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as libro:
+        libro.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        libro.writestr('_rels/.rels', _RELS)
+        libro.writestr('xl/workbook.xml', _WORKBOOK.format(nombre=escape(nombre_hoja, {'"': '&quot;'})))
+        libro.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS)
+        libro.writestr('xl/styles.xml', _STYLES)
+
+        # force_zip64: el tamaño final de la hoja no se conoce al empezar a escribirla
+        with libro.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as hoja:
+            hoja.write(_INICIO_HOJA.encode('utf-8'))
+            hoja.write(b'<sheetData>')
+            hoja.write(('<row r="1">' + ''.join(
+                _celda(f'{columna}1', titulo, estilo=1) for columna, titulo in zip(columnas, encabezados)
+            ) + '</row>').encode('utf-8'))
+
+            for numero, fila in enumerate(filas, start=2):
+                hoja.write((f'<row r="{numero}">' + ''.join(
+                    _celda(f'{columna}{numero}', valor) for columna, valor in zip(columnas, fila)
+                ) + '</row>').encode('utf-8'))
+                if salida.tamano >= tamano_bloque:
+                    yield salida.extraer()
+
+            hoja.write(b'</sheetData></worksheet>')
+
+    yield salida.extraer()
+
+
+def valor_plano(valor):
+    """
+    Convertir un valor de MongoDB a un tipo representable en CSV/JSON
+
+    :param valor: Valor del documento
+    :return: None, bool, número o texto (fechas en ISO 8601, listas y objetos en JSON)
+    """
+    if valor is None or isinstance(valor, (bool, int, float, str)):
+        return valor
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, ObjectId):
+        return str(valor)
+    if isinstance(valor, (dict, list, tuple)):
+        return json.dumps(valor, ensure_ascii=False, default=str)
+    return str(valor)
+
+
+def generar_csv(campos, documentos, tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Generar un CSV (UTF-8, con encabezado) por bloques
+
+    :param campos: Campos del documento que forman las columnas
+    :param documentos: Iterable de documentos de MongoDB
+    :param tamano_bloque: Bytes acumulados antes de entregar un bloque
+    :return: Generador de bloques de bytes
+    """
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(campos)
+    for documento in documentos:
+        escritor.writerow(['' if valor is None else valor
+                           for valor in (valor_plano(documento.get(campo)) for campo in campos)])
+        if buffer.tell() >= tamano_bloque:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def generar_lineas_json(documentos, serializar=json.dumps, tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Generar JSON delimitado por líneas (un objeto por documento) por bloques
+
+    Solo se tiene en memoria el bloque en curso: el siguiente documento se pide
+    al iterable cuando el cliente ya consumió el bloque anterior.
+
+    :param documentos: Iterable de documentos ya representables en JSON
+    :param serializar: Función que convierte un documento en texto JSON de una línea
+    :param tamano_bloque: Bytes acumulados antes de entregar un bloque
+    :return: Generador de bloques de bytes
+    """
+    lineas = []
+    tamano = 0
+    for documento in documentos:
+        linea = serializar(documento) + '\n'
+        lineas.append(linea)
+        tamano += len(linea)
+        if tamano >= tamano_bloque:
+            yield ''.join(lineas).encode('utf-8')
+            lineas = []
+            tamano = 0
+    yield ''.join(lineas).encode('utf-8')
+
+
+def generar_ndjson(campos, documentos, tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Generar la exportación en JSON delimitado por líneas por bloques
+
+    :param campos: Campos del documento que se incluyen en cada objeto
+    :param documentos: Iterable de documentos de MongoDB
+    :param tamano_bloque: Bytes acumulados antes de entregar un bloque
+    :return: Generador de bloques de bytes
+    """
+    return generar_lineas_json(
+        ({campo: valor_plano(documento.get(campo)) for campo in campos} for documento in documentos),
+        lambda objeto: json.dumps(objeto, ensure_ascii=False),
+        tamano_bloque
+    )
+
+
+def _valor_parquet(valor, tipo):
+    """Adaptar un valor al tipo de su columna Parquet (None si no se puede)"""
+    if valor is None:
+        return None
+    if tipo == 'bool':
+        return bool(valor)
+    if tipo == 'int':
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            return None
+    return str(valor_plano(valor))
+
+
+def generar_parquet(campos, documentos, tipos=None, tamano_grupo=TAMANO_GRUPO_PARQUET):
+    """
+    Generar un archivo Parquet escrito por grupos de filas
+
+    Solo el grupo en curso está en memoria; cada grupo se entrega al cliente
+    en cuanto se escribe.
+
+    :param campos: Campos del documento que forman las columnas
+    :param documentos: Iterable de documentos de MongoDB
+    :param tipos: Tipo de las columnas que no son texto ({campo: 'bool' | 'int'})
+    :param tamano_grupo: Filas por grupo de filas
+    :return: Generador de bloques de bytes
+    :raises RuntimeError: Si pyarrow no está instalado
+    """
+    if not PARQUET_DISPONIBLE:
+        raise RuntimeError("La exportación a Parquet requiere pyarrow")
+
+    tipos = tipos or {}
+    tipos_arrow = {'bool': pa.bool_(), 'int': pa.int64()}
+    esquema = pa.schema([(campo, tipos_arrow.get(tipos.get(campo), pa.string())) for campo in campos])
+    salida = _SalidaEnBloques()
+    escritor = pq.ParquetWriter(salida, esquema, compression='snappy')
+
+    def escribir(columnas):
+        escritor.write_table(pa.Table.from_pydict(columnas, schema=esquema))
+
+    columnas = {campo: [] for campo in campos}
+    filas = 0
+    for documento in documentos:
+        for campo in campos:
+            columnas[campo].append(_valor_parquet(documento.get(campo), tipos.get(campo)))
+        filas += 1
+        if filas >= tamano_grupo:
+            escribir(columnas)
+            columnas = {campo: [] for campo in campos}
+            filas = 0
+            yield salida.extraer()
+
+    if filas:
+        escribir(columnas)
+    escritor.close()
+    yield salida.extraer()
+
+
+def generar_exportacion(formato, campos, documentos, tipos=None):
+    """
+    Generar una exportación de datos sin formato (csv, ndjson o parquet)
+
+    :param formato: 'csv', 'ndjson' o 'parquet'
+    :param campos: Campos del documento que se exportan
+    :param documentos: Iterable de documentos de MongoDB
+    :param tipos: Tipos de columna para Parquet ({campo: 'bool' | 'int'})
+    :return: Generador de bloques de bytes
+    """
+    if formato == 'csv':
+        return generar_csv(campos, documentos)
+    if formato == 'ndjson':
+        return generar_ndjson(campos, documentos)
+    if formato == 'parquet':
+        return generar_parquet(campos, documentos, tipos=tipos)
+    raise ValueError(f"Formato de exportación no soportado: {formato}")
+
+
+def leer_formato(parametro, por_defecto='xlsx'):
+    """
+    Interpretar el parámetro ?format= de una exportación
+
+    :param parametro: Valor recibido (o None)
+    :param por_defecto: Formato cuando no se indica ninguno
+    :return: Formato en minúsculas
+    :raises ValueError: Si el formato no existe
+    """
+    formato = (parametro or por_defecto).strip().lower()
+    if formato not in FORMATOS_EXPORTACION:
+        raise ValueError(f"Formato inválido: {formato}. Use {', '.join(FORMATOS_EXPORTACION)}")
+    return formato
+
+
+def respuesta_en_flujo(bloques, formato, nombre_base):
+    """
+    Respuesta de Flask que envía una exportación a medida que se genera
+
+    :param bloques: Generador de bloques de bytes
+    :param formato: Clave de FORMATOS_EXPORTACION
+    :param nombre_base: Nombre del archivo sin extensión
+    :return: Response en streaming con el archivo adjunto
+    """
+    from flask import Response, stream_with_context
+
+    mimetype, extension = FORMATOS_EXPORTACION[formato]
+    return Response(
+        stream_with_context(bloques),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={nombre_base}.{extension}'}
+    )
+
+
+def respuesta_archivo_en_flujo(archivo, nombre_descarga, mimetype=MIMETYPE_XLSX,
+                               tamano_bloque=TAMANO_BLOQUE_EXPORTACION):
+    """
+    Respuesta de Flask que envía por bloques un archivo temporal ya generado
+
+    El archivo se cierra (y con ello se borra, si es temporal) en cuanto se
+    cierra la respuesta, se haya enviado entera o no.
+
+    :param archivo: Archivo abierto en modo binario, posicionado al principio
+    :param nombre_descarga: Nombre del archivo adjunto (puede tener tildes)
+    :param mimetype: Tipo MIME
+    :param tamano_bloque: Bytes por bloque enviado
+    :return: Response en streaming con el archivo adjunto
+    """
+    from flask import Response
+
+    inicio = archivo.tell()
+    archivo.seek(0, io.SEEK_END)
+    tamano = archivo.tell() - inicio
+    archivo.seek(inicio)
+
+    def bloques():
+        while True:
+            bloque = archivo.read(tamano_bloque)
+            if not bloque:
+                return
+            yield bloque
+
+    # Mismo Content-Disposition que send_file: nombre ASCII y, si hace falta, filename* en UTF-8
+    try:
+        nombre_descarga.encode('ascii')
+        nombres = {'filename': nombre_descarga}
+    except UnicodeEncodeError:
+        nombres = {
+            'filename': unicodedata.normalize('NFKD', nombre_descarga).encode('ascii', 'ignore').decode('ascii'),
+            'filename*': f"UTF-8''{quote(nombre_descarga, safe='')}",
+        }
+
+    respuesta = Response(bloques(), mimetype=mimetype, direct_passthrough=True)
+    respuesta.headers.set('Content-Disposition', 'attachment', **nombres)
+    respuesta.headers['Content-Length'] = str(tamano)
+    respuesta.call_on_close(archivo.close)
+    return respuesta
@@ -0,0 +1,38 @@
+from bson import ObjectId
+
+
+def ids_validos(ids):
+    """
+    ObjectIds únicos de una lista de referencias
+
+    :param ids: IDs como texto u ObjectId (se ignoran los vacíos y los inválidos)
+    :return: Lista de ObjectId sin repetidos, en el orden en que aparecen
+    """
+    unicos = {}
+    for referencia in ids:
+        if referencia and ObjectId.is_valid(str(referencia)):
+            unicos.setdefault(str(referencia), ObjectId(str(referencia)))
+    return list(unicos.values())
+
+
+def cargar_por_ids(coleccion, ids, proyeccion=None):
+    """
+    Cargar con una sola consulta $in los documentos a los que apuntan varias referencias
+
+    Sustituye a las búsquedas por ID una a una (p. ej. un beneficiario por
+    asistente de una actividad); la unión se hace en memoria con el resultado.
+
+    :param coleccion: Colección de MongoDB
+    :param ids: IDs referenciados (texto u ObjectId; pueden repetirse)
+    :param proyeccion: Campos a devolver
+    :return: Diccionario {id_en_texto: documento} con el _id convertido a texto
+    """
+    object_ids = ids_validos(ids)
+    if not object_ids:
+        return {}
+
+    documentos = {}
+    for documento in coleccion.find({'_id': {'$in': object_ids}}, proyeccion):
+        documento['_id'] = str(documento['_id'])
+        documentos[documento['_id']] = documento
+    return documentos
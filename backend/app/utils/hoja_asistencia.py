@@ -0,0 +1,473 @@
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+from io import BytesIO
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.drawing.image import Image as XLImage
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+logger = logging.getLogger(__name__)
+
+# Logo del encabezado y ancho con el que se muestra (ocupa A1:C4)
+RUTA_LOGO = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    'frontend', 'src', 'fondo', 'logo.png'
+)
+ANCHO_LOGO = 300
+
+# Fila en la que empieza la tabla de asistentes bajo el encabezado
+FILA_TABLA = 8
+
+# Bytes del libro generado que se mantienen en memoria antes de pasar a un archivo temporal
+TAMANO_MEMORIA_LIBRO = 8 * 1024 * 1024
+
+# Componentes compartidos por todos los libros (los estilos de openpyxl no se modifican al asignarlos)
+_BORDE = Border(
+    left=Side(style='thin', color='000000'),
+    right=Side(style='thin', color='000000'),
+    top=Side(style='thin', color='000000'),
+    bottom=Side(style='thin', color='000000')
+)
+_BLANCO = PatternFill(start_color='FFFFFF', end_color='FFFFFF', fill_type='solid')
+_FUENTE_ETIQUETA = Font(bold=True, name='Arial', size=10)
+_FUENTE_VALOR = Font(name='Arial', size=10)
+
+# Estilos con nombre de la hoja de asistencia: {nombre: atributos}
+ESTILOS_ASISTENCIA = {
+    'asistencia_titulo': {
+        'font': Font(bold=True, size=14, name='Arial'), 'fill': _BLANCO, 'border': _BORDE,
+        'alignment': Alignment(horizontal='left', vertical='center'),
+    },
+    'asistencia_subtitulo': {
+        'font': Font(bold=True, size=12, name='Arial'), 'fill': _BLANCO, 'border': _BORDE,
+        'alignment': Alignment(horizontal='left', vertical='center'),
+    },
+    'asistencia_etiqueta': {'font': _FUENTE_ETIQUETA, 'fill': _BLANCO, 'border': _BORDE},
+    'asistencia_valor': {'font': _FUENTE_VALOR, 'fill': _BLANCO, 'border': _BORDE},
+    'asistencia_etiqueta_objetivo': {
+        'font': _FUENTE_ETIQUETA, 'fill': _BLANCO, 'border': _BORDE,
+        'alignment': Alignment(horizontal='center', vertical='center'),
+    },
+    'asistencia_objetivo': {
+        'font': _FUENTE_VALOR, 'fill': _BLANCO, 'border': _BORDE,
+        'alignment': Alignment(wrap_text=True, vertical='top'),
+    },
+    'asistencia_encabezado_tabla': {
+        'font': Font(bold=True, color='FFFFFF'),
+        'fill': PatternFill(start_color='4F81BD', end_color='4F81BD', fill_type='solid'),
+        'border': _BORDE,
+        'alignment': Alignment(horizontal='center', vertical='center', wrap_text=True),
+    },
+    'asistencia_celda': {'border': _BORDE},
+    'asistencia_dato': {
+        'border': _BORDE, 'alignment': Alignment(horizontal='left', vertical='center', wrap_text=True),
+    },
+}
+
+
+def registrar_estilos(wb):
+    """
+    Añadir a un libro los estilos con nombre de la hoja de asistencia
+
+    Cada libro recibe sus propios NamedStyle (openpyxl los enlaza al libro),
+    construidos a partir de los componentes compartidos.
+
+    :param wb: Workbook de openpyxl
+    """
+    existentes = set(wb.named_styles)
+    for nombre, atributos in ESTILOS_ASISTENCIA.items():
+        if nombre not in existentes:
+            wb.add_named_style(NamedStyle(name=nombre, **atributos))
+
+
+_logo = None
+_logo_lock = threading.Lock()
+
+
+def logo_asistencia():
+    """
+    Logo ya reducido al tamaño del encabezado, leído una sola vez por proceso
+
+    :return: Tupla (bytes PNG, ancho, alto) o None si no existe el archivo
+    """
+    global _logo
+    if _logo is None:
+        with _logo_lock:
+            if _logo is None:
+                _logo = _cargar_logo() or False
+    return _logo or None
+
+
+def _cargar_logo():
+    """Leer y reducir el logo (None si no se puede)"""
+    if not os.path.exists(RUTA_LOGO):
+        logger.warning(f"No se encontró el archivo de logo en: {RUTA_LOGO}")
+        return None
+    try:
+        from PIL import Image
+
+        with Image.open(RUTA_LOGO) as imagen:
+            alto = int(ANCHO_LOGO * imagen.height / imagen.width)
+            reducida = imagen.resize((ANCHO_LOGO, alto), Image.Resampling.LANCZOS)
+        salida = BytesIO()
+        reducida.save(salida, format='PNG')
+        return salida.getvalue(), ANCHO_LOGO, alto
+    except Exception as e:
+        logger.error(f"Error al cargar la imagen del logo: {str(e)}")
+        return None
+
+
+def formatear_fecha_encabezado(fecha):
+    """
+    Fecha de la actividad como DD/MM/YYYY
+
+    :param fecha: datetime o texto ISO ('2024-03-05T10:00:00')
+    :return: Texto formateado, el valor original si no se reconoce o '' si no hay fecha
+    """
+    if not fecha:
+        return ''
+    if isinstance(fecha, datetime):
+        return fecha.strftime('%d/%m/%Y')
+    try:
+        return datetime.fromisoformat(str(fecha).replace('Z', '+00:00')).strftime('%d/%m/%Y')
+    except ValueError:
+        return str(fecha)
+
+
+def _mayusculas(valor):
+    return (valor or '').upper()
+
+
+def _sin_cambios(valor):
+    return valor or ''
+
+
+class PlantillaEncabezado:
+    """
+    Encabezado de una hoja de asistencia compilado una sola vez por proceso
+
+    La disposición (anchos de columna, celdas combinadas, textos fijos y el
+    estilo de cada celda) se calcula al crear la plantilla. Para cada
+    exportación solo se escriben los datos de la actividad.
+    """
+
+    def __init__(self, ultima_columna, anchos, etiqueta_objetivo, valor_objetivo):
+        """
+        :param ultima_columna: Letra de la última columna del encabezado ('K' o 'I')
+        :param anchos: Anchos de las columnas A..ultima_columna
+        :param etiqueta_objetivo: Rango de la etiqueta OBJETIVO (p. ej. 'G5:H7')
+        :param valor_objetivo: Rango del texto del objetivo (p. ej. 'I5:K7')
+        """
+        inicio_valor = valor_objetivo.split(':')[0]
+        self.anchos = {get_column_letter(numero): ancho for numero, ancho in enumerate(anchos, 1)}
+
+        # (celda, estilo, texto fijo) y (celda, estilo, campo, transformación)
+        fijas = [
+            ('D1', 'asistencia_titulo', 'FORMATO REGISTRO DE ASISTENCIA'),
+            ('D2', 'asistencia_subtitulo', 'ALCALDÍA MUNICIPAL DE QUIBDÓ'),
+            ('D3', 'asistencia_etiqueta', 'DEPENDENCIA:'),
+            ('D4', 'asistencia_etiqueta', None),
+            ('A5', 'asistencia_etiqueta', 'TEMA:'),
+            ('A6', 'asistencia_etiqueta', 'FECHA:'),
+            ('D6', 'asistencia_etiqueta', 'LUGAR:'),
+            ('A7', 'asistencia_etiqueta', 'HORA INICIO:'),
+            ('D7', 'asistencia_etiqueta', 'HORA FINALIZACIÓN:'),
+            (etiqueta_objetivo.split(':')[0], 'asistencia_etiqueta_objetivo', 'OBJETIVO:'),
+        ]
+        variables = [
+            ('F3', 'asistencia_valor', 'dependencia', _mayusculas),
+            ('C5', 'asistencia_valor', 'tema', _mayusculas),
+            ('C6', 'asistencia_valor', 'fecha', self._fecha),
+            ('E6', 'asistencia_valor', 'lugar', _mayusculas),
+            ('C7', 'asistencia_valor', 'hora_inicio', _sin_cambios),
+            ('E7', 'asistencia_valor', 'hora_fin', _sin_cambios),
+            (inicio_valor, 'asistencia_objetivo', 'objetivo', _mayusculas),
+        ]
+        self.combinaciones = [
+            CellRange(rango) for rango in (
+                'A1:C4', f'D1:{ultima_columna}1', f'D2:{ultima_columna}2', 'D3:E3',
+                f'F3:{ultima_columna}3', f'D4:{ultima_columna}4', 'A5:B5', 'C5:F5', 'A6:B6',
+                'E6:F6', 'A7:B7', 'E7:F7', etiqueta_objetivo, valor_objetivo,
+            )
+        ]
+
+        # Celdas de cada fila del encabezado: {(fila, columna): (estilo, texto fijo o (campo, transformación))}
+        self.celdas = {}
+        for coordenada, estilo, texto in fijas:
+            self.celdas[self._posicion(coordenada)] = (estilo, texto)
+        for coordenada, estilo, campo, transformar in variables:
+            self.celdas[self._posicion(coordenada)] = (estilo, (campo, transformar))
+
+        # Las demás celdas de un rango combinado llevan el estilo de la primera
+        # para que el borde rodee todo el rango
+        for rango in self.combinaciones:
+            estilo, _ = self.celdas.get((rango.min_row, rango.min_col), (None, None))
+            if estilo:
+                for posicion in rango.cells:
+                    self.celdas.setdefault(posicion, (estilo, None))
+
+        total_filas = max(fila for fila, _ in self.celdas)
+        self.columnas_por_fila = [
+            sorted(columna for fila, columna in self.celdas if fila == numero_fila)
+            for numero_fila in range(1, total_filas + 1)
+        ]
+
+    @staticmethod
+    def _posicion(coordenada):
+        rango = CellRange(coordenada)
+        return rango.min_row, rango.min_col
+
+    @staticmethod
+    def _fecha(fecha):
+        return f"FECHA: {formatear_fecha_encabezado(fecha)}" if fecha else ''
+
+    def filas_encabezado(self, ws, actividad):
+        """
+        Celdas de las filas del encabezado con los datos de una actividad
+
+        :param ws: Hoja (de solo escritura) a la que pertenecen las celdas
+        :param actividad: Actividad o reunión con dependencia, tema, fecha, lugar, horas y objetivo
+        :return: Lista de filas; cada fila es una lista de celdas o None
+        """
+        filas = []
+        for numero_fila, columnas in enumerate(self.columnas_por_fila, 1):
+            fila = [None] * columnas[-1]
+            for columna in columnas:
+                estilo, contenido = self.celdas[numero_fila, columna]
+                if isinstance(contenido, tuple):
+                    campo, transformar = contenido
+                    contenido = transformar(actividad.get(campo))
+                celda = WriteOnlyCell(ws, contenido)
+                celda.style = estilo
+                fila[columna - 1] = celda
+            filas.append(fila)
+        return filas
+
+
+# Encabezados de las dos hojas de asistencia (una plantilla por proceso)
+PLANTILLA_ACTIVIDAD = PlantillaEncabezado(
+    'K', [15, 13, 20, 15, 13, 15, 15, 13, 15, 15, 20], 'G5:H7', 'I5:K7'
+)
+PLANTILLA_REUNION = PlantillaEncabezado(
+    'I', [14, 14, 18, 25, 25, 20, 13, 35, 20, 15, 20], 'G5:G7', 'H5:I7'
+)
+
+
+class HojaAsistencia:
+    """
+    Hoja de asistencia escrita en flujo (libro de openpyxl en modo write_only)
+
+    openpyxl vuelca cada fila a un archivo temporal en cuanto se agrega, por
+    lo que el libro nunca está entero en memoria. A cambio, las filas se
+    escriben en orden, los anchos de columna (self.anchos) se fijan antes de
+    la primera fila y el alto de cada fila al agregarla. Las celdas
+    combinadas y las imágenes (logo y firmas) se anclan por referencia y se
+    escriben al guardar.
+    """
+
+    def __init__(self, titulo, plantilla):
+        """
+        :param titulo: Nombre de la hoja
+        :param plantilla: PlantillaEncabezado con el encabezado y los anchos iniciales
+        """
+        self.wb = Workbook(write_only=True)
+        registrar_estilos(self.wb)
+        self.ws = self.wb.create_sheet(titulo)
+        self.plantilla = plantilla
+        self.anchos = dict(plantilla.anchos)
+        self.fila = 0
+        self._columnas_fijadas = False
+
+    def _fijar_columnas(self):
+        """Pasar los anchos a la hoja (solo se puede antes de escribir la primera fila)"""
+        if not self._columnas_fijadas:
+            for letra, ancho in self.anchos.items():
+                self.ws.column_dimensions[letra].width = ancho
+            self._columnas_fijadas = True
+
+    def _agregar(self, celdas, alto=None):
+        self._fijar_columnas()
+        self.fila += 1
+        if alto:
+            self.ws.row_dimensions[self.fila].height = alto
+        self.ws.append(celdas)
+        return self.fila
+
+    def encabezado(self, actividad):
+        """
+        Escribir el encabezado (logo e información de la actividad)
+
+        Las celdas se preparan antes de escribir la primera fila: si algo
+        falla, la hoja queda sin cambios.
+
+        :param actividad: Actividad o reunión
+        :return: Fila en la que va el encabezado de la tabla de asistentes
+        """
+        filas = self.plantilla.filas_encabezado(self.ws, actividad)
+
+        logo = logo_asistencia()
+        if logo:
+            datos, ancho, alto = logo
+            imagen = XLImage(BytesIO(datos))
+            imagen.width, imagen.height = ancho, alto
+            self.ws.add_image(imagen, 'A1')
+
+        inicio = self.fila
+        for numero, fila in enumerate(filas, 1):
+            # Las filas del objetivo se ajustan al contenido
+            if numero in (5, 6, 7):
+                self.ws.row_dimensions[inicio + numero].auto_size = True
+            self._agregar(fila)
+        for rango in self.plantilla.combinaciones:
+            self.combinar(inicio + rango.min_row, rango.min_col, inicio + rango.max_row, rango.max_col)
+        return self.fila + 1
+
+    def encabezados_tabla(self, encabezados, alto=None):
+        """
+        Escribir la fila de títulos de la tabla de asistentes
+
+        :param encabezados: Títulos de las columnas, desde la A
+        :param alto: Alto de la fila (opcional)
+        :return: Número de la fila escrita
+        """
+        return self.agregar_fila(encabezados, estilo='asistencia_encabezado_tabla', alto=alto)
+
+    def agregar_fila(self, valores, estilo='asistencia_dato', alto=None):
+        """
+        Escribir la siguiente fila
+
+        :param valores: Valores desde la columna A (None deja la celda sin escribir)
+        :param estilo: Estilo con nombre de las celdas
+        :param alto: Alto de la fila (opcional)
+        :return: Número de la fila escrita
+        """
+        celdas = []
+        for valor in valores:
+            if valor is None:
+                celdas.append(None)
+                continue
+            celda = WriteOnlyCell(self.ws, valor)
+            celda.style = estilo
+            celdas.append(celda)
+        return self._agregar(celdas, alto)
+
+    def agregar_imagen(self, imagen, referencia):
+        """
+        Anclar una imagen en una celda
+
+        :param imagen: Image de openpyxl o bytes de la imagen
+        :param referencia: Celda de anclaje (p. ej. 'I9')
+        """
+        if isinstance(imagen, bytes):
+            imagen = XLImage(BytesIO(imagen))
+        self.ws.add_image(imagen, referencia)
+
+    def combinar(self, fila_inicio, columna_inicio, fila_fin, columna_fin):
+        """
+        Combinar un rango de celdas
+
+        ws.merged_cells.add comprueba que el rango no esté ya combinado
+        recorriendo todos los rangos de la hoja, lo que con un rango por fila
+        haría cuadrática la escritura; aquí el rango se añade directamente, por
+        lo que no debe solaparse con otro ya combinado.
+        """
+        self.ws.merged_cells.ranges.add(CellRange(
+            min_col=columna_inicio, min_row=fila_inicio, max_col=columna_fin, max_row=fila_fin
+        ))
+
+    def guardar(self, tamano_memoria=TAMANO_MEMORIA_LIBRO):
+        """
+        Guardar el libro en un archivo temporal en memoria (o en disco si es grande)
+
+        El archivo se borra al cerrarlo; quien lo reciba debe cerrarlo cuando
+        termine de enviarlo. Si falla, se descartan también los temporales de openpyxl.
+
+        :param tamano_memoria: Bytes que se mantienen en memoria antes de pasar a disco
+        :return: SpooledTemporaryFile posicionado al principio
+        """
+        archivo = tempfile.SpooledTemporaryFile(max_size=tamano_memoria, suffix='.xlsx')
+        try:
+            self.wb.save(archivo)
+        except Exception:
+            archivo.close()
+            self.descartar()
+            raise
+        archivo.seek(0)
+        return archivo
+
+    def descartar(self):
+        """Borrar el archivo temporal de la hoja si no se llegó a guardar el libro"""
+        escritor = self.ws._writer
+        if escritor is None or not os.path.exists(escritor.out):
+            return
+        try:
+            # Primero las filas (cierran sus etiquetas) y después el archivo
+            if self.ws._rows is not None:
+                self.ws._rows.close()
+            escritor.close()
+        except Exception as e:
+            logger.warning(f"Error al cerrar la hoja de asistencia: {str(e)}")
+        escritor.cleanup()
+
+
+class AnchoColumnas:
+    """
+    Ancho de las columnas ajustado al contenido
+
+    Guarda la longitud máxima de texto por columna a medida que se registran
+    los valores, de modo que el ajuste no recorre la hoja. Con una
+    HojaAsistencia los anchos se fijan antes de escribir, así que los valores
+    se registran en una pasada previa sobre los datos. Las celdas que forman
+    parte de un rango combinado no cuentan; la pertenencia se responde con un
+    conjunto de coordenadas en lugar de revisar todos los rangos por celda.
+    Las columnas con un ancho ya definido (p. ej. por la plantilla) se respetan.
+    """
+
+    def __init__(self, fijas=(), maximo=30):
+        """
+        :param fijas: Letras de las columnas que ya tienen ancho
+        :param maximo: Ancho máximo que se asigna a una columna
+        """
+        self.maximo = maximo
+        self.fijas = set(fijas)
+        self.longitudes = {}
+        self.combinadas = set()
+
+    def combinar(self, fila_inicio, columna_inicio, fila_fin, columna_fin):
+        """Excluir del cálculo las celdas de un rango combinado"""
+        self.combinadas.update(
+            (fila, columna)
+            for fila in range(fila_inicio, fila_fin + 1)
+            for columna in range(columna_inicio, columna_fin + 1)
+        )
+
+    def registrar(self, fila, columna, valor):
+        """
+        Tener en cuenta el valor de una celda
+
+        :param fila: Número de fila
+        :param columna: Número de columna
+        :param valor: Valor de la celda
+        """
+        if not valor or (fila, columna) in self.combinadas:
+            return
+        letra = get_column_letter(columna)
+        if letra in self.fijas:
+            return
+        longitud = len(str(valor))
+        if longitud > self.longitudes.get(letra, 0):
+            self.longitudes[letra] = longitud
+
+    def anchos(self):
+        """
+        Ancho calculado de las columnas sin ancho definido
+
+        :return: Diccionario {letra: ancho}
+        """
+        return {letra: min((longitud + 2) * 1.2, self.maximo) for letra, longitud in self.longitudes.items()}
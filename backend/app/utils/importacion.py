@@ -0,0 +1,466 @@
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+from marshmallow import fields, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from app.models.firma import FirmaModel
+from app.models.trabajo_importacion import TrabajoImportacionModel
+from app.models.version_datos import registrar_cambio_datos
+from app.utils.catalogos import catalogo
+from app.utils.busqueda import campos_busqueda, normalizar_texto
+from app.utils.trabajos import ejecutor_en_segundo_plano
+from app.utils.unicidad import campo_duplicado, CODIGO_CLAVE_DUPLICADA
+
+logger = logging.getLogger(__name__)
+
+# Colección de destino de cada tipo de importación
+TIPOS_IMPORTACION = {
+    'beneficiarios': 'beneficiarios',
+    'poblacion_migrante': 'poblacion_migrante',
+}
+
+FORMATOS_IMPORTACION = ('xlsx', 'csv')
+
+# Campo con el que se identifica un registro existente (upsert)
+CAMPO_CLAVE_IMPORTACION = 'numero_documento'
+
+# Filas que valida cada proceso de una vez y que se escriben en un bulk_write
+TAMANO_BLOQUE_IMPORTACION = 2000
+
+# Bloques en vuelo por proceso: limita la memoria mientras se lee el archivo
+BLOQUES_POR_PROCESO = 2
+
+_VERDADEROS = {'si', 's', 'true', '1', 'x', 'yes', 'verdadero'}
+_FALSOS = {'no', 'n', 'false', '0', 'falso'}
+
+
+def clave_columna(texto):
+    """
+    Forma comparable de un encabezado o un nombre de campo
+
+    :param texto: Encabezado del archivo o campo del esquema
+    :return: Texto sin tildes, en minúsculas y solo con letras y números
+             ('Número Documento' y 'numero_documento' -> 'numerodocumento')
+    """
+    return re.sub(r'[^a-z0-9]', '', normalizar_texto(texto))
+
+
+def esquema_importacion(tipo):
+    """
+    Esquema de validación de un tipo de importación
+
+    Se importa aquí para que los procesos de validación solo carguen el que usan.
+
+    :param tipo: Clave de TIPOS_IMPORTACION
+    :return: Instancia del esquema de marshmallow
+    """
+    if tipo == 'beneficiarios':
+        from app.models.beneficiario import beneficiario_schema
+        return beneficiario_schema
+    if tipo == 'poblacion_migrante':
+        from app.routes.poblacion_migrante import poblacion_migrante_schema
+        return poblacion_migrante_schema
+    raise ValueError(f"Tipo de importación no válido: {tipo}")
+
+
+def mapear_columnas(encabezados, esquema):
+    """
+    Relacionar los encabezados del archivo con los campos del esquema
+
+    Admite tanto el nombre del campo ('numero_documento') como el encabezado
+    de las exportaciones ('Número Documento'). Los campos anidados no se importan.
+
+    :param encabezados: Encabezados en el orden del archivo
+    :param esquema: Esquema de marshmallow
+    :return: Diccionario {encabezado: campo} solo con las columnas reconocidas
+    """
+    campos = {
+        clave_columna(nombre): nombre
+        for nombre, campo in esquema.fields.items()
+        if not isinstance(campo, (fields.Nested, fields.Dict))
+    }
+    columnas = {}
+    for encabezado in encabezados:
+        campo = campos.get(clave_columna(encabezado))
+        if encabezado and campo and campo not in columnas.values():
+            columnas[encabezado] = campo
+    return columnas
+
+
+def convertir_valor(valor, campo):
+    """
+    Adaptar el valor de una celda al tipo de un campo del esquema
+
+    :param valor: Valor leído del archivo
+    :param campo: Campo de marshmallow de destino
+    :return: Valor convertido, o None si la celda está vacía
+    """
+    if isinstance(valor, str):
+        valor = valor.strip()
+    if valor is None or valor == '':
+        return None
+
+    if isinstance(campo, fields.Bool):
+        texto = normalizar_texto(valor)
+        if texto in _VERDADEROS:
+            return True
+        if texto in _FALSOS:
+            return False
+        return valor
+    if isinstance(campo, (fields.Int, fields.Float)):
+        if isinstance(valor, str):
+            valor = valor.replace(',', '.')
+        try:
+            numero = float(valor)
+        except (TypeError, ValueError):
+            return valor
+        return int(numero) if isinstance(campo, fields.Int) and numero.is_integer() else numero
+    if isinstance(campo, fields.Str):
+        if isinstance(valor, float) and valor.is_integer():
+            # Excel guarda los números de documento y celulares como números
+            return str(int(valor))
+        if isinstance(valor, (datetime, date)):
+            return valor.isoformat()
+        return str(valor)
+    return valor
+
+
+def validar_bloque(tipo, columnas, filas, valores_por_defecto, lineas_trabajo):
+    """
+    Validar un bloque de filas (se ejecuta en un proceso del grupo)
+
+    :param tipo: Clave de TIPOS_IMPORTACION
+    :param columnas: Diccionario {encabezado: campo}
+    :param filas: Lista de (número de fila, {encabezado: valor})
+    :param valores_por_defecto: Valores de los campos obligatorios que falten
+    :param lineas_trabajo: Diccionario {nombre normalizado: ID} para las líneas escritas por nombre
+    :return: Tupla (validos, rechazados): validos es una lista de
+             (fila, documento, campos tomados por defecto) y rechazados de
+             (fila, errores, valores originales)
+    """
+    esquema = esquema_importacion(tipo)
+    validos = []
+    rechazados = []
+    for numero, valores in filas:
+        datos = {}
+        for encabezado, campo in columnas.items():
+            valor = convertir_valor(valores.get(encabezado), esquema.fields[campo])
+            if valor is not None:
+                datos[campo] = valor
+
+        linea = datos.get('linea_trabajo')
+        if linea and normalizar_texto(linea) in lineas_trabajo:
+            datos['linea_trabajo'] = lineas_trabajo[normalizar_texto(linea)]
+
+        por_defecto = [campo for campo in valores_por_defecto if campo not in datos]
+        for campo in por_defecto:
+            datos[campo] = valores_por_defecto[campo]
+
+        try:
+            documento = esquema.load(datos)
+        except ValidationError as err:
+            rechazados.append((numero, err.messages, valores))
+            continue
+        documento.update(campos_busqueda(documento, TIPOS_IMPORTACION[tipo]))
+        validos.append((numero, documento, por_defecto))
+    return validos, rechazados
+
+
+def _valor_celda(valor):
+    """Representación de una celda en el informe de rechazados"""
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+
+class ArchivoImportacion:
+    """
+    Archivo de importación que se lee fila a fila sin cargarlo en memoria
+
+    Uso:
+        with ArchivoImportacion(ruta, 'xlsx') as archivo:
+            for numero, valores in archivo.filas():
+                ...
+
+    Las filas se numeran como en la hoja (el encabezado es la fila 1) y las
+    filas vacías se omiten.
+    """
+
+    def __init__(self, ruta, formato):
+        """
+        :param ruta: Ruta del archivo
+        :param formato: 'xlsx' (se abre en modo de solo lectura) o 'csv'
+        """
+        if formato == 'xlsx':
+            from openpyxl import load_workbook
+
+            self._archivo = load_workbook(ruta, read_only=True, data_only=True)
+            self._filas = self._archivo.active.iter_rows(values_only=True)
+        else:
+            self._archivo = open(ruta, newline='', encoding='utf-8-sig')
+            self._filas = csv.reader(self._archivo)
+
+        encabezados = next(self._filas, None) or []
+        self.encabezados = [str(valor).strip() if valor is not None else '' for valor in encabezados]
+
+    def filas(self):
+        """Generador de (número de fila, {encabezado: valor})"""
+        for numero, fila in enumerate(self._filas, start=2):
+            if any(valor not in (None, '') for valor in fila):
+                yield numero, dict(zip(self.encabezados, fila))
+
+    def close(self):
+        self._archivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def contar_filas(ruta, formato):
+    """
+    Filas de datos del archivo (aproximado en CSV si hay celdas con saltos de línea)
+
+    :param ruta: Ruta del archivo
+    :param formato: 'xlsx' o 'csv'
+    :return: Número de filas o None si no se puede saber sin leerlo
+    """
+    if formato == 'xlsx':
+        from openpyxl import load_workbook
+
+        libro = load_workbook(ruta, read_only=True)
+        try:
+            total = libro.active.max_row
+        finally:
+            libro.close()
+        return total - 1 if total else None
+
+    lineas = 0
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b''):
+            lineas += bloque.count(b'\n')
+    return max(lineas - 1, 0)
+
+
+def directorio_importaciones(app):
+    """Directorio de archivos subidos e informes de rechazados (se crea si no existe)"""
+    directorio = app.config.get('IMPORTACIONES_DIR') or os.path.join(tempfile.gettempdir(), 'sics_importaciones')
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def ruta_rechazados(app, trabajo_id):
+    """Ruta del informe CSV de filas rechazadas de una importación"""
+    return os.path.join(directorio_importaciones(app), f"{trabajo_id}_rechazados.csv")
+
+
+def _operacion(documento, por_defecto):
+    """UpdateOne con upsert por número de documento; los valores por defecto solo se usan al insertar"""
+    en_insercion = {campo: documento.pop(campo) for campo in por_defecto}
+    actualizacion = {'$set': documento}
+    if en_insercion:
+        actualizacion['$setOnInsert'] = en_insercion
+    return UpdateOne({CAMPO_CLAVE_IMPORTACION: documento[CAMPO_CLAVE_IMPORTACION]}, actualizacion, upsert=True)
+
+
+def _bloques(filas, tamano):
+    """Agrupar las filas en listas de 'tamano' elementos"""
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) == tamano:
+            yield bloque
+            bloque = []
+    if bloque:
+        yield bloque
+
+
+def _escribir_bloque(db, coleccion, validos):
+    """
+    Escribir los registros válidos de un bloque con un solo bulk_write
+
+    Las filas que choquen con un índice único (p. ej. un correo que ya tiene
+    otro beneficiario) o con una firma que no es una imagen PNG/JPEG no
+    detienen la importación: se devuelven como rechazadas.
+
+    :return: Tupla (insertados, actualizados, rechazados), con rechazados como
+             lista de (fila, errores, documento)
+    """
+    # Si un documento se repite en el bloque vale la última fila
+    operaciones = {}
+    rechazados = []
+    for fila, documento, por_defecto in validos:
+        if coleccion == 'beneficiarios' and documento.get('firma'):
+            try:
+                FirmaModel(db).separar(documento)
+            except ValueError as e:
+                rechazados.append((fila, {'firma': [str(e)]}, documento))
+                continue
+        operaciones[documento[CAMPO_CLAVE_IMPORTACION]] = (fila, documento, _operacion(documento, por_defecto))
+    if not operaciones:
+        return 0, 0, rechazados
+    escritas = list(operaciones.values())
+    try:
+        resultado = db[coleccion].bulk_write([operacion for _, _, operacion in escritas], ordered=False)
+        return resultado.upserted_count, resultado.matched_count, rechazados
+    except BulkWriteError as e:
+        errores = e.details.get('writeErrors', [])
+        if any(error.get('code') != CODIGO_CLAVE_DUPLICADA for error in errores):
+            raise
+        for error in errores:
+            fila, documento, _ = escritas[error['index']]
+            # El upsert es por documento, así que lo normal es que choque el correo
+            campo = campo_duplicado(error, ['correo_electronico', CAMPO_CLAVE_IMPORTACION])
+            rechazados.append((fila, {campo: ['Ya está registrado para otro registro']}, documento))
+        return e.details.get('nUpserted', 0), e.details.get('nMatched', 0), rechazados
+
+
+def _actualizar_estadisticas(db, actualizados):
+    """
+    Poner al día los contadores y el cubo del dashboard tras escribir beneficiarios
+
+    Las altas y cambios masivos no pasan por los contadores incrementales. El
+    cubo se refresca con las altas; solo si la importación modificó
+    beneficiarios que ya estaban se vuelve a calcular, porque el refresco no
+    revisa las celdas de los ya incorporados.
+
+    :param db: Conexión a la base de datos MongoDB
+    :param actualizados: Número de beneficiarios existentes que se actualizaron
+    """
+    from app.models.estadisticas import EstadisticasMaterializadasModel, CuboBeneficiariosModel
+    try:
+        EstadisticasMaterializadasModel(db).reconstruir()
+        cubo = CuboBeneficiariosModel(db)
+        if actualizados:
+            cubo.reconstruir()
+        else:
+            cubo.refrescar()
+    except Exception as e:
+        logger.error(f"Error al actualizar las estadísticas tras la importación: {str(e)}")
+
+
+def ejecutar_importacion(app, trabajo_id):
+    """
+    Ejecutar (o reanudar) una importación
+
+    El archivo se lee por bloques que se validan en un grupo de procesos; los
+    resultados se escriben en el orden del archivo y, tras cada bloque, se
+    guarda la última fila escrita. Al reanudar se salta hasta esa fila y el
+    informe de rechazados se recorta a lo que había en ese punto.
+
+    :param app: Aplicación Flask
+    :param trabajo_id: ID del trabajo de importación
+    """
+    with app.app_context():
+        db = app.config['MONGO_DB']
+        modelo = TrabajoImportacionModel(db)
+        trabajo = modelo.obtener(trabajo_id)
+        tipo = trabajo['tipo']
+        coleccion = TIPOS_IMPORTACION[tipo]
+        escrito = False
+        try:
+            with ArchivoImportacion(trabajo['archivo'], trabajo['formato']) as archivo:
+                encabezados = archivo.encabezados
+                columnas = mapear_columnas(encabezados, esquema_importacion(tipo))
+                if CAMPO_CLAVE_IMPORTACION not in columnas.values():
+                    modelo.fallar(trabajo_id, "El archivo no tiene la columna del número de documento")
+                    return
+                modelo.iniciar(trabajo_id, columnas, contar_filas(trabajo['archivo'], trabajo['formato']))
+
+                lineas_trabajo = {
+                    normalizar_texto(linea['nombre']): str(linea['_id'])
+                    for linea in catalogo(db, 'lineas_trabajo').documentos if linea.get('nombre')
+                }
+                fila_confirmada = trabajo.get('fila_confirmada', 0)
+                progreso = dict(trabajo.get('progreso') or {})
+                procesos = app.config.get('IMPORTACIONES_PROCESOS') or os.cpu_count() or 1
+                tamano = app.config.get('IMPORTACIONES_TAMANO_BLOQUE', TAMANO_BLOQUE_IMPORTACION)
+                pendientes = (fila for fila in archivo.filas() if fila[0] > fila_confirmada)
+
+                # 'spawn' evita heredar los hilos y conexiones del servidor en los procesos
+                with open(ruta_rechazados(app, trabajo_id), 'a+', newline='', encoding='utf-8') as informe, \
+                        ProcessPoolExecutor(max_workers=procesos,
+                                            mp_context=multiprocessing.get_context('spawn')) as grupo:
+                    # Informe de rechazados: se recorta al último punto de control
+                    informe.truncate(trabajo.get('tamano_rechazados', 0))
+                    informe.seek(0, os.SEEK_END)
+                    escritor = csv.writer(informe)
+                    if informe.tell() == 0:
+                        escritor.writerow(['fila', 'errores'] + encabezados)
+
+                    en_vuelo = deque()
+
+                    def escribir_siguiente():
+                        nonlocal escrito
+                        ultima_fila, futuro = en_vuelo.popleft()
+                        validos, rechazados = futuro.result()
+                        insertados, actualizados, duplicados = _escribir_bloque(db, coleccion, validos)
+                        rechazados = sorted(rechazados + [
+                            (numero, errores, {encabezado: documento.get(campo) for encabezado, campo in columnas.items()})
+                            for numero, errores, documento in duplicados
+                        ], key=lambda rechazado: rechazado[0])
+                        for numero, errores, valores in rechazados:
+                            escritor.writerow([numero, json.dumps(errores, ensure_ascii=False)] +
+                                              [_valor_celda(valores.get(encabezado)) for encabezado in encabezados])
+                        informe.flush()
+                        escrito = escrito or bool(validos)
+                        progreso['filas'] = progreso.get('filas', 0) + len(validos) + len(rechazados) - len(duplicados)
+                        progreso['insertados'] = progreso.get('insertados', 0) + insertados
+                        progreso['actualizados'] = progreso.get('actualizados', 0) + actualizados
+                        progreso['rechazados'] = progreso.get('rechazados', 0) + len(rechazados)
+                        modelo.confirmar(trabajo_id, ultima_fila, informe.tell(), progreso)
+
+                    for bloque in _bloques(pendientes, tamano):
+                        en_vuelo.append((bloque[-1][0], grupo.submit(
+                            validar_bloque, tipo, columnas, bloque, trabajo['valores_por_defecto'], lineas_trabajo
+                        )))
+                        if len(en_vuelo) >= procesos * BLOQUES_POR_PROCESO:
+                            escribir_siguiente()
+                    while en_vuelo:
+                        escribir_siguiente()
+
+            modelo.completar(trabajo_id, progreso)
+            logger.info(f"Importación {trabajo_id} completada: {progreso}")
+
+        except Exception as e:
+            logger.error(f"Error en la importación {trabajo_id}: {str(e)}", exc_info=True)
+            modelo.fallar(trabajo_id, str(e))
+        finally:
+            # Los bloques escritos antes de un fallo siguen en la colección
+            if escrito:
+                registrar_cambio_datos(db, coleccion)
+                if coleccion == 'beneficiarios':
+                    _actualizar_estadisticas(db, progreso.get('actualizados', 0))
+            app.extensions.get('importaciones_activas', set()).discard(trabajo_id)
+
+
+def enviar_importacion(app, trabajo_id):
+    """
+    Encolar una importación en el grupo de hilos de importaciones
+
+    :param app: Aplicación Flask
+    :param trabajo_id: ID del trabajo
+    :return: Future del trabajo
+    """
+    app.extensions.setdefault('importaciones_activas', set()).add(trabajo_id)
+    ejecutor = ejecutor_en_segundo_plano(app, 'importaciones', app.config.get('IMPORTACIONES_SIMULTANEAS', 1))
+    return ejecutor.submit(ejecutar_importacion, app, trabajo_id)
+
+
+def importacion_activa(app, trabajo_id):
+    """Indica si la importación se está ejecutando en este proceso"""
+    return trabajo_id in app.extensions.get('importaciones_activas', set())
@@ -0,0 +1,125 @@
+import base64
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+
+def _valor_cursor(valor):
+    """Serializar el valor del campo de orden conservando su tipo BSON"""
+    if valor is None:
+        return ['n', None]
+    if isinstance(valor, datetime):
+        return ['d', valor.isoformat()]
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return ['f', valor]
+    return ['s', str(valor)]
+
+
+def codificar_cursor(documento, campo='fecha_registro'):
+    """
+    Generar un cursor opaco a partir del último documento de una página
+
+    :param documento: Último documento devuelto (con _id y el campo de orden)
+    :param campo: Campo por el que se ordena la consulta
+    :return: Cadena base64 segura para URL
+    """
+    contenido = {
+        'v': _valor_cursor(documento.get(campo)),
+        'id': str(documento['_id'])
+    }
+    crudo = json.dumps(contenido, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(crudo).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """
+    Obtener el valor de orden y el _id guardados en un cursor
+
+    :param cursor: Cadena generada por codificar_cursor
+    :return: Tupla (tipo, valor, ObjectId)
+    :raises ValueError: Si el cursor no es válido
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        contenido = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        tipo, valor = contenido['v']
+        if tipo == 'd':
+            valor = datetime.fromisoformat(valor)
+        elif tipo not in ('n', 'f', 's'):
+            raise ValueError(tipo)
+        return tipo, valor, ObjectId(contenido['id'])
+    except Exception:
+        raise ValueError("Cursor de paginación inválido")
+
+
+def filtro_despues_de_cursor(cursor, campo='fecha_registro'):
+    """
+    Construir el filtro que selecciona los documentos posteriores al cursor
+    para un orden descendente por (campo, _id)
+
+    En orden descendente MongoDB coloca primero las fechas, luego las cadenas,
+    luego los números y al final los nulos o ausentes. Como los operadores de
+    comparación solo comparan dentro del mismo tipo, se añaden explícitamente
+    los tipos que quedan por debajo del valor del cursor.
+
+    :param cursor: Cadena generada por codificar_cursor
+    :param campo: Campo por el que se ordena la consulta
+    :return: Filtro de consulta de MongoDB
+    """
+    tipo, valor, ultimo_id = decodificar_cursor(cursor)
+
+    if tipo == 'n':
+        return {campo: None, '_id': {'$lt': ultimo_id}}
+
+    condiciones = [
+        {campo: {'$lt': valor}},
+        {campo: valor, '_id': {'$lt': ultimo_id}}
+    ]
+    if tipo == 'd':
+        condiciones.append({campo: {'$type': 'string'}})
+    if tipo in ('d', 's'):
+        condiciones.append({campo: {'$type': 'number'}})
+    condiciones.append({campo: None})
+    return {'$or': condiciones}
+
+
+# Modos de conteo del total en los listados paginados (?count=)
+MODOS_CONTEO = ('exact', 'estimated', 'none')
+
+# En modo 'estimated' con filtros se deja de contar a partir de este número
+LIMITE_CONTEO_ESTIMADO = 10000
+
+# A partir de este por_pagina los clientes antiguos piden el listado completo,
+# que se envía en flujo como JSON delimitado por líneas
+POR_PAGINA_TODOS = 1000000
+
+
+def leer_modo_conteo(parametro, por_defecto='exact'):
+    """
+    Interpretar el parámetro ?count= de un listado
+
+    :param parametro: 'exact' (total exacto), 'estimated' (aproximado y barato) o 'none' (sin total)
+    :param por_defecto: Modo cuando no se indica ninguno
+    :return: Modo de conteo
+    :raises ValueError: Si el modo no existe
+    """
+    modo = (parametro or por_defecto).strip().lower()
+    if modo not in MODOS_CONTEO:
+        raise ValueError(f"Modo de conteo inválido: {modo}. Use {', '.join(MODOS_CONTEO)}")
+    return modo
+
+
+def combinar_filtros(*filtros):
+    """
+    Unir varios filtros de consulta en uno solo (se ignoran los vacíos)
+
+    :param filtros: Filtros de MongoDB
+    :return: Filtro único ({} si no hay ninguno)
+    """
+    filtros = [filtro for filtro in filtros if filtro]
+    if not filtros:
+        return {}
+    if len(filtros) == 1:
+        return filtros[0]
+    return {'$and': filtros}
@@ -0,0 +1,41 @@
+import re
+
+# Nombres de campo aceptados en ?fields= (admite subcampos con punto, nunca operadores '$')
+_PATRON_CAMPO = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$')
+
+
+def leer_campos(parametro):
+    """
+    Interpretar el parámetro ?fields= de una petición
+
+    :param parametro: Lista de campos separada por comas (o None)
+    :return: Lista de campos solicitados, o None si no se pidió ninguno
+    :raises ValueError: Si algún nombre de campo no es válido
+    """
+    if not parametro:
+        return None
+    campos = [campo.strip() for campo in parametro.split(',') if campo.strip()]
+    for campo in campos:
+        if not _PATRON_CAMPO.match(campo):
+            raise ValueError(f"Campo inválido en fields: {campo}")
+    return campos or None
+
+
+def construir_proyeccion(campos=None, excluir=(), obligatorios=()):
+    """
+    Construir la proyección de MongoDB para una lectura
+
+    Sin campos solicitados se devuelve el documento completo salvo los campos
+    de 'excluir'. Con campos solicitados (fieldset parcial) solo se devuelven
+    esos más los 'obligatorios' que necesita la propia consulta.
+
+    :param campos: Campos pedidos por el cliente (lista) o None
+    :param excluir: Campos que se omiten por defecto
+    :param obligatorios: Campos que siempre se incluyen en un fieldset parcial
+    :return: Diccionario de proyección
+    """
+    if campos:
+        proyeccion = {campo: 1 for campo in campos}
+        proyeccion.update({campo: 1 for campo in obligatorios})
+        return proyeccion
+    return {campo: 0 for campo in excluir}
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl
+
+from flask import g, has_app_context
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_options_header
+
+from app.models.trabajo_exportacion import TrabajoExportacionModel
+
+logger = logging.getLogger(__name__)
+
+# Exportaciones que se pueden ejecutar en segundo plano y colecciones de las que
+# dependen (su versión forma parte de la clave de caché del archivo)
+EXPORTACIONES_EN_SEGUNDO_PLANO = {
+    'beneficiarios.exportar_beneficiarios_excel': ('beneficiarios',),
+    'actividad.exportar_actividad_route': ('actividades', 'beneficiarios', 'asistentes', 'lineas_trabajo'),
+    'reportes.generar_reporte_beneficiarios': ('beneficiarios', 'lineas_trabajo'),
+    'dashboard.exportar_grafico': ('beneficiarios',),
+}
+
+# Intervalo mínimo entre escrituras del progreso en la base de datos
+INTERVALO_PROGRESO = 1.0
+
+
+def resolver_exportacion(app, url):
+    """
+    Identificar la exportación que corresponde a una URL
+
+    :param app: Aplicación Flask
+    :param url: URL de la exportación (ruta y parámetros), p. ej. '/reportes/beneficiarios?mes=5'
+    :return: Tupla (endpoint, argumentos de la ruta, ruta, lista de parámetros de consulta)
+    :raises ValueError: Si la URL no corresponde a una exportación admitida
+    """
+    if not url or not isinstance(url, str):
+        raise ValueError("Debe indicar la URL de la exportación")
+
+    partes = urlsplit(url)
+    try:
+        endpoint, argumentos = app.url_map.bind('localhost').match(partes.path, method='GET')
+    except HTTPException:
+        raise ValueError(f"La ruta {partes.path} no existe")
+
+    if endpoint not in EXPORTACIONES_EN_SEGUNDO_PLANO:
+        raise ValueError(f"La ruta {partes.path} no admite exportación en segundo plano")
+
+    return endpoint, argumentos, partes.path, parse_qsl(partes.query, keep_blank_values=True)
+
+
+def clave_cache(endpoint, argumentos, parametros, versiones):
+    """
+    Clave del archivo de una exportación
+
+    Dos solicitudes con la misma exportación, los mismos filtros y la misma
+    versión de los datos producen el mismo archivo. Se incluye la fecha del
+    día porque algunas exportaciones usan el mes actual por defecto.
+
+    :param endpoint: Endpoint de la exportación
+    :param argumentos: Argumentos de la ruta
+    :param parametros: Parámetros de consulta (lista de pares)
+    :param versiones: Versión de cada colección de la que depende
+    :return: Hash SHA-256 en hexadecimal
+    """
+    contenido = json.dumps({
+        'endpoint': endpoint,
+        'argumentos': argumentos,
+        'parametros': sorted(parametros),
+        'versiones': versiones,
+        'dia': datetime.utcnow().strftime('%Y-%m-%d')
+    }, sort_keys=True, default=str)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def directorio_exportaciones(app):
+    """Directorio donde se guardan los archivos generados (se crea si no existe)"""
+    directorio = app.config.get('EXPORTACIONES_DIR') or os.path.join(tempfile.gettempdir(), 'sics_exportaciones')
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def limpiar_exportaciones_vencidas(app):
+    """
+    Borrar los archivos generados que ya superaron su tiempo de vida
+
+    :param app: Aplicación Flask
+    :return: Número de archivos borrados
+    """
+    directorio = directorio_exportaciones(app)
+    limite = time.time() - app.config.get('EXPORTACIONES_TTL_HORAS', 24) * 3600
+    borrados = 0
+    for nombre in os.listdir(directorio):
+        ruta = os.path.join(directorio, nombre)
+        try:
+            if os.path.isfile(ruta) and os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+                borrados += 1
+        except OSError as e:
+            logger.warning(f"No se pudo borrar la exportación vencida {ruta}: {str(e)}")
+    return borrados
+
+
+def ejecutor_en_segundo_plano(app, nombre='exportaciones', trabajadores=None):
+    """
+    Grupo de hilos de trabajos en segundo plano del proceso (uno por aplicación y nombre)
+
+    :param app: Aplicación Flask
+    :param nombre: Clave del grupo en app.extensions
+    :param trabajadores: Hilos del grupo (por defecto EXPORTACIONES_TRABAJADORES)
+    :return: ThreadPoolExecutor
+    """
+    ejecutor = app.extensions.get(nombre)
+    if ejecutor is None:
+        ejecutor = ThreadPoolExecutor(
+            max_workers=trabajadores or app.config.get('EXPORTACIONES_TRABAJADORES', 2),
+            thread_name_prefix=nombre
+        )
+        app.extensions[nombre] = ejecutor
+    return ejecutor
+
+
+def enviar_trabajo(app, trabajo_id, ruta, parametros, cabeceras):
+    """
+    Encolar un trabajo de exportación en el grupo de hilos
+
+    :param app: Aplicación Flask
+    :param trabajo_id: ID del trabajo registrado
+    :param ruta: Ruta de la exportación
+    :param parametros: Parámetros de consulta
+    :param cabeceras: Cabeceras de la solicitud original (autorización)
+    :return: Future del trabajo
+    """
+    return ejecutor_en_segundo_plano(app).submit(ejecutar_trabajo, app, trabajo_id, ruta, parametros, cabeceras)
+
+
+class _Progreso:
+    """Progreso de un trabajo, guardado en la base de datos como máximo una vez por intervalo"""
+
+    def __init__(self, modelo, trabajo_id):
+        self.modelo = modelo
+        self.trabajo_id = trabajo_id
+        self.datos = {'bytes': 0}
+        self._ultima_escritura = 0.0
+
+    def actualizar(self, **datos):
+        self.datos.update(datos)
+        ahora = time.monotonic()
+        if ahora - self._ultima_escritura >= INTERVALO_PROGRESO:
+            self._ultima_escritura = ahora
+            self.modelo.actualizar_progreso(self.trabajo_id, dict(self.datos))
+
+
+def reportar_progreso(procesados, total=None):
+    """
+    Informar del avance de una exportación que se ejecuta como trabajo
+
+    Fuera de un trabajo en segundo plano no hace nada, por lo que las
+    exportaciones pueden llamarla siempre.
+
+    :param procesados: Registros procesados hasta ahora
+    :param total: Total de registros, si se conoce
+    """
+    if not has_app_context():
+        return
+    progreso = g.get('progreso_exportacion')
+    if progreso is not None:
+        datos = {'procesados': procesados}
+        if total is not None:
+            datos['total'] = total
+        progreso.actualizar(**datos)
+
+
+def en_trabajo_exportacion():
+    """Indica si la solicitud actual es un trabajo de exportación en segundo plano"""
+    return has_app_context() and g.get('progreso_exportacion') is not None
+
+
+def _mensaje_error(respuesta):
+    """Mensaje de error de una respuesta JSON de exportación"""
+    if respuesta.status_code == 204:
+        return "No hay registros para exportar"
+    datos = respuesta.get_json(silent=True) or {}
+    return datos.get('msg') or datos.get('message') or datos.get('error') or f"Error {respuesta.status_code}"
+
+
+def _nombre_archivo(respuesta, trabajo_id):
+    """Nombre de descarga a partir de Content-Disposition (o uno genérico)"""
+    _, opciones = parse_options_header(respuesta.headers.get('Content-Disposition', ''))
+    if opciones.get('filename'):
+        return opciones['filename']
+    extension = mimetypes.guess_extension(respuesta.mimetype or '') or '.bin'
+    return f"exportacion_{trabajo_id}{extension}"
+
+
+def ejecutar_trabajo(app, trabajo_id, ruta, parametros, cabeceras):
+    """
+    Ejecutar una exportación como trabajo en segundo plano
+
+    La exportación se atiende igual que una solicitud GET (mismos filtros,
+    misma autenticación) y su cuerpo se vuelca por bloques a un archivo.
+
+    :param app: Aplicación Flask
+    :param trabajo_id: ID del trabajo
+    :param ruta: Ruta de la exportación
+    :param parametros: Parámetros de consulta
+    :param cabeceras: Cabeceras de la solicitud original
+    """
+    with app.app_context():
+        modelo = TrabajoExportacionModel(app.config['MONGO_DB'])
+        trabajo = modelo.obtener(trabajo_id)
+        temporal = None
+        try:
+            modelo.iniciar(trabajo_id)
+            progreso = _Progreso(modelo, trabajo_id)
+
+            with app.test_request_context(ruta, method='GET', query_string=parametros, headers=cabeceras):
+                g.progreso_exportacion = progreso
+                respuesta = app.full_dispatch_request()
+                try:
+                    if respuesta.status_code != 200:
+                        modelo.fallar(trabajo_id, _mensaje_error(respuesta), respuesta.status_code)
+                        return
+
+                    nombre_archivo = _nombre_archivo(respuesta, trabajo_id)
+                    extension = os.path.splitext(nombre_archivo)[1]
+                    destino = os.path.join(directorio_exportaciones(app), f"{trabajo['clave_cache']}{extension}")
+                    temporal = f"{destino}.{trabajo_id}.tmp"
+
+                    tamano = 0
+                    with open(temporal, 'wb') as archivo:
+                        for bloque in respuesta.iter_encoded():
+                            archivo.write(bloque)
+                            tamano += len(bloque)
+                            progreso.actualizar(bytes=tamano)
+                    # El archivo solo aparece con su nombre definitivo cuando está completo
+                    os.replace(temporal, destino)
+                    temporal = None
+                finally:
+                    respuesta.close()
+
+            progreso.datos['bytes'] = tamano
+            modelo.completar(trabajo_id, destino, nombre_archivo, respuesta.mimetype, tamano, progreso.datos)
+            logger.info(f"Trabajo de exportación {trabajo_id} completado ({tamano} bytes)")
+
+        except Exception as e:
+            logger.error(f"Error en el trabajo de exportación {trabajo_id}: {str(e)}", exc_info=True)
+            modelo.fallar(trabajo_id, str(e))
+        finally:
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
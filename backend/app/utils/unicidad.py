@@ -0,0 +1,148 @@
+import logging
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# Código de MongoDB para una clave duplicada en un índice único
+CODIGO_CLAVE_DUPLICADA = 11000
+
+# Índices únicos cuya existencia ya se comprobó (cliente, colección, campo).
+# Solo se guardan los que existen: un índice no se borra con la aplicación en
+# marcha, mientras que uno ausente puede crearse al resolver los duplicados
+_indices_confirmados = set()
+
+
+def nombre_indice_unico(campo):
+    """Nombre del índice único de un campo (aparece en los mensajes de clave duplicada)"""
+    return f'{campo}_unico'
+
+
+def crear_indice_unico(coleccion, campo):
+    """
+    Crear un índice único parcial sobre un campo de texto
+
+    Solo se indexan los valores no vacíos, de modo que varios registros
+    pueden quedar sin el campo, con None o con ''. Si la colección ya tiene
+    valores repetidos el índice no se crea y se registra el error (los pares
+    se pueden revisar con 'flask detectar-duplicados'); mientras falte, las
+    rutas comprueban los duplicados con una consulta previa
+    (ver valor_repetido y valores_registrados).
+
+    :param coleccion: Colección de MongoDB
+    :param campo: Campo que debe ser único
+    :return: True si el índice existe al terminar
+    """
+    try:
+        coleccion.create_index(
+            campo,
+            name=nombre_indice_unico(campo),
+            unique=True,
+            partialFilterExpression={campo: {'$gt': ''}}
+        )
+        return True
+    except OperationFailure as e:
+        logger.error(f"No se pudo crear el índice único de {coleccion.name}.{campo} "
+                     f"(¿hay valores repetidos?): {str(e)}. Se comprobarán los duplicados "
+                     f"con una consulta previa hasta que se resuelvan y se reinicie la aplicación")
+        return False
+
+
+def tiene_indice_unico(coleccion, campo):
+    """
+    Comprobar si la colección tiene el índice único de un campo
+
+    :param coleccion: Colección de MongoDB
+    :param campo: Campo que debe ser único
+    :return: True si el índice existe
+    """
+    clave = (id(coleccion.database.client), coleccion.full_name, campo)
+    if clave in _indices_confirmados:
+        return True
+    try:
+        indice = coleccion.index_information().get(nombre_indice_unico(campo))
+    except Exception as e:
+        logger.warning(f"No se pudieron leer los índices de {coleccion.name}: {str(e)}")
+        return False
+    if indice and indice.get('unique'):
+        _indices_confirmados.add(clave)
+        return True
+    return False
+
+
+def valor_repetido(coleccion, datos, campos, excluir_id=None):
+    """
+    Buscar otro documento con el mismo valor en un campo sin índice único
+
+    Los campos que tienen índice único no se consultan: el índice rechaza la
+    escritura y el error se traduce con campo_duplicado.
+
+    :param coleccion: Colección de MongoDB
+    :param datos: Documento o campos que se van a escribir
+    :param campos: Campos que deben ser únicos, en orden de preferencia
+    :param excluir_id: _id del documento que se actualiza (opcional)
+    :return: Nombre del primer campo repetido o None
+    """
+    pendientes = [campo for campo in campos if datos.get(campo) and not tiene_indice_unico(coleccion, campo)]
+    if not pendientes:
+        return None
+
+    filtro = {'$or': [{campo: datos[campo]} for campo in pendientes]}
+    if excluir_id is not None:
+        filtro['_id'] = {'$ne': excluir_id}
+    existente = coleccion.find_one(filtro, {campo: 1 for campo in pendientes})
+    if not existente:
+        return None
+    for campo in pendientes:
+        if existente.get(campo) == datos[campo]:
+            return campo
+    return pendientes[0]
+
+
+def valores_registrados(coleccion, documentos, campos):
+    """
+    Valores ya registrados de los campos sin índice único, para un lote
+
+    Una sola consulta con $in para todo el lote.
+
+    :param coleccion: Colección de MongoDB
+    :param documentos: Documentos que se van a insertar
+    :param campos: Campos que deben ser únicos
+    :return: Diccionario {campo: conjunto de valores ya registrados}
+    """
+    valores = {}
+    for campo in campos:
+        if not tiene_indice_unico(coleccion, campo):
+            del_lote = {documento[campo] for documento in documentos if documento.get(campo)}
+            if del_lote:
+                valores[campo] = del_lote
+    if not valores:
+        return {}
+
+    registrados = {campo: set() for campo in valores}
+    filtro = {'$or': [{campo: {'$in': list(lote)}} for campo, lote in valores.items()]}
+    for existente in coleccion.find(filtro, {campo: 1 for campo in valores}):
+        for campo, lote in valores.items():
+            if existente.get(campo) in lote:
+                registrados[campo].add(existente[campo])
+    return registrados
+
+
+def campo_duplicado(error, campos, datos=None):
+    """
+    Identificar el campo que provocó un error de clave duplicada
+
+    :param error: DuplicateKeyError o una entrada de 'writeErrors' de un BulkWriteError
+    :param campos: Campos con índice único, en orden de preferencia
+    :param datos: Documento que se intentó escribir (para acotar el campo si el error no lo indica)
+    :return: Nombre del campo
+    """
+    detalles = error if isinstance(error, dict) else (getattr(error, 'details', None) or {})
+    patron = detalles.get('keyPattern') or {}
+    mensaje = detalles.get('errmsg') or str(error)
+    for campo in campos:
+        if campo in patron or f'index: {nombre_indice_unico(campo)} ' in mensaje:
+            return campo
+
+    presentes = [campo for campo in campos if datos and datos.get(campo)]
+    return presentes[0] if presentes else campos[0]
@@ -0,0 +1,156 @@
+"""
+Benchmark del ajuste de ancho de columnas de exportar_reunion
+
+Compara, para distintos números de asistentes:
+  - anterior: las filas se escriben y después se recorre cada columna fila a fila,
+    revisando para cada celda todos los rangos combinados de la hoja (cada fila
+    añade uno para NOMBRE), es decir O(columnas × filas × rangos),
+  - incremental: AnchoColumnas registra la longitud de cada valor en una pasada
+    previa sobre los datos y responde si una celda está combinada con un conjunto
+    de coordenadas; después las filas se escriben en flujo con HojaAsistencia.
+
+Las columnas se dejan sin ancho definido para que ambas variantes calculen el
+ajuste de todas (con la plantilla del encabezado las nueve columnas tienen ancho
+fijo y el cálculo no se aplica). Se mide el tiempo de escribir las filas más el
+del ajuste (la variante incremental incluye además guardar el libro); el logo y
+las firmas no intervienen.
+
+La variante anterior tarda minutos con 1000 asistentes y horas con 5000; por
+encima de --maximo-anterior no se ejecuta y se muestra su tiempo estimado a
+partir de la última medición (crecimiento cuadrático).
+
+Uso:
+    python tests/benchmark_ancho_columnas.py [--asistentes 1000 5000] [--variantes anterior incremental]
+                                             [--maximo-anterior 1000]
+
+No necesita base de datos.
+"""
+import argparse
+import os
+import sys
+import time
+
+from openpyxl import Workbook
+from openpyxl.styles import Border, Side
+from openpyxl.utils import get_column_letter
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+from app.utils.hoja_asistencia import PLANTILLA_REUNION, AnchoColumnas, HojaAsistencia
+
+ENCABEZADOS = ['NOMBRE COMPLETO', '', 'CÉDULA', 'DEPENDENCIA', 'CARGO', 'TIPO PARTICIPACIÓN',
+               'TELÉFONO', 'EMAIL', 'FIRMA']
+BORDE = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+
+
+def asistentes(total):
+    """Asistentes sintéticos con longitudes de texto variadas"""
+    return [{
+        'nombre': f'Asistente de prueba número {i}',
+        'cedula': str(10000000 + i),
+        'dependencia': f'Secretaría {i % 17} ' + 'x' * (i % 9),
+        'cargo': 'Profesional universitario' if i % 2 else 'Técnico',
+        'tipo_participacion': 'Presencial',
+        'telefono': '3000000000',
+        'email': f'asistente{i}@quibdo-choco.gov.co',
+    } for i in range(total)]
+
+
+def hoja_con_encabezado():
+    """Libro con la fila de títulos de la tabla (NOMBRE combinado en A:B)"""
+    wb = Workbook()
+    ws = wb.active
+    for columna, encabezado in enumerate(ENCABEZADOS, 1):
+        ws.cell(row=1, column=columna, value=encabezado)
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=2)
+    return ws
+
+
+def valores(asistente):
+    return [asistente['cedula'], asistente['dependencia'], asistente['cargo'],
+            asistente['tipo_participacion'], asistente['telefono'], asistente['email'], 'Sin firma']
+
+
+def exportar_anterior(lista):
+    """Comportamiento anterior: ajuste de ancho al final revisando todos los rangos por celda"""
+    ws = hoja_con_encabezado()
+    for row_num, asistente in enumerate(lista, 2):
+        ws.cell(row=row_num, column=1, value=asistente['nombre']).border = BORDE
+        ws.cell(row=row_num, column=2, value='').border = BORDE
+        ws.merge_cells(start_row=row_num, start_column=1, end_row=row_num, end_column=2)
+        for col_num, valor in enumerate(valores(asistente), 3):
+            ws.cell(row=row_num, column=col_num, value=valor).border = BORDE
+
+    for col_num in range(1, ws.max_column + 1):
+        max_length = 0
+        column_letter = get_column_letter(col_num)
+        if column_letter in ws.column_dimensions and ws.column_dimensions[column_letter].width is not None:
+            continue
+        for row in ws.iter_rows(min_col=col_num, max_col=col_num):
+            cell = row[0]
+            is_merged = False
+            for merge_range in ws.merged_cells.ranges:
+                if cell.coordinate in merge_range:
+                    is_merged = True
+                    break
+            if not is_merged and cell.value:
+                max_length = max(max_length, len(str(cell.value)))
+        if max_length > 0:
+            ws.column_dimensions[column_letter].width = min((max_length + 2) * 1.2, 30)
+    return {letra: dimension.width for letra, dimension in ws.column_dimensions.items()}
+
+
+def exportar_incremental(lista):
+    """Ajuste de ancho calculado en una pasada sobre los valores y hoja escrita en flujo"""
+    hoja = HojaAsistencia('Asistencia', PLANTILLA_REUNION)
+    hoja.anchos.clear()
+    ancho = AnchoColumnas(fijas=hoja.anchos)
+    filas = [ENCABEZADOS] + [[asistente['nombre'], ''] + valores(asistente) for asistente in lista]
+    for fila, datos in enumerate(filas, 1):
+        ancho.combinar(fila, 1, fila, 2)
+        for columna, valor in enumerate(datos, 1):
+            ancho.registrar(fila, columna, valor)
+    hoja.anchos.update(ancho.anchos())
+
+    for datos in filas:
+        fila = hoja.agregar_fila(datos, estilo='asistencia_celda')
+        hoja.combinar(fila, 1, fila, 2)
+    hoja.guardar().close()
+    return hoja.anchos
+
+
+VARIANTES = {'anterior': exportar_anterior, 'incremental': exportar_incremental}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--asistentes', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--variantes', nargs='+', choices=list(VARIANTES), default=list(VARIANTES))
+    parser.add_argument('--maximo-anterior', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"{'asistentes':>10} {'variante':<12} {'tiempo':>10} {'por asistente':>14}")
+    medicion_anterior = None
+    for total in sorted(args.asistentes):
+        lista = asistentes(total)
+        anchos = {}
+        for variante in args.variantes:
+            if variante == 'anterior' and total > args.maximo_anterior:
+                if medicion_anterior:
+                    filas, duracion = medicion_anterior
+                    print(f"{total:>10} {variante:<12} {duracion * (total / filas) ** 2:>9.0f}s (estimado)")
+                continue
+            inicio = time.perf_counter()
+            anchos[variante] = VARIANTES[variante](lista)
+            duracion = time.perf_counter() - inicio
+            if variante == 'anterior':
+                medicion_anterior = (total, duracion)
+            print(f"{total:>10} {variante:<12} {duracion:>9.3f}s {duracion * 1e6 / total:>12.1f}µs")
+        if len(anchos) == 2 and anchos['anterior'] != anchos['incremental']:
+            print(f"  Aviso: los anchos calculados difieren: {anchos}")
+
+
+if __name__ == '__main__':
+    main()
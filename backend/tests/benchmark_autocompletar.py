@@ -0,0 +1,108 @@
+"""
+Benchmark del autocompletado de beneficiarios (/beneficiarios/autocompletar)
+
+Siembra beneficiarios con nombres y documentos sintéticos, genera sus términos
+de autocompletado normalizados (nombre y documento) y mide la latencia de la
+consulta de autocompletado, ordenada por nombre, para prefijos de distinta longitud. También muestra la etapa del plan ganador
+para comprobar que la consulta usa el índice (IXSCAN) y no recorre la colección.
+
+Uso:
+    python tests/benchmark_autocompletar.py [--total 100000] [--consultas 200] [--limite 10]
+
+Se usa una base de datos aparte (<DATABASE_NAME>_benchmark) que se elimina al terminar.
+"""
+from pymongo import MongoClient
+import argparse
+import random
+import statistics
+import time
+import os
+import sys
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+# Importar configuración
+from config import get_config
+from app.utils.busqueda import CAMPO_AUTOCOMPLETAR, CAMPO_NOMBRE_ORDEN, campos_busqueda, filtro_busqueda
+
+# Obtener configuración
+config = get_config()
+
+NOMBRES = ['José', 'María', 'Ana', 'Luis', 'Andrés', 'Sofía', 'Camilo', 'Valentina', 'Jhon', 'Yesenia']
+APELLIDOS = ['Peña', 'Gómez', 'Mosquera', 'Palacios', 'Rentería', 'Córdoba', 'Murillo', 'Asprilla']
+
+
+def sembrar_beneficiarios(coleccion, total):
+    """Insertar beneficiarios sintéticos con sus términos de búsqueda"""
+    lote = []
+    for i in range(total):
+        beneficiario = {
+            'nombre_completo': f"{random.choice(NOMBRES)} {random.choice(APELLIDOS)} {random.choice(APELLIDOS)}",
+            'numero_documento': str(random.randint(10000000, 1199999999)),
+            'comuna': f'Comuna {random.randint(1, 6)}',
+        }
+        beneficiario.update(campos_busqueda(beneficiario, 'beneficiarios'))
+        lote.append(beneficiario)
+        if len(lote) == 10000:
+            coleccion.insert_many(lote)
+            lote = []
+    if lote:
+        coleccion.insert_many(lote)
+    coleccion.create_index([(CAMPO_AUTOCOMPLETAR, 1), (CAMPO_NOMBRE_ORDEN, 1)])
+
+
+def consulta(coleccion, texto, limite):
+    """Consulta de sugerencias como la de la ruta (sin la coincidencia exacta de documento)"""
+    return coleccion.find(
+        filtro_busqueda(texto, CAMPO_AUTOCOMPLETAR), {'nombre_completo': 1, 'numero_documento': 1}
+    ).sort([(CAMPO_NOMBRE_ORDEN, 1), ('_id', 1)]).limit(limite)
+
+
+def etapa_plan(plan):
+    """Obtener la etapa de acceso a datos más interna del plan ganador"""
+    while 'inputStage' in plan:
+        plan = plan['inputStage']
+    return plan['stage']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--total', type=int, default=100000)
+    parser.add_argument('--consultas', type=int, default=200)
+    parser.add_argument('--limite', type=int, default=10)
+    args = parser.parse_args()
+
+    client = MongoClient(config.MONGO_URI)
+    nombre_db = f"{config.DATABASE_NAME}_benchmark"
+    coleccion = client[nombre_db]['beneficiarios']
+
+    try:
+        print(f"Sembrando {args.total} beneficiarios en {nombre_db}...")
+        sembrar_beneficiarios(coleccion, args.total)
+
+        textos = {
+            '2 letras': [random.choice(NOMBRES)[:2] for _ in range(args.consultas)],
+            '4 letras': [random.choice(APELLIDOS)[:4] for _ in range(args.consultas)],
+            'nombre + apellido': [f"{random.choice(NOMBRES)} {random.choice(APELLIDOS)[:3]}" for _ in range(args.consultas)],
+            'documento (5 dígitos)': [str(random.randint(10000, 99999)) for _ in range(args.consultas)],
+        }
+
+        for nombre, consultas in textos.items():
+            tiempos = []
+            for texto in consultas:
+                inicio = time.perf_counter()
+                list(consulta(coleccion, texto, args.limite))
+                tiempos.append((time.perf_counter() - inicio) * 1000)
+            plan = consulta(coleccion, consultas[0], args.limite).explain()
+            etapa = etapa_plan(plan['queryPlanner']['winningPlan'])
+            print(f"{nombre:<24} plan: {etapa:<9} mediana: {statistics.median(tiempos):>7.2f} ms   "
+                  f"p95: {sorted(tiempos)[int(len(tiempos) * 0.95) - 1]:>7.2f} ms")
+    finally:
+        client.drop_database(nombre_db)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
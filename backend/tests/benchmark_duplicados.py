@@ -0,0 +1,139 @@
+"""
+Benchmark del detector de posibles duplicados
+
+Siembra beneficiarios y población migrante sintéticos en los que una parte son
+la misma persona registrada de nuevo con errores de digitación (nombre y/o
+documento), y mide:
+  - tiempo de la detección completa y pares comparados frente a los n·(n-1)/2
+    de comparar todos con todos,
+  - cuántos de los duplicados sembrados se encuentran,
+  - tiempo de una ejecución incremental con un 1% de registros nuevos.
+
+Uso:
+    python tests/benchmark_duplicados.py [--registros 20000 100000] [--duplicados 0.05]
+
+Se usa una base de datos aparte (<DATABASE_NAME>_benchmark) que se elimina al terminar.
+"""
+from pymongo import MongoClient
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+# Importar configuración
+from config import get_config
+from app.models.duplicados import DuplicadosModel
+
+# Obtener configuración
+config = get_config()
+
+NOMBRES = ['María', 'José', 'Luis', 'Ana', 'Carlos', 'Luz', 'Jorge', 'Sandra', 'Andrés', 'Paola', 'Jhon',
+           'Yuli', 'Edwin', 'Diana', 'Wilmer', 'Leidy', 'Fredy', 'Marisol', 'Harold', 'Yesenia']
+APELLIDOS = ['Rodríguez', 'Mina', 'Caicedo', 'Valencia', 'Perea', 'Mosquera', 'Angulo', 'Riascos', 'Hurtado',
+             'Cuero', 'Góngora', 'Rentería', 'Cortés', 'Castillo', 'Palacios', 'Sinisterra', 'Quiñones',
+             'Murillo', 'Obregón', 'Asprilla', 'Banguera', 'Solís', 'Arboleda', 'Lucumí', 'Viveros']
+
+
+def con_error(texto):
+    """Cambiar, quitar o duplicar un carácter al azar"""
+    i = random.randrange(len(texto))
+    cambio = random.choice(['cambiar', 'quitar', 'duplicar'])
+    if cambio == 'cambiar':
+        return texto[:i] + random.choice(string.ascii_lowercase) + texto[i + 1:]
+    if cambio == 'quitar':
+        return texto[:i] + texto[i + 1:]
+    return texto[:i] + texto[i] + texto[i:]
+
+
+def persona(i):
+    nombre = ' '.join(random.sample(NOMBRES, random.choice([1, 2])) + random.sample(APELLIDOS, 2))
+    return {'nombre_completo': nombre, 'numero_documento': str(random.randint(10000000, 1999999999)), 'semilla': i}
+
+
+def sembrar(db, total, proporcion):
+    """Insertar 'total' registros; 'proporcion' de ellos repiten a otro con errores"""
+    originales = []
+    lotes = {'beneficiarios': [], 'poblacion_migrante': []}
+    sembrados = 0
+    for i in range(total):
+        if originales and random.random() < proporcion:
+            original = random.choice(originales)
+            registro = dict(original, semilla=original['semilla'])
+            if random.random() < 0.7:
+                registro['nombre_completo'] = con_error(registro['nombre_completo'])
+            if random.random() < 0.5:
+                registro['numero_documento'] = con_error(registro['numero_documento'])
+            sembrados += 1
+        else:
+            registro = persona(i)
+            originales.append(registro)
+        coleccion = 'beneficiarios' if random.random() < 0.8 else 'poblacion_migrante'
+        lotes[coleccion].append(dict(registro))
+    for coleccion, registros in lotes.items():
+        if registros:
+            db[coleccion].insert_many(registros)
+    return sembrados
+
+
+def pares_encontrados(db, modelo):
+    """Pares candidatos cuyos dos registros provienen de la misma persona sembrada"""
+    semillas = {}
+    for coleccion in ('beneficiarios', 'poblacion_migrante'):
+        for documento in db[coleccion].find({}, {'semilla': 1}):
+            semillas[f"{coleccion}:{documento['_id']}"] = documento['semilla']
+    aciertos = 0
+    total = 0
+    for par in modelo.candidatos.find({}, {'_id': 1}):
+        primero, segundo = par['_id'].split('|')
+        total += 1
+        aciertos += semillas.get(primero) == semillas.get(segundo)
+    return aciertos, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--registros', type=int, nargs='+', default=[20000, 100000])
+    parser.add_argument('--duplicados', type=float, default=0.05, help='Proporción de registros repetidos')
+    args = parser.parse_args()
+
+    client = MongoClient(config.MONGO_URI)
+    nombre_db = f"{config.DATABASE_NAME}_benchmark"
+
+    try:
+        for total in args.registros:
+            client.drop_database(nombre_db)
+            db = client[nombre_db]
+            modelo = DuplicadosModel(db)
+            modelo.crear_indices()
+
+            sembrados = sembrar(db, total, args.duplicados)
+            inicio = time.perf_counter()
+            resumen = modelo.detectar()
+            segundos = time.perf_counter() - inicio
+            aciertos, candidatos = pares_encontrados(db, modelo)
+            todos_con_todos = total * (total - 1) // 2
+
+            print(f"\n{total} registros ({sembrados} repetidos con errores)")
+            print(f"  detección completa: {segundos:.1f} s, {resumen['comparaciones']} pares comparados "
+                  f"({resumen['comparaciones'] / todos_con_todos:.4%} de {todos_con_todos})")
+            print(f"  candidatos: {candidatos}, de la misma persona: {aciertos} "
+                  f"(sensibilidad aproximada {aciertos / max(sembrados, 1):.1%})")
+
+            sembrar(db, max(total // 100, 1), args.duplicados)
+            inicio = time.perf_counter()
+            resumen = modelo.detectar()
+            print(f"  incremental con {resumen['registros']} nuevos: {time.perf_counter() - inicio:.2f} s, "
+                  f"{resumen['comparaciones']} pares comparados")
+    finally:
+        client.drop_database(nombre_db)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
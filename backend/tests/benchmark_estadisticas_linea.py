@@ -0,0 +1,149 @@
+"""
+Benchmark de BeneficiarioModel.obtener_estadisticas_por_linea_trabajo
+
+Compara la implementación anterior (un count_documents por contador más una
+agregación de comunas) con la consulta única basada en $facet, sobre una
+colección sembrada con 100.000 beneficiarios.
+
+Uso:
+    python tests/benchmark_estadisticas_linea.py [--total 100000] [--repeticiones 20]
+
+Se usa una base de datos aparte (<DATABASE_NAME>_benchmark) que se elimina al terminar.
+"""
+from pymongo import MongoClient, monitoring
+from bson.objectid import ObjectId
+import argparse
+import random
+import statistics
+import time
+import os
+import sys
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+# Importar configuración
+from config import get_config
+from app.models.beneficiario import BeneficiarioModel, FILTROS_ESTADISTICAS
+
+# Obtener configuración
+config = get_config()
+
+
+class ContadorComandos(monitoring.CommandListener):
+    """Cuenta los comandos enviados al servidor (idas y vueltas)"""
+
+    def __init__(self):
+        self.total = 0
+
+    def started(self, event):
+        if event.command_name not in ('endSessions', 'hello', 'isMaster', 'ping'):
+            self.total += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def sembrar_beneficiarios(db, linea_trabajo_id, total):
+    """Insertar beneficiarios sintéticos repartidos en varias líneas de trabajo"""
+    otras_lineas = [str(ObjectId()) for _ in range(3)]
+    comunas = [f'Comuna {i}' for i in range(1, 7)]
+    rangos = ['0-12', '13-18', '19-25', '26-35', '36-45', '46-55', '56-65', '66 o más']
+    viviendas = ['Propia', 'Arriendo', 'Familiar', 'Compartida']
+    laborales = ['Empleado', 'Independiente', 'Desempleado', 'Pensionado']
+
+    lote = []
+    for i in range(total):
+        lote.append({
+            'linea_trabajo': str(linea_trabajo_id) if i % 2 == 0 else random.choice(otras_lineas),
+            'nombre_completo': f'Beneficiario {i}',
+            'numero_documento': str(10000000 + i),
+            'genero': random.choice(['Masculino', 'Femenino']),
+            'rango_edad': random.choice(rangos),
+            'comuna': random.choice(comunas),
+            'tipo_vivienda': random.choice(viviendas),
+            'situacion_laboral': random.choice(laborales),
+            'victima_conflicto': random.random() < 0.3,
+            'tiene_discapacidad': random.random() < 0.1,
+            'ayuda_humanitaria': random.random() < 0.2,
+            'estudia_actualmente': random.random() < 0.4,
+            'sabe_leer': random.random() < 0.9,
+            'sabe_escribir': random.random() < 0.85,
+            'hijos_a_cargo': random.randint(0, 3)
+        })
+        if len(lote) == 5000:
+            db['beneficiarios'].insert_many(lote)
+            lote = []
+    if lote:
+        db['beneficiarios'].insert_many(lote)
+    db['beneficiarios'].create_index('linea_trabajo')
+
+
+def estadisticas_anteriores(coleccion, linea_trabajo_id):
+    """Reproduce la implementación anterior: un count_documents por contador"""
+    filtro_base = {'linea_trabajo': str(linea_trabajo_id)}
+    conteos = {
+        nombre: coleccion.count_documents({**filtro_base, **filtro})
+        for nombre, filtro in FILTROS_ESTADISTICAS.items()
+    }
+    comunas = list(coleccion.aggregate([
+        {'$match': filtro_base},
+        {'$group': {'_id': '$comuna', 'total': {'$sum': 1}}}
+    ]))
+    return conteos, comunas
+
+
+def medir(nombre, funcion, contador, repeticiones):
+    tiempos = []
+    contador.total = 0
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    idas_y_vueltas = contador.total / repeticiones
+    print(f"{nombre:<28} idas/vueltas: {idas_y_vueltas:>5.1f}   "
+          f"mediana: {statistics.median(tiempos):>8.2f} ms   "
+          f"p95: {sorted(tiempos)[int(len(tiempos) * 0.95) - 1]:>8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--total', type=int, default=100000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    contador = ContadorComandos()
+    client = MongoClient(config.MONGO_URI, event_listeners=[contador])
+    nombre_db = f"{config.DATABASE_NAME}_benchmark"
+    db = client[nombre_db]
+
+    try:
+        linea_trabajo_id = db['lineas_trabajo'].insert_one({'nombre': 'Línea benchmark'}).inserted_id
+        print(f"Sembrando {args.total} beneficiarios en {nombre_db}...")
+        sembrar_beneficiarios(db, linea_trabajo_id, args.total)
+
+        modelo = BeneficiarioModel(db)
+
+        # Verificar que ambas versiones producen los mismos números
+        anteriores, comunas = estadisticas_anteriores(db['beneficiarios'], linea_trabajo_id)
+        actuales = modelo.obtener_estadisticas_por_linea_trabajo(linea_trabajo_id)
+        for nombre, valor in anteriores.items():
+            assert actuales[nombre] == valor, f"Diferencia en {nombre}: {actuales[nombre]} != {valor}"
+        assert actuales['total_comunas']['cantidad'] == len(comunas)
+        print("Resultados idénticos entre ambas implementaciones\n")
+
+        medir('Antes (count_documents)', lambda: estadisticas_anteriores(db['beneficiarios'], linea_trabajo_id),
+              contador, args.repeticiones)
+        medir('Después ($facet)', lambda: modelo.obtener_estadisticas_por_linea_trabajo(linea_trabajo_id),
+              contador, args.repeticiones)
+    finally:
+        client.drop_database(nombre_db)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""
+Benchmark de la exportación de beneficiarios a Excel
+
+Compara, para distintos números de filas:
+  - pandas: comportamiento anterior (list(find) -> DataFrame -> ExcelWriter en BytesIO),
+  - streaming: cursor por lotes con proyección y libro escrito por bloques (generar_xlsx).
+
+Para cada caso registra el pico de memoria residente (RSS) del proceso, el tiempo
+hasta el primer byte que recibiría el cliente y el tiempo total. Cada medición se
+ejecuta en un proceso aparte para que el pico de RSS de una no contamine a la otra.
+
+Uso:
+    python tests/benchmark_exportacion.py [--filas 10000 100000 500000] [--variantes pandas streaming]
+
+Se usa una base de datos aparte (<DATABASE_NAME>_benchmark) que se elimina al terminar.
+"""
+from pymongo import MongoClient
+from datetime import datetime, timedelta
+import argparse
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+# Importar configuración
+from config import get_config
+from app.models.beneficiario import COLUMNAS_EXPORTACION, CAMPOS_EXPORTACION, fila_exportacion
+from app.utils.exportacion import generar_xlsx, TAMANO_LOTE_EXPORTACION
+
+# Obtener configuración
+config = get_config()
+
+
+def sembrar_beneficiarios(coleccion, total):
+    """Insertar beneficiarios sintéticos con los campos de la exportación"""
+    inicio = datetime(2024, 1, 1)
+    lote = []
+    for i in range(total):
+        lote.append({
+            'nombre_completo': f'Beneficiario de prueba {i}',
+            'tipo_documento': 'Cédula de ciudadanía',
+            'numero_documento': str(10000000 + i),
+            'genero': random.choice(['Masculino', 'Femenino']),
+            'rango_edad': random.choice(['18-28', '29-59', '60+']),
+            'correo_electronico': f'beneficiario{i}@correo.com',
+            'numero_celular': '3000000000',
+            'comuna': f'Comuna {random.randint(1, 6)}',
+            'barrio': f'Barrio {random.randint(1, 40)}',
+            'linea_trabajo': 'benchmark',
+            'fecha_registro': inicio + timedelta(minutes=i),
+            'estudia_actualmente': random.random() < 0.3,
+            'nivel_educativo': 'Secundaria completa',
+            'situacion_laboral': 'Independiente',
+            'victima_conflicto': random.random() < 0.2,
+            'tiene_discapacidad': random.random() < 0.1,
+        })
+        if len(lote) == 10000:
+            coleccion.insert_many(lote)
+            lote = []
+    if lote:
+        coleccion.insert_many(lote)
+
+
+def exportar_pandas(coleccion, filas):
+    """Exportación anterior: todo el resultado en memoria antes de responder"""
+    import pandas as pd
+
+    registros = list(coleccion.find({}).limit(filas))
+    datos = [dict(zip([encabezado for encabezado, _ in COLUMNAS_EXPORTACION], fila_exportacion(r)))
+             for r in registros]
+    df = pd.DataFrame(datos)
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Beneficiarios')
+    # El cliente no recibe nada hasta que el archivo está completo
+    yield output.getvalue()
+
+
+def exportar_streaming(coleccion, filas):
+    """Exportación por bloques: cursor por lotes y libro escrito en flujo"""
+    cursor = coleccion.find({}, {campo: 1 for campo in CAMPOS_EXPORTACION}) \
+        .limit(filas).batch_size(TAMANO_LOTE_EXPORTACION)
+    yield from generar_xlsx(
+        [encabezado for encabezado, _ in COLUMNAS_EXPORTACION],
+        (fila_exportacion(b) for b in cursor),
+        nombre_hoja='Beneficiarios'
+    )
+
+
+def medir(nombre_db, variante, filas):
+    """Ejecutar una exportación (en este proceso) y devolver sus métricas"""
+    client = MongoClient(config.MONGO_URI)
+    coleccion = client[nombre_db]['beneficiarios']
+    exportar = exportar_pandas if variante == 'pandas' else exportar_streaming
+
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    primer_byte = None
+    tamano = 0
+    for bloque in exportar(coleccion, filas):
+        if primer_byte is None and bloque:
+            primer_byte = time.perf_counter() - inicio
+        tamano += len(bloque)
+    total = time.perf_counter() - inicio
+    client.close()
+
+    return {
+        'rss_inicial_mb': rss_inicial / 1024,
+        'rss_pico_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'primer_byte_s': primer_byte,
+        'total_s': total,
+        'tamano_mb': tamano / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10000, 100000, 500000])
+    parser.add_argument('--variantes', nargs='+', choices=['pandas', 'streaming'], default=['pandas', 'streaming'])
+    # Uso interno: ejecutar una sola medición en un proceso hijo
+    parser.add_argument('--medir', nargs=3, metavar=('DB', 'VARIANTE', 'FILAS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        nombre_db, variante, filas = args.medir
+        print(json.dumps(medir(nombre_db, variante, int(filas))))
+        return
+
+    client = MongoClient(config.MONGO_URI)
+    nombre_db = f"{config.DATABASE_NAME}_benchmark"
+
+    try:
+        total = max(args.filas)
+        print(f"Sembrando {total} beneficiarios en {nombre_db}...")
+        sembrar_beneficiarios(client[nombre_db]['beneficiarios'], total)
+
+        print(f"\n{'filas':>8} {'variante':<10} {'RSS pico':>10} {'(+inicial)':>11} "
+              f"{'primer byte':>12} {'total':>9} {'archivo':>9}")
+        for filas in args.filas:
+            for variante in args.variantes:
+                salida = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--medir', nombre_db, variante, str(filas)],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                m = json.loads(salida.strip().splitlines()[-1])
+                print(f"{filas:>8} {variante:<10} {m['rss_pico_mb']:>8.1f}MB "
+                      f"{m['rss_pico_mb'] - m['rss_inicial_mb']:>+9.1f}MB "
+                      f"{m['primer_byte_s']:>11.3f}s {m['total_s']:>8.2f}s {m['tamano_mb']:>7.1f}MB")
+    finally:
+        client.drop_database(nombre_db)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,200 @@
+"""
+Benchmark del encabezado de la hoja de asistencia
+
+Compara, para una hoja con 50 asistentes:
+  - anterior: encabezado construido celda a celda en cada exportación (un Font,
+    PatternFill y Border nuevos por celda, bordes recorridos rango a rango y el
+    logo original leído del disco y reescalado por Excel),
+  - plantilla: HojaAsistencia con PLANTILLA_ACTIVIDAD (estilos con nombre, celdas
+    combinadas precalculadas y logo reducido una sola vez por proceso), escrita
+    en flujo como en la exportación actual.
+
+En ambos casos se escriben las filas de la tabla y se guarda el libro, como en
+la exportación real. Se mide el tiempo de CPU del proceso (time.process_time)
+por exportación y el tamaño del archivo generado.
+
+Uso:
+    python tests/benchmark_hoja_asistencia.py [--filas 50] [--repeticiones 200]
+
+No necesita base de datos.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import datetime
+
+from openpyxl import Workbook
+from openpyxl.drawing.image import Image as XLImage
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+from app.utils.hoja_asistencia import PLANTILLA_ACTIVIDAD, RUTA_LOGO, HojaAsistencia, logo_asistencia
+
+ACTIVIDAD = {
+    'dependencia': 'Secretaría de Inclusión y Cohesión Social',
+    'tema': 'Taller de emprendimiento',
+    'fecha': '2024-03-05T10:00:00',
+    'lugar': 'Casa de la cultura',
+    'hora_inicio': '08:00',
+    'hora_fin': '12:00',
+    'objetivo': 'Fortalecer las capacidades de los participantes',
+}
+
+ENCABEZADOS = ['N°', 'FECHA', 'NOMBRE COMPLETO', 'CÉDULA', 'GÉNERO', 'RANGO EDAD',
+               'COMUNA', 'CELULAR', 'CORREO', 'LÍNEA', 'FIRMA']
+
+
+def _borde():
+    return Border(
+        left=Side(style='thin', color='000000'),
+        right=Side(style='thin', color='000000'),
+        top=Side(style='thin', color='000000'),
+        bottom=Side(style='thin', color='000000')
+    )
+
+
+def encabezado_anterior(ws, actividad):
+    """Encabezado como se construía antes, resumido (mismas celdas y estilos)"""
+    blanco = PatternFill(start_color="FFFFFF", end_color="FFFFFF", fill_type="solid")
+    for letra, ancho in zip('ABCDEFGHIJK', [15, 13, 20, 15, 13, 15, 15, 13, 15, 15, 20]):
+        ws.column_dimensions[letra].width = ancho
+
+    if os.path.exists(RUTA_LOGO):
+        img = XLImage(RUTA_LOGO)
+        proporcion = img.height / img.width
+        img.width = 300
+        img.height = int(300 * proporcion)
+        ws.add_image(img, 'A1')
+    ws.merge_cells('A1:C4')
+
+    for rango, texto, tamano in (('D1:K1', 'FORMATO REGISTRO DE ASISTENCIA', 14),
+                                 ('D2:K2', 'ALCALDÍA MUNICIPAL DE QUIBDÓ', 12)):
+        ws.merge_cells(rango)
+        celda = ws[rango.split(':')[0]]
+        celda.value = texto
+        celda.font = Font(bold=True, size=tamano, name='Arial')
+        celda.fill = blanco
+        for fila in ws[rango]:
+            for c in fila:
+                c.border = _borde()
+        celda.alignment = Alignment(horizontal='left', vertical='center')
+
+    fecha = datetime.strptime(actividad['fecha'], '%Y-%m-%dT%H:%M:%S').strftime('%d/%m/%Y')
+    celdas = [
+        ('D3', 'DEPENDENCIA:', True, 'D3:E3'), ('F3', actividad['dependencia'].upper(), False, 'F3:K3'),
+        ('D4', None, True, 'D4:K4'),
+        ('A5', 'TEMA:', True, 'A5:B5'), ('C5', actividad['tema'].upper(), False, 'C5:F5'),
+        ('A6', 'FECHA:', True, 'A6:B6'), ('C6', f"FECHA: {fecha}", False, 'C6'),
+        ('D6', 'LUGAR:', True, 'D6'), ('E6', actividad['lugar'].upper(), False, 'E6:F6'),
+        ('A7', 'HORA INICIO:', True, 'A7:B7'), ('C7', actividad['hora_inicio'], False, 'C7'),
+        ('D7', 'HORA FINALIZACIÓN:', True, 'D7'), ('E7', actividad['hora_fin'], False, 'E7:F7'),
+    ]
+    for coordenada, valor, etiqueta, rango in celdas:
+        celda = ws[coordenada]
+        if valor is not None:
+            celda.value = valor
+            celda.font = Font(bold=etiqueta, name='Arial', size=10)
+        celda.fill = blanco
+        celda.border = _borde()
+        ws.merge_cells(rango)
+
+    ws.merge_cells('G5:H7')
+    ws['G5'].value = 'OBJETIVO:'
+    ws['G5'].font = Font(bold=True, size=10, name='Arial')
+    ws['G5'].fill = blanco
+    for fila in ws['G5:H7']:
+        for c in fila:
+            c.border = _borde()
+    ws['G5'].alignment = Alignment(horizontal='center', vertical='center')
+    ws['I5'].value = actividad['objetivo'].upper()
+    ws['I5'].font = Font(name='Arial', size=10)
+    ws['I5'].fill = blanco
+    for fila in ws['I5:K7']:
+        for c in fila:
+            c.border = _borde()
+    ws['I5'].alignment = Alignment(wrap_text=True, vertical='top')
+    ws.merge_cells('I5:K7')
+    for fila in (5, 6, 7):
+        ws.row_dimensions[fila].auto_size = True
+
+    fuente = Font(bold=True, color="FFFFFF")
+    relleno = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+    for columna, encabezado in enumerate(ENCABEZADOS, 1):
+        celda = ws.cell(row=8, column=columna, value=encabezado)
+        celda.font = fuente
+        celda.fill = relleno
+        celda.border = _borde()
+        celda.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    return 8
+
+
+def valores_fila(i):
+    return [i + 1, '05/03/2024', f'Asistente de prueba {i}', str(10000000 + i), 'Femenino',
+            '29-59', 'Comuna 1', '3000000000', f'asistente{i}@correo.com', 'Juventud', '']
+
+
+def exportar_anterior(filas):
+    """Exportación anterior: libro completo en memoria, encabezado celda a celda"""
+    wb = Workbook()
+    ws = wb.active
+    fila_inicio = encabezado_anterior(ws, ACTIVIDAD) + 1
+    borde = Border(left=Side(style='thin'), right=Side(style='thin'),
+                   top=Side(style='thin'), bottom=Side(style='thin'))
+    for i in range(filas):
+        for columna, valor in enumerate(valores_fila(i), 1):
+            celda = ws.cell(row=fila_inicio + i, column=columna, value=valor)
+            celda.border = borde
+    salida = io.BytesIO()
+    wb.save(salida)
+    return len(salida.getvalue())
+
+
+def exportar_plantilla(filas):
+    """Exportación con la plantilla precompilada y la hoja en flujo"""
+    hoja = HojaAsistencia('Asistencia', PLANTILLA_ACTIVIDAD)
+    hoja.encabezado(ACTIVIDAD)
+    hoja.encabezados_tabla(ENCABEZADOS)
+    for i in range(filas):
+        hoja.agregar_fila(valores_fila(i), estilo='asistencia_celda')
+    archivo = hoja.guardar()
+    tamano = len(archivo.read())
+    archivo.close()
+    return tamano
+
+
+def medir(exportar, filas, repeticiones):
+    """Tiempo medio de CPU por exportación (ms) y tamaño del archivo (KB)"""
+    tamano = exportar(filas)  # Calentamiento (en la plantilla, carga del logo)
+    inicio = time.process_time()
+    for _ in range(repeticiones):
+        exportar(filas)
+    return (time.process_time() - inicio) * 1000 / repeticiones, tamano / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=50)
+    parser.add_argument('--repeticiones', type=int, default=200)
+    args = parser.parse_args()
+
+    if not logo_asistencia():
+        print(f"Aviso: no se encontró el logo en {RUTA_LOGO}; se mide sin imagen")
+
+    print(f"{'variante':<10} {'CPU/exportación':>16} {'archivo':>10}")
+    resultados = {}
+    for nombre, exportar in (('anterior', exportar_anterior), ('plantilla', exportar_plantilla)):
+        cpu_ms, tamano_kb = medir(exportar, args.filas, args.repeticiones)
+        resultados[nombre] = cpu_ms
+        print(f"{nombre:<10} {cpu_ms:>14.2f}ms {tamano_kb:>8.1f}KB")
+    ahorro = resultados['anterior'] - resultados['plantilla']
+    print(f"\nAhorro: {ahorro:.2f}ms de CPU por exportación "
+          f"({ahorro * 100 / resultados['anterior']:.0f}%) con {args.filas} filas")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+"""
+Benchmark de la escritura en flujo de las hojas de asistencia
+
+Compara, para distintos números de asistentes con firma:
+  - anterior: libro completo en memoria (Workbook normal de openpyxl), celdas con
+    estilo propio, imágenes ancladas y guardado en NamedTemporaryFile(delete=False)
+    que luego se envía con send_file (el archivo no se borraba),
+  - flujo: HojaAsistencia (modo write_only: cada fila se vuelca a disco al
+    agregarla), guardado en un SpooledTemporaryFile y enviado por bloques con
+    respuesta_archivo_en_flujo, que lo cierra al cerrar la respuesta.
+
+Para cada caso registra el pico de memoria residente (RSS), el tiempo total y
+los archivos que quedan en el directorio temporal. Cada medición se ejecuta en
+un proceso aparte para que el pico de RSS de una no contamine a la otra.
+
+Uso:
+    python tests/benchmark_hoja_en_flujo.py [--asistentes 1000 5000] [--variantes anterior flujo]
+
+No necesita base de datos.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+from app.models.miniatura_firma import generar_miniatura
+from app.utils.exportacion import respuesta_archivo_en_flujo
+from app.utils.hoja_asistencia import PLANTILLA_REUNION, HojaAsistencia
+
+ENCABEZADOS = ['NOMBRE COMPLETO', '', 'CÉDULA', 'DEPENDENCIA', 'CARGO', 'TIPO PARTICIPACIÓN',
+               'TELÉFONO', 'EMAIL', 'FIRMA']
+REUNION = {'tema': 'Reunión de seguimiento', 'dependencia': 'Secretaría de Inclusión', 'objetivo': 'Seguimiento'}
+
+
+def miniaturas(total):
+    """Miniaturas de firma distintas (una cada diez asistentes sin firma)"""
+    from PIL import Image, ImageDraw
+
+    resultado = []
+    for i in range(total):
+        if i % 10 == 0:
+            resultado.append(None)
+            continue
+        imagen = Image.new('RGB', (600, 200), 'white')
+        ImageDraw.Draw(imagen).line([(20, 150), (200 + i % 300, 40), (580, 120)], fill='black', width=6)
+        salida = io.BytesIO()
+        imagen.save(salida, format='PNG')
+        resultado.append(generar_miniatura(salida.getvalue()))
+    return resultado
+
+
+def valores(i):
+    return [f'Asistente de prueba {i}', '', str(10000000 + i), 'Secretaría de Inclusión', 'Profesional',
+            'Presencial', '3000000000', f'asistente{i}@correo.com']
+
+
+def exportar_anterior(firmas):
+    """Libro completo en memoria y archivo temporal que no se borra"""
+    from flask import Flask, send_file
+    from openpyxl import Workbook
+    from openpyxl.drawing.image import Image as XLImage
+    from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+    wb = Workbook()
+    ws = wb.active
+    borde = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
+    for columna, encabezado in enumerate(ENCABEZADOS, 1):
+        celda = ws.cell(row=8, column=columna, value=encabezado)
+        celda.font = Font(bold=True, color="FFFFFF")
+        celda.fill = PatternFill(start_color="4F81BD", end_color="4F81BD", fill_type="solid")
+        celda.border = borde
+        celda.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
+    for fila, firma in enumerate(firmas, 9):
+        for columna, valor in enumerate(valores(fila), 1):
+            ws.cell(row=fila, column=columna, value=valor).border = borde
+        ws.merged_cells.ranges.add(f'A{fila}:B{fila}')
+        if firma:
+            ws.add_image(XLImage(io.BytesIO(firma)), f'I{fila}')
+            ws.row_dimensions[fila].height = 32
+        else:
+            ws.cell(row=fila, column=9, value='Sin firma').border = borde
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp:
+        wb.save(tmp.name)
+    with Flask(__name__).test_request_context():
+        respuesta = send_file(tmp.name, as_attachment=True, download_name='asistencia.xlsx')
+        respuesta.direct_passthrough = False
+        tamano = sum(len(bloque) for bloque in respuesta.iter_encoded())
+        respuesta.close()
+    return tamano
+
+
+def exportar_flujo(firmas):
+    """Hoja en flujo y archivo temporal que se cierra con la respuesta"""
+    hoja = HojaAsistencia('Asistencia Reunión', PLANTILLA_REUNION)
+    fila = hoja.encabezado(REUNION)
+    hoja.encabezados_tabla(ENCABEZADOS)
+    hoja.combinar(fila, 1, fila, 2)
+    for numero, firma in enumerate(firmas):
+        fila = hoja.agregar_fila(valores(numero) + [None if firma else 'Sin firma'],
+                                 estilo='asistencia_celda', alto=32 if firma else None)
+        hoja.combinar(fila, 1, fila, 2)
+        if firma:
+            hoja.agregar_imagen(firma, f'I{fila}')
+    respuesta = respuesta_archivo_en_flujo(hoja.guardar(), 'asistencia.xlsx')
+    tamano = sum(len(bloque) for bloque in respuesta.iter_encoded())
+    respuesta.close()
+    return tamano
+
+
+def medir(variante, total):
+    """Ejecutar una exportación (en este proceso) y devolver sus métricas"""
+    firmas = miniaturas(total)
+    exportar = exportar_anterior if variante == 'anterior' else exportar_flujo
+    temporales = set(glob.glob(os.path.join(tempfile.gettempdir(), '*')))
+
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    tamano = exportar(firmas)
+    total_s = time.perf_counter() - inicio
+
+    restantes = set(glob.glob(os.path.join(tempfile.gettempdir(), '*'))) - temporales
+    for ruta in restantes:
+        os.remove(ruta)
+    return {
+        'rss_inicial_mb': rss_inicial / 1024,
+        'rss_pico_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'total_s': total_s,
+        'tamano_mb': tamano / (1024 * 1024),
+        'temporales': len(restantes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--asistentes', type=int, nargs='+', default=[1000, 5000])
+    parser.add_argument('--variantes', nargs='+', choices=['anterior', 'flujo'], default=['anterior', 'flujo'])
+    # Uso interno: ejecutar una sola medición en un proceso hijo
+    parser.add_argument('--medir', nargs=2, metavar=('VARIANTE', 'ASISTENTES'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        variante, total = args.medir
+        print(json.dumps(medir(variante, int(total))))
+        return
+
+    print(f"{'asistentes':>10} {'variante':<9} {'RSS pico':>10} {'(+inicial)':>11} "
+          f"{'total':>8} {'archivo':>9} {'temporales':>11}")
+    for total in args.asistentes:
+        for variante in args.variantes:
+            salida = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--medir', variante, str(total)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            m = json.loads(salida.strip().splitlines()[-1])
+            print(f"{total:>10} {variante:<9} {m['rss_pico_mb']:>8.1f}MB "
+                  f"{m['rss_pico_mb'] - m['rss_inicial_mb']:>+9.1f}MB "
+                  f"{m['total_s']:>7.2f}s {m['tamano_mb']:>7.1f}MB {m['temporales']:>11}")
+
+
+if __name__ == '__main__':
+    main()
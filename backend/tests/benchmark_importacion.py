@@ -0,0 +1,129 @@
+"""
+Benchmark de la importación masiva de beneficiarios
+
+Genera un archivo de beneficiarios (CSV o XLSX) con el número de filas indicado,
+una parte con errores y otra con documentos ya registrados, y lo importa con
+el mismo proceso que usa POST /importaciones. Muestra el tiempo total, las
+filas por segundo y el pico de memoria del proceso.
+
+Uso:
+    python tests/benchmark_importacion.py [--filas 200000] [--formato csv] [--procesos 4] [--bloque 2000]
+
+Se usa una base de datos aparte (<DATABASE_NAME>_benchmark) que se elimina al terminar.
+"""
+from pymongo import MongoClient
+import argparse
+import csv
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+# Importar configuración
+from config import get_config
+
+# Obtener configuración
+config = get_config()
+
+NOMBRE_DB = f"{config.DATABASE_NAME}_benchmark"
+
+# La aplicación se conecta a la base de datos del benchmark
+os.environ['MONGODB_URI'] = config.MONGO_URI
+os.environ['MONGODB_NAME'] = NOMBRE_DB
+
+ENCABEZADOS = [
+    'Nombre Completo', 'Tipo Documento', 'Número Documento', 'Género', 'Rango Edad', 'Número Celular',
+    'Comuna', 'Barrio', 'Sabe Leer', 'Sabe Escribir', 'Estudia Actualmente', 'Nivel Educativo'
+]
+
+
+def filas_de_prueba(total):
+    """Filas del archivo: ~1% con errores y ~5% con documentos repetidos de filas anteriores"""
+    for i in range(total):
+        documento = str(10000000 + (random.randrange(i) if i and random.random() < 0.05 else i))
+        con_error = random.random() < 0.01
+        yield [
+            f'Beneficiario {i}', 'Cédula de ciudadanía', documento,
+            random.choice(['Masculino', 'Femenino']), random.choice(['18-28', '29-59', '60+']),
+            3000000000 + i, f'Comuna {random.randint(1, 6)}', f'Barrio {random.randint(1, 40)}',
+            'Sí', 'tal vez' if con_error else random.choice(['Sí', 'No']), random.choice(['Sí', 'No']), 'Secundaria'
+        ]
+
+
+def generar_archivo(ruta, formato, total):
+    """Escribir el archivo de prueba sin tenerlo entero en memoria"""
+    if formato == 'xlsx':
+        from openpyxl import Workbook
+
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet()
+        hoja.append(ENCABEZADOS)
+        for fila in filas_de_prueba(total):
+            hoja.append(fila)
+        libro.save(ruta)
+    else:
+        with open(ruta, 'w', newline='', encoding='utf-8') as archivo:
+            escritor = csv.writer(archivo)
+            escritor.writerow(ENCABEZADOS)
+            escritor.writerows(filas_de_prueba(total))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=200000)
+    parser.add_argument('--formato', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--procesos', type=int, default=None, help='Procesos de validación (por defecto, uno por CPU)')
+    parser.add_argument('--bloque', type=int, default=2000, help='Filas por bloque de validación y escritura')
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.models.trabajo_importacion import TrabajoImportacionModel
+    from app.utils.importacion import ejecutar_importacion
+
+    client = MongoClient(config.MONGO_URI)
+    db = client[NOMBRE_DB]
+    directorio = tempfile.mkdtemp(prefix='sics_benchmark_importacion_')
+
+    try:
+        app = create_app()
+        app.config['IMPORTACIONES_DIR'] = directorio
+        app.config['IMPORTACIONES_PROCESOS'] = args.procesos
+        app.config['IMPORTACIONES_TAMANO_BLOQUE'] = args.bloque
+
+        ruta = os.path.join(directorio, f'beneficiarios.{args.formato}')
+        inicio = time.perf_counter()
+        generar_archivo(ruta, args.formato, args.filas)
+        print(f"Archivo de {args.filas} filas ({os.path.getsize(ruta) / 1024 / 1024:.1f} MB) "
+              f"generado en {time.perf_counter() - inicio:.1f} s")
+
+        trabajo_id = TrabajoImportacionModel(db).crear(
+            'benchmark', 'beneficiarios', ruta, os.path.basename(ruta), args.formato,
+            {'funcionario_id': 'benchmark', 'funcionario_nombre': 'Benchmark',
+             'linea_trabajo': 'benchmark', 'fecha_registro': '2024-06-01T00:00:00'}
+        )
+
+        inicio = time.perf_counter()
+        ejecutar_importacion(app, trabajo_id)
+        segundos = time.perf_counter() - inicio
+
+        trabajo = TrabajoImportacionModel(db).obtener(trabajo_id)
+        pico_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"\nEstado: {trabajo['estado']} {trabajo.get('error') or ''}")
+        print(f"Progreso: {trabajo['progreso']}")
+        print(f"Tiempo: {segundos:.1f} s   {args.filas / segundos:.0f} filas/s   "
+              f"pico de memoria del proceso principal: {pico_mb:.0f} MB")
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+        client.drop_database(NOMBRE_DB)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark de paginación del listado de beneficiarios
+
+Compara la paginación por número de página (sort + skip + limit, como en
+/beneficiarios/listar sin cursor) con la paginación por cursor sobre
+(fecha_registro, _id), en la página 1 y en la página 5.000.
+
+Uso:
+    python tests/benchmark_paginacion.py [--por-pagina 20] [--pagina 5000] [--repeticiones 10]
+
+Se usa una base de datos aparte (<DATABASE_NAME>_benchmark) que se elimina al terminar.
+"""
+from pymongo import MongoClient, DESCENDING
+from datetime import datetime, timedelta
+import argparse
+import random
+import statistics
+import time
+import os
+import sys
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+# Importar configuración
+from config import get_config
+from app.utils.paginacion import codificar_cursor, filtro_despues_de_cursor
+
+# Obtener configuración
+config = get_config()
+
+ORDEN = [('fecha_registro', DESCENDING), ('_id', DESCENDING)]
+
+
+def sembrar_beneficiarios(coleccion, total):
+    """Insertar beneficiarios sintéticos con fechas de registro repartidas en dos años"""
+    inicio = datetime(2024, 1, 1)
+    lote = []
+    for i in range(total):
+        lote.append({
+            'nombre_completo': f'Beneficiario {i}',
+            'numero_documento': str(10000000 + i),
+            'fecha_registro': inicio + timedelta(minutes=random.randint(0, 60 * 24 * 730))
+        })
+        if len(lote) == 10000:
+            coleccion.insert_many(lote)
+            lote = []
+    if lote:
+        coleccion.insert_many(lote)
+    coleccion.create_index(ORDEN)
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--por-pagina', type=int, default=20)
+    parser.add_argument('--pagina', type=int, default=5000)
+    parser.add_argument('--repeticiones', type=int, default=10)
+    args = parser.parse_args()
+
+    total = args.por_pagina * (args.pagina + 10)
+    client = MongoClient(config.MONGO_URI)
+    nombre_db = f"{config.DATABASE_NAME}_benchmark"
+    coleccion = client[nombre_db]['beneficiarios']
+
+    try:
+        print(f"Sembrando {total} beneficiarios en {nombre_db}...")
+        sembrar_beneficiarios(coleccion, total)
+
+        def pagina_skip(pagina):
+            return list(coleccion.find({}).sort(ORDEN)
+                        .skip((pagina - 1) * args.por_pagina).limit(args.por_pagina))
+
+        def pagina_cursor(cursor):
+            consulta = filtro_despues_de_cursor(cursor) if cursor else {}
+            return list(coleccion.find(consulta).sort(ORDEN).limit(args.por_pagina + 1))
+
+        # Cursor que apunta al final de la página anterior a la solicitada
+        anterior = pagina_skip(args.pagina - 1)[-1]
+        cursor_profundo = codificar_cursor(anterior)
+
+        # Ambas estrategias deben devolver la misma página
+        assert [d['_id'] for d in pagina_skip(args.pagina)] == \
+            [d['_id'] for d in pagina_cursor(cursor_profundo)[:args.por_pagina]]
+
+        resultados = [
+            ('skip, página 1', medir(lambda: pagina_skip(1), args.repeticiones)),
+            (f'skip, página {args.pagina}', medir(lambda: pagina_skip(args.pagina), args.repeticiones)),
+            ('cursor, página 1', medir(lambda: pagina_cursor(''), args.repeticiones)),
+            (f'cursor, página {args.pagina}', medir(lambda: pagina_cursor(cursor_profundo), args.repeticiones)),
+        ]
+        for nombre, mediana in resultados:
+            print(f"{nombre:<24} mediana: {mediana:>8.2f} ms")
+    finally:
+        client.drop_database(nombre_db)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark del tamaño de respuesta del listado de beneficiarios
+
+Compara, para una página del listado, el tamaño del JSON y el tiempo de lectura:
+  - documento completo (comportamiento anterior, con la firma en base64 y los
+    datos biométricos),
+  - proyección por defecto (sin campos pesados),
+  - fieldset parcial (?fields=nombre_completo,numero_documento,comuna).
+
+Uso:
+    python tests/benchmark_proyeccion.py [--total 2000] [--por-pagina 10 50 100] [--kb-firma 40]
+
+Se usa una base de datos aparte (<DATABASE_NAME>_benchmark) que se elimina al terminar.
+"""
+from pymongo import MongoClient
+from datetime import datetime, timedelta
+from bson import json_util
+import argparse
+import base64
+import os
+import random
+import statistics
+import sys
+import time
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+# Importar configuración
+from config import get_config
+from app.models.beneficiario import proyeccion_beneficiario
+
+# Obtener configuración
+config = get_config()
+
+ORDEN = [('fecha_registro', -1), ('_id', -1)]
+
+
+def sembrar_beneficiarios(coleccion, total, kb_firma):
+    """Insertar beneficiarios con una firma base64 del tamaño indicado"""
+    inicio = datetime(2024, 1, 1)
+    lote = []
+    for i in range(total):
+        firma = base64.b64encode(b'\x89PNG\r\n\x1a\n' + os.urandom(kb_firma * 768)).decode('ascii')
+        lote.append({
+            'nombre_completo': f'Beneficiario {i}',
+            'numero_documento': str(10000000 + i),
+            'tipo_documento': 'Cédula de ciudadanía',
+            'genero': random.choice(['Masculino', 'Femenino']),
+            'rango_edad': random.choice(['18-28', '29-59', '60+']),
+            'comuna': f'Comuna {random.randint(1, 6)}',
+            'barrio': f'Barrio {random.randint(1, 40)}',
+            'numero_celular': '3000000000',
+            'linea_trabajo': 'benchmark',
+            'fecha_registro': inicio + timedelta(minutes=i),
+            'firma': f'data:image/png;base64,{firma}',
+            'verificacion_biometrica': {
+                'credential_id': base64.b64encode(os.urandom(64)).decode('ascii'),
+                'public_key': base64.b64encode(os.urandom(256)).decode('ascii'),
+                'tipo_verificacion': 'firma_digital',
+                'estado': 'verificado',
+            },
+        })
+        if len(lote) == 500:
+            coleccion.insert_many(lote)
+            lote = []
+    if lote:
+        coleccion.insert_many(lote)
+    coleccion.create_index(ORDEN)
+
+
+def medir_pagina(coleccion, proyeccion, por_pagina, repeticiones=10):
+    """Leer la primera página y devolver (bytes del JSON, mediana en ms)"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        pagina = list(coleccion.find({}, proyeccion).sort(ORDEN).limit(por_pagina))
+        cuerpo = json_util.dumps({'beneficiarios': pagina})
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return len(cuerpo.encode('utf-8')), statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--total', type=int, default=2000)
+    parser.add_argument('--por-pagina', type=int, nargs='+', default=[10, 50, 100])
+    parser.add_argument('--kb-firma', type=int, default=40, help='Tamaño aproximado de la firma en KB (base64)')
+    args = parser.parse_args()
+
+    client = MongoClient(config.MONGO_URI)
+    nombre_db = f"{config.DATABASE_NAME}_benchmark"
+    coleccion = client[nombre_db]['beneficiarios']
+
+    variantes = [
+        ('documento completo', None),
+        ('proyección por defecto', proyeccion_beneficiario()),
+        ('fields=nombre,documento,comuna', proyeccion_beneficiario(['nombre_completo', 'numero_documento', 'comuna'])),
+    ]
+
+    try:
+        print(f"Sembrando {args.total} beneficiarios con firmas de ~{args.kb_firma} KB en {nombre_db}...")
+        sembrar_beneficiarios(coleccion, args.total, args.kb_firma)
+
+        for por_pagina in args.por_pagina:
+            print(f"\nPágina de {por_pagina} beneficiarios")
+            for nombre, proyeccion in variantes:
+                tamano, mediana = medir_pagina(coleccion, proyeccion, por_pagina)
+                print(f"  {nombre:<32} {tamano / 1024:>10.1f} KB   mediana: {mediana:>7.2f} ms")
+    finally:
+        client.drop_database(nombre_db)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark del registro de beneficiarios: uno por solicitud frente a lotes
+
+Registra el mismo número de beneficiarios a través de la API de dos formas:
+  - POST /beneficiarios/registrar, una solicitud por beneficiario,
+  - POST /beneficiarios/registrar-lote, en lotes del tamaño indicado,
+y muestra los registros por segundo de cada una.
+
+Uso:
+    python tests/benchmark_registro_lote.py [--total 2000] [--lote 50 200 500]
+
+Se usa una base de datos aparte (<DATABASE_NAME>_benchmark) que se elimina al terminar.
+"""
+from pymongo import MongoClient
+import argparse
+import base64
+import os
+import random
+import sys
+import time
+
+# Obtener la ruta del directorio del proyecto
+proyecto_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, proyecto_dir)
+
+# Importar configuración
+from config import get_config
+
+# Obtener configuración
+config = get_config()
+
+NOMBRE_DB = f"{config.DATABASE_NAME}_benchmark"
+
+# La aplicación se conecta a la base de datos del benchmark
+os.environ['MONGODB_URI'] = config.MONGO_URI
+os.environ['MONGODB_NAME'] = NOMBRE_DB
+
+from app import create_app
+from flask_jwt_extended import create_access_token
+
+
+def beneficiario(numero, funcionario_id):
+    """Formulario de registro como lo envía el frontend"""
+    return {
+        'funcionario_id': funcionario_id,
+        'funcionario_nombre': 'Funcionario benchmark',
+        'linea_trabajo': 'benchmark',
+        'fecha_registro': '2024-06-01T10:00:00',
+        'nombre_completo': f'Beneficiario {numero}',
+        'tipo_documento': 'Cédula de ciudadanía',
+        'numero_documento': str(10000000 + numero),
+        'genero': random.choice(['Masculino', 'Femenino']),
+        'rango_edad': random.choice(['18-28', '29-59', '60+']),
+        'sabe_leer': True,
+        'sabe_escribir': True,
+        'numero_celular': '3000000000',
+        'comuna': f'Comuna {random.randint(1, 6)}',
+        'barrio': f'Barrio {random.randint(1, 40)}',
+        'firma': 'data:image/png;base64,' + base64.b64encode(b'\x89PNG\r\n\x1a\n' + os.urandom(3 * 1024)).decode('ascii'),
+    }
+
+
+def medir_individual(cliente, cabeceras, registros):
+    """Registrar con una solicitud por beneficiario; devuelve segundos"""
+    inicio = time.perf_counter()
+    for registro in registros:
+        respuesta = cliente.post('/beneficiarios/registrar', json=registro, headers=cabeceras)
+        assert respuesta.status_code == 201, respuesta.get_json()
+    return time.perf_counter() - inicio
+
+
+def medir_lote(cliente, cabeceras, registros, tamano_lote):
+    """Registrar en lotes; devuelve segundos"""
+    inicio = time.perf_counter()
+    for desde in range(0, len(registros), tamano_lote):
+        respuesta = cliente.post('/beneficiarios/registrar-lote',
+                                 json={'beneficiarios': registros[desde:desde + tamano_lote]}, headers=cabeceras)
+        assert respuesta.status_code == 201, respuesta.get_json()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--total', type=int, default=2000)
+    parser.add_argument('--lote', type=int, nargs='+', default=[50, 200, 500])
+    args = parser.parse_args()
+
+    client = MongoClient(config.MONGO_URI)
+    db = client[NOMBRE_DB]
+
+    try:
+        app = create_app()
+        funcionario_id = str(db['funcionarios'].insert_one({
+            'nombre': 'Funcionario benchmark', 'email': 'benchmark@sics.local',
+            'rol': 'funcionario', 'estado': 'activo'
+        }).inserted_id)
+        with app.app_context():
+            cabeceras = {'Authorization': f'Bearer {create_access_token(identity=funcionario_id)}'}
+        cliente = app.test_client()
+
+        print(f"Registrando {args.total} beneficiarios en {NOMBRE_DB}\n")
+        variantes = [('una solicitud por registro', None)] + [(f'lotes de {n}', n) for n in args.lote]
+        siguiente = 0
+        for nombre, tamano_lote in variantes:
+            registros = [beneficiario(siguiente + i, funcionario_id) for i in range(args.total)]
+            siguiente += args.total
+            if tamano_lote is None:
+                segundos = medir_individual(cliente, cabeceras, registros)
+            else:
+                segundos = medir_lote(cliente, cabeceras, registros, tamano_lote)
+            print(f"  {nombre:<28} {segundos:>8.2f} s   {args.total / segundos:>9.0f} registros/s")
+    finally:
+        client.drop_database(NOMBRE_DB)
+        client.close()
+
+
+if __name__ == '__main__':
+    main()
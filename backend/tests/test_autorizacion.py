@@ -0,0 +1,41 @@
+import unittest
+
+from bson import ObjectId
+
+from app.utils.autorizacion import CacheFuncionarios, claims_funcionario
+
+
+class TestAutorizacion(unittest.TestCase):
+    def test_claims_funcionario(self):
+        linea = ObjectId()
+        self.assertEqual(
+            claims_funcionario({'rol': 'admin', 'linea_trabajo': linea, 'estado': 'Activo', 'nombre': 'Ana'}),
+            {'rol': 'admin', 'linea_trabajo': str(linea), 'estado': 'Activo'}
+        )
+        self.assertEqual(claims_funcionario({})['rol'], 'funcionario')
+
+    def test_cache_reutiliza_e_invalida(self):
+        cache = CacheFuncionarios(ttl=60)
+        claims = {'rol': 'admin', 'linea_trabajo': '', 'estado': 'Activo'}
+        cache.guardar('no-es-un-id', claims)
+        # Mientras la entrada está vigente no se consulta la base de datos
+        self.assertEqual(cache.obtener(None, 'no-es-un-id'), claims)
+
+        cache.invalidar('no-es-un-id')
+        # Un identificador que no es un ObjectId no corresponde a ningún funcionario
+        self.assertIsNone(cache.obtener(None, 'no-es-un-id'))
+
+    def test_cache_recuerda_tokens_revocados(self):
+        cache = CacheFuncionarios(ttl=60)
+        self.assertFalse(cache.revocado('jti-1'))
+        cache.revocar('jti-1')
+        self.assertTrue(cache.revocado('jti-1'))
+        self.assertFalse(cache.revocado('jti-2'))
+
+        vencida = CacheFuncionarios(ttl=0)
+        vencida.revocar('jti-1')
+        self.assertFalse(vencida.revocado('jti-1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
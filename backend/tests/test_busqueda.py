@@ -0,0 +1,52 @@
+import unittest
+
+from bson.regex import Regex
+
+from app.utils.busqueda import (
+    normalizar_texto, tokenizar, claves_busqueda, campos_busqueda, filtro_busqueda, documentos_exactos,
+    CAMPO_BUSQUEDA, CAMPO_AUTOCOMPLETAR, CAMPO_NOMBRE_ORDEN
+)
+
+
+class TestClavesBusqueda(unittest.TestCase):
+    def test_normalizar_quita_tildes_y_mayusculas(self):
+        self.assertEqual(normalizar_texto('José Peña ÁLVAREZ'), 'jose pena alvarez')
+        self.assertEqual(normalizar_texto(None), '')
+
+    def test_tokenizar_separa_por_signos(self):
+        self.assertEqual(tokenizar('Pérez-Gómez, María'), ['perez', 'gomez', 'maria'])
+
+    def test_claves_incluyen_documento_sin_separadores(self):
+        documento = {'nombre_completo': 'María Pérez', 'numero_documento': '1.234.567', 'comuna': None}
+        claves = claves_busqueda(documento, ('nombre_completo', 'numero_documento', 'comuna'))
+
+        self.assertEqual(claves, sorted(['maria', 'perez', '1', '234', '567', '1234567']))
+
+    def test_filtro_por_prefijo_anclado(self):
+        self.assertEqual(filtro_busqueda('  '), {})
+        self.assertEqual(filtro_busqueda('Pér'), {CAMPO_BUSQUEDA: Regex('^per')})
+
+        filtro = filtro_busqueda('maría mar')
+        self.assertEqual(filtro, {'$and': [{CAMPO_BUSQUEDA: Regex('^maria')}, {CAMPO_BUSQUEDA: Regex('^mar')}]})
+        self.assertEqual(filtro_busqueda('Pér', CAMPO_AUTOCOMPLETAR), {CAMPO_AUTOCOMPLETAR: Regex('^per')})
+
+    def test_campos_de_autocompletado_solo_nombre_y_documento(self):
+        beneficiario = {'nombre_completo': 'María  Pérez', 'numero_documento': '123',
+                        'funcionario_nombre': 'Luis Mina', 'barrio': 'Kennedy'}
+        campos = campos_busqueda(beneficiario, 'beneficiarios')
+
+        self.assertIn('kennedy', campos[CAMPO_BUSQUEDA])
+        self.assertEqual(campos[CAMPO_AUTOCOMPLETAR], ['123', 'maria', 'perez'])
+        self.assertEqual(campos[CAMPO_NOMBRE_ORDEN], 'maria perez')
+        # Las colecciones sin autocompletado propio solo guardan los términos de búsqueda
+        self.assertEqual(list(campos_busqueda({'nombre': 'Ana'}, 'asistentes')), [CAMPO_BUSQUEDA])
+
+    def test_documentos_exactos(self):
+        self.assertEqual(documentos_exactos(' 1.234.567 '), ['1.234.567', '1234567'])
+        self.assertEqual(documentos_exactos('1234567'), ['1234567'])
+        self.assertEqual(documentos_exactos('María 12'), [])
+        self.assertEqual(documentos_exactos(''), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
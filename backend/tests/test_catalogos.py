@@ -0,0 +1,29 @@
+import unittest
+
+from bson import ObjectId
+
+from app.utils.catalogos import Catalogo
+
+
+class TestCatalogos(unittest.TestCase):
+    def setUp(self):
+        self.linea_id = ObjectId()
+        self.catalogo = Catalogo([
+            {'_id': self.linea_id, 'nombre': 'Discapacidad'},
+            {'_id': ObjectId(), 'nombre': 'Juventud'},
+        ], version=3)
+
+    def test_busqueda_por_id_en_texto_u_objectid(self):
+        self.assertEqual(self.catalogo.obtener(self.linea_id)['nombre'], 'Discapacidad')
+        self.assertEqual(self.catalogo.obtener(str(self.linea_id))['nombre'], 'Discapacidad')
+        self.assertIsNone(self.catalogo.obtener(''))
+        self.assertIsNone(self.catalogo.obtener('no-es-un-id'))
+
+    def test_nombre_y_busqueda_por_nombre(self):
+        self.assertEqual(self.catalogo.nombre(str(self.linea_id)), 'Discapacidad')
+        self.assertEqual(self.catalogo.nombre(ObjectId(), 'Sin línea de trabajo'), 'Sin línea de trabajo')
+        self.assertEqual(self.catalogo.por_nombre['Juventud']['_id'], self.catalogo.documentos[1]['_id'])
+
+
+if __name__ == '__main__':
+    unittest.main()
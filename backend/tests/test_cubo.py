@@ -0,0 +1,118 @@
+import unittest
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+try:
+    import mongomock
+except ImportError:  # Sin mongomock no se pueden simular las escrituras concurrentes
+    mongomock = None
+
+from app.models.estadisticas import CuboBeneficiariosModel
+
+
+def beneficiario(minutos, comuna):
+    fecha = datetime(2024, 3, 1) + timedelta(minutes=minutos)
+    return {'_id': ObjectId.from_datetime(fecha), 'fecha_registro': fecha, 'comuna': comuna, 'genero': 'Femenino'}
+
+
+class CuboConCambios(CuboBeneficiariosModel):
+    """Cubo que ejecuta unos cambios justo antes del primer volcado (tras leer el lote)"""
+    TAMANO_LOTE = 2
+
+    def __init__(self, db, cambios):
+        super().__init__(db)
+        self.cambios = cambios
+
+    def _volcar(self, *args, **kwargs):
+        while self.cambios:
+            self.cambios.pop(0)()
+        super()._volcar(*args, **kwargs)
+
+
+@unittest.skipIf(mongomock is None, "mongomock no está instalado")
+class TestCuboBeneficiarios(unittest.TestCase):
+    def setUp(self):
+        self.db = mongomock.MongoClient().db
+        self.beneficiarios = self.db['beneficiarios']
+        self.beneficiarios.insert_many([beneficiario(i, f'Comuna {i}') for i in range(5)])
+        self.ids = [documento['_id'] for documento in self.beneficiarios.find().sort('_id', 1)]
+
+    def cambiar(self, indice, comuna):
+        """Actualizar un beneficiario como lo hacen las rutas (documento anterior y nuevo)"""
+        def cambio():
+            antes = self.beneficiarios.find_one({'_id': self.ids[indice]})
+            if comuna is None:
+                self.beneficiarios.delete_one({'_id': antes['_id']})
+                despues = None
+            else:
+                self.beneficiarios.update_one({'_id': antes['_id']}, {'$set': {'comuna': comuna}})
+                despues = self.beneficiarios.find_one({'_id': antes['_id']})
+            CuboBeneficiariosModel(self.db).aplicar_cambio(antes, despues)
+        return cambio
+
+    def comunas(self):
+        return {
+            celda['_id']['comuna']: celda['total']
+            for celda in self.db['cubo_beneficiarios'].find() if celda['total']
+        }
+
+    def test_cambios_durante_el_refresco(self):
+        # El primer lote (0 y 1) ya se leyó; 3 y 4 están en el lote siguiente
+        cubo = CuboConCambios(self.db, [
+            self.cambiar(0, 'Comuna 9'), self.cambiar(0, 'Comuna 8'),
+            self.cambiar(1, None), self.cambiar(3, 'Comuna 9'), self.cambiar(4, None),
+        ])
+        cubo.refrescar()
+        self.assertEqual(self.comunas(), {'Comuna 8': 1, 'Comuna 2': 1, 'Comuna 9': 1})
+        self.assertNotIn('pendientes', self.db['estadisticas_materializadas'].find_one())
+
+        # Después del refresco los cambios se aplican como deltas
+        self.cambiar(2, 'Comuna 8')()
+        self.assertEqual(self.comunas(), {'Comuna 8': 2, 'Comuna 9': 1})
+
+    def test_cambio_sin_refresco_en_curso(self):
+        self.cambiar(0, 'Comuna 9')()
+        CuboBeneficiariosModel(self.db).refrescar()
+        self.assertEqual(self.comunas()['Comuna 9'], 1)
+        self.assertNotIn('Comuna 0', self.comunas())
+
+    def test_reconstruir_con_cambios_durante_la_reconstruccion(self):
+        CuboBeneficiariosModel(self.db).refrescar()
+        previo = self.comunas()
+
+        def cubo_en_uso():
+            # El dashboard sigue viendo el cubo anterior completo durante la reconstrucción
+            self.assertEqual(self.comunas(), previo)
+
+        # Los cambios de 0 y 1 llegan tras volcar su lote, los de 3 y 4 antes
+        cubo = CuboConCambios(self.db, [
+            cubo_en_uso, self.cambiar(3, 'Comuna 9'), self.cambiar(4, None)
+        ])
+        original = cubo._volcar
+
+        def volcar(*args, **kwargs):
+            original(*args, **kwargs)
+            if args[2] == self.ids[1]:
+                cubo.cambios.extend([self.cambiar(0, 'Comuna 8'), self.cambiar(1, None)])
+        cubo._volcar = volcar
+
+        self.assertEqual(cubo.reconstruir(), 5)
+        self.assertEqual(self.comunas(), {'Comuna 8': 1, 'Comuna 2': 1, 'Comuna 9': 1})
+        estado = self.db['estadisticas_materializadas'].find_one()
+        self.assertEqual(estado['ultimo_id'], self.ids[4])
+        self.assertNotIn('reconstruyendo', estado)
+        self.assertNotIn('cubo_beneficiarios_nuevo', self.db.list_collection_names())
+
+        # Después de la reconstrucción los cambios vuelven a aplicarse como deltas
+        self.cambiar(2, 'Comuna 8')()
+        self.assertEqual(self.comunas(), {'Comuna 8': 2, 'Comuna 9': 1})
+
+    def test_reconstruir_con_refresco_en_curso(self):
+        cubo = CuboBeneficiariosModel(self.db)
+        self.assertTrue(cubo._tomar_bloqueo())
+        self.assertIsNone(cubo.reconstruir())
+
+
+if __name__ == '__main__':
+    unittest.main()
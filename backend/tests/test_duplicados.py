@@ -0,0 +1,72 @@
+import unittest
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+try:
+    import mongomock
+except ImportError:  # La detección contra la colección necesita mongomock
+    mongomock = None
+
+from app.models.duplicados import DuplicadosModel
+from app.utils.duplicados import claves_bloqueo, palabras_nombre, puntuar, UMBRAL_DUPLICADO
+
+
+class TestDuplicados(unittest.TestCase):
+    def test_palabras_nombre(self):
+        self.assertEqual(palabras_nombre('María de los Ángeles  Peña'), ['angeles', 'maria', 'pena'])
+
+    def test_claves_bloqueo_toleran_errores(self):
+        original = set(claves_bloqueo('María José Rodríguez', '1.087.654.321'))
+        # Error en una palabra: se conservan los pares que no la incluyen
+        self.assertTrue(original & set(claves_bloqueo('Maria Jose Rodrigues', '99')))
+        # Error al final de dos palabras: se conservan los prefijos
+        self.assertIn('p:mar|rod', set(claves_bloqueo('Mariah Rodrigues', None)))
+        self.assertIn('p:mar|rod', original)
+        # Un dígito equivocado al inicio deja igual el final del documento
+        self.assertTrue(original & set(claves_bloqueo('Otra Persona', '2087654321')))
+
+    def test_claves_bloqueo_vacias(self):
+        self.assertEqual(claves_bloqueo('', None), [])
+        self.assertEqual(claves_bloqueo('Ana', '12'), ['n:ana'])
+
+    def test_puntuar(self):
+        puntaje, detalle = puntuar({'nombre': 'Rodríguez Pérez María', 'documento': '1.087.654.321'},
+                                   {'nombre': 'maria rodriguez perez', 'documento': '1087654321'})
+        self.assertEqual(puntaje, 1.0)
+        self.assertEqual(detalle, {'nombre': 1.0, 'documento': 1.0})
+
+        puntaje, _ = puntuar({'nombre': 'Luis Alberto Mina', 'documento': '94123456'},
+                             {'nombre': 'Luis Alberto Mína', 'documento': '94123465'})
+        self.assertGreaterEqual(puntaje, UMBRAL_DUPLICADO)
+
+        puntaje, _ = puntuar({'nombre': 'Luis Alberto Mina', 'documento': '94123456'},
+                             {'nombre': 'Luis Carlos Mina', 'documento': '31555444'})
+        self.assertLess(puntaje, UMBRAL_DUPLICADO)
+
+        # Sin documento en alguno de los dos solo cuenta el nombre
+        _, detalle = puntuar({'nombre': 'Ana Caicedo'}, {'nombre': 'Ana Caicedo', 'documento': '1'})
+        self.assertIsNone(detalle['documento'])
+
+
+@unittest.skipIf(mongomock is None, "mongomock no está instalado")
+class TestDetectarDuplicados(unittest.TestCase):
+    def test_respeta_el_margen_de_insercion(self):
+        db = mongomock.MongoClient().db
+        hace_una_hora = ObjectId.from_datetime(datetime.utcnow() - timedelta(hours=1))
+        db['beneficiarios'].insert_one({'_id': hace_una_hora, 'nombre_completo': 'Ana Mina', 'numero_documento': '1'})
+        # Registro recién creado: una inserción con _id anterior puede estar aún en curso
+        db['beneficiarios'].insert_one({'nombre_completo': 'Ana Mina', 'numero_documento': '1'})
+
+        detector = DuplicadosModel(db)
+        self.assertEqual(detector.detectar()['registros'], 1)
+        self.assertEqual(db['duplicados_estado'].find_one({'_id': 'beneficiarios'})['ultimo_id'], hace_una_hora)
+
+        # Sin margen (el límite se redondea al segundo, por eso uno negativo)
+        detector.MARGEN_INSERCION = timedelta(seconds=-2)
+        resumen = detector.detectar()
+        self.assertEqual((resumen['registros'], resumen['candidatos']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
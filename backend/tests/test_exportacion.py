@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+import tempfile
+import unittest
+from datetime import datetime
+
+from bson import ObjectId
+from openpyxl import load_workbook
+
+from app.models.beneficiario import COLUMNAS_EXPORTACION, fila_exportacion
+from app.utils.exportacion import (
+    columna_excel, generar_xlsx, generar_csv, generar_ndjson, generar_lineas_json, generar_parquet,
+    leer_formato, respuesta_archivo_en_flujo, PARQUET_DISPONIBLE
+)
+
+DOCUMENTOS = [
+    {'_id': ObjectId(), 'nombre': 'Ana, "la" Peña', 'fecha': datetime(2024, 5, 2), 'activo': True, 'edad': 30},
+    {'_id': ObjectId(), 'nombre': 'Luis', 'activo': False, 'edad': '41'},
+]
+
+
+class TestExportacion(unittest.TestCase):
+    def test_columna_excel(self):
+        self.assertEqual([columna_excel(i) for i in (0, 25, 26, 51, 701, 702)],
+                         ['A', 'Z', 'AA', 'AZ', 'ZZ', 'AAA'])
+
+    def test_generar_xlsx_por_bloques(self):
+        filas = ([f'Nombre {i} <&>', i, None, 'Sí'] for i in range(2000))
+        bloques = list(generar_xlsx(['Nombre', 'Número', 'Vacío', 'Activo'], filas,
+                                    nombre_hoja='Prueba', tamano_bloque=1024))
+        self.assertGreater(len(bloques), 1)
+
+        hoja = load_workbook(io.BytesIO(b''.join(bloques)))['Prueba']
+        self.assertEqual(hoja.max_row, 2001)
+        self.assertEqual([celda.value for celda in hoja[1]], ['Nombre', 'Número', 'Vacío', 'Activo'])
+        self.assertTrue(hoja['A1'].font.b)
+        self.assertEqual([celda.value for celda in hoja[2001]], ['Nombre 1999 <&>', 1999, None, 'Sí'])
+
+    def test_generar_xlsx_omite_caracteres_de_control(self):
+        contenido = b''.join(generar_xlsx(['Texto'], [[' con\x01 espacios ']]))
+        hoja = load_workbook(io.BytesIO(contenido)).active
+        self.assertEqual(hoja['A2'].value, ' con espacios ')
+
+    def test_generar_xlsx_deja_vacios_nan_e_infinitos(self):
+        contenido = b''.join(generar_xlsx(['A', 'B', 'C', 'D'], [[float('nan'), float('inf'), float('-inf'), 1.5]]))
+        hoja = load_workbook(io.BytesIO(contenido)).active
+        self.assertEqual([celda.value for celda in hoja[2]], [None, None, None, 1.5])
+
+    def test_fila_exportacion_beneficiario(self):
+        fila = fila_exportacion({
+            'nombre_completo': 'Ana Peña',
+            'fecha_registro': datetime(2024, 5, 2, 10, 30),
+            'victima_conflicto': True
+        })
+        self.assertEqual(len(fila), len(COLUMNAS_EXPORTACION))
+        self.assertEqual(fila[0], 'Ana Peña')
+        self.assertEqual(fila[5], 'No registrado')
+        self.assertEqual(fila[10], '2024-05-02')
+        self.assertEqual(fila[14], 'Sí')
+        self.assertEqual(fila_exportacion({'fecha_registro': '2024-05-02T10:30:00'})[10], '2024-05-02')
+
+    def test_leer_formato(self):
+        self.assertEqual(leer_formato(None), 'xlsx')
+        self.assertEqual(leer_formato(' CSV '), 'csv')
+        with self.assertRaises(ValueError):
+            leer_formato('xml')
+
+    def test_generar_csv(self):
+        contenido = b''.join(generar_csv(['_id', 'nombre', 'fecha', 'activo'], DOCUMENTOS, tamano_bloque=10))
+        filas = list(csv.reader(io.StringIO(contenido.decode('utf-8'))))
+        self.assertEqual(filas[0], ['_id', 'nombre', 'fecha', 'activo'])
+        self.assertEqual(filas[1], [str(DOCUMENTOS[0]['_id']), 'Ana, "la" Peña', '2024-05-02T00:00:00', 'True'])
+        self.assertEqual(filas[2][2], '')
+
+    def test_generar_ndjson(self):
+        bloques = list(generar_ndjson(['nombre', 'fecha'], DOCUMENTOS, tamano_bloque=10))
+        lineas = b''.join(bloques).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(linea) for linea in lineas], [
+            {'nombre': 'Ana, "la" Peña', 'fecha': '2024-05-02T00:00:00'},
+            {'nombre': 'Luis', 'fecha': None},
+        ])
+
+    def test_generar_lineas_json_consume_por_bloques(self):
+        leidos = []
+
+        def documentos():
+            for i in range(10):
+                leidos.append(i)
+                yield {'n': i}
+
+        bloques = generar_lineas_json(documentos(), tamano_bloque=20)
+        primero = next(bloques)
+        # El primer bloque sale sin haber recorrido todos los documentos
+        self.assertLess(len(leidos), 10)
+        lineas = (primero + b''.join(bloques)).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(linea)['n'] for linea in lineas], list(range(10)))
+
+    @unittest.skipUnless(PARQUET_DISPONIBLE, "pyarrow no está instalado")
+    def test_generar_parquet_por_grupos(self):
+        import pyarrow.parquet as pq
+
+        documentos = [{'nombre': f'Persona {i}', 'activo': i % 2 == 0, 'edad': i} for i in range(25)]
+        contenido = b''.join(generar_parquet(['nombre', 'activo', 'edad'], documentos,
+                                             tipos={'activo': 'bool', 'edad': 'int'}, tamano_grupo=10))
+        archivo = pq.ParquetFile(io.BytesIO(contenido))
+        self.assertEqual(archivo.num_row_groups, 3)
+        tabla = archivo.read()
+        self.assertEqual(tabla.num_rows, 25)
+        self.assertEqual(tabla.column('activo').to_pylist()[:2], [True, False])
+        self.assertEqual(tabla.column('edad').to_pylist()[-1], 24)
+
+    def test_respuesta_archivo_en_flujo_cierra_el_temporal(self):
+        archivo = tempfile.SpooledTemporaryFile(max_size=10)
+        archivo.write(b'x' * 100)
+        archivo.seek(0)
+
+        respuesta = respuesta_archivo_en_flujo(archivo, 'asistencia_reunión.xlsx', tamano_bloque=30)
+        self.assertEqual(respuesta.headers['Content-Length'], '100')
+        self.assertIn("filename*=UTF-8''asistencia_reuni%C3%B3n.xlsx", respuesta.headers['Content-Disposition'])
+        self.assertEqual([len(bloque) for bloque in respuesta.response], [30, 30, 30, 10])
+        self.assertFalse(archivo.closed)
+        respuesta.close()
+        self.assertTrue(archivo.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import base64
+import hashlib
+import unittest
+from io import BytesIO
+
+from PIL import Image
+
+from app.models.firma import decodificar_firma, hash_desde_url
+from app.models.miniatura_firma import generar_miniatura, referencia_firma
+
+
+class TestFirmas(unittest.TestCase):
+    def test_decodificar_data_url(self):
+        datos = b'\x89PNG\r\n\x1a\nfirma'
+        valor = 'data:image/png;base64,' + base64.b64encode(datos).decode('ascii')
+
+        self.assertEqual(decodificar_firma(valor), (datos, 'image/png'))
+        self.assertEqual(decodificar_firma(base64.b64encode(datos).decode('ascii'))[0], datos)
+
+    def test_decodificar_firma_invalida(self):
+        with self.assertRaises(ValueError):
+            decodificar_firma('%%%abc')
+        # Con validate=True los caracteres fuera del alfabeto base64 no se descartan
+        with self.assertRaises(ValueError):
+            decodificar_firma('iVBORw0K$$GgoA')
+
+    def test_decodificar_firma_solo_png_o_jpeg(self):
+        jpeg = b'\xff\xd8\xff\xe0firma'
+        html = base64.b64encode(b'<script>alert(1)</script>').decode('ascii')
+        png = base64.b64encode(b'\x89PNG\r\n\x1a\nfirma').decode('ascii')
+
+        # El tipo sale de los bytes, no del prefijo enviado por el cliente
+        self.assertEqual(decodificar_firma('data:image/png;base64,' + base64.b64encode(jpeg).decode('ascii')),
+                         (jpeg, 'image/jpeg'))
+        for valor in ('data:text/html;base64,' + png, 'data:image/svg+xml;base64,' + png,
+                      'data:image/png;base64,' + html, html):
+            with self.assertRaises(ValueError):
+                decodificar_firma(valor)
+
+    def test_hash_desde_url(self):
+        hash_firma = hashlib.sha256(b'firma').hexdigest()
+
+        self.assertEqual(hash_desde_url(f'https://api.ejemplo.co/firmas/{hash_firma}'), hash_firma)
+        self.assertEqual(hash_desde_url(f'/firmas/{hash_firma}?v=1'), hash_firma)
+        self.assertIsNone(hash_desde_url('data:image/png;base64,AAAA'))
+        self.assertIsNone(hash_desde_url(None))
+        # Solo la ruta completa: sin texto antes del servidor ni después del hash
+        self.assertIsNone(hash_desde_url(f'javascript:alert(1)//firmas/{hash_firma}'))
+        self.assertIsNone(hash_desde_url(f'https://api.ejemplo.co/firmas/{hash_firma}/otra'))
+        self.assertEqual(hash_desde_url(f'https://api.ejemplo.co/api/firmas/{hash_firma}/'), hash_firma)
+
+    def test_referencia_firma_por_contenido(self):
+        datos = b'\x89PNG\r\n\x1a\nfirma'
+        hash_firma = hashlib.sha256(datos).hexdigest()
+        en_linea = 'data:image/png;base64,' + base64.b64encode(datos).decode('ascii')
+
+        # La misma firma en línea y en el almacén comparte la clave
+        self.assertEqual(referencia_firma({'firma': en_linea}), (hash_firma, datos))
+        self.assertEqual(referencia_firma({'firma_hash': hash_firma, 'firma': None}), (hash_firma, None))
+        self.assertEqual(referencia_firma({'firma': ''}), (None, None))
+
+    def test_generar_miniatura(self):
+        original = BytesIO()
+        Image.new('RGB', (600, 100), 'white').save(original, format='PNG')
+
+        miniatura = Image.open(BytesIO(generar_miniatura(original.getvalue())))
+        self.assertEqual((miniatura.format, miniatura.size), ('PNG', (150, 25)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,16 @@
+import unittest
+
+from bson import ObjectId
+
+from app.utils.hidratacion import ids_validos
+
+
+class TestHidratacion(unittest.TestCase):
+    def test_ids_validos_sin_repetidos_ni_invalidos(self):
+        primero, segundo = ObjectId(), ObjectId()
+        ids = ids_validos([str(primero), None, '', 'no-es-un-id', primero, segundo, str(segundo)])
+        self.assertEqual(ids, [primero, segundo])
+
+
+if __name__ == '__main__':
+    unittest.main()
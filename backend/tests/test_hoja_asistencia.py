@@ -0,0 +1,78 @@
+import io
+import os
+import unittest
+from datetime import datetime
+
+from openpyxl import load_workbook
+
+from app.utils.hoja_asistencia import (
+    PLANTILLA_ACTIVIDAD, PLANTILLA_REUNION, AnchoColumnas, HojaAsistencia, formatear_fecha_encabezado
+)
+
+
+class TestHojaAsistencia(unittest.TestCase):
+    def test_formatear_fecha_encabezado(self):
+        self.assertEqual(formatear_fecha_encabezado(datetime(2024, 3, 5, 10)), '05/03/2024')
+        self.assertEqual(formatear_fecha_encabezado('2024-03-05T10:00:00'), '05/03/2024')
+        self.assertEqual(formatear_fecha_encabezado('2024-03-05T10:00:00Z'), '05/03/2024')
+        self.assertEqual(formatear_fecha_encabezado('pendiente'), 'pendiente')
+        self.assertEqual(formatear_fecha_encabezado(None), '')
+
+    def test_hoja_en_flujo_con_plantilla(self):
+        actividad = {'tema': 'taller', 'fecha': datetime(2024, 3, 5), 'objetivo': 'formar'}
+        for plantilla, celda_objetivo, ultima in ((PLANTILLA_ACTIVIDAD, 'I5', 'K'), (PLANTILLA_REUNION, 'H5', 'I')):
+            # Dos libros seguidos: los estilos con nombre no se comparten entre libros
+            for _ in range(2):
+                hoja = HojaAsistencia('Asistencia', plantilla)
+                hoja.anchos['B'] = 40
+                fila = hoja.encabezado(actividad)
+                hoja.encabezados_tabla(['NOMBRE', 'CÉDULA'], alto=60)
+                for numero in range(3):
+                    fila_dato = hoja.agregar_fila([f'Asistente {numero}', None, '123'], alto=32)
+                    hoja.combinar(fila_dato, 1, fila_dato, 2)
+                archivo = hoja.guardar()
+                datos = archivo.read()
+                archivo.close()
+
+                ws = load_workbook(io.BytesIO(datos)).active
+                self.assertEqual(fila, 8)
+                self.assertEqual(ws['C5'].value, 'TALLER')
+                self.assertEqual(ws['C6'].value, 'FECHA: 05/03/2024')
+                self.assertEqual(ws[celda_objetivo].value, 'FORMAR')
+                self.assertIsNone(ws['F3'].value)
+                self.assertEqual(ws[f'{ultima}1'].border.right.style, 'thin')
+                self.assertEqual(ws['A8'].fill.fgColor.rgb, '004F81BD')
+                self.assertEqual(ws['A9'].value, 'Asistente 0')
+                self.assertEqual(ws['A11'].border.left.style, 'thin')
+                self.assertEqual(ws.row_dimensions[8].height, 60)
+                self.assertEqual(ws.row_dimensions[10].height, 32)
+                self.assertEqual(ws.column_dimensions['B'].width, 40)
+                combinadas = {str(rango) for rango in ws.merged_cells.ranges}
+                self.assertTrue({'A1:C4', 'A9:B9', 'A11:B11'} <= combinadas)
+
+    def test_descartar_borra_el_temporal_de_la_hoja(self):
+        hoja = HojaAsistencia('Asistencia', PLANTILLA_REUNION)
+        hoja.agregar_fila(['Fila sin guardar'])
+        temporal = hoja.ws._writer.out
+        self.assertTrue(os.path.exists(temporal))
+        hoja.descartar()
+        self.assertFalse(os.path.exists(temporal))
+
+    def test_ancho_columnas(self):
+        ancho = AnchoColumnas(fijas={'D'})
+        ancho.registrar(1, 1, 'Encabezado combinado muy largo')
+        ancho.registrar(1, 3, 'Cédula')
+        for fila in (2, 3):
+            ancho.combinar(fila, 1, fila, 2)
+            ancho.registrar(fila, 1, 'Nombre de un asistente bastante largo')
+            ancho.registrar(fila, 3, '1234567890' * fila)
+            ancho.registrar(fila, 4, 'Valor largo en columna fija')
+
+        self.assertIn((3, 2), ancho.combinadas)
+        self.assertEqual(ancho.anchos(), {'A': 30, 'C': 30})
+        ancho.longitudes['C'] = 10
+        self.assertAlmostEqual(ancho.anchos()['C'], 14.4)
+
+
+if __name__ == '__main__':
+    unittest.main()
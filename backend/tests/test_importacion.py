@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from marshmallow import fields
+from openpyxl import Workbook
+
+from app.models.beneficiario import beneficiario_schema
+from app.utils.importacion import (
+    ArchivoImportacion, clave_columna, mapear_columnas, convertir_valor, validar_bloque
+)
+
+POR_DEFECTO = {'funcionario_id': 'f1', 'funcionario_nombre': 'Funcionaria', 'fecha_registro': '2024-06-01T00:00:00'}
+
+FILA_VALIDA = {
+    'Nombre Completo': 'Ana Peña', 'Tipo Documento': 'Cédula de ciudadanía', 'Número Documento': 1234567.0,
+    'Género': 'Femenino', 'Rango Edad': '18-28', 'Número Celular': 3001234567, 'Comuna': 'Comuna 1',
+    'Barrio': 'Centro', 'Línea Trabajo': 'Mujer y Género', 'sabe_leer': 'Sí', 'sabe_escribir': 'no',
+}
+
+
+class TestImportacion(unittest.TestCase):
+    def test_mapear_columnas(self):
+        self.assertEqual(clave_columna('Número Documento'), clave_columna('numero_documento'))
+        columnas = mapear_columnas(['Nombre Completo', 'numero_documento', 'Columna libre', ''], beneficiario_schema)
+        self.assertEqual(columnas, {'Nombre Completo': 'nombre_completo', 'numero_documento': 'numero_documento'})
+
+    def test_convertir_valor(self):
+        self.assertIs(convertir_valor('Sí', fields.Bool()), True)
+        self.assertIs(convertir_valor(' NO ', fields.Bool()), False)
+        self.assertEqual(convertir_valor(1234567.0, fields.Str()), '1234567')
+        self.assertEqual(convertir_valor(datetime(2024, 5, 2), fields.Str()), '2024-05-02T00:00:00')
+        self.assertEqual(convertir_valor('3,0', fields.Int()), 3)
+        self.assertIsNone(convertir_valor('  ', fields.Str()))
+
+    def test_validar_bloque(self):
+        columnas = mapear_columnas(list(FILA_VALIDA), beneficiario_schema)
+        invalida = dict(FILA_VALIDA, **{'Número Documento': None, 'sabe_leer': 'quizá'})
+        validos, rechazados = validar_bloque(
+            'beneficiarios', columnas, [(2, FILA_VALIDA), (3, invalida)], POR_DEFECTO, {'mujer y genero': 'l1'}
+        )
+
+        self.assertEqual(len(validos), 1)
+        fila, documento, por_defecto = validos[0]
+        self.assertEqual(fila, 2)
+        self.assertEqual(documento['numero_documento'], '1234567')
+        self.assertEqual(documento['numero_celular'], '3001234567')
+        self.assertEqual(documento['linea_trabajo'], 'l1')
+        self.assertEqual((documento['sabe_leer'], documento['sabe_escribir']), (True, False))
+        self.assertIn('1234567', documento['busqueda'])
+        self.assertEqual(sorted(por_defecto), sorted(POR_DEFECTO))
+
+        self.assertEqual(len(rechazados), 1)
+        fila, errores, valores = rechazados[0]
+        self.assertEqual(fila, 3)
+        self.assertEqual(sorted(errores), ['numero_documento', 'sabe_leer'])
+        self.assertEqual(valores['sabe_leer'], 'quizá')
+
+    def test_archivo_importacion(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta_csv = os.path.join(directorio, 'datos.csv')
+            with open(ruta_csv, 'w', encoding='utf-8-sig', newline='') as archivo:
+                archivo.write('Nombre Completo,Número Documento\nAna,1\n,\nLuis,2\n')
+
+            libro = Workbook()
+            hoja = libro.active
+            for fila in (['Nombre Completo', 'Número Documento'], ['Ana', 1], [None, None], ['Luis', 2]):
+                hoja.append(fila)
+            ruta_xlsx = os.path.join(directorio, 'datos.xlsx')
+            libro.save(ruta_xlsx)
+
+            for ruta, formato, documento in ((ruta_csv, 'csv', '2'), (ruta_xlsx, 'xlsx', 2)):
+                with ArchivoImportacion(ruta, formato) as archivo:
+                    self.assertEqual(archivo.encabezados, ['Nombre Completo', 'Número Documento'])
+                    filas = list(archivo.filas())
+                # Las filas vacías se omiten pero se conserva la numeración de la hoja
+                self.assertEqual([numero for numero, _ in filas], [2, 4])
+                self.assertEqual(filas[1][1], {'Nombre Completo': 'Luis', 'Número Documento': documento})
+
+
+if __name__ == '__main__':
+    unittest.main()
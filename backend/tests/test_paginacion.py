@@ -0,0 +1,58 @@
+import unittest
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.utils.paginacion import (
+    codificar_cursor, decodificar_cursor, filtro_despues_de_cursor, leer_modo_conteo, combinar_filtros
+)
+
+
+class TestPaginacionCursor(unittest.TestCase):
+    def test_cursor_conserva_fecha_e_id(self):
+        documento = {'_id': ObjectId(), 'fecha_registro': datetime(2025, 3, 14, 9, 30, 0, 123000)}
+        tipo, valor, ultimo_id = decodificar_cursor(codificar_cursor(documento))
+
+        self.assertEqual(tipo, 'd')
+        self.assertEqual(valor, documento['fecha_registro'])
+        self.assertEqual(ultimo_id, documento['_id'])
+
+    def test_cursor_con_fecha_en_texto(self):
+        documento = {'_id': ObjectId(), 'fecha_registro': '2025-03-14'}
+        filtro = filtro_despues_de_cursor(codificar_cursor(documento))
+
+        self.assertIn({'fecha_registro': {'$lt': '2025-03-14'}}, filtro['$or'])
+        self.assertIn({'fecha_registro': None}, filtro['$or'])
+        # Las fechas van antes que las cadenas en orden descendente
+        self.assertNotIn({'fecha_registro': {'$type': 'string'}}, filtro['$or'])
+
+    def test_cursor_sin_fecha(self):
+        documento = {'_id': ObjectId()}
+        filtro = filtro_despues_de_cursor(codificar_cursor(documento))
+
+        self.assertEqual(filtro, {'fecha_registro': None, '_id': {'$lt': documento['_id']}})
+
+    def test_cursor_invalido(self):
+        with self.assertRaises(ValueError):
+            decodificar_cursor('no-es-un-cursor')
+
+
+class TestConteo(unittest.TestCase):
+    def test_leer_modo_conteo(self):
+        self.assertEqual(leer_modo_conteo(None), 'exact')
+        self.assertEqual(leer_modo_conteo('Estimated'), 'estimated')
+        self.assertEqual(leer_modo_conteo('none'), 'none')
+        with self.assertRaises(ValueError):
+            leer_modo_conteo('aprox')
+
+    def test_combinar_filtros(self):
+        self.assertEqual(combinar_filtros(None, {}), {})
+        self.assertEqual(combinar_filtros(None, {'estado': 'Activo'}), {'estado': 'Activo'})
+        self.assertEqual(
+            combinar_filtros({'busqueda': 'ana'}, None, {'estado': 'Activo'}),
+            {'$and': [{'busqueda': 'ana'}, {'estado': 'Activo'}]}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,33 @@
+import unittest
+
+from app.models.beneficiario import proyeccion_beneficiario
+from app.utils.proyeccion import leer_campos
+
+
+class TestProyeccion(unittest.TestCase):
+    def test_leer_campos(self):
+        self.assertIsNone(leer_campos(None))
+        self.assertIsNone(leer_campos(' , '))
+        self.assertEqual(leer_campos('nombre_completo, numero_documento'), ['nombre_completo', 'numero_documento'])
+        self.assertEqual(leer_campos('datos_biometricos.codigo_verificacion'), ['datos_biometricos.codigo_verificacion'])
+
+    def test_leer_campos_rechaza_operadores(self):
+        with self.assertRaises(ValueError):
+            leer_campos('nombre_completo,$where')
+
+    def test_proyeccion_por_defecto_omite_campos_pesados(self):
+        proyeccion = proyeccion_beneficiario()
+        self.assertEqual(proyeccion['firma'], 0)
+        self.assertEqual(proyeccion['verificacion_biometrica'], 0)
+        self.assertEqual(proyeccion['huella_dactilar'], 0)
+
+        self.assertNotIn('firma', proyeccion_beneficiario(incluir=('firma',)))
+
+    def test_fieldset_parcial(self):
+        proyeccion = proyeccion_beneficiario(['nombre_completo', 'firma'], obligatorios=['fecha_registro'])
+        # La firma se sirve desde el almacén, por lo que también se pide su referencia
+        self.assertEqual(proyeccion, {'nombre_completo': 1, 'firma': 1, 'fecha_registro': 1, 'firma_hash': 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
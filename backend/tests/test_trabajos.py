@@ -0,0 +1,51 @@
+import unittest
+
+from flask import Flask
+
+from app.utils.trabajos import clave_cache, resolver_exportacion
+
+
+def _app_de_prueba():
+    """Aplicación mínima con una ruta de exportación admitida y otra que no lo es"""
+    app = Flask('prueba')
+    app.add_url_rule('/beneficiarios/exportar-beneficiarios-excel',
+                     endpoint='beneficiarios.exportar_beneficiarios_excel', view_func=lambda: '')
+    app.add_url_rule('/actividades/<actividad_id>/exportar-excel',
+                     endpoint='actividad.exportar_actividad_route', view_func=lambda actividad_id: '')
+    app.add_url_rule('/beneficiarios/listar', endpoint='beneficiarios.listar_beneficiarios', view_func=lambda: '')
+    return app
+
+
+class TestTrabajos(unittest.TestCase):
+    def test_resolver_exportacion(self):
+        app = _app_de_prueba()
+
+        endpoint, argumentos, ruta, parametros = resolver_exportacion(
+            app, '/beneficiarios/exportar-beneficiarios-excel?filtro=ana&tipo_exportacion=todos')
+        self.assertEqual(endpoint, 'beneficiarios.exportar_beneficiarios_excel')
+        self.assertEqual(argumentos, {})
+        self.assertEqual(ruta, '/beneficiarios/exportar-beneficiarios-excel')
+        self.assertEqual(parametros, [('filtro', 'ana'), ('tipo_exportacion', 'todos')])
+
+        _, argumentos, _, _ = resolver_exportacion(app, '/actividades/abc/exportar-excel')
+        self.assertEqual(argumentos, {'actividad_id': 'abc'})
+
+    def test_resolver_exportacion_rechaza_rutas(self):
+        app = _app_de_prueba()
+        for url in (None, '/no-existe', '/beneficiarios/listar'):
+            with self.assertRaises(ValueError):
+                resolver_exportacion(app, url)
+
+    def test_clave_cache(self):
+        endpoint = 'beneficiarios.exportar_beneficiarios_excel'
+        clave = clave_cache(endpoint, {}, [('filtro', 'ana'), ('format', 'csv')], {'beneficiarios': 3})
+
+        # El orden de los parámetros no cambia la clave
+        self.assertEqual(clave, clave_cache(endpoint, {}, [('format', 'csv'), ('filtro', 'ana')], {'beneficiarios': 3}))
+        # Otros filtros o una nueva versión de los datos sí
+        self.assertNotEqual(clave, clave_cache(endpoint, {}, [('filtro', 'luis'), ('format', 'csv')], {'beneficiarios': 3}))
+        self.assertNotEqual(clave, clave_cache(endpoint, {}, [('filtro', 'ana'), ('format', 'csv')], {'beneficiarios': 4}))
+
+
+if __name__ == '__main__':
+    unittest.main()
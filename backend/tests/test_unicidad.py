@@ -0,0 +1,66 @@
+import unittest
+
+from pymongo.errors import DuplicateKeyError
+
+try:
+    import mongomock
+except ImportError:  # Las comprobaciones contra la colección necesitan mongomock
+    mongomock = None
+
+from app.utils.unicidad import campo_duplicado, crear_indice_unico, valor_repetido, valores_registrados
+
+CAMPOS = ['numero_documento', 'correo_electronico']
+
+
+class TestUnicidad(unittest.TestCase):
+    def test_campo_por_patron_de_clave(self):
+        error = DuplicateKeyError('E11000 duplicate key error', 11000, {
+            'keyPattern': {'correo_electronico': 1}, 'keyValue': {'correo_electronico': 'a@x.co'}
+        })
+        self.assertEqual(campo_duplicado(error, CAMPOS), 'correo_electronico')
+
+    def test_campo_por_nombre_de_indice(self):
+        # Entrada de 'writeErrors' de un servidor que no envía keyPattern
+        error = {
+            'index': 0, 'code': 11000,
+            'errmsg': 'E11000 duplicate key error collection: sics.beneficiarios '
+                      'index: correo_electronico_unico dup key: { correo_electronico: "a@x.co" }'
+        }
+        self.assertEqual(campo_duplicado(error, CAMPOS), 'correo_electronico')
+
+    def test_campo_por_datos_escritos(self):
+        error = DuplicateKeyError('E11000 duplicate key error', 11000)
+        self.assertEqual(campo_duplicado(error, CAMPOS, {'correo_electronico': 'a@x.co'}), 'correo_electronico')
+        self.assertEqual(campo_duplicado(error, CAMPOS, {'nombre_completo': 'Ana'}), 'numero_documento')
+
+
+@unittest.skipIf(mongomock is None, "mongomock no está instalado")
+class TestComprobacionPrevia(unittest.TestCase):
+    def setUp(self):
+        self.coleccion = mongomock.MongoClient().db['beneficiarios']
+        # Datos antiguos con un documento repetido: el índice de documento no se puede crear
+        self.coleccion.insert_many([
+            {'numero_documento': '1', 'correo_electronico': 'a@x.co'},
+            {'numero_documento': '1'},
+        ])
+        self.assertFalse(crear_indice_unico(self.coleccion, 'numero_documento'))
+        self.assertTrue(crear_indice_unico(self.coleccion, 'correo_electronico'))
+
+    def test_valor_repetido_sin_indice(self):
+        existente = self.coleccion.find_one({'correo_electronico': 'a@x.co'})
+
+        self.assertEqual(valor_repetido(self.coleccion, {'numero_documento': '1'}, CAMPOS), 'numero_documento')
+        self.assertIsNone(valor_repetido(self.coleccion, {'numero_documento': '2'}, CAMPOS))
+        # El correo tiene índice único: lo comprueba la base de datos al escribir
+        self.assertIsNone(valor_repetido(self.coleccion, {'correo_electronico': 'a@x.co'}, CAMPOS))
+        # Al actualizar no cuenta el propio documento
+        self.assertEqual(valor_repetido(self.coleccion, {'numero_documento': '1'}, CAMPOS,
+                                        excluir_id=existente['_id']), 'numero_documento')
+
+    def test_valores_registrados_del_lote(self):
+        lote = [{'numero_documento': '1'}, {'numero_documento': '3', 'correo_electronico': 'a@x.co'}]
+        self.assertEqual(valores_registrados(self.coleccion, lote, CAMPOS), {'numero_documento': {'1'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -43,12 +43,16 @@ def exportar_reunion(reunion_id, columnas=None):
         
         # Obtener los datos completos de los asistentes
         if 'asistentes' in reunion and reunion['asistentes']:
-            beneficiario_model = BeneficiarioModel()
+            # Todos los beneficiarios referenciados en una sola consulta
+            beneficiarios = BeneficiarioModel().obtener_beneficiarios_por_ids(
+                [asistente.get('beneficiario_id') for asistente in reunion['asistentes']],
+                campos=['nombre_completo', 'numero_documento', 'numero_celular', 'correo_electronico',
+                        'genero', 'barrio', 'comuna']
+            )
             for asistente in reunion['asistentes']:
                 if 'beneficiario_id' in asistente and asistente['beneficiario_id']:
                     try:
-                        logger.info(f"Buscando asistente con ID: {asistente['beneficiario_id']}")
-                        beneficiario = beneficiario_model.obtener_beneficiario_por_id(asistente['beneficiario_id'])
+                        beneficiario = beneficiarios.get(str(asistente['beneficiario_id']))
                         if beneficiario:
                             # Actualizar los datos del asistente con la información del beneficiario
                             asistente.update({